@@ -0,0 +1,230 @@
+/**
+ * Bulk import engine, hosted in the service worker.
+ *
+ * The popup starts, pauses, resumes and retries jobs by message and follows
+ * progress through the stored job (bulk_import_journal), so closing it no
+ * longer stops an import. Items are fetched through the portal tab and
+ * saved here directly, without a round trip through the popup.
+ *
+ * Every item step is journaled, which doubles as the checkpoint. While a
+ * job runs, an alarm wakes the worker every BULK_IMPORT_KEEPALIVE_PERIOD_MINUTES;
+ * if Chrome stopped the worker mid-job, the wake finds the stored job still
+ * running and continues it, with the items that were in flight queued again.
+ */
+
+import {
+  completeBulkImportJob,
+  createBulkImportJob,
+  failBulkImportItem,
+  getNextBulkImportItem,
+  pauseBulkImportJob,
+  recordBulkImportThroughput,
+  resetFailedBulkImportItems,
+  startBulkImportJob,
+  updateBulkImportItem,
+  type BulkImportItem,
+  type BulkImportJob,
+} from "../shared/bulk_import";
+import {
+  journalBulkImportItems,
+  loadStoredBulkImportJob,
+  saveStoredBulkImportJob,
+} from "../shared/bulk_import_journal";
+import { runAdaptivePool, type PoolTaskOutcome } from "../shared/bulk_import_pool";
+import { clearBulkImportedSessions } from "../shared/bulk_import_store";
+import { GRAPHQL_BATCH_SIZE, createNodeBatcher } from "../shared/graphql_batch";
+import type { ActivitySummary } from "../shared/import_types";
+import {
+  describeQueryRoundTrips,
+  fetchPortalActivityCandidates,
+  fetchPortalGraphQL,
+  isPortalAuthMessage,
+  isPortalBridgeUnavailableMessage,
+} from "../shared/portal_import";
+import { saveBulkImportedSession, type ImportedSessionGraphQLData } from "./imported_session";
+import { describePortalRequestWaits } from "./portal_request_queue";
+
+export const BULK_IMPORT_KEEPALIVE_ALARM = "trackpull-bulk-import-keepalive";
+/** The shortest period Chrome allows for an alarm. */
+export const BULK_IMPORT_KEEPALIVE_PERIOD_MINUTES = 0.5;
+
+let running = false;
+let pauseRequested = false;
+
+/** Auth and missing-tab errors fail every later item too, so they stop the job. */
+function isFatalImportError(message: string): boolean {
+  return isPortalAuthMessage(message) || isPortalBridgeUnavailableMessage(message);
+}
+
+function describeRequests(): string {
+  return [describeQueryRoundTrips(), describePortalRequestWaits()].filter(Boolean).join("\n");
+}
+
+async function runBulkImportJob(startingJob: BulkImportJob): Promise<void> {
+  const tabId = startingJob.tabId;
+  if (running || tabId === undefined) return;
+
+  running = true;
+  pauseRequested = false;
+  let job = startBulkImportJob(startingJob);
+  let stopError: string | undefined;
+
+  try {
+    await saveStoredBulkImportJob(job);
+    await chrome.alarms.create(BULK_IMPORT_KEEPALIVE_ALARM, {
+      periodInMinutes: BULK_IMPORT_KEEPALIVE_PERIOD_MINUTES,
+    });
+
+    // Concurrent items asking for the same candidate share one request
+    const batcher = createNodeBatcher({
+      send: (query, variables) => fetchPortalGraphQL(tabId, { label: "batch", query }, variables, "bulk"),
+      maxBatchSize: GRAPHQL_BATCH_SIZE,
+      isFatalError: isFatalImportError,
+    });
+
+    const saveStep = (activityId: string) => {
+      job = { ...job, diagnostics: describeRequests() };
+      return journalBulkImportItems(job, [activityId]);
+    };
+
+    const finishItem = async (activityId: string, patch: Parameters<typeof updateBulkImportItem>[2]) => {
+      job = recordBulkImportThroughput(updateBulkImportItem(job, activityId, patch));
+      await saveStep(activityId);
+    };
+
+    const failItem = async (activityId: string, message: string): Promise<PoolTaskOutcome | null> => {
+      job = recordBulkImportThroughput(failBulkImportItem(job, activityId, message));
+      await saveStep(activityId);
+      if (!isFatalImportError(message)) return null;
+      stopError = stopError ?? message;
+      return "stop";
+    };
+
+    const importItem = async ({ activityId, type }: BulkImportItem): Promise<PoolTaskOutcome> => {
+      // Checkpoint the claim made by next()
+      await saveStep(activityId);
+
+      let graphqlPayloads: Awaited<ReturnType<typeof fetchPortalActivityCandidates>>;
+      try {
+        graphqlPayloads = await fetchPortalActivityCandidates(tabId, activityId, type, batcher, "bulk");
+      } catch (err) {
+        const message = err instanceof Error && err.message
+          ? err.message
+          : "Unable to fetch activity";
+        // GraphQL errors and timeouts mean the portal wants fewer requests
+        return await failItem(activityId, message) ?? "backoff";
+      }
+
+      const result = await saveBulkImportedSession(job.id, activityId, graphqlPayloads as ImportedSessionGraphQLData[]);
+      if (result.success && result.reportId) {
+        await finishItem(activityId, {
+          status: "imported",
+          reportId: result.reportId,
+          shotCount: result.shotCount,
+          error: undefined,
+        });
+        return "success";
+      }
+      return await failItem(activityId, result.error ?? "Import failed") ?? "neutral";
+    };
+
+    await runAdaptivePool({
+      next: () => {
+        const nextItem = getNextBulkImportItem(job);
+        if (!nextItem) return null;
+        // Claim synchronously so the next dispatch picks a different item
+        job = updateBulkImportItem(job, nextItem.activityId, {
+          status: "importing",
+          error: undefined,
+        });
+        return nextItem;
+      },
+      run: importItem,
+      shouldStop: () => pauseRequested,
+    });
+
+    if (stopError) {
+      job = { ...pauseBulkImportJob(job), lastError: stopError };
+    } else if (pauseRequested) {
+      job = pauseBulkImportJob(job);
+    } else {
+      job = completeBulkImportJob(job);
+    }
+  } catch (err) {
+    console.error("TrackPull: Bulk import stopped:", err);
+    job = { ...pauseBulkImportJob(job), lastError: "Bulk import stopped — resume to continue" };
+  } finally {
+    running = false;
+    await chrome.alarms.clear(BULK_IMPORT_KEEPALIVE_ALARM);
+  }
+
+  await saveStoredBulkImportJob({ ...job, diagnostics: describeRequests() })
+    .catch((err) => console.error("TrackPull: Could not save bulk import job:", err));
+}
+
+export async function startBulkImport(tabId: number, activities: ActivitySummary[]): Promise<void> {
+  if (running) throw new Error("A bulk import is already running");
+  if (activities.length === 0) throw new Error("Select at least one session");
+
+  const previousJob = await loadStoredBulkImportJob();
+  const job: BulkImportJob = { ...createBulkImportJob(activities), tabId };
+  if (previousJob) {
+    await clearBulkImportedSessions(previousJob.id).catch((err) => {
+      console.warn("TrackPull: Could not clear previous bulk import archive:", err);
+    });
+  }
+  await clearBulkImportedSessions(job.id).catch(() => undefined);
+  void runBulkImportJob(job);
+}
+
+export async function resumeBulkImport(tabId: number): Promise<void> {
+  if (running) return;
+  const job = await loadStoredBulkImportJob();
+  if (!job) throw new Error("No bulk import to resume");
+  void runBulkImportJob({ ...pauseBulkImportJob(job), tabId });
+}
+
+export async function retryFailedBulkImport(tabId: number): Promise<void> {
+  if (running) return;
+  const job = await loadStoredBulkImportJob();
+  if (!job) throw new Error("No bulk import to retry");
+  void runBulkImportJob({ ...resetFailedBulkImportItems(job), tabId });
+}
+
+export async function pauseBulkImport(): Promise<void> {
+  if (running) {
+    pauseRequested = true;
+    return;
+  }
+
+  // A job left running by a stopped worker that has not been resumed yet
+  const job = await loadStoredBulkImportJob();
+  if (job?.state === "running") {
+    await saveStoredBulkImportJob(pauseBulkImportJob(job));
+    await chrome.alarms.clear(BULK_IMPORT_KEEPALIVE_ALARM);
+  }
+}
+
+/** Continue a job the stored state says is running but no worker is running. */
+export async function resumeInterruptedBulkImport(): Promise<void> {
+  if (running) return;
+  const job = await loadStoredBulkImportJob();
+  if (!job || job.state !== "running") {
+    await chrome.alarms.clear(BULK_IMPORT_KEEPALIVE_ALARM);
+    return;
+  }
+
+  // Items that were in flight when the worker stopped go back in the queue
+  const interrupted = pauseBulkImportJob(job);
+  if (interrupted.tabId === undefined) {
+    // Started by a popup before the engine moved here; the user resumes it
+    await saveStoredBulkImportJob(interrupted);
+    await chrome.alarms.clear(BULK_IMPORT_KEEPALIVE_ALARM);
+    return;
+  }
+  void runBulkImportJob(interrupted);
+}
+
+export function isBulkImportRunning(): boolean {
+  return running;
+}
@@ -0,0 +1,72 @@
+/**
+ * Turning fetched portal GraphQL payloads into saved sessions.
+ */
+
+import { STORAGE_KEYS } from "../shared/constants";
+import type { SessionData } from "../models/types";
+import { saveSessionToHistory } from "../shared/history";
+import { parsePortalActivity } from "../shared/portal_parser";
+import type { GraphQLActivity } from "../shared/portal_parser";
+import { putBulkImportedSession } from "../shared/bulk_import_store";
+
+export interface ImportedSessionGraphQLData {
+  data?: { node?: GraphQLActivity };
+  errors?: Array<{ message: string; extensions?: { code?: string } }>;
+}
+
+export interface BulkImportedSessionResult {
+  success: boolean;
+  reportId?: string;
+  shotCount?: number;
+  error?: string;
+}
+
+export function parseImportedSession(
+  payloads: ImportedSessionGraphQLData[]
+): SessionData | null {
+  for (const payload of payloads) {
+    if (payload.errors && payload.errors.length > 0) continue;
+    const activity = payload.data?.node;
+    const session = activity ? parsePortalActivity(activity) : null;
+    if (session) return session;
+  }
+  return null;
+}
+
+/** Parse one bulk import item and store it as the current session, in history and in the job's archive. */
+export async function saveBulkImportedSession(
+  jobId: string,
+  activityId: string,
+  graphqlPayloads: ImportedSessionGraphQLData[]
+): Promise<BulkImportedSessionResult> {
+  try {
+    const firstError = graphqlPayloads.find((payload) => payload.errors && payload.errors.length > 0)?.errors?.[0];
+    const hasPayloadWithoutErrors = graphqlPayloads.some((payload) => !payload.errors || payload.errors.length === 0);
+
+    if (firstError && !hasPayloadWithoutErrors) {
+      return { success: false, error: firstError.message };
+    }
+
+    const session = parseImportedSession(graphqlPayloads);
+    if (!session) {
+      return { success: false, error: "No shot data found for this activity" };
+    }
+
+    await chrome.storage.local.set({ [STORAGE_KEYS.TRACKMAN_DATA]: session });
+    await saveSessionToHistory(session);
+    await putBulkImportedSession(jobId, activityId, session);
+
+    const shotCount = session.club_groups.reduce(
+      (total, club) => total + club.shots.length,
+      0
+    );
+    return {
+      success: true,
+      reportId: session.report_id,
+      shotCount,
+    };
+  } catch (err) {
+    console.error("TrackPull: Bulk import item failed:", err);
+    return { success: false, error: "Import failed — try again" };
+  }
+}
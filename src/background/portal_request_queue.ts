@@ -0,0 +1,45 @@
+/**
+ * The one queue every portal GraphQL request goes through.
+ *
+ * The popup (activity list, single imports, prefetch) and the bulk import
+ * engine both fetch through the portal tab. Their requests all run here,
+ * in the service worker, so the request_scheduler limit and class quotas
+ * hold across both and the wait statistics cover all traffic. The popup
+ * reaches the queue with a PORTAL_GRAPHQL_REQUEST message; the worker's
+ * own callers are routed to it by setPortalGraphQLTransport.
+ */
+
+import type { PortalGraphQLFetchResponse } from "../shared/portal_import";
+import {
+  REQUEST_PRIORITIES,
+  createRequestScheduler,
+  getAverageWaitMs,
+  type RequestPriority,
+} from "../shared/request_scheduler";
+
+const portalRequestScheduler = createRequestScheduler();
+
+export function schedulePortalGraphQL(
+  tabId: number,
+  query: string,
+  variables?: Record<string, unknown>,
+  priority: RequestPriority = "interactive"
+): Promise<PortalGraphQLFetchResponse> {
+  return portalRequestScheduler.schedule(priority, () => chrome.tabs.sendMessage(tabId, {
+    type: "PORTAL_GRAPHQL_FETCH",
+    query,
+    variables,
+  }) as Promise<PortalGraphQLFetchResponse>);
+}
+
+/** Queue wait per request class, for diagnostics. */
+export function describePortalRequestWaits(): string {
+  const stats = portalRequestScheduler.getStats();
+  return REQUEST_PRIORITIES
+    .filter((priority) => stats[priority].completed + stats[priority].inFlight > 0)
+    .map((priority) => {
+      const classStats = stats[priority];
+      return `${priority}: ${Math.round(getAverageWaitMs(classStats))} ms avg wait, ${classStats.queued} queued`;
+    })
+    .join("\n");
+}
@@ -6,19 +6,40 @@ import { STORAGE_KEYS } from "../shared/constants";
 import { writeCsv } from "../shared/csv_writer";
 import type { SessionData } from "../models/types";
 import { migrateLegacyPref, type UnitChoice, type SpeedUnit, type DistanceUnit } from "../shared/unit_normalization";
-import { saveSessionToHistory, getHistoryErrorMessage } from "../shared/history";
-import { parsePortalActivity } from "../shared/portal_parser";
-import type { GraphQLActivity } from "../shared/portal_parser";
-import type { ImportStatus } from "../shared/import_types";
-import { putBulkImportedSession } from "../shared/bulk_import_store";
-
-interface ImportedSessionGraphQLData {
-  data?: { node?: GraphQLActivity };
-  errors?: Array<{ message: string; extensions?: { code?: string } }>;
-}
+import {
+  saveSessionToHistory,
+  getHistoryErrorMessage,
+  migrateStorageHistoryToIndexedDb,
+  migrateStoredSessionMetrics,
+} from "../shared/history";
+import type { ActivitySummary, ImportStatus } from "../shared/import_types";
+import { parseImportedSession, type ImportedSessionGraphQLData } from "./imported_session";
+import {
+  BULK_IMPORT_KEEPALIVE_ALARM,
+  pauseBulkImport,
+  resumeBulkImport,
+  resumeInterruptedBulkImport,
+  retryFailedBulkImport,
+  startBulkImport,
+} from "./bulk_import_engine";
+import { schedulePortalGraphQL } from "./portal_request_queue";
+import { setPortalGraphQLTransport, type PortalGraphQLRequestResult } from "../shared/portal_import";
+import type { RequestPriority } from "../shared/request_scheduler";
+
+// The bulk import engine's requests share the popup's queue
+setPortalGraphQLTransport(schedulePortalGraphQL);
 
-chrome.runtime.onInstalled.addListener(() => {
+chrome.runtime.onInstalled.addListener((details) => {
   console.log("TrackPull extension installed");
+  if (details?.reason === "update") {
+    // Older versions stored metric values as strings and kept history in
+    // chrome.storage.local
+    migrateStoredSessionMetrics()
+      .then(() => migrateStorageHistoryToIndexedDb())
+      .catch((err) => {
+        console.error("TrackPull: Storage migration failed:", err);
+      });
+  }
 });
 
 interface SaveDataRequest {
@@ -37,11 +58,12 @@ interface SaveImportedSessionRequest {
   activityId: string;
 }
 
-interface SaveBulkImportedSessionRequest {
-  type: "SAVE_BULK_IMPORTED_SESSION";
-  jobId: string;
-  graphqlPayloads: ImportedSessionGraphQLData[];
-  activityId: string;
+interface PortalGraphQLRequest {
+  type: "PORTAL_GRAPHQL_REQUEST";
+  tabId: number;
+  query: string;
+  variables?: Record<string, unknown>;
+  priority: RequestPriority;
 }
 
 function getDownloadErrorMessage(originalError: string): string {
@@ -57,23 +79,19 @@ function getDownloadErrorMessage(originalError: string): string {
   return originalError;
 }
 
+type BulkImportRequest =
+  | { type: "BULK_IMPORT_START"; tabId: number; activities: ActivitySummary[] }
+  | { type: "BULK_IMPORT_RESUME"; tabId: number }
+  | { type: "BULK_IMPORT_RETRY"; tabId: number }
+  | { type: "BULK_IMPORT_PAUSE" }
+  | { type: "BULK_IMPORT_ENSURE_RUNNING" };
+
 type RequestMessage =
   | SaveDataRequest
   | ExportCsvRequest
   | SaveImportedSessionRequest
-  | SaveBulkImportedSessionRequest;
-
-function parseImportedSession(
-  payloads: ImportedSessionGraphQLData[]
-): SessionData | null {
-  for (const payload of payloads) {
-    if (payload.errors && payload.errors.length > 0) continue;
-    const activity = payload.data?.node;
-    const session = activity ? parsePortalActivity(activity) : null;
-    if (session) return session;
-  }
-  return null;
-}
+  | PortalGraphQLRequest
+  | BulkImportRequest;
 
 chrome.runtime.onMessage.addListener((message: RequestMessage, sender, sendResponse) => {
   if (message.type === "SAVE_DATA") {
@@ -187,47 +205,54 @@ chrome.runtime.onMessage.addListener((message: RequestMessage, sender, sendRespo
     return false;
   }
 
-  if (message.type === "SAVE_BULK_IMPORTED_SESSION") {
-    const { jobId, activityId, graphqlPayloads } = message;
-
-    (async () => {
-      try {
-        const firstError = graphqlPayloads.find((payload) => payload.errors && payload.errors.length > 0)?.errors?.[0];
-        const hasPayloadWithoutErrors = graphqlPayloads.some((payload) => !payload.errors || payload.errors.length === 0);
-
-        if (firstError && !hasPayloadWithoutErrors) {
-          sendResponse({ success: false, error: firstError.message });
-          return;
-        }
-
-        const session = parseImportedSession(graphqlPayloads);
-        if (!session) {
-          sendResponse({ success: false, error: "No shot data found for this activity" });
-          return;
-        }
+  // Every portal request from the popup waits in the same queue as bulk imports
+  if (message.type === "PORTAL_GRAPHQL_REQUEST") {
+    const { tabId, query, variables, priority } = message;
+    const respond = (result: PortalGraphQLRequestResult) => sendResponse(result);
+    schedulePortalGraphQL(tabId, query, variables, priority)
+      .then((response) => respond({ response }))
+      .catch((err) => respond({ error: err instanceof Error ? err.message : String(err) }));
+    return true;
+  }
 
-        await chrome.storage.local.set({ [STORAGE_KEYS.TRACKMAN_DATA]: session });
-        await saveSessionToHistory(session);
-        await putBulkImportedSession(jobId, activityId, session);
+  // The bulk import engine runs here; the popup only starts and follows it
+  if (
+    message.type === "BULK_IMPORT_START" ||
+    message.type === "BULK_IMPORT_RESUME" ||
+    message.type === "BULK_IMPORT_RETRY" ||
+    message.type === "BULK_IMPORT_PAUSE" ||
+    message.type === "BULK_IMPORT_ENSURE_RUNNING"
+  ) {
+    handleBulkImportRequest(message)
+      .then(() => sendResponse({ success: true }))
+      .catch((err) => sendResponse({ success: false, error: err instanceof Error ? err.message : String(err) }));
+    return true;
+  }
+});
 
-        const shotCount = session.club_groups.reduce(
-          (total, club) => total + club.shots.length,
-          0
-        );
-        sendResponse({
-          success: true,
-          reportId: session.report_id,
-          shotCount,
-        });
-      } catch (err) {
-        console.error("TrackPull: Bulk import item failed:", err);
-        sendResponse({ success: false, error: "Import failed — try again" });
-      }
-    })();
+function handleBulkImportRequest(message: BulkImportRequest): Promise<void> {
+  switch (message.type) {
+    case "BULK_IMPORT_START":
+      return startBulkImport(message.tabId, message.activities);
+    case "BULK_IMPORT_RESUME":
+      return resumeBulkImport(message.tabId);
+    case "BULK_IMPORT_RETRY":
+      return retryFailedBulkImport(message.tabId);
+    case "BULK_IMPORT_PAUSE":
+      return pauseBulkImport();
+    case "BULK_IMPORT_ENSURE_RUNNING":
+      return resumeInterruptedBulkImport();
+  }
+}
 
-    return true;
+// While a bulk import runs the alarm keeps waking the worker. If Chrome
+// stopped the worker mid-job, the wake resumes it from its last checkpoint.
+chrome.alarms.onAlarm.addListener((alarm) => {
+  if (alarm.name === BULK_IMPORT_KEEPALIVE_ALARM) {
+    resumeInterruptedBulkImport().catch((err) => console.error("TrackPull: Bulk import resume failed:", err));
   }
 });
+resumeInterruptedBulkImport().catch((err) => console.error("TrackPull: Bulk import resume failed:", err));
 
 chrome.storage.onChanged.addListener((changes, namespace) => {
   if (namespace === "local" && changes[STORAGE_KEYS.TRACKMAN_DATA]) {
@@ -0,0 +1,148 @@
+/**
+ * Group-tag capture for report pages.
+ *
+ * Trackman renders one .group-tag label per StrokeGroup after the shot data
+ * arrives. Instead of polling the DOM, a MutationObserver wakes on subtree
+ * insertions, ignores records that cannot involve a tag, and reads every
+ * tag's textContent in one batch (textContent does not force layout the way
+ * innerText does). The collector settles as soon as the expected number of
+ * tags is present, or at a hard deadline with whatever is there.
+ */
+
+import type { SessionData } from "../models/types";
+
+export const GROUP_TAG_SELECTOR = ".group-tag";
+export const GROUP_TAG_DEADLINE_MS = 8000;
+
+export interface GroupTagTiming {
+  /** ms from collector start until tags were read for the last time. */
+  timeToTagsMs: number;
+  /** Observer callbacks delivered while waiting. */
+  wakeups: number;
+  /** Batch DOM reads performed (initial read included). */
+  scans: number;
+  timedOut: boolean;
+  tagCount: number;
+}
+
+export interface GroupTagResult {
+  tags: string[];
+  timing: GroupTagTiming;
+}
+
+export interface CollectGroupTagsOptions {
+  root?: Document | Element;
+  deadlineMs?: number;
+}
+
+let lastGroupTagTiming: GroupTagTiming | null = null;
+
+function now(): number {
+  return typeof performance !== "undefined" ? performance.now() : Date.now();
+}
+
+/** Read every tag label in one pass, collapsing whitespace like innerText. */
+export function readGroupTags(root: ParentNode = document): string[] {
+  const elements = root.querySelectorAll(GROUP_TAG_SELECTOR);
+  const tags: string[] = [];
+  for (let i = 0; i < elements.length; i += 1) {
+    tags.push((elements[i].textContent ?? "").replace(/\s+/g, " ").trim());
+  }
+  return tags;
+}
+
+export function applyGroupTags(session: SessionData, tags: string[]): void {
+  // Tags appear in the same order as StrokeGroups → club_groups
+  for (let i = 0; i < session.club_groups.length && i < tags.length; i++) {
+    const tag = tags[i];
+    if (!tag) continue;
+    for (const shot of session.club_groups[i].shots) {
+      shot.tag = tag;
+    }
+  }
+}
+
+function touchesGroupTag(node: Node): boolean {
+  if (node.nodeType !== 1) {
+    return Boolean(node.parentElement?.closest(GROUP_TAG_SELECTOR));
+  }
+  const element = node as Element;
+  return element.matches(GROUP_TAG_SELECTOR) ||
+    element.closest(GROUP_TAG_SELECTOR) !== null ||
+    element.querySelector(GROUP_TAG_SELECTOR) !== null;
+}
+
+function isRelevantMutation(record: MutationRecord): boolean {
+  if (record.addedNodes.length === 0) return false;
+  if (record.target.nodeType === 1 && (record.target as Element).closest(GROUP_TAG_SELECTOR)) {
+    return true;
+  }
+  for (let i = 0; i < record.addedNodes.length; i += 1) {
+    if (touchesGroupTag(record.addedNodes[i])) return true;
+  }
+  return false;
+}
+
+/**
+ * Resolve with the page's group tags once expectedCount are present, or at
+ * the deadline. Never rejects.
+ */
+export function collectGroupTags(
+  expectedCount: number,
+  options: CollectGroupTagsOptions = {}
+): Promise<GroupTagResult> {
+  const root = options.root ?? document;
+  const deadlineMs = options.deadlineMs ?? GROUP_TAG_DEADLINE_MS;
+  const startedAt = now();
+  let wakeups = 0;
+  let scans = 1;
+
+  const finish = (tags: string[], timedOut: boolean): GroupTagResult => {
+    const timing: GroupTagTiming = {
+      timeToTagsMs: Math.round(now() - startedAt),
+      wakeups,
+      scans,
+      timedOut,
+      tagCount: tags.length,
+    };
+    lastGroupTagTiming = timing;
+    return { tags, timing };
+  };
+
+  const initialTags = readGroupTags(root);
+  if (initialTags.length >= expectedCount || typeof MutationObserver === "undefined") {
+    return Promise.resolve(finish(initialTags, false));
+  }
+
+  return new Promise((resolve) => {
+    let settled = false;
+
+    const settle = (tags: string[], timedOut: boolean): void => {
+      if (settled) return;
+      settled = true;
+      observer.disconnect();
+      clearTimeout(deadlineId);
+      resolve(finish(tags, timedOut));
+    };
+
+    const observer = new MutationObserver((records) => {
+      wakeups += 1;
+      if (!records.some(isRelevantMutation)) return;
+
+      scans += 1;
+      const tags = readGroupTags(root);
+      if (tags.length >= expectedCount) settle(tags, false);
+    });
+
+    const deadlineId = setTimeout(() => {
+      scans += 1;
+      settle(readGroupTags(root), true);
+    }, deadlineMs);
+
+    observer.observe(root, { childList: true, subtree: true });
+  });
+}
+
+export function getLastGroupTagTiming(): GroupTagTiming | null {
+  return lastGroupTagTiming ? { ...lastGroupTagTiming } : null;
+}
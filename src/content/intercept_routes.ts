@@ -0,0 +1,113 @@
+/**
+ * Declarative routing for the report-page interceptor.
+ *
+ * Every fetch/XHR on a report page passes through the interceptor, but only
+ * Trackman API JSON can carry shot data. The route table and response gates
+ * are checked before any clone or body read so images, fonts, scripts and
+ * analytics traffic pass straight through. Counters record how many
+ * responses were skipped, sniffed (body read and scanned) and parsed.
+ */
+
+export interface InterceptRoute {
+  label: string;
+  host: RegExp;
+  /** Optional path filter; routes without one accept any non-asset path. */
+  path?: RegExp;
+}
+
+export const INTERCEPT_ROUTES: InterceptRoute[] = [
+  { label: "trackmangolf", host: /(^|\.)trackmangolf\.com$/i },
+  { label: "trackmancloud", host: /(^|\.)trackmancloud\.com$/i },
+];
+
+/** Static assets never carry shot data, even on Trackman hosts. */
+const STATIC_ASSET_PATH = /\.(?:m?js|css|map|html?|png|jpe?g|gif|svg|webp|avif|ico|woff2?|ttf|otf|eot|mp4|webm)$/i;
+
+const JSON_CONTENT_TYPE = /(^|[/+])json\b/i;
+
+/** Bodies larger than this are skipped rather than buffered a second time. */
+export const MAX_INTERCEPT_BODY_BYTES = 32 * 1024 * 1024;
+/** Smallest body that could hold a non-empty StrokeGroups array. */
+export const MIN_INTERCEPT_BODY_BYTES = 20;
+
+/** Key that parseSessionData requires at the top level of a shot payload. */
+const SHOT_DATA_SNIFF = "\"StrokeGroups\"";
+
+export interface InterceptCounters {
+  skipped: number;
+  sniffed: number;
+  parsed: number;
+  /** Payloads dropped because this tab already posted identical data. */
+  duplicates: number;
+  /** Payloads folded into an already-buffered session for the same report. */
+  merged: number;
+}
+
+const counters: InterceptCounters = {
+  skipped: 0,
+  sniffed: 0,
+  parsed: 0,
+  duplicates: 0,
+  merged: 0,
+};
+
+export function matchInterceptRoute(urlValue: string, base?: string): InterceptRoute | null {
+  let url: URL;
+  try {
+    url = new URL(urlValue, base ?? (typeof location !== "undefined" ? location.href : undefined));
+  } catch {
+    return null;
+  }
+
+  if (url.protocol !== "https:" && url.protocol !== "http:") return null;
+  if (STATIC_ASSET_PATH.test(url.pathname)) return null;
+
+  for (const route of INTERCEPT_ROUTES) {
+    if (!route.host.test(url.hostname)) continue;
+    if (route.path && !route.path.test(url.pathname)) continue;
+    return route;
+  }
+  return null;
+}
+
+/**
+ * Content-type and size gates applied to a matched response before its body
+ * is read. A missing content-type or content-length is allowed through; the
+ * text sniff still guards the parse.
+ */
+export function passesResponseGates(
+  contentType: string | null,
+  contentLength: string | null
+): boolean {
+  if (contentType && !JSON_CONTENT_TYPE.test(contentType)) return false;
+
+  if (contentLength) {
+    const length = Number(contentLength);
+    if (Number.isFinite(length)) {
+      if (length < MIN_INTERCEPT_BODY_BYTES || length > MAX_INTERCEPT_BODY_BYTES) {
+        return false;
+      }
+    }
+  }
+
+  return true;
+}
+
+/** Cheap text check run before JSON.parse. */
+export function sniffShotData(text: string): boolean {
+  return text.length >= MIN_INTERCEPT_BODY_BYTES && text.includes(SHOT_DATA_SNIFF);
+}
+
+export function countIntercept(counter: keyof InterceptCounters): void {
+  counters[counter] += 1;
+}
+
+export function getInterceptCounters(): InterceptCounters {
+  return { ...counters };
+}
+
+export function resetInterceptCountersForTests(): void {
+  for (const key of Object.keys(counters) as Array<keyof InterceptCounters>) {
+    counters[key] = 0;
+  }
+}
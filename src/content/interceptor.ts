@@ -1,202 +1,32 @@
 /**
  * Content Script (MAIN world) for API interception on Trackman report pages.
  * Monkey-patches both window.fetch and XMLHttpRequest to capture JSON
- * responses containing shot data. After the page renders, scrapes
+ * responses containing shot data. Payloads for the same report arriving
+ * close together are merged into one session. After the page renders, scrapes
  * .group-tag elements from the DOM to get shot-group labels (e.g. "D1 SW").
  * Posts the tagged SessionData to the bridge via window.postMessage.
  */
 
-import type { Shot, ClubGroup, SessionData, CaptureInfo } from "../models/types";
-
-const METRIC_KEYS = new Set([
-  "ClubSpeed",
-  "BallSpeed",
-  "SmashFactor",
-  "AttackAngle",
-  "ClubPath",
-  "FaceAngle",
-  "FaceToPath",
-  "SwingDirection",
-  "DynamicLoft",
-  "SpinRate",
-  "SpinAxis",
-  "SpinLoft",
-  "LaunchAngle",
-  "LaunchDirection",
-  "Carry",
-  "Total",
-  "Side",
-  "SideTotal",
-  "CarrySide",
-  "TotalSide",
-  "Height",
-  "MaxHeight",
-  "Curve",
-  "LandingAngle",
-  "HangTime",
-  "LowPointDistance",
-  "ImpactHeight",
-  "ImpactOffset",
-  "Tempo",
-]);
-
-function containsStrokegroups(data: unknown): boolean {
-  if (!data || typeof data !== "object") return false;
-  const obj = data as Record<string, unknown>;
-
-  if ("StrokeGroups" in obj && Array.isArray(obj["StrokeGroups"]) && obj["StrokeGroups"].length > 0) {
-    return true;
-  }
-
-  try {
-    const text = JSON.stringify(obj).toLowerCase();
-    const indicators = [
-      "ballspeed", "clubspeed", "carry", "spinrate",
-      "strokegroups", "strokes", "measurement",
-    ];
-    return indicators.filter((ind) => text.includes(ind)).length >= 3;
-  } catch {
-    return false;
-  }
-}
-
-function tryParseJson(text: string): unknown | null {
-  try {
-    return JSON.parse(text);
-  } catch {
-    return null;
-  }
-}
-
-// ---------------------------------------------------------------------------
-// Parse API JSON → SessionData (no tags yet — those come from the DOM)
-// ---------------------------------------------------------------------------
-
-function parseSessionData(data: Record<string, unknown>, sourceUrl: string): SessionData | null {
-  try {
-    if (!("StrokeGroups" in data)) return null;
-
-    const strokeGroups = data["StrokeGroups"];
-    if (!Array.isArray(strokeGroups) || strokeGroups.length === 0) return null;
-
-    let parsedUrl: URL;
-    try {
-      parsedUrl = new URL(sourceUrl);
-    } catch {
-      parsedUrl = new URL("https://web-dynamic-reports.trackmangolf.com/");
-    }
-
-    let dateStr = "Unknown";
-    const timeInfo = data["Time"] as Record<string, unknown>;
-    if (timeInfo && typeof timeInfo.Date !== "undefined") {
-      dateStr = String(timeInfo.Date);
-    } else if (typeof strokeGroups[0] === "object" && strokeGroups[0]) {
-      if (typeof strokeGroups[0].Date !== "undefined") {
-        dateStr = String(strokeGroups[0].Date);
-      }
-    }
-
-    const reportId =
-      parsedUrl.searchParams.get("r") ||
-      parsedUrl.searchParams.get("a") ||
-      parsedUrl.searchParams.get("ReportId") ||
-      "unknown";
-
-    const session: SessionData = {
-      date: dateStr,
-      report_id: reportId,
-      url_type: "StrokeGroups" in data ? "activity" : "report",
-      club_groups: [],
-      metric_names: [],
-      metadata_params: {},
-    };
-
-    for (const [key, value] of parsedUrl.searchParams) {
-      session.metadata_params[key] = value;
-    }
-
-    const allMetricNames = new Set<string>();
-
-    for (const group of strokeGroups) {
-      if (!group || typeof group !== "object") continue;
-
-      const clubName = String(group["Club"] || "Unknown");
-      const shots: Shot[] = [];
-
-      const strokes = group["Strokes"];
-      if (Array.isArray(strokes)) {
-        for (let i = 0; i < strokes.length; i++) {
-          const stroke = strokes[i];
-          if (!stroke || typeof stroke !== "object") continue;
-
-          const normalized = (stroke["NormalizedMeasurement"] as Record<string, unknown>) || {};
-          const raw = (stroke["Measurement"] as Record<string, unknown>) || {};
-          const merged = { ...raw, ...normalized };
-
-          const shotMetrics: Record<string, string> = {};
-          for (const [key, value] of Object.entries(merged)) {
-            if (!METRIC_KEYS.has(key)) continue;
-            let numValue: number | null = null;
-            if (typeof value === "number") {
-              numValue = value;
-            } else if (typeof value === "string") {
-              const trimmed = value.trim();
-              numValue = isNaN(parseFloat(trimmed)) ? null : parseFloat(trimmed);
-            }
-            if (numValue !== null) {
-              allMetricNames.add(key);
-              shotMetrics[key] = `${numValue}`;
-            }
-          }
-
-          if (Object.keys(shotMetrics).length > 0) {
-            shots.push({ shot_number: i, metrics: shotMetrics });
-          }
-        }
-      }
-
-      if (shots.length > 0) {
-        session.club_groups.push({
-          club_name: clubName,
-          shots,
-          averages: {},
-          consistency: {},
-        });
-      }
-    }
-
-    session.metric_names = Array.from(allMetricNames).sort();
-    return session.club_groups.length > 0 ? session : null;
-  } catch (error) {
-    console.error("TrackPull: Parsing failed:", error);
-    return null;
-  }
-}
-
-// ---------------------------------------------------------------------------
-// Scrape .group-tag elements from the rendered DOM and apply to SessionData
-// ---------------------------------------------------------------------------
-
-function scrapeGroupTags(): string[] {
-  const tags: string[] = [];
-  const elements = document.querySelectorAll(".group-tag");
-  for (const el of Array.from(elements)) {
-    const text = (el as HTMLElement).innerText?.trim() || (el as HTMLElement).textContent?.trim() || "";
-    tags.push(text);
-  }
-  return tags;
-}
-
-function applyGroupTags(session: SessionData, tags: string[]): void {
-  // Tags appear in the same order as StrokeGroups → club_groups
-  for (let i = 0; i < session.club_groups.length && i < tags.length; i++) {
-    const tag = tags[i];
-    if (!tag) continue;
-    for (const shot of session.club_groups[i].shots) {
-      shot.tag = tag;
-    }
-  }
-}
+import type { SessionData } from "../models/types";
+import { containsStrokegroups } from "./payload_probe";
+import {
+  countIntercept,
+  getInterceptCounters,
+  matchInterceptRoute,
+  passesResponseGates,
+  sniffShotData,
+} from "./intercept_routes";
+import { parseSessionData } from "./session_parser";
+import { parseSessionText } from "./parser_worker";
+import { applyGroupTags, collectGroupTags } from "./group_tags";
+import {
+  fingerprintReport,
+  fingerprintText,
+  forgetFingerprint,
+  isDuplicatePayload,
+  rememberFingerprint,
+} from "./payload_fingerprint";
+import { bufferSession, flushSessionMerge, setSessionMergeHandler } from "./session_merge";
 
 // ---------------------------------------------------------------------------
 // Wait for .group-tag elements to appear, then post tagged SessionData
@@ -221,33 +51,33 @@ function postSession(session: SessionData): void {
     shots: totalShots,
     tagged: taggedShots,
   });
+  console.debug("TrackPull: intercept counters", getInterceptCounters());
 }
 
 function waitForTagsThenPost(session: SessionData): void {
-  const MAX_WAIT = 8000;   // max ms to wait for DOM tags
-  const POLL_INTERVAL = 300;
-  const expectedCount = session.club_groups.length;
-  let elapsed = 0;
-
-  function attempt(): void {
-    const tags = scrapeGroupTags();
-
-    if (tags.length >= expectedCount || elapsed >= MAX_WAIT) {
-      if (tags.length > 0) {
-        applyGroupTags(session, tags);
-        console.log("TrackPull: Applied DOM group tags:", tags);
-      } else {
-        console.log("TrackPull: No .group-tag elements found in DOM, posting without tags");
-      }
-      postSession(session);
-      return;
+  collectGroupTags(session.club_groups.length).then(({ tags, timing }) => {
+    if (tags.length > 0) {
+      applyGroupTags(session, tags);
+      console.log("TrackPull: Applied DOM group tags:", tags);
+    } else {
+      console.log("TrackPull: No .group-tag elements found in DOM, posting without tags");
     }
+    console.debug("TrackPull: group tag timing", timing);
+    postSession(session);
+  });
+}
 
-    elapsed += POLL_INTERVAL;
-    setTimeout(attempt, POLL_INTERVAL);
+// Payloads for the same report (e.g. one per metric page) are merged and
+// only the combined session goes through the tag wait and post
+setSessionMergeHandler((session, payloads) => {
+  if (payloads > 1) {
+    console.log(`TrackPull: Merged ${payloads} payloads for report ${session.report_id}`);
   }
+  waitForTagsThenPost(session);
+});
 
-  attempt();
+function queueSession(session: SessionData): void {
+  if (bufferSession(session)) countIntercept("merged");
 }
 
 // ---------------------------------------------------------------------------
@@ -256,13 +86,100 @@ function waitForTagsThenPost(session: SessionData): void {
 
 function handleCapturedJson(body: unknown, url: string): void {
   if (!containsStrokegroups(body)) return;
+  const data = body as Record<string, unknown>;
+  const fingerprint = fingerprintReport(data, url);
+  if (isDuplicatePayload(fingerprint)) {
+    countIntercept("duplicates");
+    return;
+  }
 
+  rememberFingerprint(fingerprint);
   console.log("TrackPull: Shot data detected in:", url);
-  const data = body as Record<string, unknown>;
   const session = parseSessionData(data, url);
-  if (session) {
-    // Wait for the page to render .group-tag elements, then apply and post
-    waitForTagsThenPost(session);
+  if (!session) {
+    forgetFingerprint(fingerprint);
+    return;
+  }
+  queueSession(session);
+}
+
+function handleCapturedText(text: string, url: string): void {
+  countIntercept("sniffed");
+  if (!sniffShotData(text)) return;
+  // A re-fetch of the payload just posted skips parse, tag wait and post
+  const fingerprint = fingerprintText(text, url);
+  if (isDuplicatePayload(fingerprint)) {
+    countIntercept("duplicates");
+    console.debug("TrackPull: duplicate shot payload ignored:", url);
+    return;
+  }
+
+  countIntercept("parsed");
+  // Recorded now so a copy arriving during the parse is dropped as well
+  rememberFingerprint(fingerprint);
+  // JSON.parse and SessionData construction run in the parser worker when available
+  parseSessionText(text, url).then((session) => {
+    if (!session) {
+      forgetFingerprint(fingerprint);
+      return;
+    }
+    console.log("TrackPull: Shot data detected in:", url);
+    queueSession(session);
+  }).catch((err) => {
+    forgetFingerprint(fingerprint);
+    console.error("TrackPull: Parsing failed:", err);
+  });
+}
+
+function getFetchUrl(input: unknown): string | null {
+  if (typeof input === "string") return input;
+  if (input instanceof URL) return input.href;
+  if (input instanceof Request) return input.url;
+  return null;
+}
+
+function inspectFetchResponse(response: Response, requestUrl: string): void {
+  try {
+    if (
+      response.type === "opaque" ||
+      !passesResponseGates(response.headers.get("content-type"), response.headers.get("content-length"))
+    ) {
+      countIntercept("skipped");
+      return;
+    }
+
+    const url = response.url || requestUrl;
+    response.clone().text().then((text: string) => {
+      handleCapturedText(text, url);
+    }).catch(() => {});
+  } catch {
+    // Never break the original fetch
+  }
+}
+
+function inspectXhrResponse(xhr: XMLHttpRequest, requestUrl: string): void {
+  try {
+    if (!passesResponseGates(xhr.getResponseHeader("content-type"), xhr.getResponseHeader("content-length"))) {
+      countIntercept("skipped");
+      return;
+    }
+
+    const url = requestUrl || xhr.responseURL || "";
+    if (xhr.responseType === "json") {
+      // Already parsed by the browser; no text to sniff
+      countIntercept("sniffed");
+      if (xhr.response !== null) handleCapturedJson(xhr.response, url);
+      return;
+    }
+    if (xhr.responseType !== "" && xhr.responseType !== "text") {
+      countIntercept("skipped");
+      return;
+    }
+
+    const text = xhr.responseText;
+    if (text) handleCapturedText(text, url);
+  } catch {
+    // Ignore errors
   }
 }
 
@@ -272,18 +189,17 @@ function handleCapturedJson(body: unknown, url: string): void {
 
 (function () {
   const originalFetch = window.fetch;
-  window.fetch = async function (...args: Parameters<typeof fetch>): Promise<Response> {
-    const response = await originalFetch.apply(this, args);
-    try {
-      const clone = response.clone();
-      clone.text().then((text: string) => {
-        const body = tryParseJson(text);
-        if (body !== null) handleCapturedJson(body, response.url);
-      }).catch(() => {});
-    } catch {
-      // Never break the original fetch
+  window.fetch = function (this: unknown, ...args: Parameters<typeof fetch>): Promise<Response> {
+    const requestUrl = getFetchUrl(args[0]);
+    if (!requestUrl || !matchInterceptRoute(requestUrl)) {
+      countIntercept("skipped");
+      return originalFetch.apply(this, args);
     }
-    return response;
+
+    return originalFetch.apply(this, args).then((response: Response) => {
+      inspectFetchResponse(response, requestUrl);
+      return response;
+    });
   };
 
   const XHRProto = XMLHttpRequest.prototype;
@@ -291,27 +207,26 @@ function handleCapturedJson(body: unknown, url: string): void {
   const originalSend = XHRProto.send;
 
   XHRProto.open = function (this: XMLHttpRequest, method: string, url: string | URL, ...rest: any[]) {
-    (this as any).__trackman_url = String(url);
+    const requestUrl = String(url);
+    (this as any).__trackman_url = requestUrl;
+    (this as any).__trackman_route = matchInterceptRoute(requestUrl) !== null;
     return (originalOpen as any).apply(this, [method, url, ...rest]);
   };
 
   XHRProto.send = function (this: XMLHttpRequest, ...args: any[]) {
-    this.addEventListener("load", function () {
-      try {
-        const text = this.responseText;
-        if (!text) return;
-        const body = tryParseJson(text);
-        if (body !== null) {
-          const url = (this as any).__trackman_url || this.responseURL || "";
-          handleCapturedJson(body, url);
-        }
-      } catch {
-        // Ignore errors
-      }
-    });
+    if ((this as any).__trackman_route) {
+      this.addEventListener("load", function () {
+        inspectXhrResponse(this, (this as any).__trackman_url || "");
+      });
+    } else {
+      countIntercept("skipped");
+    }
     return (originalSend as any).apply(this, args);
   };
 
+  // Don't lose a buffered merge when the user navigates away mid-window
+  window.addEventListener("pagehide", flushSessionMerge);
+
   console.log("TrackPull: fetch interceptor active");
   console.log("TrackPull: XHR interceptor active");
 })();
@@ -0,0 +1,173 @@
+/**
+ * Optional off-main-thread parsing for the report-page interceptor.
+ *
+ * The interceptor runs in the page's MAIN world, where extension URLs are
+ * cross-origin and cannot host a Worker. The worker is therefore built from
+ * parseSessionData's own source text as a blob: script. JSON.parse and
+ * SessionData construction run in the worker; the main thread only pays for
+ * structured-cloning the raw text in and the finished SessionData out.
+ * tests/test_session_parser.ts runs the worker script from an esbuild
+ * bundle of this module, plain and minified, so a bundler change that
+ * pulls a module binding into parseSessionData fails there, not silently
+ * on the report page.
+ *
+ * If the page CSP blocks blob: workers, the worker errors, or a reply takes
+ * too long, parsing falls back to the in-thread path.
+ */
+
+import type { SessionData } from "../models/types";
+import { containsStrokegroups } from "./payload_probe";
+import { METRIC_KEYS, parseSessionData, tryParseJson } from "./session_parser";
+
+/** Set to false to always parse on the main thread. */
+export const ENABLE_PARSER_WORKER = true;
+export const PARSER_WORKER_TIMEOUT_MS = 10000;
+
+interface ParserWorkerRequest {
+  id: number;
+  text: string;
+  url: string;
+  metricKeys: string[];
+}
+
+interface ParserWorkerResponse {
+  id: number;
+  session: SessionData | null;
+}
+
+interface PendingParse {
+  text: string;
+  url: string;
+  resolve: (session: SessionData | null) => void;
+  timeoutId: ReturnType<typeof setTimeout>;
+}
+
+let parserWorker: Worker | null = null;
+let parserWorkerUnavailable = false;
+let nextParseId = 0;
+const pendingParses = new Map<number, PendingParse>();
+
+export function parseSessionTextInThread(text: string, url: string): SessionData | null {
+  const body = tryParseJson(text);
+  if (!containsStrokegroups(body)) return null;
+  return parseSessionData(body as Record<string, unknown>, url);
+}
+
+/** Self-contained worker script: the parser's source plus a message loop. */
+export function buildParserWorkerSource(): string {
+  return `
+const parseSessionData = ${parseSessionData.toString()};
+
+self.onmessage = (event) => {
+  const { id, text, url, metricKeys } = event.data;
+  let session = null;
+  try {
+    const body = JSON.parse(text);
+    if (body && typeof body === "object" && !Array.isArray(body)) {
+      session = parseSessionData(body, url, new Set(metricKeys));
+    }
+  } catch {
+    session = null;
+  }
+  self.postMessage({ id, session });
+};
+`;
+}
+
+function settleParse(id: number, session: SessionData | null): void {
+  const pending = pendingParses.get(id);
+  if (!pending) return;
+  pendingParses.delete(id);
+  clearTimeout(pending.timeoutId);
+  pending.resolve(session);
+}
+
+function disableParserWorker(reason: unknown): void {
+  if (!parserWorkerUnavailable) {
+    console.log("TrackPull: parser worker unavailable, parsing in-thread:", reason);
+  }
+  parserWorkerUnavailable = true;
+  parserWorker?.terminate();
+  parserWorker = null;
+
+  // Anything still waiting on the worker is parsed here instead
+  for (const [id, pending] of Array.from(pendingParses)) {
+    settleParse(id, parseSessionTextInThread(pending.text, pending.url));
+  }
+}
+
+function getParserWorker(): Worker | null {
+  if (!ENABLE_PARSER_WORKER || parserWorkerUnavailable) return null;
+  if (parserWorker) return parserWorker;
+
+  if (typeof Worker === "undefined" || typeof Blob === "undefined" || typeof URL.createObjectURL !== "function") {
+    parserWorkerUnavailable = true;
+    return null;
+  }
+
+  try {
+    const scriptUrl = URL.createObjectURL(
+      new Blob([buildParserWorkerSource()], { type: "text/javascript" })
+    );
+    const worker = new Worker(scriptUrl);
+    // The worker holds its own reference to the script once constructed
+    URL.revokeObjectURL(scriptUrl);
+    worker.onmessage = (event: MessageEvent<ParserWorkerResponse>) => {
+      settleParse(event.data.id, event.data.session);
+    };
+    worker.onerror = (event: ErrorEvent) => {
+      event.preventDefault();
+      disableParserWorker(event.message || "worker error");
+    };
+    parserWorker = worker;
+    return worker;
+  } catch (err) {
+    // Typically a CSP worker-src violation on the host page
+    disableParserWorker(err instanceof Error ? err.message : err);
+    return null;
+  }
+}
+
+/**
+ * Parse a sniffed response body into SessionData, preferring the worker.
+ * Resolves null when the body is not shot data.
+ */
+export function parseSessionText(text: string, url: string): Promise<SessionData | null> {
+  const worker = getParserWorker();
+  if (!worker) {
+    return Promise.resolve(parseSessionTextInThread(text, url));
+  }
+
+  return new Promise((resolve) => {
+    nextParseId += 1;
+    const id = nextParseId;
+    const timeoutId = setTimeout(() => {
+      const pending = pendingParses.get(id);
+      if (pending) settleParse(id, parseSessionTextInThread(pending.text, pending.url));
+    }, PARSER_WORKER_TIMEOUT_MS);
+
+    pendingParses.set(id, { text, url, resolve, timeoutId });
+
+    const request: ParserWorkerRequest = {
+      id,
+      text,
+      url,
+      metricKeys: Array.from(METRIC_KEYS),
+    };
+    try {
+      worker.postMessage(request);
+    } catch (err) {
+      disableParserWorker(err instanceof Error ? err.message : err);
+    }
+  });
+}
+
+export function resetParserWorkerForTests(): void {
+  parserWorker?.terminate();
+  parserWorker = null;
+  parserWorkerUnavailable = false;
+  for (const pending of pendingParses.values()) {
+    clearTimeout(pending.timeoutId);
+  }
+  pendingParses.clear();
+}
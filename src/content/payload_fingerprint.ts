@@ -0,0 +1,80 @@
+/**
+ * Content fingerprints for captured shot payloads.
+ *
+ * Report pages re-fetch the same StrokeGroups payload on metric-tab
+ * switches and re-renders. The interceptor fingerprints each sniffed
+ * payload and drops it when it matches the last payload this tab posted,
+ * before the parse, the tag wait, the bridge post and the storage/history
+ * writes downstream. Only the last one is compared: after A -> B -> A the
+ * second A must be posted again, or TRACKMAN_DATA would keep B's session.
+ * A fingerprint is recorded before its payload is parsed, so a copy that
+ * arrives while the parse is in flight is dropped too, and forgotten again
+ * if the parse fails, so a retry of the same payload gets through.
+ *
+ * The interceptor runs once per tab, so the module-level memory below is
+ * per tab by construction.
+ */
+
+let lastPostedFingerprint: string | null = null;
+
+/** 32-bit FNV-1a over UTF-16 code units, folded into a running hash. */
+function fnv1a(text: string, hash = 0x811c9dc5): number {
+  let h = hash;
+  for (let i = 0; i < text.length; i += 1) {
+    h ^= text.charCodeAt(i);
+    h = Math.imul(h, 0x01000193);
+  }
+  return h >>> 0;
+}
+
+/**
+ * Fingerprint a raw response body. The URL is folded in because the
+ * SessionData built from it carries URL-derived fields (report id, mp[]).
+ */
+export function fingerprintText(text: string, url: string): string {
+  const hash = fnv1a(text, fnv1a(url));
+  return `t:${text.length}:${hash.toString(16)}`;
+}
+
+/**
+ * Fingerprint an already-parsed payload (XHR responseType "json"): group
+ * and stroke counts plus every stroke, so a re-fetch where any one shot
+ * changed is not taken for a duplicate.
+ */
+export function fingerprintReport(body: Record<string, unknown>, url: string): string {
+  const groups = body.StrokeGroups;
+  if (!Array.isArray(groups)) return `r:${fnv1a(url).toString(16)}`;
+
+  let hash = fnv1a(url);
+  let strokeCount = 0;
+  for (const group of groups) {
+    if (typeof group !== "object" || group === null) continue;
+    const g = group as Record<string, unknown>;
+    const strokes = Array.isArray(g.Strokes) ? g.Strokes : [];
+    strokeCount += strokes.length;
+    hash = fnv1a(`${String(g.Club ?? "")}|${strokes.length}`, hash);
+    for (const stroke of strokes) {
+      hash = fnv1a(JSON.stringify(stroke) ?? "", hash);
+    }
+  }
+  return `r:${groups.length}:${strokeCount}:${hash.toString(16)}`;
+}
+
+/** True when the payload matches the last one this tab posted. */
+export function isDuplicatePayload(fingerprint: string): boolean {
+  return fingerprint === lastPostedFingerprint;
+}
+
+/** Record a payload as it is handed to the parser. */
+export function rememberFingerprint(fingerprint: string): void {
+  lastPostedFingerprint = fingerprint;
+}
+
+/** Undo rememberFingerprint for a payload that produced no session. */
+export function forgetFingerprint(fingerprint: string): void {
+  if (lastPostedFingerprint === fingerprint) lastPostedFingerprint = null;
+}
+
+export function resetFingerprintsForTests(): void {
+  lastPostedFingerprint = null;
+}
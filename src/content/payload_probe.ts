@@ -0,0 +1,113 @@
+/**
+ * Structural shot-data probe for the report-page interceptor.
+ *
+ * Decides whether a parsed JSON body looks like Trackman shot data without
+ * serializing it. The probe walks object keys breadth-first to a bounded
+ * depth, samples the head of each array (shot arrays are homogeneous) and
+ * returns as soon as enough indicators are seen or the node budget runs out.
+ * Only keys are inspected: parseSessionData reads structured keys, so an
+ * indicator that appears only inside a string value could never be parsed.
+ */
+
+const STROKE_GROUPS_KEY = "StrokeGroups";
+
+const SHOT_DATA_INDICATORS = [
+  "ballspeed",
+  "clubspeed",
+  "carry",
+  "spinrate",
+  "strokegroups",
+  "strokes",
+  "measurement",
+];
+
+const REQUIRED_INDICATOR_COUNT = 3;
+
+/** Deepest nesting level whose keys are inspected (root object is depth 0). */
+export const PROBE_MAX_DEPTH = 6;
+/** Upper bound on objects/arrays visited before the probe gives up. */
+export const PROBE_MAX_NODES = 2000;
+/** Number of leading elements inspected per array. */
+export const PROBE_ARRAY_SAMPLE = 3;
+
+export interface PayloadProbeStats {
+  nodesVisited: number;
+  indicatorsFound: number;
+}
+
+function isContainer(value: unknown): value is Record<string, unknown> | unknown[] {
+  return value !== null && typeof value === "object";
+}
+
+/**
+ * Walk keys looking for at least three distinct shot-data indicators.
+ * Optional stats are filled in for diagnostics and tests.
+ */
+export function probeShotDataIndicators(
+  root: unknown,
+  stats?: PayloadProbeStats
+): boolean {
+  if (!isContainer(root)) return false;
+
+  const found = new Array<boolean>(SHOT_DATA_INDICATORS.length).fill(false);
+  let foundCount = 0;
+  let nodesVisited = 0;
+
+  const queue: Array<[unknown, number]> = [[root, 0]];
+  let head = 0;
+
+  const finish = (result: boolean): boolean => {
+    if (stats) {
+      stats.nodesVisited = nodesVisited;
+      stats.indicatorsFound = foundCount;
+    }
+    return result;
+  };
+
+  while (head < queue.length) {
+    const [node, depth] = queue[head];
+    head += 1;
+
+    nodesVisited += 1;
+    if (nodesVisited > PROBE_MAX_NODES) return finish(false);
+
+    if (Array.isArray(node)) {
+      if (depth >= PROBE_MAX_DEPTH) continue;
+      const sampleSize = Math.min(node.length, PROBE_ARRAY_SAMPLE);
+      for (let i = 0; i < sampleSize; i += 1) {
+        if (isContainer(node[i])) queue.push([node[i], depth + 1]);
+      }
+      continue;
+    }
+
+    const record = node as Record<string, unknown>;
+    for (const key of Object.keys(record)) {
+      const lower = key.toLowerCase();
+      for (let i = 0; i < SHOT_DATA_INDICATORS.length; i += 1) {
+        if (found[i] || !lower.includes(SHOT_DATA_INDICATORS[i])) continue;
+        found[i] = true;
+        foundCount += 1;
+        if (foundCount >= REQUIRED_INDICATOR_COUNT) return finish(true);
+      }
+
+      if (depth < PROBE_MAX_DEPTH) {
+        const value = record[key];
+        if (isContainer(value)) queue.push([value, depth + 1]);
+      }
+    }
+  }
+
+  return finish(false);
+}
+
+export function containsStrokegroups(data: unknown): boolean {
+  if (!data || typeof data !== "object") return false;
+  const obj = data as Record<string, unknown>;
+
+  const strokeGroups = obj[STROKE_GROUPS_KEY];
+  if (Array.isArray(strokeGroups) && strokeGroups.length > 0) {
+    return true;
+  }
+
+  return probeShotDataIndicators(obj);
+}
@@ -103,3 +103,66 @@ export function findTrackmanAuthTokenFromStorage(...stores: StorageLike[]): stri
   candidates.sort((a, b) => b.score - a.score);
   return candidates[0]?.token ?? null;
 }
+
+export interface AuthTokenCacheStats {
+  scans: number;
+  hits: number;
+}
+
+interface ResolvedToken {
+  stores: StorageLike[];
+  /** Key counts at scan time; a login that adds keys changes them. */
+  lengths: number[];
+  token: string | null;
+}
+
+let resolvedToken: ResolvedToken | null = null;
+const tokenCacheStats: AuthTokenCacheStats = { scans: 0, hits: 0 };
+
+function isResolvedFor(resolved: ResolvedToken, stores: StorageLike[]): boolean {
+  return resolved.stores.length === stores.length &&
+    stores.every((store, i) => store === resolved.stores[i] && store.length === resolved.lengths[i]);
+}
+
+/**
+ * findTrackmanAuthTokenFromStorage, remembered until
+ * invalidateTrackmanAuthToken is called (on a storage event or an auth
+ * failure) or a store gains or loses keys. A full scan parses every JSON
+ * value in both storages, which is too much to repeat per request.
+ */
+export function resolveTrackmanAuthToken(...stores: StorageLike[]): string | null {
+  if (resolvedToken && isResolvedFor(resolvedToken, stores)) {
+    tokenCacheStats.hits += 1;
+    return resolvedToken.token;
+  }
+
+  tokenCacheStats.scans += 1;
+  const token = findTrackmanAuthTokenFromStorage(...stores);
+  resolvedToken = { stores, lengths: stores.map((store) => store.length), token };
+  return token;
+}
+
+export function invalidateTrackmanAuthToken(): void {
+  resolvedToken = null;
+}
+
+export function getAuthTokenCacheStats(): AuthTokenCacheStats {
+  return { ...tokenCacheStats };
+}
+
+export function resetAuthTokenCacheForTests(): void {
+  resolvedToken = null;
+  tokenCacheStats.scans = 0;
+  tokenCacheStats.hits = 0;
+}
+
+/** True for a GraphQL reply that means the bearer token was rejected. */
+export function isAuthFailureResponse(status: number, data: unknown): boolean {
+  if (status === 401 || status === 403) return true;
+  const errors = (data as { errors?: Array<{ message?: unknown }> } | null)?.errors;
+  if (!Array.isArray(errors)) return false;
+  return errors.some((error) => (
+    typeof error?.message === "string" &&
+    /unauthori[sz]ed|unauthenticated|not authorized/i.test(error.message)
+  ));
+}
@@ -21,3 +21,18 @@ export interface PortalGraphQLResponseMessage {
   data?: unknown;
   error?: string;
 }
+
+/** Sent by portal_fetch at start; the page bridge answers with READY. */
+export const PORTAL_BRIDGE_PING_TYPE = "TRACKPULL_PORTAL_BRIDGE_PING";
+/** Sent by the page bridge when it loads and in answer to every PING. */
+export const PORTAL_BRIDGE_READY_TYPE = "TRACKPULL_PORTAL_BRIDGE_READY";
+
+export interface PortalBridgePingMessage {
+  source: typeof PORTAL_GRAPHQL_REQUEST_SOURCE;
+  type: typeof PORTAL_BRIDGE_PING_TYPE;
+}
+
+export interface PortalBridgeReadyMessage {
+  source: typeof PORTAL_GRAPHQL_RESPONSE_SOURCE;
+  type: typeof PORTAL_BRIDGE_READY_TYPE;
+}
@@ -2,16 +2,21 @@
  * Content script for portal.trackmangolf.com.
  * Proxies GraphQL requests from the extension through the page-context bridge.
  * Falls back to an isolated-world fetch with browser credentials and any
- * discoverable bearer token when the MAIN-world bridge is unavailable.
+ * discoverable bearer token when the MAIN-world bridge is unavailable, which
+ * a readiness handshake at startup detects instead of a per-request timeout.
  */
 
-import { findTrackmanAuthTokenFromStorage } from "./portal_auth";
+import { invalidateTrackmanAuthToken, isAuthFailureResponse, resolveTrackmanAuthToken } from "./portal_auth";
 import {
+  PORTAL_BRIDGE_PING_TYPE,
+  PORTAL_BRIDGE_READY_TYPE,
   PORTAL_GRAPHQL_ENDPOINT,
   PORTAL_GRAPHQL_REQUEST_SOURCE,
   PORTAL_GRAPHQL_REQUEST_TYPE,
   PORTAL_GRAPHQL_RESPONSE_SOURCE,
   PORTAL_GRAPHQL_RESPONSE_TYPE,
+  type PortalBridgePingMessage,
+  type PortalBridgeReadyMessage,
   type PortalGraphQLRequestMessage,
   type PortalGraphQLResponseMessage,
 } from "./portal_bridge_protocol";
@@ -19,11 +24,19 @@ import {
 export { findTrackmanAuthTokenFromStorage } from "./portal_auth";
 
 const MAIN_WORLD_TIMEOUT_MS = 15000;
+const MAIN_WORLD_TIMEOUT_ERROR = "Portal page bridge timed out";
+/** The page bridge loads at document_start, so its answer is near-instant. */
+export const BRIDGE_HANDSHAKE_TIMEOUT_MS = 1000;
 let nextRequestId = 0;
 
-function buildGraphQLHeaders(): Record<string, string> {
+type GraphQLFetchResult = { success: boolean; data?: unknown; error?: string };
+
+function getAuthToken(): string | null {
+  return resolveTrackmanAuthToken(window.localStorage, window.sessionStorage);
+}
+
+function buildGraphQLHeaders(token: string | null): Record<string, string> {
   const headers: Record<string, string> = { "Content-Type": "application/json" };
-  const token = findTrackmanAuthTokenFromStorage(window.localStorage, window.sessionStorage);
   if (token) {
     headers.Authorization = `Bearer ${token}`;
   }
@@ -33,68 +46,141 @@ function buildGraphQLHeaders(): Record<string, string> {
 async function fetchGraphQLFromIsolatedWorld(
   query: string,
   variables?: Record<string, unknown>
-): Promise<{ success: boolean; data?: unknown; error?: string }> {
-  const response = await fetch(PORTAL_GRAPHQL_ENDPOINT, {
-    method: "POST",
-    credentials: "include",
-    headers: buildGraphQLHeaders(),
-    body: JSON.stringify({ query, variables }),
-  });
+): Promise<GraphQLFetchResult> {
+  const post = async (token: string | null) => {
+    const response = await fetch(PORTAL_GRAPHQL_ENDPOINT, {
+      method: "POST",
+      credentials: "include",
+      headers: buildGraphQLHeaders(token),
+      body: JSON.stringify({ query, variables }),
+    });
+    return { status: response.status, data: await response.json() as unknown };
+  };
 
-  return { success: true, data: await response.json() };
+  const token = getAuthToken();
+  let result = await post(token);
+  if (isAuthFailureResponse(result.status, result.data)) {
+    // The portal may have refreshed the token in place; look again once
+    invalidateTrackmanAuthToken();
+    const freshToken = getAuthToken();
+    if (freshToken !== token) result = await post(freshToken);
+  }
+
+  return { success: true, data: result.data };
 }
 
-function fetchGraphQLFromMainWorld(
-  query: string,
-  variables?: Record<string, unknown>
-): Promise<{ success: boolean; data?: unknown; error?: string }> {
-  const requestId = `trackpull-portal-${Date.now()}-${nextRequestId += 1}`;
-  const request: PortalGraphQLRequestMessage = {
-    source: PORTAL_GRAPHQL_REQUEST_SOURCE,
-    type: PORTAL_GRAPHQL_REQUEST_TYPE,
-    requestId,
-    query,
-    variables,
-  };
+/** The parts of window the bridge client uses, so tests can supply their own. */
+export interface BridgeWindow {
+  addEventListener: (type: "message", listener: (event: MessageEvent) => void) => void;
+  postMessage: (message: unknown, targetOrigin: string) => void;
+}
 
-  return new Promise((resolve) => {
-    let settled = false;
-    const cleanup = (): void => {
-      window.removeEventListener("message", onMessage);
-      clearTimeout(timeoutId);
-    };
-    const settle = (response: { success: boolean; data?: unknown; error?: string }): void => {
-      if (settled) return;
-      settled = true;
-      cleanup();
-      resolve(response);
-    };
-    const onMessage = (event: MessageEvent): void => {
-      if (event.source !== window) return;
-      const data = event.data as Partial<PortalGraphQLResponseMessage> | undefined;
-      if (!data || data.source !== PORTAL_GRAPHQL_RESPONSE_SOURCE) return;
-      if (data.type !== PORTAL_GRAPHQL_RESPONSE_TYPE || data.requestId !== requestId) return;
-      settle({
-        success: Boolean(data.success),
-        data: data.data,
-        error: typeof data.error === "string" ? data.error : undefined,
-      });
-    };
-    const timeoutId = window.setTimeout(() => {
-      settle({ success: false, error: "Portal page bridge timed out" });
-    }, MAIN_WORLD_TIMEOUT_MS);
+export interface MainWorldBridgeOptions {
+  target: BridgeWindow;
+  origin: string;
+  handshakeTimeoutMs?: number;
+  requestTimeoutMs?: number;
+}
+
+export interface MainWorldBridge {
+  /** Resolves true once the page bridge answered, false if it never did. */
+  whenReady: () => Promise<boolean>;
+  /** Sends through the page bridge, or resolves null when it is absent. */
+  fetch: (query: string, variables?: Record<string, unknown>) => Promise<GraphQLFetchResult | null>;
+  getPendingCount: () => number;
+}
 
-    window.addEventListener("message", onMessage);
-    window.postMessage(request, window.location.origin);
+/**
+ * Client side of the MAIN-world bridge. One message listener serves every
+ * request, matched by requestId, and a PING sent at creation tells within
+ * handshakeTimeoutMs whether portal_page_fetch is there at all. A READY
+ * that arrives late still switches the bridge on for later requests.
+ */
+export function createMainWorldBridge(options: MainWorldBridgeOptions): MainWorldBridge {
+  const { target, origin } = options;
+  const handshakeTimeoutMs = options.handshakeTimeoutMs ?? BRIDGE_HANDSHAKE_TIMEOUT_MS;
+  const requestTimeoutMs = options.requestTimeoutMs ?? MAIN_WORLD_TIMEOUT_MS;
+  const pending = new Map<string, (response: GraphQLFetchResult) => void>();
+  let ready = false;
+  let markReady: (isReady: boolean) => void = () => {};
+  const readyPromise = new Promise<boolean>((resolve) => {
+    markReady = resolve;
   });
+
+  target.addEventListener("message", (event: MessageEvent) => {
+    if (event.source !== target) return;
+    const data = event.data as Partial<PortalGraphQLResponseMessage | PortalBridgeReadyMessage> | undefined;
+    if (!data || data.source !== PORTAL_GRAPHQL_RESPONSE_SOURCE) return;
+
+    if (data.type === PORTAL_BRIDGE_READY_TYPE) {
+      ready = true;
+      markReady(true);
+      return;
+    }
+    if (data.type !== PORTAL_GRAPHQL_RESPONSE_TYPE) return;
+
+    const response = data as Partial<PortalGraphQLResponseMessage>;
+    const settle = typeof response.requestId === "string" ? pending.get(response.requestId) : undefined;
+    settle?.({
+      success: Boolean(response.success),
+      data: response.data,
+      error: typeof response.error === "string" ? response.error : undefined,
+    });
+  });
+
+  const ping: PortalBridgePingMessage = { source: PORTAL_GRAPHQL_REQUEST_SOURCE, type: PORTAL_BRIDGE_PING_TYPE };
+  target.postMessage(ping, origin);
+  setTimeout(() => markReady(false), handshakeTimeoutMs);
+
+  const sendRequest = (query: string, variables?: Record<string, unknown>): Promise<GraphQLFetchResult> => {
+    const requestId = `trackpull-portal-${Date.now()}-${nextRequestId += 1}`;
+    const request: PortalGraphQLRequestMessage = {
+      source: PORTAL_GRAPHQL_REQUEST_SOURCE,
+      type: PORTAL_GRAPHQL_REQUEST_TYPE,
+      requestId,
+      query,
+      variables,
+    };
+
+    return new Promise((resolve) => {
+      const timeoutId = setTimeout(() => {
+        settle({ success: false, error: MAIN_WORLD_TIMEOUT_ERROR });
+      }, requestTimeoutMs);
+      const settle = (response: GraphQLFetchResult): void => {
+        if (!pending.delete(requestId)) return;
+        clearTimeout(timeoutId);
+        resolve(response);
+      };
+      pending.set(requestId, settle);
+      target.postMessage(request, origin);
+    });
+  };
+
+  return {
+    whenReady: () => readyPromise,
+    fetch: async (query, variables) => {
+      await readyPromise;
+      return ready ? sendRequest(query, variables) : null;
+    },
+    getPendingCount: () => pending.size,
+  };
+}
+
+let mainWorldBridge: MainWorldBridge | null = null;
+
+function getMainWorldBridge(): MainWorldBridge {
+  if (!mainWorldBridge) {
+    mainWorldBridge = createMainWorldBridge({ target: window, origin: window.location.origin });
+  }
+  return mainWorldBridge;
 }
 
 async function fetchGraphQL(
   query: string,
   variables?: Record<string, unknown>
-): Promise<{ success: boolean; data?: unknown; error?: string }> {
-  const mainWorldResponse = await fetchGraphQLFromMainWorld(query, variables);
-  if (mainWorldResponse.success || mainWorldResponse.error !== "Portal page bridge timed out") {
+): Promise<GraphQLFetchResult> {
+  const mainWorldResponse = await getMainWorldBridge().fetch(query, variables);
+  if (mainWorldResponse && (mainWorldResponse.success || mainWorldResponse.error !== MAIN_WORLD_TIMEOUT_ERROR)) {
     return mainWorldResponse;
   }
 
@@ -115,4 +201,8 @@ function registerPortalFetchListener(): void {
 
 if (typeof chrome !== "undefined" && chrome.runtime?.onMessage) {
   registerPortalFetchListener();
+  // Another portal tab logging in or out changes the token
+  window.addEventListener("storage", invalidateTrackmanAuthToken);
+  // Handshake now so the first request already knows which path to take
+  getMainWorldBridge();
 }
@@ -7,13 +7,22 @@
  * isolated portal_fetch content script without exposing token values.
  */
 
-import { findTrackmanAuthTokenFromStorage, type StorageLike } from "./portal_auth";
 import {
+  invalidateTrackmanAuthToken,
+  isAuthFailureResponse,
+  resolveTrackmanAuthToken,
+  type StorageLike,
+} from "./portal_auth";
+import {
+  PORTAL_BRIDGE_PING_TYPE,
+  PORTAL_BRIDGE_READY_TYPE,
   PORTAL_GRAPHQL_ENDPOINT,
   PORTAL_GRAPHQL_REQUEST_SOURCE,
   PORTAL_GRAPHQL_REQUEST_TYPE,
   PORTAL_GRAPHQL_RESPONSE_SOURCE,
   PORTAL_GRAPHQL_RESPONSE_TYPE,
+  type PortalBridgePingMessage,
+  type PortalBridgeReadyMessage,
   type PortalGraphQLRequestMessage,
   type PortalGraphQLResponseMessage,
 } from "./portal_bridge_protocol";
@@ -40,6 +49,15 @@ let capturedGraphQLHeaders: HeaderMap = {};
 let capturedGraphQLRequestCount = 0;
 let pageFetch: typeof fetch | null = null;
 
+export interface GraphQLCoalescingStats {
+  sent: number;
+  coalesced: number;
+}
+
+/** Requests on the wire, keyed by getGraphQLRequestKey. */
+const inFlightGraphQLRequests = new Map<string, { query: string; response: Promise<PortalGraphQLResponseMessage> }>();
+const coalescingStats: GraphQLCoalescingStats = { sent: 0, coalesced: 0 };
+
 export function isTrackmanGraphQLEndpoint(urlValue: string): boolean {
   try {
     const base = typeof window !== "undefined"
@@ -173,8 +191,8 @@ export function buildPageContextGraphQLHeaders(...stores: StorageLike[]): Header
   setHeaderIfAbsent(headers, "Accept", "application/json");
   setHeaderIfAbsent(headers, "Content-Type", "application/json");
 
-  const token = findTrackmanAuthTokenFromStorage(...stores);
-  if (token && !hasHeader(headers, "Authorization")) {
+  const token = hasHeader(headers, "Authorization") ? null : resolveTrackmanAuthToken(...stores);
+  if (token) {
     headers.Authorization = `Bearer ${token}`;
   }
 
@@ -280,6 +298,7 @@ async function fetchGraphQLInPageContext(
     const text = await response.text();
 
     if (!response.ok) {
+      if (isAuthFailureResponse(response.status, null)) invalidateTrackmanAuthToken();
       return {
         source: PORTAL_GRAPHQL_RESPONSE_SOURCE,
         type: PORTAL_GRAPHQL_RESPONSE_TYPE,
@@ -290,6 +309,8 @@ async function fetchGraphQLInPageContext(
     }
 
     const data = text ? JSON.parse(text) : null;
+    // Rescan storage on the next request in case the portal swapped tokens
+    if (isAuthFailureResponse(response.status, data)) invalidateTrackmanAuthToken();
 
     return {
       source: PORTAL_GRAPHQL_RESPONSE_SOURCE,
@@ -309,6 +330,64 @@ async function fetchGraphQLInPageContext(
   }
 }
 
+/** JSON with object keys sorted, so equal variables give equal text. */
+function stableStringify(value: unknown): string {
+  if (Array.isArray(value)) return `[${value.map(stableStringify).join(",")}]`;
+  if (value && typeof value === "object") {
+    const entries = Object.keys(value as Record<string, unknown>)
+      .sort()
+      .filter((key) => (value as Record<string, unknown>)[key] !== undefined)
+      .map((key) => `${JSON.stringify(key)}:${stableStringify((value as Record<string, unknown>)[key])}`);
+    return `{${entries.join(",")}}`;
+  }
+  return JSON.stringify(value) ?? "null";
+}
+
+/** FNV-1a of the query text, plus the variables, as the single-flight key. */
+export function getGraphQLRequestKey(query: string, variables?: Record<string, unknown>): string {
+  let hash = 0x811c9dc5;
+  for (let i = 0; i < query.length; i += 1) {
+    hash ^= query.charCodeAt(i);
+    hash = Math.imul(hash, 0x01000193);
+  }
+  return `${(hash >>> 0).toString(36)}:${query.length}:${stableStringify(variables ?? null)}`;
+}
+
+/**
+ * Send a request unless an identical one is already in flight, in which
+ * case share its response. Nothing is kept once the response arrives.
+ */
+export function fetchGraphQLCoalesced(
+  query: string,
+  variables?: Record<string, unknown>,
+  send: typeof fetchGraphQLInPageContext = fetchGraphQLInPageContext
+): Promise<PortalGraphQLResponseMessage> {
+  const key = getGraphQLRequestKey(query, variables);
+  const inFlight = inFlightGraphQLRequests.get(key);
+  // Comparing the text rules out a hash collision between two queries
+  if (inFlight && inFlight.query === query) {
+    coalescingStats.coalesced += 1;
+    return inFlight.response;
+  }
+
+  coalescingStats.sent += 1;
+  const response = send(query, variables).finally(() => {
+    if (inFlightGraphQLRequests.get(key)?.response === response) inFlightGraphQLRequests.delete(key);
+  });
+  if (!inFlight) inFlightGraphQLRequests.set(key, { query, response });
+  return response;
+}
+
+export function getGraphQLCoalescingStats(): GraphQLCoalescingStats {
+  return { ...coalescingStats };
+}
+
+export function resetGraphQLCoalescingForTests(): void {
+  inFlightGraphQLRequests.clear();
+  coalescingStats.sent = 0;
+  coalescingStats.coalesced = 0;
+}
+
 function isPortalGraphQLRequestMessage(value: unknown): value is PortalGraphQLRequestMessage {
   if (!value || typeof value !== "object") return false;
   const record = value as Partial<PortalGraphQLRequestMessage>;
@@ -318,13 +397,28 @@ function isPortalGraphQLRequestMessage(value: unknown): value is PortalGraphQLRe
     typeof record.query === "string";
 }
 
+function isPortalBridgePingMessage(value: unknown): boolean {
+  if (!value || typeof value !== "object") return false;
+  const record = value as Partial<PortalBridgePingMessage>;
+  return record.source === PORTAL_GRAPHQL_REQUEST_SOURCE && record.type === PORTAL_BRIDGE_PING_TYPE;
+}
+
+function announceBridgeReady(): void {
+  const ready: PortalBridgeReadyMessage = { source: PORTAL_GRAPHQL_RESPONSE_SOURCE, type: PORTAL_BRIDGE_READY_TYPE };
+  window.postMessage(ready, window.location.origin);
+}
+
 function registerPageBridge(): void {
   window.addEventListener("message", (event: MessageEvent) => {
     if (event.source !== window) return;
+    if (isPortalBridgePingMessage(event.data)) {
+      announceBridgeReady();
+      return;
+    }
     if (!isPortalGraphQLRequestMessage(event.data)) return;
 
     const request = event.data;
-    fetchGraphQLInPageContext(request.query, request.variables)
+    fetchGraphQLCoalesced(request.query, request.variables)
       .then((response) => {
         window.postMessage({ ...response, requestId: request.requestId }, window.location.origin);
       });
@@ -335,5 +429,8 @@ if (typeof window !== "undefined" && window.location.hostname === "portal.trackm
   startFetchCaptureWatchdog();
   installXhrCapture();
   registerPageBridge();
+  window.addEventListener("storage", invalidateTrackmanAuthToken);
+  // Covers a portal_fetch that pinged before this script ran
+  announceBridgeReady();
   console.log("TrackPull portal bridge: MAIN-world GraphQL bridge loaded");
 }
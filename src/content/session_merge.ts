@@ -0,0 +1,176 @@
+/**
+ * Per-tab merge buffer for report payloads captured across metric pages.
+ *
+ * Browsing a report's metric pages (different mp[] sets) yields one payload
+ * per page, each covering the same shots with different metrics. Payloads
+ * for the same report that arrive within a short window are folded into a
+ * single SessionData, keyed by (club group, shot number) through a hash
+ * index, and only the merged result is handed on for posting. A payload
+ * for a different report flushes the buffer first.
+ *
+ * Groups are matched by the payload's group id (group_id), not by
+ * position: the parser drops StrokeGroups without usable shots, so the
+ * same position can hold a different group on different metric pages.
+ * Payloads without ids fall back to club name and occurrence count.
+ *
+ * The interceptor runs once per tab, so the buffer below is per tab.
+ */
+
+import type { ClubGroup, SessionData, Shot } from "../models/types";
+
+/** Quiet period after the last payload before the merged session is posted. */
+export const SESSION_MERGE_WINDOW_MS = 1200;
+/** Upper bound on how long a buffered session can be held back. */
+export const SESSION_MERGE_MAX_WAIT_MS = 5000;
+
+interface MergeState {
+  session: SessionData;
+  /** getGroupKeys key → group in session */
+  groupIndex: Map<string, ClubGroup>;
+  /** `${groupKey}:${shot_number}` → shot in session */
+  shotIndex: Map<string, Shot>;
+  metricNames: Set<string>;
+  payloads: number;
+}
+
+interface PendingMerge {
+  state: MergeState;
+  windowTimer: ReturnType<typeof setTimeout>;
+  maxWaitTimer: ReturnType<typeof setTimeout>;
+}
+
+export type SessionMergeHandler = (session: SessionData, payloads: number) => void;
+
+let pendingMerge: PendingMerge | null = null;
+let mergeHandler: SessionMergeHandler | null = null;
+
+/**
+ * "id:<group_id>", or for a group without one "Driver#0", "7Iron#0",
+ * "7Iron#1": the nth such group of a club in the session.
+ */
+function getGroupKeys(session: SessionData): string[] {
+  const seen = new Map<string, number>();
+  return session.club_groups.map((group) => {
+    if (group.group_id !== undefined) return `id:${group.group_id}`;
+    const occurrence = seen.get(group.club_name) ?? 0;
+    seen.set(group.club_name, occurrence + 1);
+    return `${group.club_name}#${occurrence}`;
+  });
+}
+
+function shotKey(groupKey: string, shotNumber: number): string {
+  return `${groupKey}:${shotNumber}`;
+}
+
+function createMergeState(session: SessionData): MergeState {
+  const groupIndex = new Map<string, ClubGroup>();
+  const shotIndex = new Map<string, Shot>();
+  const groupKeys = getGroupKeys(session);
+  session.club_groups.forEach((group, i) => {
+    groupIndex.set(groupKeys[i], group);
+    for (const shot of group.shots) {
+      shotIndex.set(shotKey(groupKeys[i], shot.shot_number), shot);
+    }
+  });
+  return {
+    session,
+    groupIndex,
+    shotIndex,
+    metricNames: new Set(session.metric_names),
+    payloads: 1,
+  };
+}
+
+/** Fold incoming into state.session in place. */
+function mergeInto(state: MergeState, incoming: SessionData): void {
+  const target = state.session;
+  const groupKeys = getGroupKeys(incoming);
+
+  incoming.club_groups.forEach((group, i) => {
+    const groupKey = groupKeys[i];
+    let targetGroup = state.groupIndex.get(groupKey);
+    if (!targetGroup) {
+      targetGroup = { ...group, shots: [] };
+      target.club_groups.push(targetGroup);
+      state.groupIndex.set(groupKey, targetGroup);
+    }
+
+    for (const shot of group.shots) {
+      const key = shotKey(groupKey, shot.shot_number);
+      const existing = state.shotIndex.get(key);
+      if (existing) {
+        Object.assign(existing.metrics, shot.metrics);
+        if (!existing.tag && shot.tag) existing.tag = shot.tag;
+      } else {
+        const copy: Shot = { ...shot, metrics: { ...shot.metrics } };
+        targetGroup.shots.push(copy);
+        state.shotIndex.set(key, copy);
+      }
+    }
+  });
+
+  for (const name of incoming.metric_names) {
+    state.metricNames.add(name);
+  }
+  target.metric_names = Array.from(state.metricNames).sort();
+  target.metadata_params = { ...target.metadata_params, ...incoming.metadata_params };
+  state.payloads += 1;
+}
+
+/**
+ * Merge two sessions for the same report by (club group, shot number).
+ * Returns a new session; neither input is modified.
+ */
+export function mergeSessionData(base: SessionData, incoming: SessionData): SessionData {
+  const state = createMergeState(structuredClone(base));
+  mergeInto(state, incoming);
+  return state.session;
+}
+
+export function setSessionMergeHandler(handler: SessionMergeHandler): void {
+  mergeHandler = handler;
+}
+
+/** Post whatever is buffered now. */
+export function flushSessionMerge(): void {
+  if (!pendingMerge) return;
+  const { state, windowTimer, maxWaitTimer } = pendingMerge;
+  pendingMerge = null;
+  clearTimeout(windowTimer);
+  clearTimeout(maxWaitTimer);
+  mergeHandler?.(state.session, state.payloads);
+}
+
+/**
+ * Buffer a freshly parsed session. Sessions for the buffered report are
+ * merged; a different report flushes the buffer and starts a new one.
+ * Returns true when the session was merged into one already buffered.
+ */
+export function bufferSession(session: SessionData): boolean {
+  if (pendingMerge && pendingMerge.state.session.report_id !== session.report_id) {
+    flushSessionMerge();
+  }
+
+  if (pendingMerge) {
+    mergeInto(pendingMerge.state, session);
+    clearTimeout(pendingMerge.windowTimer);
+    pendingMerge.windowTimer = setTimeout(flushSessionMerge, SESSION_MERGE_WINDOW_MS);
+    return true;
+  }
+
+  pendingMerge = {
+    state: createMergeState(session),
+    windowTimer: setTimeout(flushSessionMerge, SESSION_MERGE_WINDOW_MS),
+    maxWaitTimer: setTimeout(flushSessionMerge, SESSION_MERGE_MAX_WAIT_MS),
+  };
+  return false;
+}
+
+export function resetSessionMergeForTests(): void {
+  if (pendingMerge) {
+    clearTimeout(pendingMerge.windowTimer);
+    clearTimeout(pendingMerge.maxWaitTimer);
+  }
+  pendingMerge = null;
+  mergeHandler = null;
+}
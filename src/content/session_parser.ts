@@ -0,0 +1,166 @@
+/**
+ * Report API JSON -> SessionData parser shared by the interceptor's
+ * in-thread path and its parser worker.
+ *
+ * parseSessionData must stay free of module-level references: the worker
+ * is built from its source text (see parser_worker.ts), so everything it
+ * needs arrives through its parameters.
+ */
+
+import type { Shot, SessionData } from "../models/types";
+
+export const METRIC_KEYS = new Set([
+  "ClubSpeed",
+  "BallSpeed",
+  "SmashFactor",
+  "AttackAngle",
+  "ClubPath",
+  "FaceAngle",
+  "FaceToPath",
+  "SwingDirection",
+  "DynamicLoft",
+  "SpinRate",
+  "SpinAxis",
+  "SpinLoft",
+  "LaunchAngle",
+  "LaunchDirection",
+  "Carry",
+  "Total",
+  "Side",
+  "SideTotal",
+  "CarrySide",
+  "TotalSide",
+  "Height",
+  "MaxHeight",
+  "Curve",
+  "LandingAngle",
+  "HangTime",
+  "LowPointDistance",
+  "ImpactHeight",
+  "ImpactOffset",
+  "Tempo",
+]);
+
+export function tryParseJson(text: string): unknown | null {
+  try {
+    return JSON.parse(text);
+  } catch {
+    return null;
+  }
+}
+
+// ---------------------------------------------------------------------------
+// Parse API JSON → SessionData (no tags yet — those come from the DOM)
+// ---------------------------------------------------------------------------
+
+export function parseSessionData(
+  data: Record<string, unknown>,
+  sourceUrl: string,
+  metricKeys: ReadonlySet<string> = METRIC_KEYS
+): SessionData | null {
+  try {
+    if (!("StrokeGroups" in data)) return null;
+
+    const strokeGroups = data["StrokeGroups"];
+    if (!Array.isArray(strokeGroups) || strokeGroups.length === 0) return null;
+
+    let parsedUrl: URL;
+    try {
+      parsedUrl = new URL(sourceUrl);
+    } catch {
+      parsedUrl = new URL("https://web-dynamic-reports.trackmangolf.com/");
+    }
+
+    let dateStr = "Unknown";
+    const timeInfo = data["Time"] as Record<string, unknown>;
+    if (timeInfo && typeof timeInfo.Date !== "undefined") {
+      dateStr = String(timeInfo.Date);
+    } else if (typeof strokeGroups[0] === "object" && strokeGroups[0]) {
+      if (typeof strokeGroups[0].Date !== "undefined") {
+        dateStr = String(strokeGroups[0].Date);
+      }
+    }
+
+    const reportId =
+      parsedUrl.searchParams.get("r") ||
+      parsedUrl.searchParams.get("a") ||
+      parsedUrl.searchParams.get("ReportId") ||
+      "unknown";
+
+    const session: SessionData = {
+      date: dateStr,
+      report_id: reportId,
+      url_type: "StrokeGroups" in data ? "activity" : "report",
+      club_groups: [],
+      metric_names: [],
+      metadata_params: {},
+    };
+
+    for (const [key, value] of parsedUrl.searchParams) {
+      session.metadata_params[key] = value;
+    }
+
+    const allMetricNames = new Set<string>();
+
+    for (const group of strokeGroups) {
+      if (!group || typeof group !== "object") continue;
+
+      const clubName = String(group["Club"] || "Unknown");
+      const shots: Shot[] = [];
+
+      const strokes = group["Strokes"];
+      if (Array.isArray(strokes)) {
+        for (let i = 0; i < strokes.length; i++) {
+          const stroke = strokes[i];
+          if (!stroke || typeof stroke !== "object") continue;
+
+          const normalized = (stroke["NormalizedMeasurement"] as Record<string, unknown>) || {};
+          const raw = (stroke["Measurement"] as Record<string, unknown>) || {};
+          const merged = { ...raw, ...normalized };
+
+          const shotMetrics: Record<string, number> = {};
+          for (const [key, value] of Object.entries(merged)) {
+            if (!metricKeys.has(key)) continue;
+            let numValue: number | null = null;
+            if (typeof value === "number") {
+              numValue = value;
+            } else if (typeof value === "string") {
+              const trimmed = value.trim();
+              numValue = isNaN(parseFloat(trimmed)) ? null : parseFloat(trimmed);
+            }
+            if (numValue !== null) {
+              allMetricNames.add(key);
+              shotMetrics[key] = numValue;
+            }
+          }
+
+          if (Object.keys(shotMetrics).length > 0) {
+            shots.push({ shot_number: i, metrics: shotMetrics });
+          }
+        }
+      }
+
+      if (shots.length > 0) {
+        // The group's own id, else its first stroke's: the same on every metric page
+        const firstStroke = Array.isArray(strokes) && strokes[0] && typeof strokes[0] === "object"
+          ? strokes[0] as Record<string, unknown>
+          : {};
+        const groupId = [group["Id"], firstStroke["Id"], firstStroke["Time"]]
+          .find((value) => typeof value === "string" || typeof value === "number");
+        session.club_groups.push({
+          club_name: clubName,
+          ...(groupId !== undefined ? { group_id: String(groupId) } : {}),
+          shots,
+          averages: {},
+          consistency: {},
+        });
+      }
+    }
+
+    session.metric_names = Array.from(allMetricNames).sort();
+    return session.club_groups.length > 0 ? session : null;
+  } catch (error) {
+    console.error("TrackPull: Parsing failed:", error);
+    return null;
+  }
+}
@@ -12,6 +12,8 @@ export interface Shot {
 
 export interface ClubGroup {
   club_name: string;
+  /** The payload's id for the stroke group, when it has one (see session_merge). */
+  group_id?: string;
   shots: Shot[];
   averages: Record<string, MetricValue>;
   consistency: Record<string, MetricValue>;
@@ -27,6 +29,26 @@ export interface SessionData {
   metadata_params: Record<string, string>;
 }
 
+/**
+ * Column-per-metric club group. columns[i] holds metric_names[i] for every
+ * shot, aligned with shot_numbers; NaN marks a shot without that metric.
+ */
+export interface ColumnarClubGroup {
+  club_name: string;
+  shot_numbers: Int32Array;
+  /** Per-shot tags, or null when no shot in the group is tagged. */
+  tags: Array<string | undefined> | null;
+  columns: Float64Array[];
+  averages: Record<string, MetricValue>;
+  consistency: Record<string, MetricValue>;
+}
+
+/** SessionData with typed-array metric columns instead of per-shot records. */
+export interface ColumnarSessionData extends Omit<SessionData, "club_groups"> {
+  layout: "columnar";
+  club_groups: ColumnarClubGroup[];
+}
+
 /** SessionData without raw_api_data — safe for persistent storage. */
 export type SessionSnapshot = Omit<SessionData, "raw_api_data">;
 
@@ -3,34 +3,52 @@
  */
 
 import { STORAGE_KEYS } from "../shared/constants";
-import { migrateLegacyPref, getApiSourceUnitSystem, normalizeMetricValue, DISTANCE_LABELS, SPEED_LABELS, DEFAULT_UNIT_CHOICE } from "../shared/unit_normalization";
+import { migrateLegacyPref, getApiSourceUnitSystem, normalizeMetricValue, toMetricNumber, DISTANCE_LABELS, SPEED_LABELS, DEFAULT_UNIT_CHOICE } from "../shared/unit_normalization";
 import type { SessionData, Shot } from "../models/types";
+import type { MetricValue } from "../shared/unit_normalization";
+import { getClubShotViews, type ClubShotView } from "../shared/columnar_session";
+import { migrateSnapshotMetrics } from "../shared/history";
 import type { UnitChoice } from "../shared/unit_normalization";
 import type { ActivitySummary, FetchActivitiesQueryCandidate, ImportStatus } from "../shared/import_types";
 import {
-  FETCH_ACTIVITIES_MAX_PAGES,
-  FETCH_ACTIVITIES_PAGE_SIZE,
   FETCH_ACTIVITIES_QUERY_CANDIDATES,
-  IMPORT_SESSION_QUERY_CANDIDATES,
   normalizeActivitySummaries,
   normalizeActivitySummaryPage,
 } from "../shared/import_types";
 import {
-  createBulkImportJob,
-  completeBulkImportJob,
-  failBulkImportItem,
+  findBulkImportItem,
   getBulkImportProgressLabel,
-  getNextBulkImportItem,
-  pauseBulkImportJob,
-  recoverInterruptedBulkImportJob,
-  resetFailedBulkImportItems,
-  startBulkImportJob,
-  updateBulkImportItem,
   type BulkImportJob,
-  type BulkImportSaveResult,
 } from "../shared/bulk_import";
-import { getBulkImportedSessions, clearBulkImportedSessions } from "../shared/bulk_import_store";
-import { writeBulkCsv } from "../shared/csv_writer";
+import {
+  applyBulkImportJournalChanges,
+  loadStoredBulkImportJob,
+} from "../shared/bulk_import_journal";
+import { buildBulkCsvBlob } from "../shared/bulk_csv_export";
+import {
+  appendUniqueActivities,
+  fetchActivitySummaryPages,
+  fetchNewActivitySummaries,
+  type ActivityPageResult,
+} from "../shared/activity_pages";
+import {
+  createActivityPrefetcher,
+  type ActivityPrefetcher,
+} from "../shared/activity_prefetch";
+import { purgeActivityCache } from "../shared/activity_detail_cache";
+import {
+  createActivitySyncWatermark,
+  getActivitySyncWatermark,
+  getStoredActivities,
+  isOlderThanWatermark,
+  saveActivities,
+} from "../shared/activity_store";
+import {
+  fetchPortalActivityCandidates,
+  fetchPortalGraphQL,
+  formatPortalFetchError,
+  isPortalAuthMessage,
+} from "../shared/portal_import";
 import { writeTsv } from "../shared/tsv_writer";
 import { BUILTIN_PROMPTS } from "../shared/prompt_types";
 import type { CustomPrompt, PromptItem } from "../shared/prompt_types";
@@ -40,17 +58,24 @@ import { hasPortalPermission, requestPortalPermission, PORTAL_ORIGINS } from "..
 import { formatActivityDate, getPortalActivityDisplayLabel } from "../shared/activity_helpers";
 
 export function computeClubAverage(
-  shots: Shot[],
+  shots: Shot[] | ClubShotView,
   metricName: string
 ): number | null {
-  const values = shots
-    .map(s => s.metrics[metricName])
-    .filter(v => v !== undefined && v !== "")
-    .map(v => parseFloat(String(v)));
-  const numericValues = values.filter(v => !isNaN(v));
-  if (numericValues.length === 0) return null;
-  const avg = numericValues.reduce((a, b) => a + b, 0) / numericValues.length;
-  return Math.round(avg * 10) / 10;
+  let sum = 0;
+  let count = 0;
+  const add = (value: MetricValue | undefined): void => {
+    const num = toMetricNumber(value);
+    if (num === null) return;
+    sum += num;
+    count++;
+  };
+  if (Array.isArray(shots)) {
+    for (const shot of shots) add(shot.metrics[metricName]);
+  } else {
+    for (let i = 0; i < shots.shotCount; i++) add(shots.metric(i, metricName));
+  }
+  if (count === 0) return null;
+  return Math.round((sum / count) * 10) / 10;
 }
 
 export function escapeHtml(value: string): string {
@@ -69,8 +94,12 @@ let cachedSurface: "Grass" | "Mat" = "Mat";
 let cachedCustomPrompts: CustomPrompt[] = [];
 let cachedPortalActivities: ActivitySummary[] = [];
 let activeBulkImportJob: BulkImportJob | null = null;
+/** The stored job is running, in the service worker. */
 let bulkImportRunning = false;
-let bulkImportPauseRequested = false;
+/** Imports the user started that are still talking to the portal. */
+let userPortalRequests = 0;
+let activityPrefetcher: ActivityPrefetcher | null = null;
+let activityPrefetchObserver: IntersectionObserver | null = null;
 
 const AI_URLS: Record<string, string> = {
   "ChatGPT": "https://chatgpt.com",
@@ -82,68 +111,12 @@ const AI_URLS: Record<string, string> = {
 const PORTAL_ACTIVITY_PATTERN = /^https:\/\/portal\.trackmangolf\.com\/player\/activities\/([A-Za-z0-9+/=]+)$/;
 const PORTAL_ACTIVITIES_LIST_PATTERN = /^https:\/\/portal\.trackmangolf\.com\/player\/activities\/?$/;
 
-interface PortalGraphQLFetchResponse {
-  success: boolean;
-  data?: {
-    data?: Record<string, unknown> & { node?: unknown };
-    errors?: Array<{ message: string }>;
-  };
-  error?: string;
-}
-
-function isPortalAuthMessage(message: string): boolean {
-  const normalized = message.toLowerCase();
-  return normalized.includes("unauthorized") ||
-    normalized.includes("not authorized") ||
-    normalized.includes("unauthenticated") ||
-    normalized.includes("not logged in");
-}
-
-function isPortalBridgeUnavailableMessage(message: string): boolean {
-  const normalized = message.toLowerCase();
-  return normalized.includes("could not establish connection") ||
-    normalized.includes("receiving end does not exist");
-}
-
-function formatPortalFetchError(message: string): string {
-  if (isPortalBridgeUnavailableMessage(message)) {
-    return "Refresh the Trackman portal tab, then reopen TrackPull";
-  }
-  return isPortalAuthMessage(message)
-    ? "Session expired — log into portal.trackmangolf.com"
-    : message;
-}
-
-async function fetchPortalGraphQL(
-  tabId: number,
-  candidate: FetchActivitiesQueryCandidate,
-  variables?: Record<string, unknown>
-): Promise<PortalGraphQLFetchResponse> {
-  return chrome.tabs.sendMessage(tabId, {
-    type: "PORTAL_GRAPHQL_FETCH",
-    query: candidate.query,
-    variables,
-  }) as Promise<PortalGraphQLFetchResponse>;
-}
-
-function appendUniqueActivities(
-  target: ActivitySummary[],
-  seenIds: Set<string>,
-  activities: ActivitySummary[]
-): void {
-  for (const activity of activities) {
-    if (seenIds.has(activity.id)) continue;
-    seenIds.add(activity.id);
-    target.push(activity);
-  }
-}
-
-async function fetchPortalActivitiesForCandidate(
+function createActivityPageFetcher(
   tabId: number,
   candidate: FetchActivitiesQueryCandidate
-): Promise<{ activities?: ActivitySummary[]; error?: string }> {
-  if (!candidate.paginated) {
-    const fetchResponse = await fetchPortalGraphQL(tabId, candidate);
+): (skip: number, take: number) => Promise<ActivityPageResult> {
+  return async (skip, take) => {
+    const fetchResponse = await fetchPortalGraphQL(tabId, candidate, { skip, take });
     if (!fetchResponse?.success) {
       return { error: fetchResponse?.error ?? "Failed to fetch activities" };
     }
@@ -153,18 +126,17 @@ async function fetchPortalActivitiesForCandidate(
       return { error: graphQLErrors[0].message };
     }
 
-    return { activities: normalizeActivitySummaries(fetchResponse.data?.data) };
-  }
-
-  const activities: ActivitySummary[] = [];
-  const seenIds = new Set<string>();
-  let skip = 0;
+    return { page: normalizeActivitySummaryPage(fetchResponse.data?.data) };
+  };
+}
 
-  for (let page = 0; page < FETCH_ACTIVITIES_MAX_PAGES; page += 1) {
-    const fetchResponse = await fetchPortalGraphQL(tabId, candidate, {
-      skip,
-      take: FETCH_ACTIVITIES_PAGE_SIZE,
-    });
+async function fetchPortalActivitiesForCandidate(
+  tabId: number,
+  candidate: FetchActivitiesQueryCandidate,
+  onFirstPage?: (activities: ActivitySummary[]) => void
+): Promise<{ activities?: ActivitySummary[]; error?: string }> {
+  if (!candidate.paginated) {
+    const fetchResponse = await fetchPortalGraphQL(tabId, candidate);
     if (!fetchResponse?.success) {
       return { error: fetchResponse?.error ?? "Failed to fetch activities" };
     }
@@ -174,101 +146,94 @@ async function fetchPortalActivitiesForCandidate(
       return { error: graphQLErrors[0].message };
     }
 
-    const summaryPage = normalizeActivitySummaryPage(fetchResponse.data?.data);
-    appendUniqueActivities(activities, seenIds, summaryPage.activities);
-
-    const consumedCount = skip + summaryPage.itemCount;
-    if (
-      summaryPage.hasNextPage === false ||
-      summaryPage.itemCount === 0 ||
-      (summaryPage.hasNextPage === null && summaryPage.itemCount < FETCH_ACTIVITIES_PAGE_SIZE) ||
-      (summaryPage.totalCount !== null && consumedCount >= summaryPage.totalCount)
-    ) {
-      return { activities };
-    }
-    skip = consumedCount;
+    return { activities: normalizeActivitySummaries(fetchResponse.data?.data) };
   }
 
-  return { activities };
+  return fetchActivitySummaryPages({
+    fetchPage: createActivityPageFetcher(tabId, candidate),
+    onFirstPage,
+  });
 }
 
-async function fetchPortalActivities(tabId: number): Promise<ActivitySummary[]> {
+async function fetchPortalActivities(
+  tabId: number,
+  onFirstPage?: (activities: ActivitySummary[]) => void
+): Promise<{ activities: ActivitySummary[]; candidateLabel: string }> {
   let firstError: string | undefined;
 
   for (const candidate of FETCH_ACTIVITIES_QUERY_CANDIDATES) {
-    const result = await fetchPortalActivitiesForCandidate(tabId, candidate);
+    const result = await fetchPortalActivitiesForCandidate(tabId, candidate, onFirstPage);
     if (result.error) {
       firstError = firstError ?? result.error;
       continue;
     }
 
-    return result.activities ?? [];
+    return { activities: result.activities ?? [], candidateLabel: candidate.label };
   }
 
   throw new Error(formatPortalFetchError(firstError ?? "No activities found"));
 }
 
-function responseContainsMeasurement(value: unknown): boolean {
-  if (Array.isArray(value)) {
-    return value.some(responseContainsMeasurement);
+/**
+ * Only activities newer than the stored list's watermark, merged in front
+ * of it. Returns null when a full sync is needed instead (nothing stored,
+ * list query changed, delta failed or ran past the page cap).
+ */
+async function syncPortalActivityDelta(
+  tabId: number,
+  onStoredList: (activities: ActivitySummary[]) => void
+): Promise<ActivitySummary[] | null> {
+  const [stored, watermark] = await Promise.all([getStoredActivities(), getActivitySyncWatermark()]);
+  const candidate = FETCH_ACTIVITIES_QUERY_CANDIDATES.find((c) => c.label === watermark?.candidateLabel);
+  if (!watermark || !candidate?.paginated || stored.length === 0) return null;
+
+  onStoredList(stored);
+  const knownIds = new Set(stored.map((activity) => activity.id));
+  const delta = await fetchNewActivitySummaries({
+    fetchPage: createActivityPageFetcher(tabId, candidate),
+    // Anything older than the newest stored activity was already synced
+    isKnown: (activity) => knownIds.has(activity.id) || isOlderThanWatermark(activity, watermark),
+  });
+  if (delta.error || !delta.activities) return null;
+
+  if (delta.reachedKnown) {
+    const merged: ActivitySummary[] = [];
+    const seenIds = new Set<string>();
+    appendUniqueActivities(merged, seenIds, delta.activities);
+    appendUniqueActivities(merged, seenIds, stored);
+    await saveActivities(delta.activities, createActivitySyncWatermark(merged, candidate.label), false);
+    return merged;
   }
-  if (!value || typeof value !== "object") return false;
-
-  const record = value as Record<string, unknown>;
-  if (
-    record.measurement ||
-    record.Measurement ||
-    record.NormalizedMeasurement
-  ) {
-    return true;
+  if (delta.exhausted) {
+    await saveActivities(delta.activities, createActivitySyncWatermark(delta.activities, candidate.label), true);
+    return delta.activities;
   }
-
-  return Object.entries(record).some(([key, nested]) => {
-    if (key === "measurement" || key === "Measurement" || key === "NormalizedMeasurement") {
-      return false;
-    }
-    return responseContainsMeasurement(nested);
-  });
+  return null;
 }
 
-async function fetchPortalActivityCandidates(
+/**
+ * Activity list for the browser: the stored copy plus a delta fetch, or a
+ * full crawl (stored afterwards) on first use or when fullResync is set.
+ * onPartial receives a list to show while the rest loads.
+ */
+async function syncPortalActivities(
   tabId: number,
-  activityId: string
-): Promise<Array<NonNullable<PortalGraphQLFetchResponse["data"]>>> {
-  const payloads: Array<NonNullable<PortalGraphQLFetchResponse["data"]>> = [];
-  let firstError: string | undefined;
-
-  for (const candidate of IMPORT_SESSION_QUERY_CANDIDATES) {
-    const fetchResponse = await chrome.tabs.sendMessage(tabId, {
-      type: "PORTAL_GRAPHQL_FETCH",
-      query: candidate.query,
-      variables: { id: activityId },
-    }) as PortalGraphQLFetchResponse;
-
-    if (!fetchResponse?.success) {
-      firstError = firstError ?? fetchResponse?.error ?? "Failed to fetch activity";
-      continue;
+  fullResync: boolean,
+  onPartial: (activities: ActivitySummary[]) => void
+): Promise<ActivitySummary[]> {
+  if (!fullResync) {
+    try {
+      const synced = await syncPortalActivityDelta(tabId, onPartial);
+      if (synced) return synced;
+    } catch (err) {
+      console.warn("TrackPull: activity list delta sync failed, doing a full sync", err);
     }
-
-    const graphQLErrors = fetchResponse.data?.errors ?? [];
-    if (graphQLErrors.length > 0) {
-      firstError = firstError ?? graphQLErrors[0].message;
-      continue;
-    }
-
-    if (fetchResponse.data) {
-      payloads.push(fetchResponse.data);
-      if (responseContainsMeasurement(fetchResponse.data.data?.node)) {
-        break;
-      }
-    }
-  }
-
-  if (payloads.length === 0) {
-    throw new Error(formatPortalFetchError(firstError ?? "Failed to fetch activity"));
   }
 
-  return payloads;
+  const { activities, candidateLabel } = await fetchPortalActivities(tabId, onPartial);
+  await saveActivities(activities, createActivitySyncWatermark(activities, candidateLabel), true)
+    .catch((err) => console.warn("TrackPull: could not store activity list", err));
+  return activities;
 }
 
 function installImportStatusButtonReset(button: HTMLButtonElement): void {
@@ -292,8 +257,11 @@ async function importPortalActivityFromTab(
 ): Promise<void> {
   button.disabled = true;
   button.textContent = "Importing...";
+  userPortalRequests += 1;
 
   try {
+    // A prefetch of this activity already under way will fill the cache
+    await activityPrefetcher?.whenSettled(activityId);
     const graphqlPayloads = await fetchPortalActivityCandidates(tabId, activityId);
     installImportStatusButtonReset(button);
     void chrome.runtime.sendMessage({
@@ -312,34 +280,13 @@ async function importPortalActivityFromTab(
     showToast(formatPortalFetchError(message), "error");
     button.disabled = false;
     button.textContent = "Import";
+  } finally {
+    userPortalRequests -= 1;
   }
 }
 
-function delay(ms: number): Promise<void> {
-  return new Promise((resolve) => setTimeout(resolve, ms));
-}
-
-function loadStoredBulkImportJob(): Promise<BulkImportJob | null> {
-  return new Promise((resolve) => {
-    chrome.storage.local.get([STORAGE_KEYS.BULK_IMPORT_STATUS], (result) => {
-      resolve((result[STORAGE_KEYS.BULK_IMPORT_STATUS] as BulkImportJob | undefined) ?? null);
-    });
-  });
-}
-
-async function saveBulkImportJob(job: BulkImportJob): Promise<void> {
-  activeBulkImportJob = job;
-  await chrome.storage.local.set({ [STORAGE_KEYS.BULK_IMPORT_STATUS]: job });
-  renderBulkImportJob(job);
-}
-
-function getBulkImportItem(job: BulkImportJob | null, activityId: string) {
-  return job?.items.find((item) => item.activityId === activityId) ?? null;
-}
-
 function getActivityRow(activityId: string): HTMLElement | null {
-  const rows = Array.from(document.querySelectorAll<HTMLElement>(".activity-row"));
-  return rows.find((row) => row.dataset.activityId === activityId) ?? null;
+  return document.querySelector<HTMLElement>(`.activity-row[data-activity-id="${CSS.escape(activityId)}"]`);
 }
 
 function getSelectedPortalActivities(): ActivitySummary[] {
@@ -381,8 +328,13 @@ function updateBulkSelectedCount(): void {
   }
 }
 
-function renderBulkImportJob(job: BulkImportJob | null = activeBulkImportJob): void {
+/** With changedActivityIds, only those rows are updated. */
+function renderBulkImportJob(
+  job: BulkImportJob | null = activeBulkImportJob,
+  changedActivityIds?: string[]
+): void {
   activeBulkImportJob = job;
+  bulkImportRunning = job?.state === "running";
 
   const progressEl = document.getElementById("bulk-import-progress");
   const pauseBtn = document.getElementById("bulk-import-pause-btn") as HTMLButtonElement | null;
@@ -397,24 +349,28 @@ function renderBulkImportJob(job: BulkImportJob | null = activeBulkImportJob): v
         ? `${getBulkImportProgressLabel(job)} | ${job.lastError}`
         : getBulkImportProgressLabel(job);
       progressEl.style.display = "block";
+      progressEl.title = job.diagnostics ?? "";
     } else {
       progressEl.textContent = "";
       progressEl.style.display = "none";
     }
   }
 
-  if (pauseBtn) pauseBtn.disabled = !job || job.state !== "running" || !bulkImportRunning;
+  if (pauseBtn) pauseBtn.disabled = !bulkImportRunning;
   if (resumeBtn) resumeBtn.disabled = !job || job.state !== "paused" || bulkImportRunning;
   if (retryBtn) retryBtn.disabled = !job || job.failed === 0 || bulkImportRunning;
   if (exportBtn) exportBtn.disabled = !job || job.imported === 0;
   if (importAllBtn) importAllBtn.disabled = cachedPortalActivities.length === 0 || bulkImportRunning;
 
-  for (const activity of cachedPortalActivities) {
-    const row = getActivityRow(activity.id);
-    if (!row) continue;
+  const rows: Array<HTMLElement | null> = changedActivityIds
+    ? changedActivityIds.map(getActivityRow)
+    : Array.from(document.querySelectorAll<HTMLElement>(".activity-row"));
+  for (const row of rows) {
+    const activityId = row?.dataset.activityId;
+    if (!row || !activityId) continue;
     const button = row.querySelector<HTMLButtonElement>(".activity-import-btn");
     const checkbox = row.querySelector<HTMLInputElement>(".activity-select");
-    const item = getBulkImportItem(job, activity.id);
+    const item = findBulkImportItem(job, activityId);
 
     if (!button || !checkbox) continue;
 
@@ -450,117 +406,40 @@ function renderBulkImportJob(job: BulkImportJob | null = activeBulkImportJob): v
 
 async function hydrateBulkImportJobControls(): Promise<void> {
   const storedJob = await loadStoredBulkImportJob();
-  if (!storedJob) {
-    renderBulkImportJob(null);
-    return;
-  }
-
-  const recoveredJob = recoverInterruptedBulkImportJob(storedJob);
-  activeBulkImportJob = recoveredJob;
-  renderBulkImportJob(recoveredJob);
-  if (recoveredJob !== storedJob) {
-    await saveBulkImportJob(recoveredJob);
+  renderBulkImportJob(storedJob);
+  // Wakes the service worker, which picks up a job it was stopped in
+  if (storedJob?.state === "running") {
+    void sendBulkImportRequest({ type: "BULK_IMPORT_ENSURE_RUNNING" });
   }
 }
 
-interface BulkImportResponse extends Partial<BulkImportSaveResult> {
-  success: boolean;
-  error?: string;
-}
+type BulkImportRequest =
+  | { type: "BULK_IMPORT_START"; tabId: number; activities: ActivitySummary[] }
+  | { type: "BULK_IMPORT_RESUME"; tabId: number }
+  | { type: "BULK_IMPORT_RETRY"; tabId: number }
+  | { type: "BULK_IMPORT_PAUSE" }
+  | { type: "BULK_IMPORT_ENSURE_RUNNING" };
 
-function saveBulkImportedSession(
-  jobId: string,
-  activityId: string,
-  graphqlPayloads: Array<NonNullable<PortalGraphQLFetchResponse["data"]>>
-): Promise<BulkImportResponse> {
+/** The service worker runs the job; progress arrives through storage.onChanged. */
+function sendBulkImportRequest(request: BulkImportRequest): Promise<void> {
   return new Promise((resolve) => {
-    chrome.runtime.sendMessage({
-      type: "SAVE_BULK_IMPORTED_SESSION",
-      jobId,
-      activityId,
-      graphqlPayloads,
-    }, (response: BulkImportResponse | undefined) => {
-      if (chrome.runtime.lastError) {
-        resolve({ success: false, error: chrome.runtime.lastError.message });
-        return;
-      }
-      resolve(response ?? { success: false, error: "No response from service worker" });
+    chrome.runtime.sendMessage(request, (response: { success: boolean; error?: string } | undefined) => {
+      const error = chrome.runtime.lastError?.message
+        ?? (response?.success ? undefined : response?.error ?? "No response from service worker");
+      if (error) showToast(error, "error");
+      resolve();
     });
   });
 }
 
-async function runBulkImportJob(tabId: number, startingJob: BulkImportJob): Promise<void> {
-  if (bulkImportRunning) return;
-
-  bulkImportRunning = true;
-  bulkImportPauseRequested = false;
-  let job = startBulkImportJob(startingJob);
-  await saveBulkImportJob(job);
-
-  try {
-    while (true) {
-      if (bulkImportPauseRequested) {
-        job = pauseBulkImportJob(job);
-        await saveBulkImportJob(job);
-        showToast("Bulk import paused", "success");
-        break;
-      }
-
-      const nextItem = getNextBulkImportItem(job);
-      if (!nextItem) {
-        job = completeBulkImportJob(job);
-        await saveBulkImportJob(job);
-        showToast(`Bulk import complete: ${job.imported} imported, ${job.failed} failed`, job.failed ? "error" : "success");
-        break;
-      }
-
-      job = updateBulkImportItem(job, nextItem.activityId, {
-        status: "importing",
-        error: undefined,
-      });
-      await saveBulkImportJob(job);
-
-      try {
-        const graphqlPayloads = await fetchPortalActivityCandidates(tabId, nextItem.activityId);
-        const result = await saveBulkImportedSession(job.id, nextItem.activityId, graphqlPayloads);
-
-        if (result.success && result.reportId) {
-          job = updateBulkImportItem(job, nextItem.activityId, {
-            status: "imported",
-            reportId: result.reportId,
-            shotCount: result.shotCount,
-            error: undefined,
-          });
-        } else {
-          const message = result.error ?? "Import failed";
-          job = failBulkImportItem(job, nextItem.activityId, message);
-          if (isPortalAuthMessage(message)) {
-            job = { ...pauseBulkImportJob(job), lastError: message };
-            await saveBulkImportJob(job);
-            showToast(message, "error");
-            break;
-          }
-        }
-      } catch (err) {
-        const message = err instanceof Error && err.message
-          ? err.message
-          : "Unable to fetch activity";
-        job = failBulkImportItem(job, nextItem.activityId, message);
-
-        if (isPortalAuthMessage(message)) {
-          job = { ...pauseBulkImportJob(job), lastError: message };
-          await saveBulkImportJob(job);
-          showToast(message, "error");
-          break;
-        }
-      }
-
-      await saveBulkImportJob(job);
-      await delay(250);
-    }
-  } finally {
-    bulkImportRunning = false;
-    renderBulkImportJob(job);
+function announceBulkImportResult(previous: BulkImportJob | null, job: BulkImportJob | null): void {
+  if (!job || previous?.id !== job.id || previous.state !== "running" || job.state === "running") return;
+  if (job.state === "complete") {
+    showToast(`Bulk import complete: ${job.imported} imported, ${job.failed} failed`, job.failed ? "error" : "success");
+  } else if (job.lastError) {
+    showToast(job.lastError, "error");
+  } else if (job.state === "paused") {
+    showToast("Bulk import paused", "success");
   }
 }
 
@@ -570,28 +449,28 @@ async function startNewBulkImport(tabId: number, activities: ActivitySummary[]):
     return;
   }
   if (bulkImportRunning) return;
-
-  const previousJob = activeBulkImportJob;
-  const job = createBulkImportJob(activities);
-  if (previousJob) {
-    await clearBulkImportedSessions(previousJob.id).catch((err) => {
-      console.warn("Could not clear previous bulk import archive:", err);
-    });
-  }
-  await clearBulkImportedSessions(job.id).catch(() => undefined);
-  await runBulkImportJob(tabId, job);
+  await sendBulkImportRequest({ type: "BULK_IMPORT_START", tabId, activities });
 }
 
 async function resumeBulkImport(tabId: number): Promise<void> {
   if (!activeBulkImportJob || bulkImportRunning) return;
-  await runBulkImportJob(tabId, activeBulkImportJob);
+  await sendBulkImportRequest({ type: "BULK_IMPORT_RESUME", tabId });
 }
 
 async function retryFailedBulkImport(tabId: number): Promise<void> {
   if (!activeBulkImportJob || bulkImportRunning) return;
-  const retryJob = resetFailedBulkImportItems(activeBulkImportJob);
-  await saveBulkImportJob(retryJob);
-  await runBulkImportJob(tabId, retryJob);
+  await sendBulkImportRequest({ type: "BULK_IMPORT_RETRY", tabId });
+}
+
+/** The download keeps reading the blob after it starts; revoke once it ends. */
+function revokeWhenDownloadEnds(downloadId: number, url: string): void {
+  const onChanged = (delta: chrome.downloads.DownloadDelta) => {
+    if (delta.id !== downloadId) return;
+    if (delta.state?.current !== "complete" && delta.state?.current !== "interrupted") return;
+    chrome.downloads.onChanged.removeListener(onChanged);
+    URL.revokeObjectURL(url);
+  };
+  chrome.downloads.onChanged.addListener(onChanged);
 }
 
 async function exportBulkImportedCsv(): Promise<void> {
@@ -604,30 +483,30 @@ async function exportBulkImportedCsv(): Promise<void> {
   if (exportBtn) exportBtn.disabled = true;
 
   try {
-    const sessions = await getBulkImportedSessions(activeBulkImportJob.id);
-    if (sessions.length === 0) {
+    const { blob, sessionCount } = await buildBulkCsvBlob(activeBulkImportJob.id, {
+      includeAverages: getIncludeAveragesChoice(),
+      unitChoice: cachedUnitChoice,
+      hittingSurface: cachedSurface,
+    });
+    if (sessionCount === 0) {
       showToast("No imported sessions to export", "error");
       return;
     }
 
-    const csvContent = writeBulkCsv(
-      sessions,
-      getIncludeAveragesChoice(),
-      undefined,
-      cachedUnitChoice,
-      cachedSurface
-    );
     const filename = getSafeBulkFilename();
+    const url = URL.createObjectURL(blob);
 
     await new Promise<void>((resolve, reject) => {
       chrome.downloads.download({
-        url: `data:text/csv;charset=utf-8,${encodeURIComponent(csvContent)}`,
+        url,
         filename,
         saveAs: false,
-      }, () => {
-        if (chrome.runtime.lastError) {
-          reject(new Error(chrome.runtime.lastError.message));
+      }, (downloadId) => {
+        if (chrome.runtime.lastError || downloadId === undefined) {
+          URL.revokeObjectURL(url);
+          reject(new Error(chrome.runtime.lastError?.message ?? "Download did not start"));
         } else {
+          revokeWhenDownloadEnds(downloadId, url);
           resolve();
         }
       });
@@ -700,7 +579,8 @@ function renderBulkImportControls(tabId: number, activities: ActivitySummary[]):
   pauseBtn.textContent = "Pause";
   pauseBtn.disabled = true;
   pauseBtn.addEventListener("click", () => {
-    bulkImportPauseRequested = true;
+    pauseBtn.disabled = true;
+    void sendBulkImportRequest({ type: "BULK_IMPORT_PAUSE" });
   });
 
   const resumeBtn = document.createElement("button");
@@ -750,6 +630,10 @@ function renderPortalActivityBrowser(
   if (!browser || !list) return;
 
   cachedPortalActivities = activities;
+  // Keep selections made while later pages were still loading
+  const checkedIds = new Set(
+    Array.from(list.querySelectorAll<HTMLInputElement>(".activity-select:checked"), (box) => box.value)
+  );
 
   browser.style.display = "block";
   document.getElementById("bulk-import-controls")?.remove();
@@ -772,6 +656,7 @@ function renderPortalActivityBrowser(
     selectBox.className = "activity-select";
     selectBox.type = "checkbox";
     selectBox.value = activity.id;
+    selectBox.checked = checkedIds.has(activity.id);
     selectBox.setAttribute("aria-label", `Select ${formatActivityDate(activity.date)}`);
     selectBox.addEventListener("change", updateBulkSelectedCount);
 
@@ -809,6 +694,49 @@ function renderPortalActivityBrowser(
   list.appendChild(fragment);
   updateBulkSelectedCount();
   void hydrateBulkImportJobControls();
+  observeVisibleActivities(tabId, list, activities);
+}
+
+/** Prefetch details for the rows scrolled into view while the popup is idle. */
+function observeVisibleActivities(tabId: number, list: HTMLElement, activities: ActivitySummary[]): void {
+  activityPrefetchObserver?.disconnect();
+  activityPrefetchObserver = null;
+  if (typeof IntersectionObserver !== "function") return;
+
+  if (!activityPrefetcher) {
+    activityPrefetcher = createActivityPrefetcher({
+      fetch: async ({ id, type }) => {
+        await fetchPortalActivityCandidates(tabId, id, type, undefined, "prefetch");
+      },
+      isBusy: () => userPortalRequests > 0 || bulkImportRunning,
+      isFatalError: isPortalAuthMessage,
+    });
+  }
+  if (activityPrefetcher.isStopped()) return;
+
+  const prefetcher = activityPrefetcher;
+  const visibleIds = new Set<string>();
+  activityPrefetchObserver = new IntersectionObserver((entries) => {
+    for (const entry of entries) {
+      const id = (entry.target as HTMLElement).dataset.activityId;
+      if (!id) continue;
+      if (entry.isIntersecting) visibleIds.add(id);
+      else visibleIds.delete(id);
+    }
+    prefetcher.setTargets(activities.filter((activity) => visibleIds.has(activity.id)));
+  }, { root: list });
+
+  for (const row of Array.from(list.querySelectorAll<HTMLElement>(".activity-row"))) {
+    activityPrefetchObserver.observe(row);
+  }
+}
+
+async function loadPortalActivityBrowser(tabId: number, fullResync: boolean): Promise<void> {
+  const activities = await syncPortalActivities(tabId, fullResync, (partial) => {
+    // A resync keeps the current list on screen until the new one is complete
+    if (!fullResync) renderPortalActivityBrowser(partial, tabId);
+  });
+  renderPortalActivityBrowser(activities, tabId);
 }
 
 /**
@@ -846,8 +774,39 @@ async function checkActiveTabForActivity(): Promise<void> {
         const list = document.getElementById("portal-activity-list");
         if (list) list.innerHTML = `<div class="activity-loading">Loading activities...</div>`;
       }
-      const activities = await fetchPortalActivities(tab.id);
-      renderPortalActivityBrowser(activities, tab.id);
+      const tabId = tab.id;
+      const resyncBtn = document.getElementById("portal-activity-resync-btn") as HTMLButtonElement | null;
+      if (resyncBtn) {
+        resyncBtn.addEventListener("click", async () => {
+          if (bulkImportRunning) return;
+          resyncBtn.disabled = true;
+          try {
+            await loadPortalActivityBrowser(tabId, true);
+            showToast("Activity list resynced", "success");
+          } catch (err) {
+            const message = err instanceof Error && err.message ? err.message : "Unable to fetch activities";
+            showToast(formatPortalFetchError(message), "error");
+          } finally {
+            resyncBtn.disabled = false;
+          }
+        });
+      }
+      const purgeBtn = document.getElementById("portal-cache-purge-btn") as HTMLButtonElement | null;
+      if (purgeBtn) {
+        purgeBtn.addEventListener("click", async () => {
+          purgeBtn.disabled = true;
+          try {
+            const count = await purgeActivityCache();
+            showToast(`Cleared ${count} cached ${count === 1 ? "session" : "sessions"}`, "success");
+          } catch (err) {
+            console.error("Activity cache purge failed:", err);
+            showToast("Could not clear cache", "error");
+          } finally {
+            purgeBtn.disabled = false;
+          }
+        });
+      }
+      await loadPortalActivityBrowser(tabId, false);
     } else {
       detected.style.display = "none";
       noActivity.style.display = "";
@@ -892,10 +851,10 @@ function renderStatCard(): void {
   </div>`;
 
   // Build club rows -- club order follows SessionData.club_groups order (Trackman report order)
-  for (const club of cachedData!.club_groups) {
-    const shotCount = club.shots.length;
-    const rawCarry = computeClubAverage(club.shots, "Carry");
-    const rawSpeed = computeClubAverage(club.shots, "ClubSpeed");
+  for (const club of getClubShotViews(cachedData!)) {
+    const shotCount = club.shotCount;
+    const rawCarry = computeClubAverage(club, "Carry");
+    const rawSpeed = computeClubAverage(club, "ClubSpeed");
 
     const carry = rawCarry !== null
       ? String(normalizeMetricValue(rawCarry, "Carry", unitSystem, cachedUnitChoice))
@@ -1037,7 +996,7 @@ document.addEventListener("DOMContentLoaded", async () => {
     const data = result[STORAGE_KEYS.TRACKMAN_DATA];
     console.log("Popup loaded data:", data ? "has data" : "no data");
 
-    cachedData = (data as SessionData) ?? null;
+    cachedData = data ? migrateSnapshotMetrics(data as SessionData) : null;
 
     updateShotCount(data);
     updateExportButtonVisibility(data);
@@ -1148,9 +1107,18 @@ document.addEventListener("DOMContentLoaded", async () => {
           }
         }
       }
+      // Follow the service worker's bulk import: apply a step to the job in hand, reload anything else
       if (namespace === "local" && changes[STORAGE_KEYS.BULK_IMPORT_STATUS]) {
-        const newJob = changes[STORAGE_KEYS.BULK_IMPORT_STATUS].newValue as BulkImportJob | undefined;
-        renderBulkImportJob(newJob ?? null);
+        const previousJob = activeBulkImportJob;
+        const step = applyBulkImportJournalChanges(previousJob, changes);
+        if (step) {
+          renderBulkImportJob(step.job, step.changedActivityIds);
+        } else {
+          void loadStoredBulkImportJob().then((job) => {
+            renderBulkImportJob(job);
+            announceBulkImportResult(previousJob, job);
+          });
+        }
       }
     });
 
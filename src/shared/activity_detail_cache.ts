@@ -0,0 +1,223 @@
+/**
+ * IndexedDB cache of portal activity detail responses.
+ *
+ * Entries hold the GraphQL payloads fetchPortalActivityCandidates
+ * collected for one activity, keyed by activity id and the id of the
+ * candidate query set (getCandidateSetId), so changing the queries
+ * invalidates every entry. Entries expire after ACTIVITY_CACHE_TTL_MS and
+ * the least recently used are evicted past ACTIVITY_CACHE_MAX_ENTRIES or
+ * ACTIVITY_CACHE_MAX_BYTES (JSON size). Only responses that contained a
+ * measurement are cached.
+ *
+ * One connection is opened lazily and reused, as in bulk_import_store.
+ */
+
+const DB_NAME = "trackpull-activity-cache";
+const DB_VERSION = 1;
+const RESPONSE_STORE = "responses";
+const META_STORE = "meta";
+const LAST_USED_INDEX = "lastUsedAt";
+/** Running total of entry bytes, so eviction need not read every entry. */
+const BYTES_KEY = "bytes";
+
+export const ACTIVITY_CACHE_TTL_MS = 7 * 24 * 60 * 60 * 1000;
+export const ACTIVITY_CACHE_MAX_ENTRIES = 1000;
+export const ACTIVITY_CACHE_MAX_BYTES = 50 * 1024 * 1024;
+
+export interface CachedActivityResponse {
+  key: string;
+  activityId: string;
+  candidateSetId: string;
+  payloads: unknown[];
+  storedAt: number;
+  lastUsedAt: number;
+  bytes: number;
+}
+
+export interface ActivityCacheStats {
+  hits: number;
+  misses: number;
+  expired: number;
+  evicted: number;
+}
+
+const stats: ActivityCacheStats = { hits: 0, misses: 0, expired: 0, evicted: 0 };
+let dbPromise: Promise<IDBDatabase> | null = null;
+
+function getCacheKey(activityId: string, candidateSetId: string): string {
+  return `${activityId}:${candidateSetId}`;
+}
+
+function openCacheDb(): Promise<IDBDatabase> {
+  return new Promise((resolve, reject) => {
+    const request = indexedDB.open(DB_NAME, DB_VERSION);
+
+    request.onupgradeneeded = () => {
+      const db = request.result;
+      if (!db.objectStoreNames.contains(RESPONSE_STORE)) {
+        const store = db.createObjectStore(RESPONSE_STORE, { keyPath: "key" });
+        store.createIndex(LAST_USED_INDEX, LAST_USED_INDEX, { unique: false });
+      }
+      if (!db.objectStoreNames.contains(META_STORE)) {
+        db.createObjectStore(META_STORE);
+      }
+    };
+
+    request.onsuccess = () => resolve(request.result);
+    request.onerror = () => reject(request.error ?? new Error("Could not open activity cache"));
+    request.onblocked = () => reject(new Error("Activity cache is blocked by another tab"));
+  });
+}
+
+function getCacheDb(): Promise<IDBDatabase> {
+  if (dbPromise) return dbPromise;
+
+  const opening = openCacheDb().then((db) => {
+    const forget = () => {
+      if (dbPromise === opening) dbPromise = null;
+    };
+    db.onversionchange = () => {
+      db.close();
+      forget();
+    };
+    db.onclose = forget;
+    return db;
+  });
+  dbPromise = opening;
+  opening.catch(() => {
+    if (dbPromise === opening) dbPromise = null;
+  });
+  return opening;
+}
+
+function requestToPromise<T>(request: IDBRequest<T>): Promise<T> {
+  return new Promise((resolve, reject) => {
+    request.onsuccess = () => resolve(request.result);
+    request.onerror = () => reject(request.error ?? new Error("Activity cache request failed"));
+  });
+}
+
+function transactionDone(tx: IDBTransaction, message: string): Promise<void> {
+  return new Promise((resolve, reject) => {
+    tx.oncomplete = () => resolve();
+    tx.onerror = () => reject(tx.error ?? new Error(message));
+    tx.onabort = () => reject(tx.error ?? new Error(message));
+  });
+}
+
+async function getStoredBytes(meta: IDBObjectStore): Promise<number> {
+  return (await requestToPromise(meta.get(BYTES_KEY)) as number | undefined) ?? 0;
+}
+
+/** Delete least recently used entries until both bounds hold. */
+async function evictLeastRecentlyUsed(store: IDBObjectStore, meta: IDBObjectStore): Promise<void> {
+  let count = await requestToPromise(store.count());
+  let bytes = await getStoredBytes(meta);
+  if (count <= ACTIVITY_CACHE_MAX_ENTRIES && bytes <= ACTIVITY_CACHE_MAX_BYTES) return;
+
+  const cursorRequest = store.index(LAST_USED_INDEX).openCursor();
+  await new Promise<void>((resolve, reject) => {
+    cursorRequest.onsuccess = () => {
+      const cursor = cursorRequest.result;
+      if (!cursor || (count <= ACTIVITY_CACHE_MAX_ENTRIES && bytes <= ACTIVITY_CACHE_MAX_BYTES)) {
+        return resolve();
+      }
+      cursor.delete();
+      count -= 1;
+      bytes -= (cursor.value as CachedActivityResponse).bytes;
+      stats.evicted += 1;
+      cursor.continue();
+    };
+    cursorRequest.onerror = () => reject(cursorRequest.error ?? new Error("Could not evict activity cache"));
+  });
+  meta.put(Math.max(0, bytes), BYTES_KEY);
+}
+
+/** Cached payloads for an activity, or null on a miss or an expired entry. */
+export async function getCachedActivityResponse(
+  activityId: string,
+  candidateSetId: string,
+  now = Date.now()
+): Promise<unknown[] | null> {
+  const db = await getCacheDb();
+  const tx = db.transaction([RESPONSE_STORE, META_STORE], "readwrite");
+  const done = transactionDone(tx, "Could not read activity cache");
+  const store = tx.objectStore(RESPONSE_STORE);
+  const meta = tx.objectStore(META_STORE);
+  const key = getCacheKey(activityId, candidateSetId);
+  const entry = await requestToPromise(store.get(key)) as CachedActivityResponse | undefined;
+
+  let payloads: unknown[] | null = null;
+  if (!entry) {
+    stats.misses += 1;
+  } else if (now - entry.storedAt > ACTIVITY_CACHE_TTL_MS) {
+    store.delete(key);
+    meta.put(Math.max(0, (await getStoredBytes(meta)) - entry.bytes), BYTES_KEY);
+    stats.expired += 1;
+    stats.misses += 1;
+  } else {
+    store.put({ ...entry, lastUsedAt: now });
+    stats.hits += 1;
+    payloads = entry.payloads;
+  }
+
+  await done;
+  return payloads;
+}
+
+export async function putCachedActivityResponse(
+  activityId: string,
+  candidateSetId: string,
+  payloads: unknown[],
+  now = Date.now()
+): Promise<void> {
+  const entry: CachedActivityResponse = {
+    key: getCacheKey(activityId, candidateSetId),
+    activityId,
+    candidateSetId,
+    payloads,
+    storedAt: now,
+    lastUsedAt: now,
+    bytes: JSON.stringify(payloads).length,
+  };
+
+  const db = await getCacheDb();
+  const tx = db.transaction([RESPONSE_STORE, META_STORE], "readwrite");
+  const done = transactionDone(tx, "Could not save to activity cache");
+  const store = tx.objectStore(RESPONSE_STORE);
+  const meta = tx.objectStore(META_STORE);
+  const previous = await requestToPromise(store.get(entry.key)) as CachedActivityResponse | undefined;
+  const bytes = await getStoredBytes(meta);
+  store.put(entry);
+  meta.put(bytes - (previous?.bytes ?? 0) + entry.bytes, BYTES_KEY);
+  await evictLeastRecentlyUsed(store, meta);
+  await done;
+}
+
+/** Remove every cached response; resolves with how many there were. */
+export async function purgeActivityCache(): Promise<number> {
+  const db = await getCacheDb();
+  const tx = db.transaction([RESPONSE_STORE, META_STORE], "readwrite");
+  const done = transactionDone(tx, "Could not clear activity cache");
+  const store = tx.objectStore(RESPONSE_STORE);
+  const count = await requestToPromise(store.count());
+  store.clear();
+  tx.objectStore(META_STORE).clear();
+  await done;
+  return count;
+}
+
+export function getActivityCacheStats(): ActivityCacheStats {
+  return { ...stats };
+}
+
+/** Close the shared connection and zero the counters (tests only). */
+export async function resetActivityCacheForTests(): Promise<void> {
+  for (const key of Object.keys(stats) as Array<keyof ActivityCacheStats>) {
+    stats[key] = 0;
+  }
+  const pending = dbPromise;
+  dbPromise = null;
+  const db = await pending?.catch(() => null);
+  db?.close();
+}
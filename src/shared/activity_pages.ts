@@ -0,0 +1,175 @@
+/**
+ * Paging through the portal activity list.
+ *
+ * The first page is fetched alone. When it reports totalCount, every
+ * remaining offset is known up front and those pages are fetched
+ * concurrently (at most FETCH_ACTIVITIES_PAGE_CONCURRENCY at a time);
+ * otherwise pages follow one another until the list says it is done.
+ * Pages are merged in offset order whatever order they arrive in, so the
+ * result matches a serial walk.
+ *
+ * fetchNewActivitySummaries is the delta variant for a list already held
+ * locally: it walks pages from the newest until it meets a known activity.
+ */
+
+import {
+  FETCH_ACTIVITIES_MAX_PAGES,
+  FETCH_ACTIVITIES_PAGE_SIZE,
+  type ActivitySummary,
+  type ActivitySummaryPage,
+} from "./import_types";
+
+export const FETCH_ACTIVITIES_PAGE_CONCURRENCY = 4;
+
+export type ActivityPageResult = { page: ActivitySummaryPage } | { error: string };
+
+export interface ActivityPagingOptions {
+  fetchPage: (skip: number, take: number) => Promise<ActivityPageResult>;
+  pageSize?: number;
+  maxPages?: number;
+  concurrency?: number;
+  /** Called with the first page's activities when more pages follow. */
+  onFirstPage?: (activities: ActivitySummary[]) => void;
+}
+
+export function appendUniqueActivities(
+  target: ActivitySummary[],
+  seenIds: Set<string>,
+  activities: ActivitySummary[]
+): void {
+  for (const activity of activities) {
+    if (seenIds.has(activity.id)) continue;
+    seenIds.add(activity.id);
+    target.push(activity);
+  }
+}
+
+function isLastPage(page: ActivitySummaryPage, skip: number, pageSize: number): boolean {
+  const consumedCount = skip + page.itemCount;
+  return page.hasNextPage === false ||
+    page.itemCount === 0 ||
+    (page.hasNextPage === null && page.itemCount < pageSize) ||
+    (page.totalCount !== null && consumedCount >= page.totalCount);
+}
+
+/** Results in offset order; at most `concurrency` fetches in flight. */
+async function fetchPagesConcurrently(
+  offsets: number[],
+  pageSize: number,
+  concurrency: number,
+  fetchPage: ActivityPagingOptions["fetchPage"]
+): Promise<ActivityPageResult[]> {
+  const results: ActivityPageResult[] = new Array(offsets.length);
+  let nextIndex = 0;
+  let failed = false;
+
+  const worker = async () => {
+    while (!failed && nextIndex < offsets.length) {
+      const index = nextIndex++;
+      results[index] = await fetchPage(offsets[index], pageSize);
+      // Stop starting new pages once one has failed
+      if ("error" in results[index]) failed = true;
+    }
+  };
+
+  await Promise.all(Array.from({ length: Math.min(concurrency, offsets.length) }, worker));
+  return results;
+}
+
+export async function fetchActivitySummaryPages(
+  options: ActivityPagingOptions
+): Promise<{ activities?: ActivitySummary[]; error?: string }> {
+  const pageSize = options.pageSize ?? FETCH_ACTIVITIES_PAGE_SIZE;
+  const maxPages = options.maxPages ?? FETCH_ACTIVITIES_MAX_PAGES;
+  const concurrency = Math.max(1, options.concurrency ?? FETCH_ACTIVITIES_PAGE_CONCURRENCY);
+  const activities: ActivitySummary[] = [];
+  const seenIds = new Set<string>();
+  let skip = 0;
+  let pagesFetched = 0;
+
+  const first = await options.fetchPage(0, pageSize);
+  if ("error" in first) return { error: first.error };
+  pagesFetched += 1;
+  appendUniqueActivities(activities, seenIds, first.page.activities);
+  if (isLastPage(first.page, 0, pageSize)) return { activities };
+  skip = first.page.itemCount;
+  options.onFirstPage?.(activities.slice());
+
+  const totalCount = first.page.totalCount;
+  if (totalCount !== null) {
+    const offsets: number[] = [];
+    for (let offset = skip; offset < totalCount && pagesFetched + offsets.length < maxPages; offset += pageSize) {
+      offsets.push(offset);
+    }
+
+    const results = await fetchPagesConcurrently(offsets, pageSize, concurrency, options.fetchPage);
+    for (const [i, result] of results.entries()) {
+      if (!result) continue;
+      if ("error" in result) return { error: result.error };
+      pagesFetched += 1;
+      appendUniqueActivities(activities, seenIds, result.page.activities);
+      // A short page means the list shrank while paging; nothing follows it
+      if (isLastPage(result.page, offsets[i], pageSize)) return { activities };
+      skip = offsets[i] + result.page.itemCount;
+    }
+  }
+
+  // No totalCount, or the list grew past it: continue one page at a time
+  while (pagesFetched < maxPages) {
+    const result = await options.fetchPage(skip, pageSize);
+    if ("error" in result) return { error: result.error };
+    pagesFetched += 1;
+    appendUniqueActivities(activities, seenIds, result.page.activities);
+    if (isLastPage(result.page, skip, pageSize)) return { activities };
+    skip += result.page.itemCount;
+  }
+
+  return { activities };
+}
+
+export interface DeltaPagingOptions {
+  fetchPage: ActivityPagingOptions["fetchPage"];
+  /** True for an activity already held locally; paging stops at the first one. */
+  isKnown: (activity: ActivitySummary) => boolean;
+  pageSize?: number;
+  maxPages?: number;
+}
+
+export interface DeltaPagingResult {
+  /** Activities newer than the first known one, newest first. */
+  activities?: ActivitySummary[];
+  /** A known activity was reached, so activities is exactly the delta. */
+  reachedKnown?: boolean;
+  /** The list ended before a known activity: activities is the whole list. */
+  exhausted?: boolean;
+  error?: string;
+}
+
+/**
+ * Pages from the newest activity until a known one. Neither reachedKnown
+ * nor exhausted means maxPages ran out first and a full sync is needed.
+ */
+export async function fetchNewActivitySummaries(options: DeltaPagingOptions): Promise<DeltaPagingResult> {
+  const pageSize = options.pageSize ?? FETCH_ACTIVITIES_PAGE_SIZE;
+  const maxPages = options.maxPages ?? FETCH_ACTIVITIES_MAX_PAGES;
+  const activities: ActivitySummary[] = [];
+  const seenIds = new Set<string>();
+  let skip = 0;
+
+  for (let page = 0; page < maxPages; page += 1) {
+    const result = await options.fetchPage(skip, pageSize);
+    if ("error" in result) return { error: result.error };
+
+    const knownIndex = result.page.activities.findIndex(options.isKnown);
+    if (knownIndex >= 0) {
+      appendUniqueActivities(activities, seenIds, result.page.activities.slice(0, knownIndex));
+      return { activities, reachedKnown: true };
+    }
+    appendUniqueActivities(activities, seenIds, result.page.activities);
+
+    if (isLastPage(result.page, skip, pageSize)) return { activities, exhausted: true };
+    skip += result.page.itemCount;
+  }
+
+  return { activities };
+}
@@ -0,0 +1,119 @@
+/**
+ * Idle-time prefetch of activity details for the activity browser.
+ *
+ * The popup hands the prefetcher the activities currently scrolled into
+ * view; when the browser is idle it fetches them one at a time through
+ * the same path an import uses, which leaves the payloads in the activity
+ * detail cache. Prefetch only runs while isBusy() is false, so a click or
+ * a bulk import always goes first, and it stops for good on an auth error.
+ */
+
+/** Upper bound on activities fetched ahead of a click per popup session. */
+export const PREFETCH_MAX_ACTIVITIES = 25;
+/** How long an idle callback may wait before running anyway. */
+export const PREFETCH_IDLE_TIMEOUT_MS = 2000;
+
+export interface PrefetchTarget {
+  id: string;
+  type?: string | null;
+}
+
+export interface ActivityPrefetchStats {
+  prefetched: number;
+  failed: number;
+  /** Idle callbacks that found a user request in progress and waited. */
+  yielded: number;
+}
+
+export interface ActivityPrefetcherOptions {
+  fetch: (target: PrefetchTarget) => Promise<void>;
+  /** True while a user-initiated portal request is running. */
+  isBusy: () => boolean;
+  isFatalError: (message: string) => boolean;
+  /** Defaults to requestIdleCallback, or a timer where that is missing. */
+  scheduleIdle?: (callback: () => void) => void;
+  maxActivities?: number;
+}
+
+export interface ActivityPrefetcher {
+  /** Replace the queue with these activities, in display order. */
+  setTargets: (targets: PrefetchTarget[]) => void;
+  /** Resolves when a prefetch of this activity in progress settles. */
+  whenSettled: (activityId: string) => Promise<void> | null;
+  stop: () => void;
+  isStopped: () => boolean;
+  getStats: () => ActivityPrefetchStats;
+}
+
+function defaultScheduleIdle(callback: () => void): void {
+  if (typeof requestIdleCallback === "function") {
+    requestIdleCallback(() => callback(), { timeout: PREFETCH_IDLE_TIMEOUT_MS });
+  } else {
+    setTimeout(callback, 50);
+  }
+}
+
+export function createActivityPrefetcher(options: ActivityPrefetcherOptions): ActivityPrefetcher {
+  const scheduleIdle = options.scheduleIdle ?? defaultScheduleIdle;
+  const maxActivities = options.maxActivities ?? PREFETCH_MAX_ACTIVITIES;
+  const stats: ActivityPrefetchStats = { prefetched: 0, failed: 0, yielded: 0 };
+  // Attempted ids, successful or not, are never fetched again
+  const attempted = new Set<string>();
+  let queue: PrefetchTarget[] = [];
+  let inFlight: { id: string; promise: Promise<void> } | null = null;
+  let scheduled = false;
+  let stopped = false;
+
+  const schedule = () => {
+    if (scheduled || stopped || inFlight || queue.length === 0) return;
+    scheduled = true;
+    scheduleIdle(runNext);
+  };
+
+  const runNext = () => {
+    scheduled = false;
+    if (stopped || inFlight) return;
+    if (attempted.size >= maxActivities) {
+      queue = [];
+      return;
+    }
+    if (options.isBusy()) {
+      stats.yielded += 1;
+      schedule();
+      return;
+    }
+
+    const target = queue.shift();
+    if (!target) return;
+    attempted.add(target.id);
+
+    const promise = options.fetch(target).then(
+      () => {
+        stats.prefetched += 1;
+      },
+      (err) => {
+        stats.failed += 1;
+        const message = err instanceof Error ? err.message : String(err);
+        if (options.isFatalError(message)) stopped = true;
+      }
+    ).finally(() => {
+      inFlight = null;
+      schedule();
+    });
+    inFlight = { id: target.id, promise };
+  };
+
+  return {
+    setTargets: (targets) => {
+      queue = targets.filter((target) => !attempted.has(target.id));
+      schedule();
+    },
+    whenSettled: (activityId) => (inFlight?.id === activityId ? inFlight.promise : null),
+    stop: () => {
+      stopped = true;
+      queue = [];
+    },
+    isStopped: () => stopped,
+    getStats: () => ({ ...stats }),
+  };
+}
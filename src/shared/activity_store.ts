@@ -0,0 +1,153 @@
+/**
+ * IndexedDB copy of the portal activity list for the activity browser.
+ *
+ * Activities are stored one record per id, with a sync watermark (newest
+ * activity date and id, the list query that produced it, and when it was
+ * taken) in a separate meta store. Opening the browser reads this copy;
+ * a refresh fetches only pages newer than the watermark
+ * (fetchNewActivitySummaries), and a full resync replaces everything.
+ */
+
+import type { ActivitySummary } from "./import_types";
+
+const DB_NAME = "trackpull-activities";
+const DB_VERSION = 1;
+const ACTIVITY_STORE = "activities";
+const META_STORE = "meta";
+const ORDER_INDEX = "order";
+const WATERMARK_KEY = "watermark";
+
+export interface ActivitySyncWatermark {
+  newestDate: string;
+  newestId: string;
+  /** Label of the list query candidate the list was synced with. */
+  candidateLabel: string;
+  syncedAt: number;
+}
+
+interface StoredActivity extends ActivitySummary {
+  /** Position in the portal's own (newest-first) order at sync time. */
+  order: number;
+}
+
+function openActivityDb(): Promise<IDBDatabase> {
+  return new Promise((resolve, reject) => {
+    const request = indexedDB.open(DB_NAME, DB_VERSION);
+
+    request.onupgradeneeded = () => {
+      const db = request.result;
+      if (!db.objectStoreNames.contains(ACTIVITY_STORE)) {
+        const store = db.createObjectStore(ACTIVITY_STORE, { keyPath: "id" });
+        store.createIndex(ORDER_INDEX, ORDER_INDEX, { unique: false });
+      }
+      if (!db.objectStoreNames.contains(META_STORE)) {
+        db.createObjectStore(META_STORE);
+      }
+    };
+
+    request.onsuccess = () => resolve(request.result);
+    request.onerror = () => reject(request.error ?? new Error("Could not open activity list"));
+    request.onblocked = () => reject(new Error("Activity list is blocked by another tab"));
+  });
+}
+
+function requestToPromise<T>(request: IDBRequest<T>): Promise<T> {
+  return new Promise((resolve, reject) => {
+    request.onsuccess = () => resolve(request.result);
+    request.onerror = () => reject(request.error ?? new Error("Activity list request failed"));
+  });
+}
+
+function transactionDone(tx: IDBTransaction, message: string): Promise<void> {
+  return new Promise((resolve, reject) => {
+    tx.oncomplete = () => resolve();
+    tx.onerror = () => reject(tx.error ?? new Error(message));
+    tx.onabort = () => reject(tx.error ?? new Error(message));
+  });
+}
+
+/** Watermark for a newest-first list, or null for an empty one. */
+export function createActivitySyncWatermark(
+  activities: ActivitySummary[],
+  candidateLabel: string,
+  now = Date.now()
+): ActivitySyncWatermark | null {
+  if (activities.length === 0) return null;
+  return { newestDate: activities[0].date, newestId: activities[0].id, candidateLabel, syncedAt: now };
+}
+
+/**
+ * True when the activity is dated strictly before the watermark's newest
+ * activity. Dates are compared as timestamps, since the portal's formats
+ * do not all sort as strings; an activity or watermark without a parseable
+ * date is never treated as older.
+ */
+export function isOlderThanWatermark(activity: ActivitySummary, watermark: ActivitySyncWatermark): boolean {
+  const activityTime = Date.parse(activity.date);
+  const newestTime = Date.parse(watermark.newestDate);
+  if (Number.isNaN(activityTime) || Number.isNaN(newestTime)) return false;
+  return activityTime < newestTime;
+}
+
+/** Stored activities in portal order (newest first). */
+export async function getStoredActivities(): Promise<ActivitySummary[]> {
+  const db = await openActivityDb();
+  let records: StoredActivity[];
+  try {
+    const tx = db.transaction(ACTIVITY_STORE, "readonly");
+    const index = tx.objectStore(ACTIVITY_STORE).index(ORDER_INDEX);
+    records = await requestToPromise(index.getAll()) as StoredActivity[];
+  } finally {
+    db.close();
+  }
+  return records.map(({ order: _, ...activity }) => activity);
+}
+
+export async function getActivitySyncWatermark(): Promise<ActivitySyncWatermark | null> {
+  const db = await openActivityDb();
+  try {
+    const tx = db.transaction(META_STORE, "readonly");
+    const watermark = await requestToPromise(tx.objectStore(META_STORE).get(WATERMARK_KEY));
+    return (watermark as ActivitySyncWatermark | undefined) ?? null;
+  } finally {
+    db.close();
+  }
+}
+
+/**
+ * Store a newest-first list and its watermark. With replace, activities
+ * not in the list are dropped (full resync); otherwise the list is put in
+ * front of what is already stored (delta sync).
+ */
+export async function saveActivities(
+  activities: ActivitySummary[],
+  watermark: ActivitySyncWatermark | null,
+  replace: boolean
+): Promise<void> {
+  const db = await openActivityDb();
+  try {
+    const tx = db.transaction([ACTIVITY_STORE, META_STORE], "readwrite");
+    const done = transactionDone(tx, "Could not save activity list");
+    const store = tx.objectStore(ACTIVITY_STORE);
+    const meta = tx.objectStore(META_STORE);
+
+    if (replace) store.clear();
+
+    // New activities sort ahead of the stored ones
+    let firstOrder = 0;
+    if (!replace && activities.length > 0) {
+      const first = await requestToPromise(store.index(ORDER_INDEX).openCursor());
+      firstOrder = (first ? (first.value as StoredActivity).order : 0) - activities.length;
+    }
+    activities.forEach((activity, i) => {
+      const record: StoredActivity = { ...activity, order: firstOrder + i };
+      store.put(record);
+    });
+
+    if (watermark) meta.put(watermark, WATERMARK_KEY);
+    else if (replace) meta.delete(WATERMARK_KEY);
+    await done;
+  } finally {
+    db.close();
+  }
+}
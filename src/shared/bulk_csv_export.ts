@@ -0,0 +1,82 @@
+/**
+ * Streaming bulk CSV export.
+ *
+ * Pages through a job's sessions in IndexedDB (capture order), formats one
+ * session at a time and appends the text to a Blob. Only one page of
+ * decoded sessions is held at once, and parts are folded into the Blob
+ * every BLOB_FOLD_PARTS so the string array never grows with the job. The
+ * event loop is yielded between pages so the popup stays responsive.
+ */
+
+import {
+  BULK_SESSION_PAGE_SIZE,
+  getBulkImportedSessionSummary,
+  iterateBulkImportedSessions,
+} from "./bulk_import_store";
+import {
+  createBulkCsvLayout,
+  writeBulkCsvHeader,
+  writeBulkCsvSessionRows,
+} from "./csv_writer";
+import { DEFAULT_UNIT_CHOICE, type UnitChoice } from "./unit_normalization";
+
+/** String parts kept before they are folded into the Blob. */
+export const BLOB_FOLD_PARTS = 64;
+
+export interface BulkCsvExportOptions {
+  includeAverages?: boolean;
+  metricOrder?: string[];
+  unitChoice?: UnitChoice;
+  hittingSurface?: "Grass" | "Mat";
+  pageSize?: number;
+}
+
+export interface BulkCsvExport {
+  blob: Blob;
+  sessionCount: number;
+}
+
+const CSV_MIME_TYPE = "text/csv;charset=utf-8";
+
+function yieldToEventLoop(): Promise<void> {
+  return new Promise((resolve) => setTimeout(resolve, 0));
+}
+
+/**
+ * Build the bulk CSV for a job as a Blob. The text matches writeBulkCsv
+ * over the same sessions; sessionCount is 0 when the job has none.
+ */
+export async function buildBulkCsvBlob(
+  jobId: string,
+  options: BulkCsvExportOptions = {}
+): Promise<BulkCsvExport> {
+  const pageSize = options.pageSize ?? BULK_SESSION_PAGE_SIZE;
+
+  // The header depends on every session's metrics and tags
+  const summary = await getBulkImportedSessionSummary(jobId, pageSize);
+  const layout = createBulkCsvLayout(
+    summary.metricNames,
+    summary.hasTags,
+    options.includeAverages ?? true,
+    options.metricOrder,
+    options.unitChoice ?? DEFAULT_UNIT_CHOICE
+  );
+
+  let blob = new Blob([], { type: CSV_MIME_TYPE });
+  let parts: string[] = [writeBulkCsvHeader(layout, options.hittingSurface)];
+  let sessionCount = 0;
+
+  for await (const session of iterateBulkImportedSessions(jobId, pageSize)) {
+    sessionCount += 1;
+    const rows = writeBulkCsvSessionRows(session, layout);
+    if (rows) parts.push(`\n${rows}`);
+
+    if (parts.length >= BLOB_FOLD_PARTS) {
+      blob = new Blob([blob, ...parts], { type: CSV_MIME_TYPE });
+      parts = [];
+    }
+    if (sessionCount % pageSize === 0) await yieldToEventLoop();
+  }
+
+  return { blob: new Blob([blob, ...parts], { type: CSV_MIME_TYPE }), sessionCount };
+}
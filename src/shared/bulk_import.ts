@@ -1,3 +1,17 @@
+/**
+ * Bulk import job state.
+ *
+ * Transitions that touch one item (updateBulkImportItem and friends) are
+ * O(1): the item is found through an id-to-index map, imported/failed are
+ * adjusted by the change rather than recounted, and the new item replaces
+ * the old one in the same items array. The job returned shares its items
+ * with the job passed in, so a caller that needs the older job must take
+ * snapshotBulkImportJob first. nextPendingIndex is a cursor with no pending
+ * item before it; claiming an item at or after it moves it past, so
+ * getNextBulkImportItem does not rescan finished items. Whole-job
+ * transitions (pause, retry) build a new items array and recount.
+ */
+
 import type { ActivitySummary } from "./import_types";
 
 export type BulkImportItemStatus =
@@ -34,6 +48,18 @@ export interface BulkImportJob {
   failed: number;
   currentActivityId?: string;
   lastError?: string;
+  /** When the current (or last) run started, for throughput. */
+  runStartedAt?: number;
+  /** Items already finished when that run started. */
+  runStartCompleted?: number;
+  /** Activities finished per minute during the current (or last) run. */
+  throughput?: number;
+  /** No item before this index is pending. */
+  nextPendingIndex?: number;
+  /** Portal tab the job fetches through. */
+  tabId?: number;
+  /** Request statistics from the engine, for the progress tooltip. */
+  diagnostics?: string;
   items: BulkImportItem[];
 }
 
@@ -51,20 +77,46 @@ function getActivityDetail(activity: ActivitySummary): string {
   return activity.strokeCount === null ? "" : `${activity.strokeCount} shots`;
 }
 
-function countStatus(items: BulkImportItem[], status: BulkImportItemStatus): number {
-  return items.filter((item) => item.status === status).length;
+/**
+ * Built once per job's item positions. A snapshot copies the items array
+ * without moving anything, so the copy reuses the same map.
+ */
+const itemIndexes = new WeakMap<BulkImportItem[], Map<string, number>>();
+
+function getItemIndex(items: BulkImportItem[]): Map<string, number> {
+  let index = itemIndexes.get(items);
+  if (!index) {
+    index = new Map(items.map((item, i) => [item.activityId, i]));
+    itemIndexes.set(items, index);
+  }
+  return index;
 }
 
+/** Full recount, for transitions that rebuild items anyway. */
 function recalculateJob(job: BulkImportJob, now: number): BulkImportJob {
+  let imported = 0;
+  let failed = 0;
+  let firstPending = -1;
+  job.items.forEach((item, i) => {
+    if (item.status === "imported") imported += 1;
+    else if (item.status === "failed") failed += 1;
+    else if (item.status === "pending" && firstPending < 0) firstPending = i;
+  });
+
   return {
     ...job,
     updatedAt: now,
     total: job.items.length,
-    imported: countStatus(job.items, "imported"),
-    failed: countStatus(job.items, "failed"),
+    imported,
+    failed,
+    nextPendingIndex: firstPending < 0 ? job.items.length : firstPending,
   };
 }
 
+function getStatusDelta(status: BulkImportItemStatus, counted: BulkImportItemStatus): number {
+  return status === counted ? 1 : 0;
+}
+
 export function createBulkImportJob(
   activities: ActivitySummary[],
   now = Date.now()
@@ -97,11 +149,17 @@ export function createBulkImportJob(
 }
 
 export function startBulkImportJob(job: BulkImportJob, now = Date.now()): BulkImportJob {
-  return recalculateJob({
+  const started = recalculateJob({
     ...job,
     state: "running",
     lastError: undefined,
+    throughput: undefined,
   }, now);
+  return {
+    ...started,
+    runStartedAt: now,
+    runStartCompleted: getBulkImportCompletedCount(started),
+  };
 }
 
 export function pauseBulkImportJob(job: BulkImportJob, now = Date.now()): BulkImportJob {
@@ -124,17 +182,6 @@ export function completeBulkImportJob(job: BulkImportJob, now = Date.now()): Bul
   }, now);
 }
 
-export function recoverInterruptedBulkImportJob(
-  job: BulkImportJob,
-  now = Date.now()
-): BulkImportJob {
-  if (job.state !== "running" && !job.items.some((item) => item.status === "importing")) {
-    return job;
-  }
-
-  return pauseBulkImportJob(job, now);
-}
-
 export function resetFailedBulkImportItems(
   job: BulkImportJob,
   now = Date.now()
@@ -150,8 +197,25 @@ export function resetFailedBulkImportItems(
   }, now);
 }
 
+export function findBulkImportItem(job: BulkImportJob | null, activityId: string): BulkImportItem | null {
+  if (!job) return null;
+  const i = getItemIndex(job.items).get(activityId);
+  return i === undefined ? null : job.items[i];
+}
+
+/** A copy of the job whose items later steps on `job` leave alone. */
+export function snapshotBulkImportJob(job: BulkImportJob): BulkImportJob {
+  const items = job.items.slice();
+  itemIndexes.set(items, getItemIndex(job.items));
+  return { ...job, items };
+}
+
+/** First pending item at or after the cursor. */
 export function getNextBulkImportItem(job: BulkImportJob): BulkImportItem | null {
-  return job.items.find((item) => item.status === "pending") ?? null;
+  for (let i = job.nextPendingIndex ?? 0; i < job.items.length; i += 1) {
+    if (job.items[i].status === "pending") return job.items[i];
+  }
+  return null;
 }
 
 export function updateBulkImportItem(
@@ -160,22 +224,33 @@ export function updateBulkImportItem(
   patch: Partial<BulkImportItem>,
   now = Date.now()
 ): BulkImportJob {
-  const items = job.items.map((item) => item.activityId === activityId
-    ? { ...item, ...patch, updatedAt: now }
-    : item
-  );
+  const i = getItemIndex(job.items).get(activityId);
+  if (i === undefined) return { ...job, updatedAt: now };
 
-  const nextJob = recalculateJob({
-    ...job,
-    items,
-    currentActivityId: patch.status === "importing" ? activityId : job.currentActivityId,
-  }, now);
+  const previous = job.items[i];
+  const item = { ...previous, ...patch, updatedAt: now };
+  job.items[i] = item;
 
-  if (patch.status && patch.status !== "importing" && nextJob.currentActivityId === activityId) {
-    return { ...nextJob, currentActivityId: undefined };
+  // Items are claimed in getNextBulkImportItem order, so none between the
+  // cursor and a claimed item is pending
+  let nextPendingIndex = job.nextPendingIndex ?? 0;
+  if (item.status === "pending") nextPendingIndex = Math.min(nextPendingIndex, i);
+  else if (item.status === "importing" && i >= nextPendingIndex) nextPendingIndex = i + 1;
+  else if (i === nextPendingIndex) nextPendingIndex = i + 1;
+
+  let currentActivityId = patch.status === "importing" ? activityId : job.currentActivityId;
+  if (patch.status && patch.status !== "importing" && currentActivityId === activityId) {
+    currentActivityId = undefined;
   }
 
-  return nextJob;
+  return {
+    ...job,
+    updatedAt: now,
+    imported: job.imported + getStatusDelta(item.status, "imported") - getStatusDelta(previous.status, "imported"),
+    failed: job.failed + getStatusDelta(item.status, "failed") - getStatusDelta(previous.status, "failed"),
+    nextPendingIndex,
+    currentActivityId,
+  };
 }
 
 export function failBulkImportItem(
@@ -197,6 +272,18 @@ export function getBulkImportCompletedCount(job: BulkImportJob): number {
   return job.imported + job.failed;
 }
 
+/**
+ * Record activities finished per minute since the run started. Left unset
+ * until an item has finished in this run.
+ */
+export function recordBulkImportThroughput(job: BulkImportJob, now = Date.now()): BulkImportJob {
+  if (job.runStartedAt === undefined) return job;
+  const finished = getBulkImportCompletedCount(job) - (job.runStartCompleted ?? 0);
+  const elapsedMs = now - job.runStartedAt;
+  if (finished <= 0 || elapsedMs <= 0) return job;
+  return { ...job, throughput: (finished * 60_000) / elapsedMs };
+}
+
 export function getBulkImportProgressLabel(job: BulkImportJob): string {
   const completed = getBulkImportCompletedCount(job);
   if (job.total === 0) return "No sessions selected";
@@ -204,5 +291,6 @@ export function getBulkImportProgressLabel(job: BulkImportJob): string {
   const parts = [`${completed} / ${job.total}`];
   if (job.imported > 0) parts.push(`${job.imported} imported`);
   if (job.failed > 0) parts.push(`${job.failed} failed`);
+  if (job.throughput !== undefined) parts.push(`${job.throughput.toFixed(1)}/min`);
   return parts.join(" | ");
 }
@@ -0,0 +1,120 @@
+/**
+ * chrome.storage.local persistence for the bulk import job.
+ *
+ * The job is split across keys so a step of a running import writes only
+ * what it changed:
+ * - STORAGE_KEYS.BULK_IMPORT_STATUS: the job without its items (state,
+ *   counters, cursor), rewritten on every step
+ * - STORAGE_KEYS.BULK_IMPORT_ITEMS: the item list as of the last full save
+ * - BULK_IMPORT_ITEM_KEY_PREFIX + activityId: an item changed since then
+ *
+ * saveStoredBulkImportJob writes the item list and drops the journal; it is for
+ * whole-job transitions (create, pause, retry, complete). Loading applies
+ * the journal on top of the saved list.
+ */
+
+import { BULK_IMPORT_ITEM_KEY_PREFIX, STORAGE_KEYS } from "./constants";
+import {
+  findBulkImportItem,
+  updateBulkImportItem,
+  type BulkImportItem,
+  type BulkImportJob,
+} from "./bulk_import";
+
+export type BulkImportJobHeader = Omit<BulkImportJob, "items">;
+
+interface JournaledItem {
+  jobId: string;
+  item: BulkImportItem;
+}
+
+function getJournalKey(activityId: string): string {
+  return BULK_IMPORT_ITEM_KEY_PREFIX + activityId;
+}
+
+function getJobHeader(job: BulkImportJob): BulkImportJobHeader {
+  const { items: _, ...header } = job;
+  return header;
+}
+
+/**
+ * Write the whole job and clear the journal of this and the previous job.
+ * The journal is blanked in the same write, so a worker stopped before the
+ * keys are removed cannot leave old entries to replay onto the new list.
+ */
+export async function saveStoredBulkImportJob(job: BulkImportJob): Promise<void> {
+  const previous = await chrome.storage.local.get([STORAGE_KEYS.BULK_IMPORT_ITEMS]);
+  const previousItems = (previous[STORAGE_KEYS.BULK_IMPORT_ITEMS] as BulkImportItem[] | undefined) ?? [];
+  const journalKeys = new Set([...previousItems, ...job.items].map((item) => getJournalKey(item.activityId)));
+
+  const values: Record<string, unknown> = {
+    [STORAGE_KEYS.BULK_IMPORT_STATUS]: getJobHeader(job),
+    [STORAGE_KEYS.BULK_IMPORT_ITEMS]: job.items,
+  };
+  for (const key of journalKeys) values[key] = null;
+  await chrome.storage.local.set(values);
+  if (journalKeys.size > 0) await chrome.storage.local.remove(Array.from(journalKeys));
+}
+
+/** Write the job header and the given items only. */
+export async function journalBulkImportItems(job: BulkImportJob, activityIds: string[]): Promise<void> {
+  const values: Record<string, unknown> = { [STORAGE_KEYS.BULK_IMPORT_STATUS]: getJobHeader(job) };
+  for (const activityId of activityIds) {
+    const item = findBulkImportItem(job, activityId);
+    if (!item) continue;
+    const record: JournaledItem = { jobId: job.id, item };
+    values[getJournalKey(activityId)] = record;
+  }
+  await chrome.storage.local.set(values);
+}
+
+export async function loadStoredBulkImportJob(): Promise<BulkImportJob | null> {
+  const stored = await chrome.storage.local.get([STORAGE_KEYS.BULK_IMPORT_STATUS, STORAGE_KEYS.BULK_IMPORT_ITEMS]);
+  const header = stored[STORAGE_KEYS.BULK_IMPORT_STATUS] as (BulkImportJobHeader & { items?: BulkImportItem[] }) | undefined;
+  if (!header) return null;
+  // Jobs saved before the split kept their items in the header
+  if (Array.isArray(header.items)) return header as BulkImportJob;
+
+  const items = ((stored[STORAGE_KEYS.BULK_IMPORT_ITEMS] as BulkImportItem[] | undefined) ?? []).slice();
+  if (items.length > 0) {
+    const journal = await chrome.storage.local.get(items.map((item) => getJournalKey(item.activityId)));
+    items.forEach((item, i) => {
+      const record = journal[getJournalKey(item.activityId)] as JournaledItem | null | undefined;
+      if (record && record.jobId === header.id) items[i] = record.item;
+    });
+  }
+
+  return { ...header, items };
+}
+
+/**
+ * Apply a storage.onChanged batch written by journalBulkImportItems to the
+ * job already in hand, so a watcher need not reread the job on every step.
+ * The job's items are updated in place (see updateBulkImportItem); take a
+ * snapshotBulkImportJob first to keep the older job. Returns null for any
+ * other batch (a whole-job save, another job); reload with
+ * loadStoredBulkImportJob then.
+ */
+export function applyBulkImportJournalChanges(
+  job: BulkImportJob | null,
+  changes: Record<string, chrome.storage.StorageChange>
+): { job: BulkImportJob; changedActivityIds: string[] } | null {
+  const header = changes[STORAGE_KEYS.BULK_IMPORT_STATUS]?.newValue as
+    (BulkImportJobHeader & { items?: BulkImportItem[] }) | undefined;
+  if (!job || !header || header.id !== job.id || Array.isArray(header.items)) return null;
+  if (changes[STORAGE_KEYS.BULK_IMPORT_ITEMS]) return null;
+
+  let updated = job;
+  const changedActivityIds: string[] = [];
+  for (const [key, change] of Object.entries(changes)) {
+    if (!key.startsWith(BULK_IMPORT_ITEM_KEY_PREFIX)) continue;
+    const record = change.newValue as JournaledItem | null | undefined;
+    if (!record) continue;
+    if (record.jobId !== job.id) return null;
+    updated = updateBulkImportItem(updated, record.item.activityId, record.item, record.item.updatedAt);
+    changedActivityIds.push(record.item.activityId);
+  }
+
+  // The header carries the writer's counters and cursor
+  return { job: { ...header, items: updated.items }, changedActivityIds };
+}
@@ -0,0 +1,118 @@
+/**
+ * Bounded worker pool for bulk imports with AIMD concurrency.
+ *
+ * Up to `limit` tasks run at once. Each successful task raises the limit
+ * by 1/limit (about +1 per round of successes); a task that reports
+ * "backoff" (GraphQL error, timeout) halves it and holds new dispatches
+ * for backoffDelayMs. A task that reports "stop" (auth failure) or a true
+ * shouldStop() ends dispatching; tasks already in flight are awaited
+ * before the pool resolves.
+ */
+
+export const BULK_IMPORT_MIN_CONCURRENCY = 1;
+export const BULK_IMPORT_MAX_CONCURRENCY = 6;
+export const BULK_IMPORT_INITIAL_CONCURRENCY = 2;
+/** Pause before dispatching again after a backoff. */
+export const BULK_IMPORT_BACKOFF_DELAY_MS = 1000;
+
+/** What a finished task tells the pool about the portal's health. */
+export type PoolTaskOutcome = "success" | "neutral" | "backoff" | "stop";
+
+export interface AdaptiveConcurrency {
+  /** Fractional; getConcurrencySlots rounds it down. */
+  limit: number;
+  min: number;
+  max: number;
+}
+
+export interface AdaptivePoolOptions<T> {
+  /** Next item to run, or null when none remain. Called synchronously per dispatch. */
+  next: () => T | null;
+  run: (item: T) => Promise<PoolTaskOutcome>;
+  shouldStop?: () => boolean;
+  concurrency?: AdaptiveConcurrency;
+  backoffDelayMs?: number;
+  onConcurrencyChange?: (slots: number) => void;
+}
+
+export function createAdaptiveConcurrency(
+  initial = BULK_IMPORT_INITIAL_CONCURRENCY,
+  min = BULK_IMPORT_MIN_CONCURRENCY,
+  max = BULK_IMPORT_MAX_CONCURRENCY
+): AdaptiveConcurrency {
+  return { limit: Math.min(max, Math.max(min, initial)), min, max };
+}
+
+export function getConcurrencySlots(state: AdaptiveConcurrency): number {
+  return Math.max(state.min, Math.floor(state.limit));
+}
+
+/** Additive increase: about one more slot per full round of successes. */
+export function increaseConcurrency(state: AdaptiveConcurrency): AdaptiveConcurrency {
+  return { ...state, limit: Math.min(state.max, state.limit + 1 / state.limit) };
+}
+
+/** Multiplicative decrease. */
+export function decreaseConcurrency(state: AdaptiveConcurrency): AdaptiveConcurrency {
+  return { ...state, limit: Math.max(state.min, state.limit / 2) };
+}
+
+function delay(ms: number): Promise<void> {
+  return new Promise((resolve) => setTimeout(resolve, ms));
+}
+
+/** Run items until none remain or the pool is stopped; resolves with the final concurrency. */
+export async function runAdaptivePool<T>(options: AdaptivePoolOptions<T>): Promise<AdaptiveConcurrency> {
+  const backoffDelayMs = options.backoffDelayMs ?? BULK_IMPORT_BACKOFF_DELAY_MS;
+  let state = options.concurrency ?? createAdaptiveConcurrency();
+  let stopped = false;
+  let exhausted = false;
+  let resumeAt = 0;
+  const inFlight = new Set<Promise<void>>();
+
+  const applyOutcome = (outcome: PoolTaskOutcome) => {
+    const before = getConcurrencySlots(state);
+    if (outcome === "success") {
+      state = increaseConcurrency(state);
+    } else if (outcome === "backoff") {
+      state = decreaseConcurrency(state);
+      resumeAt = Date.now() + backoffDelayMs;
+    } else if (outcome === "stop") {
+      stopped = true;
+    }
+    const after = getConcurrencySlots(state);
+    if (after !== before) options.onConcurrencyChange?.(after);
+  };
+
+  const launch = (item: T) => {
+    const task = options.run(item)
+      .catch((): PoolTaskOutcome => "backoff")
+      .then(applyOutcome)
+      .finally(() => inFlight.delete(task));
+    inFlight.add(task);
+  };
+
+  for (;;) {
+    if (!stopped && options.shouldStop?.()) stopped = true;
+
+    while (!stopped && !exhausted && inFlight.size < getConcurrencySlots(state) && Date.now() >= resumeAt) {
+      const item = options.next();
+      if (item === null) {
+        exhausted = true;
+        break;
+      }
+      launch(item);
+    }
+
+    const waitMs = resumeAt - Date.now();
+    if (inFlight.size === 0) {
+      if (stopped || exhausted) return state;
+      await delay(waitMs);
+      continue;
+    }
+
+    const wakeups: Array<Promise<void>> = [...inFlight];
+    if (!stopped && !exhausted && waitMs > 0) wakeups.push(delay(waitMs));
+    await Promise.race(wakeups);
+  }
+}
@@ -1,9 +1,30 @@
+/**
+ * IndexedDB store for sessions saved by bulk import jobs.
+ *
+ * One connection is opened lazily and reused for the life of the page or
+ * service worker. It is dropped (and reopened on next use) when another
+ * context upgrades or deletes the database (versionchange) or the browser
+ * closes it. Puts are queued and committed together: puts arriving within
+ * GROUP_COMMIT_DELAY_MS of each other share one readwrite transaction.
+ */
+
 import type { SessionData, SessionSnapshot } from "../models/types";
+import { decodeSnapshot, encodeSnapshot, type EncodedSnapshot } from "./snapshot_codec";
+import { sessionHasTags } from "./columnar_session";
 
 const DB_NAME = "trackpull-bulk-import";
-const DB_VERSION = 1;
+const DB_VERSION = 2;
 const SESSION_STORE = "sessions";
 const JOB_INDEX = "jobId";
+/** [jobId, capturedAt, key]: a job's sessions in capture order, unique. */
+const JOB_CAPTURED_INDEX = "jobCapturedAt";
+
+/** How long a queued put waits for company before its batch commits. */
+export const GROUP_COMMIT_DELAY_MS = 10;
+/** A batch this large commits immediately. */
+export const GROUP_COMMIT_MAX_BATCH = 100;
+/** Records fetched per readonly transaction when paging through a job. */
+export const BULK_SESSION_PAGE_SIZE = 50;
 
 export interface StoredBulkImportSession {
   key: string;
@@ -11,9 +32,31 @@ export interface StoredBulkImportSession {
   activityId: string;
   reportId: string;
   capturedAt: number;
-  snapshot: SessionSnapshot;
+  /** Encoded by snapshot_codec; plain objects were written by older versions. */
+  snapshot: EncodedSnapshot | SessionSnapshot;
+  /** Kept beside the encoded snapshot so exports can lay out columns without decoding. */
+  metricNames?: string[];
+  hasTags?: boolean;
 }
 
+/** What a bulk CSV header needs to know about a job's sessions. */
+export interface BulkImportedSessionSummary {
+  count: number;
+  metricNames: string[];
+  hasTags: boolean;
+}
+
+interface QueuedWrite {
+  record: StoredBulkImportSession;
+  resolve: () => void;
+  reject: (error: Error) => void;
+}
+
+let dbPromise: Promise<IDBDatabase> | null = null;
+let writeQueue: QueuedWrite[] = [];
+let flushTimer: ReturnType<typeof setTimeout> | null = null;
+let activeFlush: Promise<void> = Promise.resolve();
+
 function createSnapshot(session: SessionData): SessionSnapshot {
   const { raw_api_data: _, ...snapshot } = session;
   return snapshot;
@@ -29,10 +72,15 @@ function openBulkImportDb(): Promise<IDBDatabase> {
 
     request.onupgradeneeded = () => {
       const db = request.result;
-      if (!db.objectStoreNames.contains(SESSION_STORE)) {
-        const store = db.createObjectStore(SESSION_STORE, { keyPath: "key" });
+      const store = db.objectStoreNames.contains(SESSION_STORE)
+        ? request.transaction!.objectStore(SESSION_STORE)
+        : db.createObjectStore(SESSION_STORE, { keyPath: "key" });
+      if (!store.indexNames.contains(JOB_INDEX)) {
         store.createIndex(JOB_INDEX, JOB_INDEX, { unique: false });
       }
+      if (!store.indexNames.contains(JOB_CAPTURED_INDEX)) {
+        store.createIndex(JOB_CAPTURED_INDEX, ["jobId", "capturedAt", "key"], { unique: true });
+      }
     };
 
     request.onsuccess = () => resolve(request.result);
@@ -41,6 +89,48 @@ function openBulkImportDb(): Promise<IDBDatabase> {
   });
 }
 
+function forgetConnection(db: IDBDatabase): void {
+  void dbPromise?.then((cached) => {
+    if (cached === db) dbPromise = null;
+  }, () => undefined);
+}
+
+/** Shared connection, opened on first use. */
+function getBulkImportDb(): Promise<IDBDatabase> {
+  if (dbPromise) return dbPromise;
+
+  const opening = openBulkImportDb().then((db) => {
+    // Let upgrades and deletes from other contexts proceed; reopen lazily
+    db.onversionchange = () => {
+      db.close();
+      forgetConnection(db);
+    };
+    db.onclose = () => forgetConnection(db);
+    return db;
+  });
+  dbPromise = opening;
+  opening.catch(() => {
+    if (dbPromise === opening) dbPromise = null;
+  });
+  return opening;
+}
+
+/**
+ * Start a transaction on the shared connection. A connection closed under
+ * us (InvalidStateError) is replaced once before giving up.
+ */
+async function startTransaction(mode: IDBTransactionMode): Promise<IDBTransaction> {
+  const db = await getBulkImportDb();
+  try {
+    return db.transaction(SESSION_STORE, mode);
+  } catch (err) {
+    if (!(err instanceof Error) || err.name !== "InvalidStateError") throw err;
+    forgetConnection(db);
+    dbPromise = null;
+    return (await getBulkImportDb()).transaction(SESSION_STORE, mode);
+  }
+}
+
 function requestToPromise<T>(request: IDBRequest<T>): Promise<T> {
   return new Promise((resolve, reject) => {
     request.onsuccess = () => resolve(request.result);
@@ -48,65 +138,184 @@ function requestToPromise<T>(request: IDBRequest<T>): Promise<T> {
   });
 }
 
+function transactionDone(tx: IDBTransaction, message: string): Promise<void> {
+  return new Promise((resolve, reject) => {
+    tx.oncomplete = () => resolve();
+    tx.onerror = () => reject(tx.error ?? new Error(message));
+    tx.onabort = () => reject(tx.error ?? new Error(message));
+  });
+}
+
+async function commitBatch(batch: QueuedWrite[]): Promise<void> {
+  try {
+    const tx = await startTransaction("readwrite");
+    const done = transactionDone(tx, "Could not save imported session");
+    const store = tx.objectStore(SESSION_STORE);
+    for (const write of batch) {
+      store.put(write.record);
+    }
+    await done;
+    for (const write of batch) write.resolve();
+  } catch (err) {
+    const error = err instanceof Error ? err : new Error(String(err));
+    for (const write of batch) write.reject(error);
+  }
+}
+
+/** Commit everything queued so far; resolves once it is durable. */
+export function flushBulkImportWrites(): Promise<void> {
+  if (flushTimer !== null) {
+    clearTimeout(flushTimer);
+    flushTimer = null;
+  }
+
+  if (writeQueue.length > 0) {
+    const batch = writeQueue;
+    writeQueue = [];
+    // Batches commit in arrival order
+    activeFlush = activeFlush.then(() => commitBatch(batch));
+  }
+  return activeFlush;
+}
+
+function enqueueWrite(record: StoredBulkImportSession): Promise<void> {
+  return new Promise((resolve, reject) => {
+    writeQueue.push({ record, resolve, reject });
+    if (writeQueue.length >= GROUP_COMMIT_MAX_BATCH) {
+      void flushBulkImportWrites();
+    } else if (flushTimer === null) {
+      flushTimer = setTimeout(() => {
+        flushTimer = null;
+        void flushBulkImportWrites();
+      }, GROUP_COMMIT_DELAY_MS);
+    }
+  });
+}
+
 export async function putBulkImportedSession(
   jobId: string,
   activityId: string,
   session: SessionData,
   now = Date.now()
 ): Promise<void> {
-  const db = await openBulkImportDb();
-  try {
-    const tx = db.transaction(SESSION_STORE, "readwrite");
-    const store = tx.objectStore(SESSION_STORE);
-    const record: StoredBulkImportSession = {
-      key: getSessionKey(jobId, session.report_id),
-      jobId,
-      activityId,
-      reportId: session.report_id,
-      capturedAt: now,
-      snapshot: createSnapshot(session),
-    };
-    store.put(record);
-    await new Promise<void>((resolve, reject) => {
-      tx.oncomplete = () => resolve();
-      tx.onerror = () => reject(tx.error ?? new Error("Could not save imported session"));
-      tx.onabort = () => reject(tx.error ?? new Error("Could not save imported session"));
-    });
-  } finally {
-    db.close();
+  const plain = createSnapshot(session);
+  const snapshot = await encodeSnapshot(plain);
+  await enqueueWrite({
+    key: getSessionKey(jobId, session.report_id),
+    jobId,
+    activityId,
+    reportId: session.report_id,
+    capturedAt: now,
+    snapshot,
+    metricNames: plain.metric_names,
+    hasTags: sessionHasTags(plain),
+  });
+}
+
+/** One page of a job's records after `after` in [jobId, capturedAt, key] order. */
+async function getBulkImportedRecordPage(
+  jobId: string,
+  after: StoredBulkImportSession | null,
+  pageSize: number
+): Promise<StoredBulkImportSession[]> {
+  const range = after
+    ? IDBKeyRange.bound([jobId, after.capturedAt, after.key], [jobId, Infinity, []], true, false)
+    : IDBKeyRange.bound([jobId, -Infinity, ""], [jobId, Infinity, []]);
+  const tx = await startTransaction("readonly");
+  const index = tx.objectStore(SESSION_STORE).index(JOB_CAPTURED_INDEX);
+  return await requestToPromise(index.getAll(range, pageSize)) as StoredBulkImportSession[];
+}
+
+async function* iterateBulkImportedRecords(
+  jobId: string,
+  pageSize: number
+): AsyncGenerator<StoredBulkImportSession[]> {
+  await flushBulkImportWrites();
+  let after: StoredBulkImportSession | null = null;
+  for (;;) {
+    const page = await getBulkImportedRecordPage(jobId, after, pageSize);
+    if (page.length === 0) return;
+    yield page;
+    if (page.length < pageSize) return;
+    after = page[page.length - 1];
   }
 }
 
-export async function getBulkImportedSessions(jobId: string): Promise<SessionSnapshot[]> {
-  const db = await openBulkImportDb();
-  try {
-    const tx = db.transaction(SESSION_STORE, "readonly");
-    const index = tx.objectStore(SESSION_STORE).index(JOB_INDEX);
-    const sessions = await requestToPromise(index.getAll(jobId));
-    return (sessions as StoredBulkImportSession[])
-      .sort((a, b) => a.capturedAt - b.capturedAt)
-      .map((record) => record.snapshot);
-  } finally {
-    db.close();
+/**
+ * A job's snapshots in capture order, one short readonly transaction per
+ * page and decoded outside it. Only one page is held in memory at a time.
+ */
+export async function* iterateBulkImportedSessions(
+  jobId: string,
+  pageSize = BULK_SESSION_PAGE_SIZE
+): AsyncGenerator<SessionSnapshot> {
+  for await (const page of iterateBulkImportedRecords(jobId, pageSize)) {
+    for (const record of page) {
+      yield await decodeSnapshot(record.snapshot);
+    }
   }
 }
 
-export async function clearBulkImportedSessions(jobId: string): Promise<void> {
-  const db = await openBulkImportDb();
-  try {
-    const tx = db.transaction(SESSION_STORE, "readwrite");
-    const index = tx.objectStore(SESSION_STORE).index(JOB_INDEX);
-    const transactionDone = new Promise<void>((resolve, reject) => {
-      tx.oncomplete = () => resolve();
-      tx.onerror = () => reject(tx.error ?? new Error("Could not clear bulk import store"));
-      tx.onabort = () => reject(tx.error ?? new Error("Could not clear bulk import store"));
-    });
-    const records = await requestToPromise(index.getAllKeys(jobId));
-    for (const key of records) {
-      tx.objectStore(SESSION_STORE).delete(key);
+/**
+ * Metric names and tag presence across a job, from record metadata.
+ * Records written before the metadata existed are decoded instead.
+ */
+export async function getBulkImportedSessionSummary(
+  jobId: string,
+  pageSize = BULK_SESSION_PAGE_SIZE
+): Promise<BulkImportedSessionSummary> {
+  const metricNames = new Set<string>();
+  let hasTags = false;
+  let count = 0;
+
+  for await (const page of iterateBulkImportedRecords(jobId, pageSize)) {
+    for (const record of page) {
+      count += 1;
+      let names = record.metricNames;
+      let tagged = record.hasTags;
+      if (names === undefined || tagged === undefined) {
+        const snapshot = await decodeSnapshot(record.snapshot);
+        names = snapshot.metric_names;
+        tagged = sessionHasTags(snapshot);
+      }
+      for (const name of names) metricNames.add(name);
+      hasTags = hasTags || tagged;
     }
-    await transactionDone;
-  } finally {
-    db.close();
   }
+
+  return { count, metricNames: Array.from(metricNames), hasTags };
+}
+
+export async function getBulkImportedSessions(jobId: string): Promise<SessionSnapshot[]> {
+  // Reads see every put that has already been requested
+  await flushBulkImportWrites();
+  const tx = await startTransaction("readonly");
+  const index = tx.objectStore(SESSION_STORE).index(JOB_INDEX);
+  const sessions = await requestToPromise(index.getAll(jobId));
+  const records = (sessions as StoredBulkImportSession[]).sort((a, b) => a.capturedAt - b.capturedAt);
+  return Promise.all(records.map((record) => decodeSnapshot(record.snapshot)));
+}
+
+export async function clearBulkImportedSessions(jobId: string): Promise<void> {
+  await flushBulkImportWrites();
+  const tx = await startTransaction("readwrite");
+  const index = tx.objectStore(SESSION_STORE).index(JOB_INDEX);
+  const done = transactionDone(tx, "Could not clear bulk import store");
+  const records = await requestToPromise(index.getAllKeys(jobId));
+  for (const key of records) {
+    tx.objectStore(SESSION_STORE).delete(key);
+  }
+  await done;
+}
+
+/** Close the shared connection and drop queued writes (tests only). */
+export async function resetBulkImportStoreForTests(): Promise<void> {
+  if (flushTimer !== null) clearTimeout(flushTimer);
+  flushTimer = null;
+  writeQueue = [];
+  activeFlush = Promise.resolve();
+  const pending = dbPromise;
+  dbPromise = null;
+  const db = await pending?.catch(() => null);
+  db?.close();
 }
@@ -0,0 +1,199 @@
+/**
+ * Columnar SessionData: adapters to and from the row (per-shot record)
+ * shape, plus a per-club read view that the CSV/TSV writers, the stat card
+ * and history accept for either layout.
+ *
+ * In the columnar layout each club group keeps one Float64Array per metric,
+ * aligned to session.metric_names, with NaN for a missing value. Metric
+ * keys are stored once per session instead of once per shot, and numbers
+ * never pass through strings.
+ */
+
+import type {
+  ClubGroup,
+  ColumnarClubGroup,
+  ColumnarSessionData,
+  SessionData,
+  Shot,
+} from "../models/types";
+import type { MetricValue } from "./unit_normalization";
+
+export type AnySessionData = SessionData | ColumnarSessionData;
+
+/** Read-only access to one club group's shots, independent of layout. */
+export interface ClubShotView {
+  club_name: string;
+  shotCount: number;
+  shotNumber(index: number): number;
+  tag(index: number): string | undefined;
+  /** Metric value for a shot, or undefined when the shot lacks it. */
+  metric(index: number, metricName: string): MetricValue | undefined;
+}
+
+/** Column stored for the JSON-safe form (NaN is not representable in JSON). */
+type StoredColumn = Array<number | null>;
+
+export interface StoredColumnarClubGroup
+  extends Omit<ColumnarClubGroup, "shot_numbers" | "columns"> {
+  shot_numbers: number[];
+  columns: StoredColumn[];
+}
+
+export interface StoredColumnarSessionData extends Omit<ColumnarSessionData, "club_groups"> {
+  club_groups: StoredColumnarClubGroup[];
+}
+
+export function isColumnarSession(session: unknown): session is ColumnarSessionData {
+  return typeof session === "object" &&
+    session !== null &&
+    (session as { layout?: unknown }).layout === "columnar";
+}
+
+function toNumber(value: MetricValue | undefined): number {
+  if (typeof value === "number") return value;
+  if (typeof value === "string" && value.trim() !== "") return parseFloat(value);
+  return NaN;
+}
+
+/** Row → columnar. Non-numeric metric values become NaN. */
+export function toColumnarSession(session: SessionData): ColumnarSessionData {
+  const { club_groups, ...rest } = session;
+  const metricNames = session.metric_names;
+
+  return {
+    ...rest,
+    layout: "columnar",
+    club_groups: club_groups.map((club) => {
+      const count = club.shots.length;
+      const shotNumbers = new Int32Array(count);
+      const columns = metricNames.map(() => new Float64Array(count).fill(NaN));
+      let tagged = false;
+      const tags: Array<string | undefined> = new Array(count);
+
+      club.shots.forEach((shot, i) => {
+        shotNumbers[i] = shot.shot_number;
+        tags[i] = shot.tag;
+        if (shot.tag) tagged = true;
+        for (let m = 0; m < metricNames.length; m += 1) {
+          columns[m][i] = toNumber(shot.metrics[metricNames[m]]);
+        }
+      });
+
+      return {
+        club_name: club.club_name,
+        shot_numbers: shotNumbers,
+        tags: tagged ? tags : null,
+        columns,
+        averages: club.averages,
+        consistency: club.consistency,
+      };
+    }),
+  };
+}
+
+/** Columnar → row. Metric values come back as numbers; NaN cells are omitted. */
+export function fromColumnarSession(session: ColumnarSessionData): SessionData {
+  const { club_groups, layout: _, ...rest } = session;
+  const metricNames = session.metric_names;
+
+  return {
+    ...rest,
+    club_groups: club_groups.map((club): ClubGroup => {
+      const shots: Shot[] = [];
+      for (let i = 0; i < club.shot_numbers.length; i += 1) {
+        const metrics: Record<string, MetricValue> = {};
+        for (let m = 0; m < metricNames.length; m += 1) {
+          const value = club.columns[m][i];
+          if (!Number.isNaN(value)) metrics[metricNames[m]] = value;
+        }
+        const shot: Shot = { shot_number: club.shot_numbers[i], metrics };
+        const tag = club.tags?.[i];
+        // JSON turns untagged slots into null
+        if (tag !== undefined && tag !== null) shot.tag = tag;
+        shots.push(shot);
+      }
+      return {
+        club_name: club.club_name,
+        shots,
+        averages: club.averages,
+        consistency: club.consistency,
+      };
+    }),
+  };
+}
+
+/** Typed arrays → plain arrays so the session survives JSON / chrome.storage. */
+export function encodeColumnarSession(session: ColumnarSessionData): StoredColumnarSessionData {
+  return {
+    ...session,
+    club_groups: session.club_groups.map((club) => ({
+      ...club,
+      shot_numbers: Array.from(club.shot_numbers),
+      columns: club.columns.map((column) =>
+        Array.from(column, (value) => (Number.isNaN(value) ? null : value))
+      ),
+    })),
+  };
+}
+
+export function decodeColumnarSession(stored: StoredColumnarSessionData): ColumnarSessionData {
+  return {
+    ...stored,
+    club_groups: stored.club_groups.map((club) => ({
+      ...club,
+      shot_numbers: Int32Array.from(club.shot_numbers),
+      columns: club.columns.map((column) =>
+        Float64Array.from(column, (value) => (value === null ? NaN : value))
+      ),
+    })),
+  };
+}
+
+/** Accept either layout and return the row shape. */
+export function toRowSession(session: AnySessionData): SessionData {
+  return isColumnarSession(session) ? fromColumnarSession(session) : session;
+}
+
+function rowClubView(club: ClubGroup): ClubShotView {
+  return {
+    club_name: club.club_name,
+    shotCount: club.shots.length,
+    shotNumber: (index) => club.shots[index].shot_number,
+    tag: (index) => club.shots[index].tag,
+    metric: (index, metricName) => club.shots[index].metrics[metricName],
+  };
+}
+
+function columnarClubView(club: ColumnarClubGroup, metricIndex: Map<string, number>): ClubShotView {
+  return {
+    club_name: club.club_name,
+    shotCount: club.shot_numbers.length,
+    shotNumber: (index) => club.shot_numbers[index],
+    tag: (index) => club.tags?.[index],
+    metric: (index, metricName) => {
+      const m = metricIndex.get(metricName);
+      if (m === undefined) return undefined;
+      const value = club.columns[m][index];
+      return Number.isNaN(value) ? undefined : value;
+    },
+  };
+}
+
+/** One view per club group, in club_groups order. */
+export function getClubShotViews(session: AnySessionData): ClubShotView[] {
+  if (!isColumnarSession(session)) {
+    return session.club_groups.map(rowClubView);
+  }
+  const metricIndex = new Map(session.metric_names.map((name, i) => [name, i] as const));
+  return session.club_groups.map((club) => columnarClubView(club, metricIndex));
+}
+
+export function sessionHasTags(session: AnySessionData): boolean {
+  return getClubShotViews(session).some((club) => {
+    for (let i = 0; i < club.shotCount; i += 1) {
+      const tag = club.tag(i);
+      if (tag !== undefined && tag !== "") return true;
+    }
+    return false;
+  });
+}
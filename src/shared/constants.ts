@@ -39,6 +39,9 @@ export const METRIC_DISPLAY_NAMES: Record<string, string> = {
 export const CUSTOM_PROMPT_KEY_PREFIX = "customPrompt_" as const;
 export const CUSTOM_PROMPT_IDS_KEY = "customPromptIds" as const;
 
+// Bulk import item journal: one key per item changed since the last full save
+export const BULK_IMPORT_ITEM_KEY_PREFIX = "bulkImportItem_" as const;
+
 // Storage keys for Chrome extension (aligned between background and popup)
 export const STORAGE_KEYS = {
   TRACKMAN_DATA: "trackmanData",
@@ -48,7 +51,10 @@ export const STORAGE_KEYS = {
   AI_SERVICE: "aiService",
   HITTING_SURFACE: "hittingSurface",
   INCLUDE_AVERAGES: "includeAverages",
+  // Legacy: history now lives in IndexedDB; read only to migrate old installs
   SESSION_HISTORY: "sessionHistory",
   IMPORT_STATUS: "importStatus",
   BULK_IMPORT_STATUS: "bulkImportStatus",
+  BULK_IMPORT_ITEMS: "bulkImportItems",
+  QUERY_CANDIDATE_STATS: "queryCandidateStats",
 } as const;
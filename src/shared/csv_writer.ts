@@ -3,11 +3,17 @@
  * Implements core columns: Date, Club, Shot #, Type
  */
 
-import type { SessionData, Shot } from "../models/types";
+import {
+  getClubShotViews,
+  sessionHasTags,
+  type AnySessionData,
+  type ClubShotView,
+} from "./columnar_session";
 import {
   getApiSourceUnitSystem,
   getMetricUnitLabel,
   normalizeMetricValue,
+  toMetricNumber,
   DEFAULT_UNIT_CHOICE,
   type UnitChoice,
 } from "./unit_normalization";
@@ -65,14 +71,37 @@ function orderMetricsByPriority(
   return result;
 }
 
-function hasTags(session: SessionData): boolean {
-  return session.club_groups.some((club) =>
-    club.shots.some((shot) => shot.tag !== undefined && shot.tag !== "")
-  );
+function hasAnyTags(sessions: AnySessionData[]): boolean {
+  return sessions.some(sessionHasTags);
 }
 
-function hasAnyTags(sessions: SessionData[]): boolean {
-  return sessions.some(hasTags);
+/** Shot indices of a club grouped by tag, in first-seen order. */
+function groupShotsByTag(club: ClubShotView): Map<string, number[]> {
+  const tagGroups = new Map<string, number[]>();
+  for (let i = 0; i < club.shotCount; i++) {
+    const tag = club.tag(i) ?? "";
+    if (!tagGroups.has(tag)) tagGroups.set(tag, []);
+    tagGroups.get(tag)!.push(i);
+  }
+  return tagGroups;
+}
+
+/** Rounded mean of a metric over the given shots, or null when none have it. */
+function averageMetric(club: ClubShotView, shots: number[], metric: string): number | null {
+  let sum = 0;
+  let count = 0;
+  for (const i of shots) {
+    const value = toMetricNumber(club.metric(i, metric));
+    if (value === null) continue;
+    sum += value;
+    count++;
+  }
+  if (count === 0) return null;
+
+  const avg = sum / count;
+  return (metric === "SmashFactor" || metric === "Tempo")
+    ? Math.round(avg * 100) / 100
+    : Math.round(avg * 10) / 10;
 }
 
 function escapeCsvValue(value: string): string {
@@ -82,6 +111,12 @@ function escapeCsvValue(value: string): string {
   return value;
 }
 
+function formatCsvRow(headerRow: string[], row: Record<string, string>): string {
+  return headerRow
+    .map((col) => escapeCsvValue(row[col] ?? ""))
+    .join(",");
+}
+
 function createCsvLines(
   headerRow: string[],
   rows: Record<string, string>[],
@@ -95,18 +130,14 @@ function createCsvLines(
 
   lines.push(headerRow.join(","));
   for (const row of rows) {
-    lines.push(
-      headerRow
-        .map((col) => escapeCsvValue(row[col] ?? ""))
-        .join(",")
-    );
+    lines.push(formatCsvRow(headerRow, row));
   }
 
   return lines.join("\n");
 }
 
 export function writeCsv(
-  session: SessionData,
+  session: AnySessionData,
   includeAverages = true,
   metricOrder?: string[],
   unitChoice: UnitChoice = DEFAULT_UNIT_CHOICE,
@@ -118,8 +149,9 @@ export function writeCsv(
   );
 
   const headerRow: string[] = ["Date", "Club"];
+  const includeTagColumn = sessionHasTags(session);
 
-  if (hasTags(session)) {
+  if (includeTagColumn) {
     headerRow.push("Tag");
   }
 
@@ -134,22 +166,22 @@ export function writeCsv(
   // Source unit system: API always returns m/s + meters, angle unit from report
   const unitSystem = getApiSourceUnitSystem(session.metadata_params);
 
-  for (const club of session.club_groups) {
-    for (const shot of club.shots) {
+  for (const club of getClubShotViews(session)) {
+    for (let i = 0; i < club.shotCount; i++) {
       const row: Record<string, string> = {
         Date: session.date,
         Club: club.club_name,
-        "Shot #": String(shot.shot_number + 1),
+        "Shot #": String(club.shotNumber(i) + 1),
         Type: "Shot",
       };
 
-      if (hasTags(session)) {
-        row.Tag = shot.tag ?? "";
+      if (includeTagColumn) {
+        row.Tag = club.tag(i) ?? "";
       }
 
       for (const metric of orderedMetrics) {
         const colName = getColumnName(metric, unitChoice);
-        const rawValue = shot.metrics[metric] ?? "";
+        const rawValue = club.metric(i, metric) ?? "";
 
         if (typeof rawValue === "string" || typeof rawValue === "number") {
           row[colName] = String(normalizeMetricValue(rawValue, metric, unitSystem, unitChoice));
@@ -163,14 +195,7 @@ export function writeCsv(
 
     if (includeAverages) {
       // Group shots by tag
-      const tagGroups = new Map<string, Shot[]>();
-      for (const shot of club.shots) {
-        const tag = shot.tag ?? "";
-        if (!tagGroups.has(tag)) tagGroups.set(tag, []);
-        tagGroups.get(tag)!.push(shot);
-      }
-
-      for (const [tag, shots] of tagGroups) {
+      for (const [tag, shots] of groupShotsByTag(club)) {
         // Only write average row if group has 2+ shots
         if (shots.length < 2) continue;
 
@@ -181,27 +206,16 @@ export function writeCsv(
           Type: "Average",
         };
 
-        if (hasTags(session)) {
+        if (includeTagColumn) {
           avgRow.Tag = tag;
         }
 
         for (const metric of orderedMetrics) {
           const colName = getColumnName(metric, unitChoice);
-          const values = shots
-            .map((s) => s.metrics[metric])
-            .filter((v) => v !== undefined && v !== "")
-            .map((v) => parseFloat(String(v)));
-          const numericValues = values.filter((v) => !isNaN(v));
-
-          if (numericValues.length > 0) {
-            const avg = numericValues.reduce((a, b) => a + b, 0) / numericValues.length;
-            const rounded = (metric === "SmashFactor" || metric === "Tempo")
-              ? Math.round(avg * 100) / 100
-              : Math.round(avg * 10) / 10;
-            avgRow[colName] = String(normalizeMetricValue(rounded, metric, unitSystem, unitChoice));
-          } else {
-            avgRow[colName] = "";
-          }
+          const rounded = averageMetric(club, shots, metric);
+          avgRow[colName] = rounded !== null
+            ? String(normalizeMetricValue(rounded, metric, unitSystem, unitChoice))
+            : "";
         }
 
         rows.push(avgRow);
@@ -212,23 +226,28 @@ export function writeCsv(
   return createCsvLines(headerRow, rows, hittingSurface);
 }
 
-export function writeBulkCsv(
-  sessions: SessionData[],
+/** Column layout shared by every chunk of a bulk CSV export. */
+export interface BulkCsvLayout {
+  headerRow: string[];
+  orderedMetrics: string[];
+  includeTagColumn: boolean;
+  includeAverages: boolean;
+  unitChoice: UnitChoice;
+}
+
+export function createBulkCsvLayout(
+  metricNames: string[],
+  includeTagColumn: boolean,
   includeAverages = true,
   metricOrder?: string[],
-  unitChoice: UnitChoice = DEFAULT_UNIT_CHOICE,
-  hittingSurface?: "Grass" | "Mat"
-): string {
-  const allMetricNames = Array.from(
-    new Set(sessions.flatMap((session) => session.metric_names))
-  );
+  unitChoice: UnitChoice = DEFAULT_UNIT_CHOICE
+): BulkCsvLayout {
   const orderedMetrics = orderMetricsByPriority(
-    allMetricNames,
+    Array.from(new Set(metricNames)),
     metricOrder ?? METRIC_COLUMN_ORDER
   );
 
   const headerRow: string[] = ["Session Date", "Report ID", "Activity Type", "Club"];
-  const includeTagColumn = hasAnyTags(sessions);
   if (includeTagColumn) {
     headerRow.push("Tag");
   }
@@ -238,88 +257,110 @@ export function writeBulkCsv(
     headerRow.push(getColumnName(metric, unitChoice));
   }
 
+  return { headerRow, orderedMetrics, includeTagColumn, includeAverages, unitChoice };
+}
+
+/** Leading lines of a bulk CSV: optional surface line and the header row. */
+export function writeBulkCsvHeader(
+  layout: BulkCsvLayout,
+  hittingSurface?: "Grass" | "Mat"
+): string {
+  return createCsvLines(layout.headerRow, [], hittingSurface);
+}
+
+/**
+ * CSV lines for one session under a shared layout, without a trailing
+ * newline. Returns "" for a session with no rows.
+ */
+export function writeBulkCsvSessionRows(
+  session: AnySessionData,
+  layout: BulkCsvLayout
+): string {
+  const { orderedMetrics, includeTagColumn, includeAverages, unitChoice } = layout;
   const rows: Record<string, string>[] = [];
+  const unitSystem = getApiSourceUnitSystem(session.metadata_params);
+  const activityType = session.metadata_params.activity_type ??
+    session.metadata_params.activity_kind ??
+    "";
 
-  for (const session of sessions) {
-    const unitSystem = getApiSourceUnitSystem(session.metadata_params);
-    const activityType = session.metadata_params.activity_type ??
-      session.metadata_params.activity_kind ??
-      "";
-
-    for (const club of session.club_groups) {
-      for (const shot of club.shots) {
-        const row: Record<string, string> = {
+  for (const club of getClubShotViews(session)) {
+    for (let i = 0; i < club.shotCount; i++) {
+      const row: Record<string, string> = {
+        "Session Date": session.date,
+        "Report ID": session.report_id,
+        "Activity Type": activityType,
+        Club: club.club_name,
+        "Shot #": String(club.shotNumber(i) + 1),
+        Type: "Shot",
+      };
+
+      if (includeTagColumn) {
+        row.Tag = club.tag(i) ?? "";
+      }
+
+      for (const metric of orderedMetrics) {
+        const colName = getColumnName(metric, unitChoice);
+        const rawValue = club.metric(i, metric) ?? "";
+        row[colName] = typeof rawValue === "string" || typeof rawValue === "number"
+          ? String(normalizeMetricValue(rawValue, metric, unitSystem, unitChoice))
+          : "";
+      }
+
+      rows.push(row);
+    }
+
+    if (includeAverages) {
+      for (const [tag, shots] of groupShotsByTag(club)) {
+        if (shots.length < 2) continue;
+
+        const avgRow: Record<string, string> = {
           "Session Date": session.date,
           "Report ID": session.report_id,
           "Activity Type": activityType,
           Club: club.club_name,
-          "Shot #": String(shot.shot_number + 1),
-          Type: "Shot",
+          "Shot #": "",
+          Type: "Average",
         };
 
         if (includeTagColumn) {
-          row.Tag = shot.tag ?? "";
+          avgRow.Tag = tag;
         }
 
         for (const metric of orderedMetrics) {
           const colName = getColumnName(metric, unitChoice);
-          const rawValue = shot.metrics[metric] ?? "";
-          row[colName] = typeof rawValue === "string" || typeof rawValue === "number"
-            ? String(normalizeMetricValue(rawValue, metric, unitSystem, unitChoice))
+          const rounded = averageMetric(club, shots, metric);
+          avgRow[colName] = rounded !== null
+            ? String(normalizeMetricValue(rounded, metric, unitSystem, unitChoice))
             : "";
         }
 
-        rows.push(row);
-      }
-
-      if (includeAverages) {
-        const tagGroups = new Map<string, Shot[]>();
-        for (const shot of club.shots) {
-          const tag = shot.tag ?? "";
-          if (!tagGroups.has(tag)) tagGroups.set(tag, []);
-          tagGroups.get(tag)!.push(shot);
-        }
-
-        for (const [tag, shots] of tagGroups) {
-          if (shots.length < 2) continue;
-
-          const avgRow: Record<string, string> = {
-            "Session Date": session.date,
-            "Report ID": session.report_id,
-            "Activity Type": activityType,
-            Club: club.club_name,
-            "Shot #": "",
-            Type: "Average",
-          };
-
-          if (includeTagColumn) {
-            avgRow.Tag = tag;
-          }
-
-          for (const metric of orderedMetrics) {
-            const colName = getColumnName(metric, unitChoice);
-            const values = shots
-              .map((s) => s.metrics[metric])
-              .filter((v) => v !== undefined && v !== "")
-              .map((v) => parseFloat(String(v)));
-            const numericValues = values.filter((v) => !isNaN(v));
-
-            if (numericValues.length > 0) {
-              const avg = numericValues.reduce((a, b) => a + b, 0) / numericValues.length;
-              const rounded = (metric === "SmashFactor" || metric === "Tempo")
-                ? Math.round(avg * 100) / 100
-                : Math.round(avg * 10) / 10;
-              avgRow[colName] = String(normalizeMetricValue(rounded, metric, unitSystem, unitChoice));
-            } else {
-              avgRow[colName] = "";
-            }
-          }
-
-          rows.push(avgRow);
-        }
+        rows.push(avgRow);
       }
     }
   }
 
-  return createCsvLines(headerRow, rows, hittingSurface);
+  return rows.map((row) => formatCsvRow(layout.headerRow, row)).join("\n");
+}
+
+export function writeBulkCsv(
+  sessions: AnySessionData[],
+  includeAverages = true,
+  metricOrder?: string[],
+  unitChoice: UnitChoice = DEFAULT_UNIT_CHOICE,
+  hittingSurface?: "Grass" | "Mat"
+): string {
+  const layout = createBulkCsvLayout(
+    sessions.flatMap((session) => session.metric_names),
+    hasAnyTags(sessions),
+    includeAverages,
+    metricOrder,
+    unitChoice
+  );
+
+  const parts = [writeBulkCsvHeader(layout, hittingSurface)];
+  for (const session of sessions) {
+    const rows = writeBulkCsvSessionRows(session, layout);
+    if (rows) parts.push(rows);
+  }
+  return parts.join("\n");
 }
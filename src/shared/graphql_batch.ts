@@ -0,0 +1,240 @@
+/**
+ * Batched `node(id:)` lookups for portal imports.
+ *
+ * Loads of the same ImportSessionQueryCandidate that arrive within a short
+ * window are combined into one GraphQL document with one aliased node field
+ * per activity (a0: node(id: $id0) { ... }, a1: ...). The combined response
+ * is split back into single-activity payloads shaped exactly like the
+ * candidate's own response ({ data: { node }, errors }), so callers and
+ * parsePortalActivity cannot tell the difference. Errors whose path starts
+ * with an alias stay with that alias.
+ *
+ * If the server rejects a batch (transport failure or document-level
+ * errors with no data), every activity in it is fetched on its own and
+ * that candidate is not batched again by this batcher.
+ */
+
+import type { ImportSessionQueryCandidate } from "./import_types";
+
+export const GRAPHQL_BATCH_SIZE = 5;
+/** How long a load waits for others sharing its candidate. */
+export const GRAPHQL_BATCH_WINDOW_MS = 15;
+
+export interface GraphQLError {
+  message: string;
+  path?: Array<string | number>;
+}
+
+/** Same shape as a PORTAL_GRAPHQL_FETCH reply. */
+export interface GraphQLFetchResponse {
+  success: boolean;
+  data?: {
+    data?: Record<string, unknown> & { node?: unknown };
+    errors?: GraphQLError[];
+  };
+  error?: string;
+}
+
+export type GraphQLSend = (
+  query: string,
+  variables: Record<string, unknown>
+) => Promise<GraphQLFetchResponse>;
+
+export interface NodeBatcherOptions {
+  send: GraphQLSend;
+  maxBatchSize?: number;
+  windowMs?: number;
+  /** Failures that mean every request would fail too (e.g. auth); not retried singly. */
+  isFatalError?: (message: string) => boolean;
+}
+
+export interface NodeBatcherStats {
+  requests: number;
+  batches: number;
+  batchedLoads: number;
+  fallbacks: number;
+}
+
+export interface NodeBatcher {
+  load(candidate: ImportSessionQueryCandidate, activityId: string): Promise<GraphQLFetchResponse>;
+  /** Dispatch everything waiting now. */
+  flush(): void;
+  getStats(): NodeBatcherStats;
+}
+
+interface PendingLoad {
+  activityId: string;
+  resolve: (response: GraphQLFetchResponse) => void;
+}
+
+interface PendingBatch {
+  candidate: ImportSessionQueryCandidate;
+  loads: PendingLoad[];
+  timer: ReturnType<typeof setTimeout> | null;
+}
+
+const NODE_FIELD_PATTERN = /\bnode\s*\(\s*id\s*:\s*\$id\s*\)\s*\{/;
+
+/** The `{ ... }` selection of the candidate's node field, or null if absent. */
+export function getNodeSelection(query: string): string | null {
+  const match = NODE_FIELD_PATTERN.exec(query);
+  if (!match) return null;
+
+  const start = match.index + match[0].length - 1;
+  let depth = 0;
+  for (let i = start; i < query.length; i++) {
+    if (query[i] === "{") depth += 1;
+    else if (query[i] === "}") {
+      depth -= 1;
+      if (depth === 0) return query.slice(start, i + 1);
+    }
+  }
+  return null;
+}
+
+function getAlias(index: number): string {
+  return `a${index}`;
+}
+
+/** One document fetching `count` activities with the candidate's selection. */
+export function buildBatchedNodeQuery(
+  candidate: ImportSessionQueryCandidate,
+  count: number
+): string | null {
+  const selection = getNodeSelection(candidate.query);
+  if (!selection) return null;
+
+  const params: string[] = [];
+  const fields: string[] = [];
+  for (let i = 0; i < count; i++) {
+    params.push(`$id${i}: ID!`);
+    fields.push(`${getAlias(i)}: node(id: $id${i}) ${selection}`);
+  }
+  return `query FetchActivitiesById(${params.join(", ")}) {\n${fields.join("\n")}\n}`;
+}
+
+export function getBatchedNodeVariables(activityIds: string[]): Record<string, string> {
+  const variables: Record<string, string> = {};
+  activityIds.forEach((id, i) => {
+    variables[`id${i}`] = id;
+  });
+  return variables;
+}
+
+/** True when the server refused the whole document rather than some aliases. */
+function isRejectedBatch(response: GraphQLFetchResponse): boolean {
+  if (!response.success) return true;
+  const data = response.data?.data;
+  return (!data || Object.keys(data).length === 0) && (response.data?.errors?.length ?? 0) > 0;
+}
+
+/** Split a batched reply into one single-node reply per activity. */
+export function splitBatchedNodeResponse(
+  response: GraphQLFetchResponse,
+  count: number
+): GraphQLFetchResponse[] {
+  const data = response.data?.data ?? {};
+  const errors = response.data?.errors ?? [];
+  const shared = errors.filter((error) => !error.path?.length);
+
+  return Array.from({ length: count }, (_, i) => {
+    const alias = getAlias(i);
+    const own = errors
+      .filter((error) => error.path?.[0] === alias)
+      .map((error) => ({ ...error, path: ["node", ...error.path!.slice(1)] }));
+    const aliasErrors = [...shared, ...own];
+
+    const payload: NonNullable<GraphQLFetchResponse["data"]> = {
+      data: { node: data[alias] ?? null },
+    };
+    if (aliasErrors.length > 0) payload.errors = aliasErrors;
+    return { success: true, data: payload };
+  });
+}
+
+export function createNodeBatcher(options: NodeBatcherOptions): NodeBatcher {
+  const maxBatchSize = Math.max(1, options.maxBatchSize ?? GRAPHQL_BATCH_SIZE);
+  const windowMs = options.windowMs ?? GRAPHQL_BATCH_WINDOW_MS;
+  const pending = new Map<string, PendingBatch>();
+  const unbatchable = new Set<string>();
+  const stats: NodeBatcherStats = { requests: 0, batches: 0, batchedLoads: 0, fallbacks: 0 };
+
+  const sendSingle = async (
+    candidate: ImportSessionQueryCandidate,
+    activityId: string
+  ): Promise<GraphQLFetchResponse> => {
+    stats.requests += 1;
+    try {
+      return await options.send(candidate.query, { id: activityId });
+    } catch (err) {
+      return { success: false, error: err instanceof Error ? err.message : String(err) };
+    }
+  };
+
+  const dispatch = async (batch: PendingBatch): Promise<void> => {
+    const { candidate, loads } = batch;
+    const query = loads.length > 1 && !unbatchable.has(candidate.label)
+      ? buildBatchedNodeQuery(candidate, loads.length)
+      : null;
+
+    if (!query) {
+      await Promise.all(loads.map(async (load) => load.resolve(await sendSingle(candidate, load.activityId))));
+      return;
+    }
+
+    stats.requests += 1;
+    stats.batches += 1;
+    stats.batchedLoads += loads.length;
+    let response: GraphQLFetchResponse;
+    try {
+      response = await options.send(query, getBatchedNodeVariables(loads.map((load) => load.activityId)));
+    } catch (err) {
+      response = { success: false, error: err instanceof Error ? err.message : String(err) };
+    }
+
+    if (!response.success && response.error && options.isFatalError?.(response.error)) {
+      for (const load of loads) load.resolve(response);
+      return;
+    }
+
+    if (isRejectedBatch(response)) {
+      stats.fallbacks += 1;
+      unbatchable.add(candidate.label);
+      await Promise.all(loads.map(async (load) => load.resolve(await sendSingle(candidate, load.activityId))));
+      return;
+    }
+
+    splitBatchedNodeResponse(response, loads.length).forEach((single, i) => loads[i].resolve(single));
+  };
+
+  const release = (label: string) => {
+    const batch = pending.get(label);
+    if (!batch) return;
+    pending.delete(label);
+    if (batch.timer !== null) clearTimeout(batch.timer);
+    void dispatch(batch);
+  };
+
+  return {
+    load(candidate, activityId) {
+      return new Promise((resolve) => {
+        let batch = pending.get(candidate.label);
+        if (!batch) {
+          batch = { candidate, loads: [], timer: null };
+          pending.set(candidate.label, batch);
+          batch.timer = setTimeout(() => release(candidate.label), windowMs);
+        }
+        batch.loads.push({ activityId, resolve });
+        if (batch.loads.length >= maxBatchSize || unbatchable.has(candidate.label)) {
+          release(candidate.label);
+        }
+      });
+    },
+    flush() {
+      for (const label of Array.from(pending.keys())) release(label);
+    },
+    getStats() {
+      return { ...stats };
+    },
+  };
+}
@@ -1,58 +1,133 @@
 /**
  * Session history storage module.
- * Saves, deduplicates (by report_id), and evicts sessions from chrome.storage.local.
+ * Saves, deduplicates (by report_id), and evicts sessions in IndexedDB.
+ *
+ * Each history entry is its own record keyed by report_id, so a save (and
+ * its dedup) is a single put. Snapshots are stored through snapshot_codec.
+ * Eviction walks the captured_at index oldest-first with a cursor, only
+ * when the store is over its cap.
+ * History kept in chrome.storage.local by older versions is moved here by
+ * migrateStorageHistoryToIndexedDb.
  */
 
-import type { SessionData, SessionSnapshot, HistoryEntry } from "../models/types";
+import type { SessionSnapshot, HistoryEntry } from "../models/types";
+import { toMetricNumber } from "./unit_normalization";
 import { STORAGE_KEYS } from "./constants";
+import { toRowSession, type AnySessionData } from "./columnar_session";
+import { decodeSnapshot, encodeSnapshot, type EncodedSnapshot } from "./snapshot_codec";
 
-const MAX_SESSIONS = 20;
+const DB_NAME = "trackpull-history";
+const DB_VERSION = 1;
+const HISTORY_STORE = "sessions";
+const CAPTURED_AT_INDEX = "capturedAt";
 
-/** Strip raw_api_data from a SessionData to create a lightweight snapshot. */
-function createSnapshot(session: SessionData): SessionSnapshot {
+/** Default number of sessions kept; callers may pass a different cap. */
+export const MAX_SESSIONS = 2000;
+
+export interface StoredHistorySession {
+  reportId: string;
+  capturedAt: number;
+  snapshot: EncodedSnapshot | SessionSnapshot;
+}
+
+/**
+ * Strip raw_api_data from a SessionData to create a lightweight snapshot.
+ * Columnar sessions are stored in the row shape that history readers expect.
+ */
+function createSnapshot(session: AnySessionData): SessionSnapshot {
   // Destructure to exclude raw_api_data
-  const { raw_api_data: _, ...snapshot } = session;
+  const { raw_api_data: _, ...snapshot } = toRowSession(session);
+  return snapshot;
+}
+
+function openHistoryDb(): Promise<IDBDatabase> {
+  return new Promise((resolve, reject) => {
+    const request = indexedDB.open(DB_NAME, DB_VERSION);
+
+    request.onupgradeneeded = () => {
+      const db = request.result;
+      if (!db.objectStoreNames.contains(HISTORY_STORE)) {
+        const store = db.createObjectStore(HISTORY_STORE, { keyPath: "reportId" });
+        store.createIndex(CAPTURED_AT_INDEX, CAPTURED_AT_INDEX, { unique: false });
+      }
+    };
+
+    request.onsuccess = () => resolve(request.result);
+    request.onerror = () => reject(request.error ?? new Error("Could not open session history"));
+    request.onblocked = () => reject(new Error("Session history is blocked by another tab"));
+  });
+}
+
+function requestToPromise<T>(request: IDBRequest<T>): Promise<T> {
+  return new Promise((resolve, reject) => {
+    request.onsuccess = () => resolve(request.result);
+    request.onerror = () => reject(request.error ?? new Error("Session history request failed"));
+  });
+}
+
+function transactionDone(tx: IDBTransaction, message: string): Promise<void> {
+  return new Promise((resolve, reject) => {
+    tx.oncomplete = () => resolve();
+    tx.onerror = () => reject(tx.error ?? new Error(message));
+    tx.onabort = () => reject(tx.error ?? new Error(message));
+  });
+}
+
+/** Delete the oldest records until at most maxSessions remain. */
+async function evictOldest(store: IDBObjectStore, maxSessions: number): Promise<void> {
+  const count = await requestToPromise(store.count());
+  let excess = count - maxSessions;
+  if (excess <= 0) return;
+
+  const cursorRequest = store.index(CAPTURED_AT_INDEX).openCursor();
+  await new Promise<void>((resolve, reject) => {
+    cursorRequest.onsuccess = () => {
+      const cursor = cursorRequest.result;
+      if (!cursor || excess <= 0) return resolve();
+      cursor.delete();
+      excess -= 1;
+      cursor.continue();
+    };
+    cursorRequest.onerror = () => reject(cursorRequest.error ?? new Error("Could not evict history"));
+  });
+}
+
+/**
+ * Convert string metric values written by older versions ("230.5") to
+ * numbers in place. Non-numeric strings are left alone. Safe to call on
+ * already-numeric snapshots.
+ */
+export function migrateSnapshotMetrics<T extends SessionSnapshot>(snapshot: T): T {
+  for (const club of snapshot.club_groups ?? []) {
+    for (const shot of club.shots) {
+      for (const [key, value] of Object.entries(shot.metrics)) {
+        if (typeof value !== "string") continue;
+        const num = toMetricNumber(value);
+        if (num !== null) shot.metrics[key] = num;
+      }
+    }
+  }
   return snapshot;
 }
 
 /**
- * Save a session to the rolling history in chrome.storage.local.
- * - Deduplicates by report_id (replaces existing entry, refreshes captured_at).
- * - Evicts oldest entry when the 20-session cap is reached.
- * - Stores entries sorted newest-first (descending captured_at).
+ * One-time rewrite of the string-valued current session in storage to
+ * numeric metric values.
  */
-export function saveSessionToHistory(session: SessionData): Promise<void> {
+export function migrateStoredSessionMetrics(): Promise<void> {
   return new Promise((resolve, reject) => {
     chrome.storage.local.get(
-      [STORAGE_KEYS.SESSION_HISTORY],
+      [STORAGE_KEYS.TRACKMAN_DATA],
       (result: Record<string, unknown>) => {
         if (chrome.runtime.lastError) {
           return reject(new Error(chrome.runtime.lastError.message));
         }
 
-        const existing = (result[STORAGE_KEYS.SESSION_HISTORY] as HistoryEntry[] | undefined) ?? [];
-
-        // Remove any existing entry with the same report_id (dedup)
-        const filtered = existing.filter(
-          (entry) => entry.snapshot.report_id !== session.report_id
-        );
-
-        // Create new entry
-        const newEntry: HistoryEntry = {
-          captured_at: Date.now(),
-          snapshot: createSnapshot(session),
-        };
-
-        filtered.push(newEntry);
-
-        // Sort newest-first (descending captured_at)
-        filtered.sort((a, b) => b.captured_at - a.captured_at);
-
-        // Enforce cap — slice keeps the newest MAX_SESSIONS entries
-        const capped = filtered.slice(0, MAX_SESSIONS);
+        const current = result[STORAGE_KEYS.TRACKMAN_DATA] as SessionSnapshot | undefined;
+        if (!current?.club_groups) return resolve();
 
         chrome.storage.local.set(
-          { [STORAGE_KEYS.SESSION_HISTORY]: capped },
+          { [STORAGE_KEYS.TRACKMAN_DATA]: migrateSnapshotMetrics(current) },
           () => {
             if (chrome.runtime.lastError) {
               return reject(new Error(chrome.runtime.lastError.message));
@@ -65,6 +140,104 @@ export function saveSessionToHistory(session: SessionData): Promise<void> {
   });
 }
 
+/**
+ * Save a session to the rolling history.
+ * - Deduplicates by report_id (the put replaces the existing record and
+ *   refreshes captured_at).
+ * - Evicts the oldest entries once the store holds more than maxSessions.
+ */
+export async function saveSessionToHistory(
+  session: AnySessionData,
+  maxSessions = MAX_SESSIONS,
+  now = Date.now()
+): Promise<void> {
+  // Encode before opening the transaction; it would auto-commit while awaiting
+  const snapshot = await encodeSnapshot(createSnapshot(session));
+  const db = await openHistoryDb();
+  try {
+    const tx = db.transaction(HISTORY_STORE, "readwrite");
+    const done = transactionDone(tx, "Could not save to session history");
+    const store = tx.objectStore(HISTORY_STORE);
+    const record: StoredHistorySession = {
+      reportId: session.report_id,
+      capturedAt: now,
+      snapshot,
+    };
+    store.put(record);
+    await evictOldest(store, maxSessions);
+    await done;
+  } finally {
+    db.close();
+  }
+}
+
+/** History entries newest-first, optionally limited to the newest `limit`. */
+export async function getSessionHistory(limit = Infinity): Promise<HistoryEntry[]> {
+  const records: StoredHistorySession[] = [];
+  const db = await openHistoryDb();
+  try {
+    const tx = db.transaction(HISTORY_STORE, "readonly");
+    const cursorRequest = tx.objectStore(HISTORY_STORE).index(CAPTURED_AT_INDEX).openCursor(null, "prev");
+    await new Promise<void>((resolve, reject) => {
+      cursorRequest.onsuccess = () => {
+        const cursor = cursorRequest.result;
+        if (!cursor || records.length >= limit) return resolve();
+        records.push(cursor.value as StoredHistorySession);
+        cursor.continue();
+      };
+      cursorRequest.onerror = () => reject(cursorRequest.error ?? new Error("Could not read session history"));
+    });
+  } finally {
+    db.close();
+  }
+
+  // Decode outside the transaction
+  return Promise.all(records.map(async (record) => ({
+    captured_at: record.capturedAt,
+    snapshot: await decodeSnapshot(record.snapshot),
+  })));
+}
+
+/**
+ * Move history kept in chrome.storage.local by older versions into
+ * IndexedDB, then drop the storage key. Entries already in IndexedDB with
+ * a newer captured_at win.
+ */
+export async function migrateStorageHistoryToIndexedDb(maxSessions = MAX_SESSIONS): Promise<number> {
+  const result = await chrome.storage.local.get([STORAGE_KEYS.SESSION_HISTORY]);
+  const legacy = (result[STORAGE_KEYS.SESSION_HISTORY] as HistoryEntry[] | undefined) ?? [];
+  if (legacy.length === 0) return 0;
+
+  const encoded = await Promise.all(
+    legacy.map((entry) => encodeSnapshot(migrateSnapshotMetrics(entry.snapshot)))
+  );
+  const db = await openHistoryDb();
+  try {
+    const tx = db.transaction(HISTORY_STORE, "readwrite");
+    const done = transactionDone(tx, "Could not migrate session history");
+    const store = tx.objectStore(HISTORY_STORE);
+
+    for (const [i, entry] of legacy.entries()) {
+      const existing = await requestToPromise(store.get(entry.snapshot.report_id)) as
+        StoredHistorySession | undefined;
+      if (existing && existing.capturedAt >= entry.captured_at) continue;
+      const record: StoredHistorySession = {
+        reportId: entry.snapshot.report_id,
+        capturedAt: entry.captured_at,
+        snapshot: encoded[i],
+      };
+      store.put(record);
+    }
+    await evictOldest(store, maxSessions);
+    await done;
+  } finally {
+    db.close();
+  }
+
+  await chrome.storage.local.remove(STORAGE_KEYS.SESSION_HISTORY);
+  return legacy.length;
+}
+
 /**
  * Map storage error strings to user-friendly messages.
  */
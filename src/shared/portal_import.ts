@@ -0,0 +1,246 @@
+/**
+ * Fetching portal activity details through the portal tab's content script.
+ *
+ * Shared by the popup (single imports, prefetch, the activity list) and the
+ * service worker's bulk import engine. Requests from both are queued by the
+ * service worker's single request scheduler (portal_request_queue): the
+ * popup sends them there as PORTAL_GRAPHQL_REQUEST messages, and the
+ * worker installs a direct transport with setPortalGraphQLTransport. The
+ * learned query-candidate order is kept per bundle and saved as deltas.
+ */
+
+import {
+  IMPORT_SESSION_QUERY_CANDIDATES,
+  type FetchActivitiesQueryCandidate,
+} from "./import_types";
+import { getCachedActivityResponse, putCachedActivityResponse } from "./activity_detail_cache";
+import type { NodeBatcher } from "./graphql_batch";
+import type { RequestPriority } from "./request_scheduler";
+import {
+  createQueryCandidateStats,
+  getAverageRoundTrips,
+  getCandidateSetId,
+  loadQueryCandidateStats,
+  orderQueryCandidates,
+  recordQueryCandidateResults,
+  recordStoredQueryCandidateResults,
+  type QueryCandidateStats,
+} from "./query_candidate_stats";
+
+export interface PortalGraphQLFetchResponse {
+  success: boolean;
+  data?: {
+    data?: Record<string, unknown> & { node?: unknown };
+    errors?: Array<{ message: string }>;
+  };
+  error?: string;
+}
+
+export function isPortalAuthMessage(message: string): boolean {
+  const normalized = message.toLowerCase();
+  // "session expired" is what formatPortalFetchError turns the others into
+  return normalized.includes("unauthorized") ||
+    normalized.includes("session expired") ||
+    normalized.includes("not authorized") ||
+    normalized.includes("unauthenticated") ||
+    normalized.includes("not logged in");
+}
+
+export function isPortalBridgeUnavailableMessage(message: string): boolean {
+  const normalized = message.toLowerCase();
+  // "refresh the trackman portal tab" is formatPortalFetchError's version
+  return normalized.includes("could not establish connection") ||
+    normalized.includes("refresh the trackman portal tab") ||
+    normalized.includes("no tab with id") ||
+    normalized.includes("receiving end does not exist");
+}
+
+export function formatPortalFetchError(message: string): string {
+  if (isPortalBridgeUnavailableMessage(message)) {
+    return "Refresh the Trackman portal tab, then reopen TrackPull";
+  }
+  return isPortalAuthMessage(message)
+    ? "Session expired — log into portal.trackmangolf.com"
+    : message;
+}
+
+export type PortalGraphQLTransport = (
+  tabId: number,
+  query: string,
+  variables: Record<string, unknown> | undefined,
+  priority: RequestPriority
+) => Promise<PortalGraphQLFetchResponse>;
+
+/**
+ * The service worker's answer to a PORTAL_GRAPHQL_REQUEST: the tab's
+ * response, or the error sending to the tab failed with.
+ */
+export interface PortalGraphQLRequestResult {
+  response?: PortalGraphQLFetchResponse;
+  error?: string;
+}
+
+/** Outside the service worker, requests are handed to its scheduler. */
+function sendToServiceWorker(
+  tabId: number,
+  query: string,
+  variables: Record<string, unknown> | undefined,
+  priority: RequestPriority
+): Promise<PortalGraphQLFetchResponse> {
+  return new Promise((resolve, reject) => {
+    chrome.runtime.sendMessage({
+      type: "PORTAL_GRAPHQL_REQUEST",
+      tabId,
+      query,
+      variables,
+      priority,
+    }, (result: PortalGraphQLRequestResult | undefined) => {
+      if (chrome.runtime.lastError) {
+        reject(new Error(chrome.runtime.lastError.message));
+        return;
+      }
+      // A failed send to the tab rejects here as it would in the worker
+      if (!result?.response) {
+        reject(new Error(result?.error ?? "No response from service worker"));
+        return;
+      }
+      resolve(result.response);
+    });
+  });
+}
+
+let portalGraphQLTransport: PortalGraphQLTransport = sendToServiceWorker;
+
+/** The service worker routes its own requests straight to its scheduler. */
+export function setPortalGraphQLTransport(transport: PortalGraphQLTransport): void {
+  portalGraphQLTransport = transport;
+}
+
+export async function fetchPortalGraphQL(
+  tabId: number,
+  candidate: FetchActivitiesQueryCandidate,
+  variables?: Record<string, unknown>,
+  priority: RequestPriority = "interactive"
+): Promise<PortalGraphQLFetchResponse> {
+  return portalGraphQLTransport(tabId, candidate.query, variables, priority);
+}
+
+export function responseContainsMeasurement(value: unknown): boolean {
+  if (Array.isArray(value)) {
+    return value.some(responseContainsMeasurement);
+  }
+  if (!value || typeof value !== "object") return false;
+
+  const record = value as Record<string, unknown>;
+  if (
+    record.measurement ||
+    record.Measurement ||
+    record.NormalizedMeasurement
+  ) {
+    return true;
+  }
+
+  return Object.entries(record).some(([key, nested]) => {
+    if (key === "measurement" || key === "Measurement" || key === "NormalizedMeasurement") {
+      return false;
+    }
+    return responseContainsMeasurement(nested);
+  });
+}
+
+/** Cache entries are only valid for the query set that produced them. */
+const IMPORT_CANDIDATE_SET_ID = getCandidateSetId(IMPORT_SESSION_QUERY_CANDIDATES);
+
+/** Learned candidate order, loaded once per context and saved after each import. */
+let queryCandidateStats: QueryCandidateStats | null = null;
+let queryCandidateStatsLoading: Promise<QueryCandidateStats> | null = null;
+
+function getQueryCandidateStats(): Promise<QueryCandidateStats> {
+  if (queryCandidateStats) return Promise.resolve(queryCandidateStats);
+  if (!queryCandidateStatsLoading) {
+    queryCandidateStatsLoading = loadQueryCandidateStats(IMPORT_SESSION_QUERY_CANDIDATES)
+      .catch(() => createQueryCandidateStats(IMPORT_SESSION_QUERY_CANDIDATES))
+      .then((stats) => {
+        if (!queryCandidateStats) queryCandidateStats = stats;
+        return queryCandidateStats;
+      });
+  }
+  return queryCandidateStatsLoading;
+}
+
+export async function fetchPortalActivityCandidates(
+  tabId: number,
+  activityId: string,
+  activityKind?: string | null,
+  batcher?: NodeBatcher,
+  priority: RequestPriority = "interactive"
+): Promise<Array<NonNullable<PortalGraphQLFetchResponse["data"]>>> {
+  const cached = await getCachedActivityResponse(activityId, IMPORT_CANDIDATE_SET_ID).catch(() => null);
+  if (cached) return cached as Array<NonNullable<PortalGraphQLFetchResponse["data"]>>;
+
+  const payloads: Array<NonNullable<PortalGraphQLFetchResponse["data"]>> = [];
+  const results: Array<{ label: string; hit: boolean }> = [];
+  let firstError: string | undefined;
+
+  const stats = await getQueryCandidateStats();
+  const candidates = orderQueryCandidates(stats, activityKind, IMPORT_SESSION_QUERY_CANDIDATES);
+
+  try {
+    for (const candidate of candidates) {
+      const fetchResponse = batcher
+        ? await batcher.load(candidate, activityId)
+        : await fetchPortalGraphQL(tabId, candidate, { id: activityId }, priority);
+
+      if (!fetchResponse?.success) {
+        const error = fetchResponse?.error ?? "Failed to fetch activity";
+        firstError = firstError ?? error;
+        // Transport and auth failures say nothing about the candidate
+        if (isPortalAuthMessage(error)) break;
+        continue;
+      }
+
+      const graphQLErrors = fetchResponse.data?.errors ?? [];
+      if (graphQLErrors.length > 0) {
+        firstError = firstError ?? graphQLErrors[0].message;
+        results.push({ label: candidate.label, hit: false });
+        continue;
+      }
+
+      if (fetchResponse.data) {
+        payloads.push(fetchResponse.data);
+        const hit = responseContainsMeasurement(fetchResponse.data.data?.node);
+        results.push({ label: candidate.label, hit });
+        if (hit) break;
+      }
+    }
+  } finally {
+    if (results.length > 0) {
+      queryCandidateStats = recordQueryCandidateResults(queryCandidateStats ?? stats, activityKind, results);
+      // Saved as a delta on the stored stats, which may hold the other context's imports
+      void recordStoredQueryCandidateResults(IMPORT_SESSION_QUERY_CANDIDATES, activityKind, results)
+        .then((saved) => {
+          queryCandidateStats = saved;
+        })
+        .catch(() => undefined);
+    }
+  }
+
+  if (payloads.length === 0) {
+    throw new Error(formatPortalFetchError(firstError ?? "Failed to fetch activity"));
+  }
+
+  // Partial responses are left uncached so a later import can find more
+  if (results.some((result) => result.hit)) {
+    void putCachedActivityResponse(activityId, IMPORT_CANDIDATE_SET_ID, payloads)
+      .catch((err) => console.warn("TrackPull: could not cache activity", err));
+  }
+
+  return payloads;
+}
+
+/** Round trips per import so far, or null before the first import. */
+export function describeQueryRoundTrips(): string | null {
+  return queryCandidateStats && queryCandidateStats.imports > 0
+    ? `${getAverageRoundTrips(queryCandidateStats).toFixed(1)} queries per import`
+    : null;
+}
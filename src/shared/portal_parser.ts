@@ -167,7 +167,7 @@ function appendStroke(
   if (!measurement) return;
 
   const clubName = getContainerClubName(stroke) ?? fallbackClub ?? "Unknown";
-  const shotMetrics: Record<string, string> = {};
+  const shotMetrics: Record<string, number> = {};
 
   for (const [key, value] of Object.entries(measurement)) {
     if (value === null || value === undefined) continue;
@@ -177,7 +177,7 @@ function appendStroke(
     if (isNaN(numValue)) continue;
 
     const normalizedKey = normalizeMetricKey(key);
-    shotMetrics[normalizedKey] = `${numValue}`;
+    shotMetrics[normalizedKey] = numValue;
     allMetricNames.add(normalizedKey);
   }
 
@@ -0,0 +1,176 @@
+/**
+ * Learned ordering of IMPORT_SESSION_QUERY_CANDIDATES per activity type.
+ *
+ * Each activity type (the activity list's __typename/kind) keeps a score
+ * per candidate label: an exponentially weighted hit rate, where a hit is
+ * a response containing a measurement. Imports try candidates by score,
+ * so a type that only matches a late candidate stops paying for the early
+ * ones. Untried candidates sit between proven and failing ones.
+ *
+ * Every QUERY_REPROBE_INTERVAL imports of a type use the declared order
+ * again, so an earlier candidate that starts working (schema change) is
+ * found. Stats are discarded when the candidate list itself changes.
+ * Stats live in chrome.storage.local under QUERY_CANDIDATE_STATS. The popup
+ * and the service worker both import, so an import is recorded by
+ * re-reading the stored stats and applying its results to them
+ * (recordStoredQueryCandidateResults) rather than writing back a copy
+ * that may predate the other context's imports.
+ */
+
+import { STORAGE_KEYS } from "./constants";
+import type { ImportSessionQueryCandidate } from "./import_types";
+
+/** Imports of one type between full probes in declared order. */
+export const QUERY_REPROBE_INTERVAL = 20;
+/** Weight of the newest result in a candidate's score. */
+const SCORE_ALPHA = 0.3;
+/** Score given to a candidate that has never been tried for a type. */
+const UNTRIED_SCORE = 0.1;
+/** Key used when the activity type is unknown (single-activity imports). */
+export const UNKNOWN_ACTIVITY_KIND = "unknown";
+
+export interface CandidateStat {
+  hits: number;
+  misses: number;
+  score: number;
+}
+
+export interface KindCandidateStats {
+  candidates: Record<string, CandidateStat>;
+  importsSinceProbe: number;
+}
+
+export interface QueryCandidateStats {
+  /** Hash of the candidate list the stats were learned against. */
+  candidateSetId: string;
+  kinds: Record<string, KindCandidateStats>;
+  imports: number;
+  roundTrips: number;
+}
+
+export function getCandidateSetId(candidates: ImportSessionQueryCandidate[]): string {
+  let hash = 0x811c9dc5;
+  for (const candidate of candidates) {
+    const text = `${candidate.label}\n${candidate.query}\n`;
+    for (let i = 0; i < text.length; i++) {
+      hash ^= text.charCodeAt(i);
+      hash = Math.imul(hash, 0x01000193);
+    }
+  }
+  return `${candidates.length}:${(hash >>> 0).toString(16)}`;
+}
+
+export function createQueryCandidateStats(
+  candidates: ImportSessionQueryCandidate[]
+): QueryCandidateStats {
+  return { candidateSetId: getCandidateSetId(candidates), kinds: {}, imports: 0, roundTrips: 0 };
+}
+
+function getKind(activityKind: string | null | undefined): string {
+  return activityKind?.trim() || UNKNOWN_ACTIVITY_KIND;
+}
+
+/** True when the next import of this type should use declared order. */
+export function isReprobeDue(stats: QueryCandidateStats, activityKind: string | null | undefined): boolean {
+  const entry = stats.kinds[getKind(activityKind)];
+  return !entry || entry.importsSinceProbe >= QUERY_REPROBE_INTERVAL;
+}
+
+/** Candidates in the order to try them for this activity type. */
+export function orderQueryCandidates(
+  stats: QueryCandidateStats,
+  activityKind: string | null | undefined,
+  candidates: ImportSessionQueryCandidate[]
+): ImportSessionQueryCandidate[] {
+  if (isReprobeDue(stats, activityKind)) return candidates;
+  const learned = stats.kinds[getKind(activityKind)].candidates;
+  return candidates
+    .map((candidate, index) => ({
+      candidate,
+      index,
+      score: learned[candidate.label]?.score ?? UNTRIED_SCORE,
+    }))
+    .sort((a, b) => b.score - a.score || a.index - b.index)
+    .map(({ candidate }) => candidate);
+}
+
+/**
+ * Fold one import into the stats: `results` lists the candidates tried,
+ * in order, with whether each returned a measurement.
+ */
+export function recordQueryCandidateResults(
+  stats: QueryCandidateStats,
+  activityKind: string | null | undefined,
+  results: Array<{ label: string; hit: boolean }>
+): QueryCandidateStats {
+  const kind = getKind(activityKind);
+  const previous = stats.kinds[kind];
+  const reprobed = isReprobeDue(stats, activityKind);
+  const candidates = { ...previous?.candidates };
+
+  for (const { label, hit } of results) {
+    const current = candidates[label];
+    const sample = hit ? 1 : 0;
+    candidates[label] = {
+      hits: (current?.hits ?? 0) + sample,
+      misses: (current?.misses ?? 0) + (1 - sample),
+      score: current ? current.score + SCORE_ALPHA * (sample - current.score) : sample,
+    };
+  }
+
+  return {
+    ...stats,
+    kinds: {
+      ...stats.kinds,
+      [kind]: {
+        candidates,
+        importsSinceProbe: reprobed ? 1 : previous.importsSinceProbe + 1,
+      },
+    },
+    imports: stats.imports + 1,
+    roundTrips: stats.roundTrips + results.length,
+  };
+}
+
+/** Mean GraphQL requests per import, or 0 before the first import. */
+export function getAverageRoundTrips(stats: QueryCandidateStats): number {
+  return stats.imports > 0 ? stats.roundTrips / stats.imports : 0;
+}
+
+/** Stored stats, or fresh ones when none exist or the candidate list changed. */
+export async function loadQueryCandidateStats(
+  candidates: ImportSessionQueryCandidate[]
+): Promise<QueryCandidateStats> {
+  const result = await chrome.storage.local.get([STORAGE_KEYS.QUERY_CANDIDATE_STATS]);
+  const stored = result[STORAGE_KEYS.QUERY_CANDIDATE_STATS] as QueryCandidateStats | undefined;
+  if (!stored || stored.candidateSetId !== getCandidateSetId(candidates)) {
+    return createQueryCandidateStats(candidates);
+  }
+  return stored;
+}
+
+export async function saveQueryCandidateStats(stats: QueryCandidateStats): Promise<void> {
+  await chrome.storage.local.set({ [STORAGE_KEYS.QUERY_CANDIDATE_STATS]: stats });
+}
+
+/** Keeps one context's read-modify-write saves from interleaving. */
+let pendingRecord: Promise<unknown> = Promise.resolve();
+
+/**
+ * Apply one import's results to the stored stats and save them. Resolves
+ * with the stats as saved, which include other contexts' imports.
+ */
+export function recordStoredQueryCandidateResults(
+  candidates: ImportSessionQueryCandidate[],
+  activityKind: string | null | undefined,
+  results: Array<{ label: string; hit: boolean }>
+): Promise<QueryCandidateStats> {
+  const recorded = pendingRecord.then(async () => {
+    const stored = await loadQueryCandidateStats(candidates);
+    const updated = recordQueryCandidateResults(stored, activityKind, results);
+    await saveQueryCandidateStats(updated);
+    return updated;
+  });
+  pendingRecord = recorded.catch(() => undefined);
+  return recorded;
+}
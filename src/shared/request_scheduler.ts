@@ -0,0 +1,118 @@
+/**
+ * Priority scheduler for portal GraphQL requests.
+ *
+ * Every request to the portal tab names a class: interactive (activity
+ * list paging and single imports the user clicked), bulk (bulk import
+ * items) or prefetch (idle-time detail prefetch). At most maxConcurrent
+ * requests run at once, and each class has its own quota below that, so
+ * bulk can never take every slot and prefetch stays at a trickle. When a
+ * slot frees up the oldest request of the highest class with quota left
+ * starts next.
+ */
+
+export type RequestPriority = "interactive" | "bulk" | "prefetch";
+
+export const REQUEST_PRIORITIES: readonly RequestPriority[] = ["interactive", "bulk", "prefetch"];
+
+export const PORTAL_MAX_CONCURRENT_REQUESTS = 6;
+export const PORTAL_REQUEST_QUOTAS: Record<RequestPriority, number> = {
+  interactive: 6,
+  // One slot is always left for the user
+  bulk: 5,
+  prefetch: 1,
+};
+
+export interface RequestClassStats {
+  queued: number;
+  inFlight: number;
+  completed: number;
+  totalWaitMs: number;
+  maxWaitMs: number;
+}
+
+export interface RequestSchedulerOptions {
+  maxConcurrent?: number;
+  quotas?: Partial<Record<RequestPriority, number>>;
+  now?: () => number;
+}
+
+export interface RequestScheduler {
+  schedule: <T>(priority: RequestPriority, task: () => Promise<T>) => Promise<T>;
+  getStats: () => Record<RequestPriority, RequestClassStats>;
+}
+
+interface QueuedRequest {
+  start: () => void;
+  enqueuedAt: number;
+}
+
+function createClassStats(): RequestClassStats {
+  return { queued: 0, inFlight: 0, completed: 0, totalWaitMs: 0, maxWaitMs: 0 };
+}
+
+/** Mean queue wait of a class in milliseconds, 0 before any request started. */
+export function getAverageWaitMs(stats: RequestClassStats): number {
+  const started = stats.completed + stats.inFlight;
+  return started > 0 ? stats.totalWaitMs / started : 0;
+}
+
+export function createRequestScheduler(options: RequestSchedulerOptions = {}): RequestScheduler {
+  const maxConcurrent = Math.max(1, options.maxConcurrent ?? PORTAL_MAX_CONCURRENT_REQUESTS);
+  const quotas = { ...PORTAL_REQUEST_QUOTAS, ...options.quotas };
+  const now = options.now ?? Date.now;
+  const queues: Record<RequestPriority, QueuedRequest[]> = { interactive: [], bulk: [], prefetch: [] };
+  const stats: Record<RequestPriority, RequestClassStats> = {
+    interactive: createClassStats(),
+    bulk: createClassStats(),
+    prefetch: createClassStats(),
+  };
+  let inFlight = 0;
+
+  const dispatch = () => {
+    for (const priority of REQUEST_PRIORITIES) {
+      const queue = queues[priority];
+      const quota = Math.max(1, Math.min(quotas[priority], maxConcurrent));
+      while (inFlight < maxConcurrent && stats[priority].inFlight < quota && queue.length > 0) {
+        const request = queue.shift()!;
+        const waitMs = now() - request.enqueuedAt;
+        stats[priority].queued -= 1;
+        stats[priority].inFlight += 1;
+        stats[priority].totalWaitMs += waitMs;
+        stats[priority].maxWaitMs = Math.max(stats[priority].maxWaitMs, waitMs);
+        inFlight += 1;
+        request.start();
+      }
+    }
+  };
+
+  const schedule = <T>(priority: RequestPriority, task: () => Promise<T>): Promise<T> => (
+    new Promise<T>((resolve, reject) => {
+      queues[priority].push({
+        enqueuedAt: now(),
+        start: () => {
+          // A task that throws synchronously still releases its slot
+          Promise.resolve()
+            .then(task)
+            .then(resolve, reject)
+            .finally(() => {
+              inFlight -= 1;
+              stats[priority].inFlight -= 1;
+              stats[priority].completed += 1;
+              dispatch();
+            });
+        },
+      });
+      stats[priority].queued += 1;
+      dispatch();
+    })
+  );
+
+  return {
+    schedule,
+    getStats: () => ({
+      interactive: { ...stats.interactive },
+      bulk: { ...stats.bulk },
+      prefetch: { ...stats.prefetch },
+    }),
+  };
+}
@@ -0,0 +1,168 @@
+/**
+ * Binary codec for stored session snapshots.
+ *
+ * Snapshots are converted to the columnar layout (metric keys once per
+ * session instead of once per shot), serialized to JSON and compressed
+ * with CompressionStream("gzip"). Every encoded value starts with a small
+ * versioned header so the layout and compression can change later without
+ * breaking records already on disk:
+ *
+ *   byte 0-1  magic "TP"
+ *   byte 2    codec version (1)
+ *   byte 3    layout: 0 = row JSON, 1 = columnar JSON
+ *   byte 4    compression: 0 = none, 1 = gzip
+ *
+ * Snapshots the columnar layout cannot represent exactly (non-numeric
+ * values, metrics missing from metric_names) keep the row layout. Without
+ * CompressionStream the payload is stored uncompressed. Plain-object
+ * snapshots written before the codec existed are passed through unchanged
+ * by decodeSnapshot.
+ */
+
+import type { SessionSnapshot } from "../models/types";
+import {
+  decodeColumnarSession,
+  encodeColumnarSession,
+  fromColumnarSession,
+  toColumnarSession,
+  type StoredColumnarSessionData,
+} from "./columnar_session";
+
+export const SNAPSHOT_CODEC_VERSION = 1;
+
+const MAGIC_0 = 0x54; // "T"
+const MAGIC_1 = 0x50; // "P"
+const HEADER_BYTES = 5;
+
+const LAYOUT_ROW = 0;
+const LAYOUT_COLUMNAR = 1;
+const COMPRESSION_NONE = 0;
+const COMPRESSION_GZIP = 1;
+
+export type EncodedSnapshot = Uint8Array;
+
+export interface SnapshotCodecStats {
+  encoded: number;
+  decoded: number;
+  /** UTF-8 bytes of the plain row-layout JSON of every encoded snapshot. */
+  rawBytes: number;
+  encodedBytes: number;
+  encodeMs: number;
+  decodeMs: number;
+}
+
+const stats: SnapshotCodecStats = {
+  encoded: 0,
+  decoded: 0,
+  rawBytes: 0,
+  encodedBytes: 0,
+  encodeMs: 0,
+  decodeMs: 0,
+};
+
+function now(): number {
+  return typeof performance !== "undefined" ? performance.now() : Date.now();
+}
+
+function canCompress(): boolean {
+  return typeof CompressionStream !== "undefined" && typeof DecompressionStream !== "undefined";
+}
+
+async function pipeBytes(
+  bytes: Uint8Array,
+  transform: CompressionStream | DecompressionStream
+): Promise<Uint8Array> {
+  const stream = new Blob([bytes]).stream().pipeThrough(transform);
+  return new Uint8Array(await new Response(stream).arrayBuffer());
+}
+
+/** True when every metric is a number listed in metric_names (lossless as columns). */
+function fitsColumnarLayout(snapshot: SessionSnapshot): boolean {
+  const metricNames = new Set(snapshot.metric_names);
+  return snapshot.club_groups.every((club) =>
+    club.shots.every((shot) =>
+      Object.entries(shot.metrics).every(([key, value]) =>
+        metricNames.has(key) && typeof value === "number" && !Number.isNaN(value)
+      )
+    )
+  );
+}
+
+export function isEncodedSnapshot(value: unknown): value is EncodedSnapshot {
+  return value instanceof Uint8Array &&
+    value.length >= HEADER_BYTES &&
+    value[0] === MAGIC_0 &&
+    value[1] === MAGIC_1;
+}
+
+export async function encodeSnapshot(snapshot: SessionSnapshot): Promise<EncodedSnapshot> {
+  const startedAt = now();
+  const encoder = new TextEncoder();
+
+  const rowJson = JSON.stringify(snapshot);
+  let layout = LAYOUT_ROW;
+  let json = rowJson;
+  if (fitsColumnarLayout(snapshot)) {
+    layout = LAYOUT_COLUMNAR;
+    json = JSON.stringify(encodeColumnarSession(toColumnarSession(snapshot)));
+  }
+
+  let body = encoder.encode(json);
+  let compression = COMPRESSION_NONE;
+  if (canCompress()) {
+    body = await pipeBytes(body, new CompressionStream("gzip"));
+    compression = COMPRESSION_GZIP;
+  }
+
+  const encoded = new Uint8Array(HEADER_BYTES + body.length);
+  encoded.set([MAGIC_0, MAGIC_1, SNAPSHOT_CODEC_VERSION, layout, compression]);
+  encoded.set(body, HEADER_BYTES);
+
+  stats.encoded += 1;
+  stats.rawBytes += encoder.encode(rowJson).length;
+  stats.encodedBytes += encoded.length;
+  stats.encodeMs += now() - startedAt;
+  return encoded;
+}
+
+/** Decode a stored snapshot; plain objects from before the codec pass through. */
+export async function decodeSnapshot(stored: EncodedSnapshot | SessionSnapshot): Promise<SessionSnapshot> {
+  if (!isEncodedSnapshot(stored)) return stored as SessionSnapshot;
+
+  const startedAt = now();
+  const version = stored[2];
+  if (version !== SNAPSHOT_CODEC_VERSION) {
+    throw new Error(`Unsupported snapshot codec version: ${version}`);
+  }
+  const layout = stored[3];
+  const compression = stored[4];
+
+  let body = stored.subarray(HEADER_BYTES);
+  if (compression === COMPRESSION_GZIP) {
+    body = await pipeBytes(body, new DecompressionStream("gzip"));
+  } else if (compression !== COMPRESSION_NONE) {
+    throw new Error(`Unsupported snapshot compression: ${compression}`);
+  }
+
+  const parsed = JSON.parse(new TextDecoder().decode(body));
+  const snapshot = layout === LAYOUT_COLUMNAR
+    ? fromColumnarSession(decodeColumnarSession(parsed as StoredColumnarSessionData))
+    : parsed as SessionSnapshot;
+
+  stats.decoded += 1;
+  stats.decodeMs += now() - startedAt;
+  return snapshot;
+}
+
+export function getSnapshotCodecStats(): SnapshotCodecStats & { ratio: number } {
+  return {
+    ...stats,
+    ratio: stats.encodedBytes > 0 ? stats.rawBytes / stats.encodedBytes : 0,
+  };
+}
+
+export function resetSnapshotCodecStatsForTests(): void {
+  for (const key of Object.keys(stats) as Array<keyof SnapshotCodecStats>) {
+    stats[key] = 0;
+  }
+}
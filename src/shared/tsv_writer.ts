@@ -6,7 +6,7 @@
  * mirroring the CSV writer.
  */
 
-import type { SessionData } from "../models/types";
+import { getClubShotViews, sessionHasTags, type AnySessionData } from "./columnar_session";
 import {
   getApiSourceUnitSystem,
   getMetricUnitLabel,
@@ -72,14 +72,8 @@ export function orderMetricsByPriority(
   return result;
 }
 
-function hasTags(session: SessionData): boolean {
-  return session.club_groups.some((club) =>
-    club.shots.some((shot) => shot.tag !== undefined && shot.tag !== "")
-  );
-}
-
 export function writeTsv(
-  session: SessionData,
+  session: AnySessionData,
   unitChoice: UnitChoice = DEFAULT_UNIT_CHOICE,
   hittingSurface?: "Grass" | "Mat"
 ): string {
@@ -88,7 +82,7 @@ export function writeTsv(
     METRIC_COLUMN_ORDER
   );
 
-  const includeTag = hasTags(session);
+  const includeTag = sessionHasTags(session);
 
   // Build header row: Date, Club, [Tag,] Shot # then metric columns with unit labels
   const headerFields: string[] = ["Date", "Club"];
@@ -105,19 +99,19 @@ export function writeTsv(
 
   const rows: string[] = [];
 
-  for (const club of session.club_groups) {
-    for (const shot of club.shots) {
+  for (const club of getClubShotViews(session)) {
+    for (let i = 0; i < club.shotCount; i++) {
       const fields: string[] = [
         escapeTsvField(session.date),
         escapeTsvField(club.club_name),
       ];
       if (includeTag) {
-        fields.push(escapeTsvField(shot.tag ?? ""));
+        fields.push(escapeTsvField(club.tag(i) ?? ""));
       }
-      fields.push(escapeTsvField(String(shot.shot_number + 1)));
+      fields.push(escapeTsvField(String(club.shotNumber(i) + 1)));
 
       for (const metric of orderedMetrics) {
-        const rawValue = shot.metrics[metric] ?? "";
+        const rawValue = club.metric(i, metric) ?? "";
 
         let fieldValue: string;
         if (typeof rawValue === "string" || typeof rawValue === "number") {
@@ -386,7 +386,7 @@ export function normalizeMetricValue(
   reportUnitSystem: UnitSystem,
   unitChoice: UnitChoice = DEFAULT_UNIT_CHOICE
 ): MetricValue {
-  const numValue = parseNumericValue(value);
+  const numValue = toMetricNumber(value);
   if (numValue === null) return value;
 
   let converted: number;
@@ -436,9 +436,10 @@ export function normalizeMetricValue(
 
 /**
  * Parse a numeric value from MetricValue type.
+ * Numbers pass straight through; strings only occur in legacy snapshots.
  */
-function parseNumericValue(value: MetricValue): number | null {
-  if (value === null || value === "") return null;
+export function toMetricNumber(value: MetricValue | undefined): number | null {
+  if (value === undefined || value === null || value === "") return null;
   if (typeof value === "number") return isNaN(value) ? null : value;
   
   const parsed = parseFloat(value);
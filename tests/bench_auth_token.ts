@@ -0,0 +1,50 @@
+/**
+ * Micro-benchmark: resolving the portal bearer token per request, with a
+ * full storage scan each time vs. the memoized resolver, over storage the
+ * size a long-lived portal session accumulates (cached queries, feature
+ * flags, analytics state).
+ *
+ * Run with: npm run bench
+ */
+
+import { bench, describe } from "vitest";
+import {
+  findTrackmanAuthTokenFromStorage,
+  resolveTrackmanAuthToken,
+  type StorageLike,
+} from "../src/content/portal_auth";
+
+const ACCESS_TOKEN = "eyJhbGciOiJIUzI1NiJ9.eyJzdWIiOiJ1c2VyIn0.signature";
+
+function makeStorage(entries: number): StorageLike {
+  const values = new Map<string, string>();
+  for (let i = 0; i < entries; i += 1) {
+    values.set(`apollo.cache.query${i}`, JSON.stringify({
+      __typename: "Activity",
+      id: `activity-${i}`,
+      kind: "CoursePlayActivity",
+      tags: [`tag-${i % 7}`, `tag-${i % 11}`],
+      nested: { label: `Round ${i}`, updatedAt: "2026-01-01T00:00:00Z" },
+    }));
+  }
+  values.set("oidc.user:portal", JSON.stringify({ profile: { sub: "user" }, access_token: ACCESS_TOKEN }));
+  const keys = Array.from(values.keys());
+  return {
+    length: keys.length,
+    key: (index) => keys[index] ?? null,
+    getItem: (key) => values.get(key) ?? null,
+  };
+}
+
+const localStore = makeStorage(2000);
+const sessionStore = makeStorage(200);
+
+describe("auth token per GraphQL request", () => {
+  bench("full storage scan", () => {
+    findTrackmanAuthTokenFromStorage(localStore, sessionStore);
+  });
+
+  bench("memoized resolver", () => {
+    resolveTrackmanAuthToken(localStore, sessionStore);
+  });
+});
@@ -0,0 +1,94 @@
+/**
+ * Bulk import writes against fake-indexeddb: the old per-item pattern
+ * (open, one put transaction, close for every session) versus the shared
+ * connection with group commit.
+ *
+ * Run with: npm run bench
+ */
+
+import { bench, describe, vi } from "vitest";
+import { indexedDB } from "fake-indexeddb";
+import type { SessionData } from "../src/models/types";
+import {
+  putBulkImportedSession,
+  resetBulkImportStoreForTests,
+} from "../src/shared/bulk_import_store";
+
+vi.stubGlobal("indexedDB", indexedDB);
+
+const SESSIONS = 200;
+const LEGACY_DB = "bench-per-item";
+
+function makeSession(index: number): SessionData {
+  return {
+    date: "2026-01-01",
+    report_id: `report-${index}`,
+    url_type: "activity",
+    metric_names: ["Carry", "ClubSpeed"],
+    metadata_params: {},
+    club_groups: [{
+      club_name: "Driver",
+      shots: Array.from({ length: 20 }, (_, shot_number) => ({
+        shot_number,
+        metrics: { Carry: 200 + shot_number, ClubSpeed: 45 },
+      })),
+      averages: {},
+      consistency: {},
+    }],
+  };
+}
+
+function openLegacyDb(): Promise<IDBDatabase> {
+  return new Promise((resolve, reject) => {
+    const request = indexedDB.open(LEGACY_DB, 1);
+    request.onupgradeneeded = () => {
+      const store = request.result.createObjectStore("sessions", { keyPath: "key" });
+      store.createIndex("jobId", "jobId", { unique: false });
+    };
+    request.onsuccess = () => resolve(request.result);
+    request.onerror = () => reject(request.error);
+  });
+}
+
+async function putPerItem(jobId: string, session: SessionData): Promise<void> {
+  const db = await openLegacyDb();
+  try {
+    const tx = db.transaction("sessions", "readwrite");
+    tx.objectStore("sessions").put({
+      key: `${jobId}:${session.report_id}`,
+      jobId,
+      reportId: session.report_id,
+      capturedAt: Date.now(),
+      snapshot: session,
+    });
+    await new Promise<void>((resolve, reject) => {
+      tx.oncomplete = () => resolve();
+      tx.onerror = () => reject(tx.error);
+    });
+  } finally {
+    db.close();
+  }
+}
+
+const sessions = Array.from({ length: SESSIONS }, (_, i) => makeSession(i));
+let run = 0;
+
+describe(`${SESSIONS} bulk-imported sessions`, () => {
+  bench("per-item connection + transaction", async () => {
+    run += 1;
+    for (const session of sessions) {
+      await putPerItem(`job-${run}`, session);
+    }
+  });
+
+  bench("shared connection + group commit", async () => {
+    run += 1;
+    await Promise.all(
+      sessions.map((session, i) => putBulkImportedSession(`job-${run}`, `activity-${i}`, session))
+    );
+  }, {
+    teardown: async () => {
+      await resetBulkImportStoreForTests();
+    },
+  });
+});
@@ -0,0 +1,75 @@
+/**
+ * Serialization cost of a full 20-session history, row vs columnar layout.
+ *
+ * Sizes for the same fixture are logged once; the benches time the
+ * JSON.stringify chrome.storage performs on every history write.
+ *
+ * Run with: npm run bench
+ */
+
+import { bench, describe } from "vitest";
+import type { HistoryEntry, SessionData } from "../src/models/types";
+import { encodeColumnarSession, toColumnarSession } from "../src/shared/columnar_session";
+
+const METRICS = [
+  "AttackAngle", "BallSpeed", "Carry", "ClubPath", "ClubSpeed", "DynamicLoft",
+  "FaceAngle", "FaceToPath", "HangTime", "LandingAngle", "LaunchAngle",
+  "LaunchDirection", "MaxHeight", "Side", "SmashFactor", "SpinAxis", "SpinRate", "Total",
+];
+const SESSIONS = 20;
+const CLUBS = 8;
+const SHOTS_PER_CLUB = 15;
+
+function makeSession(index: number): SessionData {
+  let seed = index * 1000;
+  return {
+    date: "2026-03-01T10:00:00Z",
+    report_id: `report-${index}`,
+    url_type: "activity",
+    metric_names: METRICS,
+    metadata_params: { r: `report-${index}` },
+    club_groups: Array.from({ length: CLUBS }, (_, club) => ({
+      club_name: `Club ${club}`,
+      shots: Array.from({ length: SHOTS_PER_CLUB }, (_, shot_number) => {
+        const metrics: Record<string, string> = {};
+        for (const metric of METRICS) {
+          seed += 1;
+          metrics[metric] = `${Math.round(((seed * 7.31) % 300) * 10) / 10}`;
+        }
+        return { shot_number, metrics };
+      }),
+      averages: {},
+      consistency: {},
+    })),
+  };
+}
+
+const rowHistory: HistoryEntry[] = Array.from({ length: SESSIONS }, (_, i) => ({
+  captured_at: i,
+  snapshot: makeSession(i),
+}));
+const columnarHistory = rowHistory.map((entry) => ({
+  captured_at: entry.captured_at,
+  snapshot: encodeColumnarSession(toColumnarSession(entry.snapshot)),
+}));
+
+const cells = SESSIONS * CLUBS * SHOTS_PER_CLUB * METRICS.length;
+console.log("20-session history", {
+  rowJsonBytes: JSON.stringify(rowHistory).length,
+  columnarJsonBytes: JSON.stringify(columnarHistory).length,
+  columnarTypedArrayBytes: cells * Float64Array.BYTES_PER_ELEMENT,
+});
+
+describe("20-session history serialization", () => {
+  bench("row layout", () => {
+    JSON.stringify(rowHistory);
+  });
+
+  bench("columnar layout", () => {
+    JSON.stringify(columnarHistory);
+  });
+
+  bench("row -> columnar conversion", () => {
+    for (const entry of rowHistory) toColumnarSession(entry.snapshot);
+  });
+});
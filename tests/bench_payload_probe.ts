@@ -0,0 +1,73 @@
+/**
+ * Micro-benchmark: structural shot-data probe vs. the previous
+ * JSON.stringify + substring scan, over large payloads that are NOT shot
+ * data (the common case on report-page load).
+ *
+ * Run with: npm run bench
+ */
+
+import { bench, describe } from "vitest";
+import { containsStrokegroups } from "../src/content/payload_probe";
+
+function legacyContainsStrokegroups(data: unknown): boolean {
+  if (!data || typeof data !== "object") return false;
+  const obj = data as Record<string, unknown>;
+
+  if ("StrokeGroups" in obj && Array.isArray(obj["StrokeGroups"]) && obj["StrokeGroups"].length > 0) {
+    return true;
+  }
+
+  try {
+    const text = JSON.stringify(obj).toLowerCase();
+    const indicators = [
+      "ballspeed", "clubspeed", "carry", "spinrate",
+      "strokegroups", "strokes", "measurement",
+    ];
+    return indicators.filter((ind) => text.includes(ind)).length >= 3;
+  } catch {
+    return false;
+  }
+}
+
+function makeTranslationPayload(entries: number): Record<string, unknown> {
+  const resources: Record<string, string> = {};
+  for (let i = 0; i < entries; i += 1) {
+    resources[`report.section${i % 50}.label${i}`] = `Localized label number ${i} for the report view`;
+  }
+  return { locale: "en-US", version: 3, resources };
+}
+
+function makeConfigPayload(features: number): Record<string, unknown> {
+  return {
+    app: { name: "dynamic-reports", build: "2026.10.1" },
+    features: Array.from({ length: features }, (_, i) => ({
+      id: `feature-${i}`,
+      enabled: i % 2 === 0,
+      rollout: { percent: i % 100, cohorts: ["a", "b", "c"] },
+      description: "Feature flag description text that pads out the payload",
+    })),
+  };
+}
+
+const translationPayload = makeTranslationPayload(20000);
+const configPayload = makeConfigPayload(5000);
+
+describe("non-shot translation payload (20k keys)", () => {
+  bench("legacy stringify scan", () => {
+    legacyContainsStrokegroups(translationPayload);
+  });
+
+  bench("structural probe", () => {
+    containsStrokegroups(translationPayload);
+  });
+});
+
+describe("non-shot config payload (5k feature objects)", () => {
+  bench("legacy stringify scan", () => {
+    legacyContainsStrokegroups(configPayload);
+  });
+
+  bench("structural probe", () => {
+    containsStrokegroups(configPayload);
+  });
+});
@@ -0,0 +1,71 @@
+/**
+ * Main-thread blocking time for a synthetic 5,000-shot report.
+ *
+ * "in-thread parse" is what the interceptor used to do on the page's main
+ * thread: JSON.parse plus SessionData construction. "worker handoff" is what
+ * remains on the main thread with the parser worker: structured-cloning the
+ * raw text into the worker and the finished SessionData back out.
+ *
+ * Run with: npm run bench
+ */
+
+import { bench, describe } from "vitest";
+import { parseSessionTextInThread } from "../src/content/parser_worker";
+
+const REPORT_URL = "https://web-dynamic-reports.trackmangolf.com/reports?r=bench-5000";
+const CLUBS = ["Driver", "3Wood", "5Iron", "7Iron", "9Iron", "PW", "SW", "LW", "Hybrid", "Putter"];
+const SHOTS_PER_CLUB = 500;
+
+function makeMeasurement(seed: number): Record<string, number> {
+  return {
+    ClubSpeed: 40 + (seed % 10),
+    BallSpeed: 60 + (seed % 15),
+    SmashFactor: 1.4,
+    AttackAngle: -2 + (seed % 5),
+    ClubPath: 1.5,
+    FaceAngle: 0.5,
+    FaceToPath: -1,
+    DynamicLoft: 14,
+    SpinRate: 2500 + seed,
+    SpinAxis: 3.2,
+    LaunchAngle: 12,
+    LaunchDirection: 1.1,
+    Carry: 200 + (seed % 40),
+    Total: 220 + (seed % 40),
+    Side: 4,
+    MaxHeight: 30,
+    LandingAngle: 40,
+    HangTime: 6.1,
+  };
+}
+
+function makeReportText(): string {
+  let seed = 0;
+  return JSON.stringify({
+    Time: { Date: "2026-03-01T10:00:00Z" },
+    StrokeGroups: CLUBS.map((club) => ({
+      Club: club,
+      Strokes: Array.from({ length: SHOTS_PER_CLUB }, () => {
+        seed += 1;
+        return {
+          Measurement: makeMeasurement(seed),
+          NormalizedMeasurement: makeMeasurement(seed + 1),
+        };
+      }),
+    })),
+  });
+}
+
+const reportText = makeReportText();
+const parsedSession = parseSessionTextInThread(reportText, REPORT_URL);
+
+describe("5,000-shot report: main-thread cost", () => {
+  bench("in-thread parse", () => {
+    parseSessionTextInThread(reportText, REPORT_URL);
+  });
+
+  bench("worker handoff (clone text in + session out)", () => {
+    structuredClone(reportText);
+    structuredClone(parsedSession);
+  });
+});
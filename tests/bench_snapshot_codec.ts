@@ -0,0 +1,58 @@
+/**
+ * Encode/decode cost and compression ratio of the stored-snapshot codec
+ * for a typical 120-shot, 18-metric session.
+ *
+ * Run with: npm run bench
+ */
+
+import { bench, describe } from "vitest";
+import type { SessionSnapshot } from "../src/models/types";
+import { decodeSnapshot, encodeSnapshot, getSnapshotCodecStats } from "../src/shared/snapshot_codec";
+
+const METRICS = [
+  "AttackAngle", "BallSpeed", "Carry", "ClubPath", "ClubSpeed", "DynamicLoft",
+  "FaceAngle", "FaceToPath", "HangTime", "LandingAngle", "LaunchAngle",
+  "LaunchDirection", "MaxHeight", "Side", "SmashFactor", "SpinAxis", "SpinRate", "Total",
+];
+
+let seed = 1;
+function random(): number {
+  seed = (seed * 16807) % 2147483647;
+  return seed / 2147483647;
+}
+
+const snapshot: SessionSnapshot = {
+  date: "2026-03-01T10:00:00Z",
+  report_id: "bench",
+  url_type: "activity",
+  metric_names: METRICS,
+  metadata_params: { r: "bench" },
+  club_groups: Array.from({ length: 8 }, (_, club) => ({
+    club_name: `Club ${club}`,
+    shots: Array.from({ length: 15 }, (_, shot_number) => ({
+      shot_number,
+      metrics: Object.fromEntries(METRICS.map((metric) => [metric, Math.round(random() * 3000) / 10])),
+    })),
+    averages: {},
+    consistency: {},
+  })),
+};
+
+const encoded = await encodeSnapshot(snapshot);
+await decodeSnapshot(encoded);
+const stats = getSnapshotCodecStats();
+console.log("snapshot codec", {
+  rawBytes: stats.rawBytes,
+  encodedBytes: stats.encodedBytes,
+  ratio: Number(stats.ratio.toFixed(1)),
+});
+
+describe("snapshot codec (120 shots x 18 metrics)", () => {
+  bench("encode", async () => {
+    await encodeSnapshot(snapshot);
+  });
+
+  bench("decode", async () => {
+    await decodeSnapshot(encoded);
+  });
+});
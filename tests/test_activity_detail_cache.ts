@@ -0,0 +1,76 @@
+import { afterEach, beforeEach, describe, expect, it, vi } from "vitest";
+import { indexedDB } from "fake-indexeddb";
+import {
+  ACTIVITY_CACHE_MAX_ENTRIES,
+  ACTIVITY_CACHE_TTL_MS,
+  getActivityCacheStats,
+  getCachedActivityResponse,
+  purgeActivityCache,
+  putCachedActivityResponse,
+  resetActivityCacheForTests,
+} from "../src/shared/activity_detail_cache";
+
+vi.stubGlobal("indexedDB", indexedDB);
+
+function deleteDb(name: string): Promise<void> {
+  return new Promise((resolve, reject) => {
+    const request = indexedDB.deleteDatabase(name);
+    request.onsuccess = () => resolve();
+    request.onerror = () => reject(request.error);
+    request.onblocked = () => reject(new Error("delete blocked"));
+  });
+}
+
+const payload = [{ data: { node: { id: "a1", strokes: [{ club: "Driver" }] } } }];
+
+describe("activity detail cache", () => {
+  beforeEach(async () => {
+    await resetActivityCacheForTests();
+    await deleteDb("trackpull-activity-cache").catch(() => undefined);
+  });
+
+  afterEach(async () => {
+    await resetActivityCacheForTests();
+  });
+
+  it("returns stored payloads for the same activity and query set", async () => {
+    expect(await getCachedActivityResponse("a1", "set-1", 1000)).toBeNull();
+    await putCachedActivityResponse("a1", "set-1", payload, 1000);
+
+    expect(await getCachedActivityResponse("a1", "set-1", 2000)).toEqual(payload);
+    expect(await getCachedActivityResponse("a1", "set-2", 2000)).toBeNull();
+    expect(getActivityCacheStats()).toEqual({ hits: 1, misses: 2, expired: 0, evicted: 0 });
+  });
+
+  it("drops entries older than the TTL", async () => {
+    await putCachedActivityResponse("a1", "set-1", payload, 1000);
+
+    expect(await getCachedActivityResponse("a1", "set-1", 1000 + ACTIVITY_CACHE_TTL_MS + 1)).toBeNull();
+    expect(getActivityCacheStats().expired).toBe(1);
+    // The expired entry is gone, not just hidden
+    expect(await getCachedActivityResponse("a1", "set-1", 1000)).toBeNull();
+  });
+
+  it("evicts the least recently used entry past the entry bound", async () => {
+    for (let i = 0; i < ACTIVITY_CACHE_MAX_ENTRIES; i++) {
+      await putCachedActivityResponse(`a${i}`, "set-1", payload, 1000 + i);
+    }
+    // Touch the oldest so the second oldest becomes the eviction candidate
+    await getCachedActivityResponse("a0", "set-1", 5000);
+    await putCachedActivityResponse("new", "set-1", payload, 6000);
+
+    expect(getActivityCacheStats().evicted).toBe(1);
+    expect(await getCachedActivityResponse("a0", "set-1", 7000)).toEqual(payload);
+    expect(await getCachedActivityResponse("a1", "set-1", 7000)).toBeNull();
+    expect(await getCachedActivityResponse("new", "set-1", 7000)).toEqual(payload);
+  });
+
+  it("purges every entry", async () => {
+    await putCachedActivityResponse("a1", "set-1", payload, 1000);
+    await putCachedActivityResponse("a2", "set-1", payload, 1000);
+
+    expect(await purgeActivityCache()).toBe(2);
+    expect(await getCachedActivityResponse("a1", "set-1", 1000)).toBeNull();
+    expect(await purgeActivityCache()).toBe(0);
+  });
+});
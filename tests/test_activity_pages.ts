@@ -0,0 +1,156 @@
+import { describe, expect, it, vi } from "vitest";
+import {
+  fetchActivitySummaryPages,
+  fetchNewActivitySummaries,
+  type ActivityPageResult,
+} from "../src/shared/activity_pages";
+import type { ActivitySummary } from "../src/shared/import_types";
+
+function activity(index: number): ActivitySummary {
+  return { id: `activity-${index}`, date: "2026-01-01", strokeCount: null, type: "CoursePlayActivity" };
+}
+
+/** A portal list of `total` activities served in pages, with optional latency per offset. */
+function createPortal(total: number, options: { withTotalCount?: boolean; latency?: (skip: number) => number } = {}) {
+  let active = 0;
+  let peak = 0;
+  const fetchPage = vi.fn(async (skip: number, take: number): Promise<ActivityPageResult> => {
+    active += 1;
+    peak = Math.max(peak, active);
+    await new Promise((resolve) => setTimeout(resolve, options.latency?.(skip) ?? 1));
+    active -= 1;
+    const items = Array.from({ length: Math.max(0, Math.min(take, total - skip)) }, (_, i) => activity(skip + i));
+    return {
+      page: {
+        activities: items,
+        itemCount: items.length,
+        totalCount: options.withTotalCount === false ? null : total,
+        hasNextPage: null,
+      },
+    };
+  });
+  return { fetchPage, getPeak: () => peak };
+}
+
+describe("fetchActivitySummaryPages", () => {
+  it("fans out remaining pages when totalCount is known and keeps offset order", async () => {
+    // Later pages answer first
+    const portal = createPortal(95, { latency: (skip) => 40 - skip / 5 });
+    const firstPages: ActivitySummary[][] = [];
+
+    const result = await fetchActivitySummaryPages({
+      fetchPage: portal.fetchPage,
+      pageSize: 10,
+      concurrency: 3,
+      onFirstPage: (activities) => firstPages.push(activities),
+    });
+
+    expect(result.activities?.map((a) => a.id)).toEqual(
+      Array.from({ length: 95 }, (_, i) => `activity-${i}`)
+    );
+    expect(portal.fetchPage).toHaveBeenCalledTimes(10);
+    expect(portal.getPeak()).toBe(3);
+    expect(firstPages).toHaveLength(1);
+    expect(firstPages[0]).toHaveLength(10);
+  });
+
+  it("pages serially when totalCount is unknown", async () => {
+    const portal = createPortal(25, { withTotalCount: false });
+
+    const result = await fetchActivitySummaryPages({ fetchPage: portal.fetchPage, pageSize: 10, concurrency: 4 });
+
+    expect(result.activities).toHaveLength(25);
+    expect(portal.fetchPage.mock.calls.map(([skip]) => skip)).toEqual([0, 10, 20]);
+    expect(portal.getPeak()).toBe(1);
+  });
+
+  it("returns a single page without calling onFirstPage", async () => {
+    const portal = createPortal(7);
+    const onFirstPage = vi.fn();
+
+    const result = await fetchActivitySummaryPages({ fetchPage: portal.fetchPage, pageSize: 10, onFirstPage });
+
+    expect(result.activities).toHaveLength(7);
+    expect(onFirstPage).not.toHaveBeenCalled();
+  });
+
+  it("respects the page cap", async () => {
+    const portal = createPortal(1000);
+
+    const result = await fetchActivitySummaryPages({ fetchPage: portal.fetchPage, pageSize: 10, maxPages: 5 });
+
+    expect(result.activities).toHaveLength(50);
+    expect(portal.fetchPage).toHaveBeenCalledTimes(5);
+  });
+
+  it("reports the first failing page", async () => {
+    const portal = createPortal(60);
+    const fetchPage = vi.fn(async (skip: number, take: number): Promise<ActivityPageResult> => (
+      skip === 30 ? { error: "Unauthorized" } : portal.fetchPage(skip, take)
+    ));
+
+    const result = await fetchActivitySummaryPages({ fetchPage, pageSize: 10, concurrency: 2 });
+
+    expect(result).toEqual({ error: "Unauthorized" });
+  });
+
+  it("merges duplicate activities across pages once", async () => {
+    const fetchPage = async (skip: number): Promise<ActivityPageResult> => ({
+      page: {
+        activities: [activity(skip), activity(skip + 1), activity(0)],
+        itemCount: 3,
+        totalCount: 6,
+        hasNextPage: null,
+      },
+    });
+
+    const result = await fetchActivitySummaryPages({ fetchPage, pageSize: 3 });
+
+    expect(result.activities?.map((a) => a.id)).toEqual([
+      "activity-0", "activity-1", "activity-3", "activity-4",
+    ]);
+  });
+});
+
+describe("fetchNewActivitySummaries", () => {
+  it("stops at the first known activity", async () => {
+    const portal = createPortal(100);
+    const known = new Set(["activity-13", "activity-14"]);
+
+    const result = await fetchNewActivitySummaries({
+      fetchPage: portal.fetchPage,
+      isKnown: (a) => known.has(a.id),
+      pageSize: 10,
+    });
+
+    expect(result.reachedKnown).toBe(true);
+    expect(result.activities?.map((a) => a.id)).toEqual(
+      Array.from({ length: 13 }, (_, i) => `activity-${i}`)
+    );
+    expect(portal.fetchPage).toHaveBeenCalledTimes(2);
+  });
+
+  it("reports an exhausted list when nothing is known", async () => {
+    const portal = createPortal(15);
+
+    const result = await fetchNewActivitySummaries({ fetchPage: portal.fetchPage, isKnown: () => false, pageSize: 10 });
+
+    expect(result).toMatchObject({ exhausted: true });
+    expect(result.activities).toHaveLength(15);
+  });
+
+  it("gives up at the page cap without claiming completeness", async () => {
+    const portal = createPortal(100);
+
+    const result = await fetchNewActivitySummaries({
+      fetchPage: portal.fetchPage,
+      isKnown: () => false,
+      pageSize: 10,
+      maxPages: 2,
+    });
+
+    expect(result.reachedKnown).toBeUndefined();
+    expect(result.exhausted).toBeUndefined();
+    expect(result.activities).toHaveLength(20);
+  });
+});
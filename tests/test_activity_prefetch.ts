@@ -0,0 +1,126 @@
+import { describe, expect, it, vi } from "vitest";
+import { createActivityPrefetcher, type PrefetchTarget } from "../src/shared/activity_prefetch";
+
+/** Idle callbacks run only when the test says the popup is idle. */
+function createIdleQueue() {
+  const callbacks: Array<() => void> = [];
+  return {
+    scheduleIdle: (callback: () => void) => callbacks.push(callback),
+    async runIdle(): Promise<void> {
+      const pending = callbacks.splice(0);
+      pending.forEach((callback) => callback());
+      await new Promise((resolve) => setTimeout(resolve, 0));
+    },
+    pendingCount: () => callbacks.length,
+  };
+}
+
+const targets = (...ids: string[]): PrefetchTarget[] => ids.map((id) => ({ id, type: "CoursePlayActivity" }));
+
+describe("createActivityPrefetcher", () => {
+  it("fetches visible activities one at a time when idle", async () => {
+    const idle = createIdleQueue();
+    const fetch = vi.fn(async () => undefined);
+    const prefetcher = createActivityPrefetcher({
+      fetch,
+      isBusy: () => false,
+      isFatalError: () => false,
+      scheduleIdle: idle.scheduleIdle,
+    });
+
+    prefetcher.setTargets(targets("a", "b"));
+    expect(fetch).not.toHaveBeenCalled();
+    await idle.runIdle();
+    expect(fetch.mock.calls.map(([target]) => target.id)).toEqual(["a"]);
+    await idle.runIdle();
+    expect(fetch.mock.calls.map(([target]) => target.id)).toEqual(["a", "b"]);
+
+    // Scrolling back over fetched rows does not fetch them again
+    prefetcher.setTargets(targets("a", "b"));
+    await idle.runIdle();
+    expect(fetch).toHaveBeenCalledTimes(2);
+    expect(prefetcher.getStats()).toEqual({ prefetched: 2, failed: 0, yielded: 0 });
+  });
+
+  it("waits while a user request is running", async () => {
+    const idle = createIdleQueue();
+    let busy = true;
+    const fetch = vi.fn(async () => undefined);
+    const prefetcher = createActivityPrefetcher({
+      fetch,
+      isBusy: () => busy,
+      isFatalError: () => false,
+      scheduleIdle: idle.scheduleIdle,
+    });
+
+    prefetcher.setTargets(targets("a"));
+    await idle.runIdle();
+    await idle.runIdle();
+    expect(fetch).not.toHaveBeenCalled();
+    expect(prefetcher.getStats().yielded).toBe(2);
+
+    busy = false;
+    await idle.runIdle();
+    expect(fetch).toHaveBeenCalledTimes(1);
+  });
+
+  it("stops for good on an auth error", async () => {
+    const idle = createIdleQueue();
+    const fetch = vi.fn(async () => {
+      throw new Error("Unauthorized");
+    });
+    const prefetcher = createActivityPrefetcher({
+      fetch,
+      isBusy: () => false,
+      isFatalError: (message) => message === "Unauthorized",
+      scheduleIdle: idle.scheduleIdle,
+    });
+
+    prefetcher.setTargets(targets("a", "b", "c"));
+    await idle.runIdle();
+    expect(prefetcher.isStopped()).toBe(true);
+
+    prefetcher.setTargets(targets("d"));
+    await idle.runIdle();
+    expect(fetch).toHaveBeenCalledTimes(1);
+    expect(idle.pendingCount()).toBe(0);
+  });
+
+  it("lets an import wait for the prefetch of the same activity", async () => {
+    const idle = createIdleQueue();
+    let finish = () => {};
+    const fetch = vi.fn(() => new Promise<void>((resolve) => { finish = resolve; }));
+    const prefetcher = createActivityPrefetcher({
+      fetch,
+      isBusy: () => false,
+      isFatalError: () => false,
+      scheduleIdle: idle.scheduleIdle,
+    });
+
+    prefetcher.setTargets(targets("a"));
+    await idle.runIdle();
+    const settled = prefetcher.whenSettled("a");
+    expect(settled).not.toBeNull();
+    expect(prefetcher.whenSettled("b")).toBeNull();
+
+    finish();
+    await settled;
+    expect(prefetcher.whenSettled("a")).toBeNull();
+  });
+
+  it("caps the number of activities fetched ahead", async () => {
+    const idle = createIdleQueue();
+    const fetch = vi.fn(async () => undefined);
+    const prefetcher = createActivityPrefetcher({
+      fetch,
+      isBusy: () => false,
+      isFatalError: () => false,
+      scheduleIdle: idle.scheduleIdle,
+      maxActivities: 2,
+    });
+
+    prefetcher.setTargets(targets("a", "b", "c", "d"));
+    for (let i = 0; i < 5; i++) await idle.runIdle();
+    expect(fetch).toHaveBeenCalledTimes(2);
+  });
+});
@@ -0,0 +1,86 @@
+import { beforeEach, describe, expect, it, vi } from "vitest";
+import { indexedDB } from "fake-indexeddb";
+import type { ActivitySummary } from "../src/shared/import_types";
+import {
+  createActivitySyncWatermark,
+  getActivitySyncWatermark,
+  getStoredActivities,
+  isOlderThanWatermark,
+  saveActivities,
+} from "../src/shared/activity_store";
+
+vi.stubGlobal("indexedDB", indexedDB);
+
+function deleteDb(name: string): Promise<void> {
+  return new Promise((resolve, reject) => {
+    const request = indexedDB.deleteDatabase(name);
+    request.onsuccess = () => resolve();
+    request.onerror = () => reject(request.error);
+    request.onblocked = () => reject(new Error("delete blocked"));
+  });
+}
+
+function activity(id: string, date: string): ActivitySummary {
+  return { id, date, strokeCount: null, type: "CoursePlayActivity" };
+}
+
+describe("activity list store", () => {
+  beforeEach(async () => {
+    await deleteDb("trackpull-activities").catch(() => undefined);
+  });
+
+  it("starts empty", async () => {
+    expect(await getStoredActivities()).toEqual([]);
+    expect(await getActivitySyncWatermark()).toBeNull();
+  });
+
+  it("keeps portal order and the watermark from a full sync", async () => {
+    const list = [activity("c", "2026-03-03"), activity("b", "2026-03-02"), activity("a", "2026-03-01")];
+    await saveActivities(list, createActivitySyncWatermark(list, "kinds-page", 1000), true);
+
+    expect(await getStoredActivities()).toEqual(list);
+    expect(await getActivitySyncWatermark()).toEqual({
+      newestDate: "2026-03-03",
+      newestId: "c",
+      candidateLabel: "kinds-page",
+      syncedAt: 1000,
+    });
+  });
+
+  it("puts a delta in front of the stored list", async () => {
+    const list = [activity("b", "2026-03-02"), activity("a", "2026-03-01")];
+    await saveActivities(list, createActivitySyncWatermark(list, "kinds-page", 1000), true);
+
+    const delta = [activity("d", "2026-03-04"), activity("c", "2026-03-03")];
+    await saveActivities(delta, createActivitySyncWatermark(delta, "kinds-page", 2000), false);
+
+    expect((await getStoredActivities()).map((a) => a.id)).toEqual(["d", "c", "b", "a"]);
+    expect((await getActivitySyncWatermark())?.newestId).toBe("d");
+  });
+
+  it("drops activities missing from a full resync", async () => {
+    const list = [activity("b", "2026-03-02"), activity("a", "2026-03-01")];
+    await saveActivities(list, createActivitySyncWatermark(list, "kinds-page"), true);
+
+    await saveActivities([activity("a", "2026-03-01")], createActivitySyncWatermark([activity("a", "2026-03-01")], "kinds-page"), true);
+    expect((await getStoredActivities()).map((a) => a.id)).toEqual(["a"]);
+
+    await saveActivities([], null, true);
+    expect(await getStoredActivities()).toEqual([]);
+    expect(await getActivitySyncWatermark()).toBeNull();
+  });
+});
+
+describe("isOlderThanWatermark", () => {
+  const watermark = createActivitySyncWatermark([activity("c", "2026-03-03T10:00:00Z")], "kinds-page", 1000)!;
+
+  it("compares dates as timestamps across formats", () => {
+    expect(isOlderThanWatermark(activity("b", "2026-03-02"), watermark)).toBe(true);
+    expect(isOlderThanWatermark(activity("d", "March 4, 2026"), watermark)).toBe(false);
+  });
+
+  it("never treats an undated activity as older", () => {
+    expect(isOlderThanWatermark(activity("x", ""), watermark)).toBe(false);
+    expect(isOlderThanWatermark(activity("b", "2026-03-02"), { ...watermark, newestDate: "" })).toBe(false);
+  });
+});
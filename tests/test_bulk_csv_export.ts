@@ -0,0 +1,140 @@
+import { beforeEach, describe, expect, it, vi } from "vitest";
+import { indexedDB } from "fake-indexeddb";
+import type { SessionData } from "../src/models/types";
+import {
+  getBulkImportedSessionSummary,
+  iterateBulkImportedSessions,
+  putBulkImportedSession,
+  resetBulkImportStoreForTests,
+} from "../src/shared/bulk_import_store";
+import { buildBulkCsvBlob } from "../src/shared/bulk_csv_export";
+import { writeBulkCsv } from "../src/shared/csv_writer";
+
+vi.stubGlobal("indexedDB", indexedDB);
+
+function deleteDb(name: string): Promise<void> {
+  return new Promise((resolve, reject) => {
+    const request = indexedDB.deleteDatabase(name);
+    request.onsuccess = () => resolve();
+    request.onerror = () => reject(request.error);
+    request.onblocked = () => reject(new Error("delete blocked"));
+  });
+}
+
+function makeSession(
+  reportId: string,
+  metrics: Record<string, number>,
+  tag?: string
+): SessionData {
+  return {
+    date: "2026-01-01",
+    report_id: reportId,
+    url_type: "activity",
+    metric_names: Object.keys(metrics),
+    metadata_params: { activity_id: `activity-${reportId}`, activity_type: "RangeActivity" },
+    club_groups: [
+      {
+        club_name: "7 Iron",
+        shots: [
+          { shot_number: 0, metrics, tag },
+          { shot_number: 1, metrics: { ...metrics, Carry: 151 } },
+        ],
+        averages: {},
+        consistency: {},
+      },
+    ],
+  };
+}
+
+async function collect(jobId: string, pageSize: number): Promise<string[]> {
+  const ids: string[] = [];
+  for await (const session of iterateBulkImportedSessions(jobId, pageSize)) {
+    ids.push(session.report_id);
+  }
+  return ids;
+}
+
+describe("streaming bulk CSV export", () => {
+  beforeEach(async () => {
+    await resetBulkImportStoreForTests();
+    await deleteDb("trackpull-bulk-import").catch(() => undefined);
+  });
+
+  it("pages through one job in capture order", async () => {
+    for (let i = 0; i < 7; i++) {
+      // Captured in reverse of report order
+      await putBulkImportedSession("job-1", `a-${i}`, makeSession(`report-${i}`, { Carry: 150 }), 2000 - i);
+    }
+    await putBulkImportedSession("job-2", "a-x", makeSession("report-x", { Carry: 150 }), 1);
+
+    expect(await collect("job-1", 3)).toEqual([
+      "report-6", "report-5", "report-4", "report-3", "report-2", "report-1", "report-0",
+    ]);
+    expect(await collect("job-none", 3)).toEqual([]);
+  });
+
+  it("summarizes metrics and tags from record metadata", async () => {
+    await putBulkImportedSession("job-1", "a-1", makeSession("report-1", { Carry: 150 }), 1);
+    await putBulkImportedSession("job-1", "a-2", makeSession("report-2", { BallSpeed: 120 }, "flush"), 2);
+
+    expect(await getBulkImportedSessionSummary("job-1")).toEqual({
+      count: 2,
+      metricNames: ["Carry", "BallSpeed"],
+      hasTags: true,
+    });
+  });
+
+  it("upgrades a version 1 store and decodes records without metadata", async () => {
+    await new Promise<void>((resolve, reject) => {
+      const request = indexedDB.open("trackpull-bulk-import", 1);
+      request.onupgradeneeded = () => {
+        const store = request.result.createObjectStore("sessions", { keyPath: "key" });
+        store.createIndex("jobId", "jobId", { unique: false });
+        const { raw_api_data: _, ...snapshot } = makeSession("legacy", { Carry: 150 }, "old");
+        store.put({ key: "job-1:legacy", jobId: "job-1", activityId: "a", reportId: "legacy", capturedAt: 5, snapshot });
+      };
+      request.onsuccess = () => {
+        request.result.close();
+        resolve();
+      };
+      request.onerror = () => reject(request.error);
+    });
+
+    await putBulkImportedSession("job-1", "a-2", makeSession("report-2", { Spin: 6000 }), 1);
+
+    expect(await collect("job-1", 50)).toEqual(["report-2", "legacy"]);
+    expect(await getBulkImportedSessionSummary("job-1")).toEqual({
+      count: 2,
+      metricNames: ["Spin", "Carry"],
+      hasTags: true,
+    });
+  });
+
+  it("produces the same text as writeBulkCsv", async () => {
+    const sessions = [
+      makeSession("report-1", { Carry: 150, ClubSpeed: 80 }),
+      makeSession("report-2", { BallSpeed: 120 }, "draw"),
+      { ...makeSession("report-3", { Carry: 140 }), club_groups: [] },
+      makeSession("report-4", { Carry: 155, Spin: 6500 }),
+    ];
+    for (const [i, session] of sessions.entries()) {
+      await putBulkImportedSession("job-1", `a-${i}`, session, 1000 + i);
+    }
+
+    const { blob, sessionCount } = await buildBulkCsvBlob("job-1", {
+      includeAverages: true,
+      hittingSurface: "Mat",
+      pageSize: 2,
+    });
+
+    expect(sessionCount).toBe(4);
+    expect(blob.type).toBe("text/csv;charset=utf-8");
+    expect(await blob.text()).toBe(writeBulkCsv(sessions, true, undefined, undefined, "Mat"));
+  });
+
+  it("reports an empty job", async () => {
+    const { blob, sessionCount } = await buildBulkCsvBlob("job-empty");
+    expect(sessionCount).toBe(0);
+    expect(blob.size).toBeGreaterThan(0);
+  });
+});
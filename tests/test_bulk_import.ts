@@ -4,11 +4,13 @@ import {
   completeBulkImportJob,
   createBulkImportJob,
   failBulkImportItem,
+  findBulkImportItem,
   getBulkImportProgressLabel,
   getNextBulkImportItem,
   pauseBulkImportJob,
-  recoverInterruptedBulkImportJob,
+  recordBulkImportThroughput,
   resetFailedBulkImportItems,
+  snapshotBulkImportJob,
   startBulkImportJob,
   updateBulkImportItem,
 } from "../src/shared/bulk_import";
@@ -62,17 +64,6 @@ describe("bulk import job state", () => {
     expect(getBulkImportProgressLabel(job)).toBe("2 / 2 | 1 imported | 1 failed");
   });
 
-  it("recovers an interrupted running job by pausing and re-queueing importing item", () => {
-    let job = startBulkImportJob(createBulkImportJob(activities, 1000), 1100);
-    job = updateBulkImportItem(job, "activity-1", { status: "importing" }, 1200);
-
-    const recovered = recoverInterruptedBulkImportJob(job, 1300);
-
-    expect(recovered.state).toBe("paused");
-    expect(recovered.currentActivityId).toBeUndefined();
-    expect(recovered.items[0].status).toBe("pending");
-  });
-
   it("resets only failed items for retry", () => {
     let job = createBulkImportJob(activities, 1000);
     job = updateBulkImportItem(job, "activity-1", { status: "imported", reportId: "report-1" }, 1100);
@@ -99,4 +90,94 @@ describe("bulk import job state", () => {
     expect(complete.state).toBe("complete");
     expect(complete.imported).toBe(1);
   });
+
+  it("reports throughput for the current run only", () => {
+    let job = startBulkImportJob(createBulkImportJob(activities, 1000), 1000);
+    expect(recordBulkImportThroughput(job, 5000).throughput).toBeUndefined();
+
+    job = updateBulkImportItem(job, "activity-1", { status: "imported", reportId: "report-1" }, 31_000);
+    job = recordBulkImportThroughput(job, 31_000);
+    expect(job.throughput).toBe(2);
+    expect(getBulkImportProgressLabel(job)).toBe("1 / 2 | 1 imported | 2.0/min");
+
+    // A resumed run does not count items finished before it started
+    job = startBulkImportJob(pauseBulkImportJob(job, 40_000), 100_000);
+    expect(job.throughput).toBeUndefined();
+    job = failBulkImportItem(job, "activity-2", "No shot data found", 115_000);
+    expect(recordBulkImportThroughput(job, 115_000).throughput).toBe(4);
+  });
+
+  it("walks pending items with a cursor and rewinds it for items put back", () => {
+    const many: ActivitySummary[] = Array.from({ length: 5 }, (_, i) => ({
+      id: `a${i}`,
+      date: "2026-01-01",
+      strokeCount: null,
+      type: "CoursePlayActivity",
+    }));
+    let job = startBulkImportJob(createBulkImportJob(many, 1000), 1000);
+
+    const claimed: string[] = [];
+    for (let i = 0; i < 3; i++) {
+      const next = getNextBulkImportItem(job)!;
+      claimed.push(next.activityId);
+      job = updateBulkImportItem(job, next.activityId, { status: "importing" }, 1100);
+    }
+    expect(claimed).toEqual(["a0", "a1", "a2"]);
+    expect(job.nextPendingIndex).toBe(3);
+
+    job = updateBulkImportItem(job, "a1", { status: "pending" }, 1200);
+    expect(getNextBulkImportItem(job)?.activityId).toBe("a1");
+  });
+
+  it("moves the cursor past claims among scattered retried items", () => {
+    const many: ActivitySummary[] = Array.from({ length: 6 }, (_, i) => ({
+      id: `a${i}`,
+      date: "2026-01-01",
+      strokeCount: null,
+      type: "CoursePlayActivity",
+    }));
+    let job = startBulkImportJob(createBulkImportJob(many, 1000), 1000);
+    for (const item of many) {
+      job = item.id === "a2" || item.id === "a4"
+        ? failBulkImportItem(job, item.id, "Timed out", 1100)
+        : updateBulkImportItem(job, item.id, { status: "imported", reportId: `r-${item.id}` }, 1100);
+    }
+    job = startBulkImportJob(resetFailedBulkImportItems(job, 1200), 1200);
+    expect(job.nextPendingIndex).toBe(2);
+
+    job = updateBulkImportItem(job, getNextBulkImportItem(job)!.activityId, { status: "importing" }, 1300);
+    expect(job.nextPendingIndex).toBe(3);
+    job = updateBulkImportItem(job, getNextBulkImportItem(job)!.activityId, { status: "importing" }, 1300);
+    expect(job.nextPendingIndex).toBe(5);
+    expect(getNextBulkImportItem(job)).toBeNull();
+  });
+
+  it("updates items in place and keeps snapshots as they were", () => {
+    const started = startBulkImportJob(createBulkImportJob(activities, 1000), 1000);
+    const before = snapshotBulkImportJob(started);
+
+    const next = getNextBulkImportItem(started)!;
+    const claimed = updateBulkImportItem(started, next.activityId, { status: "importing" }, 1100);
+    const imported = updateBulkImportItem(claimed, next.activityId, { status: "imported", reportId: "r1" }, 1200);
+
+    expect(imported.items).toBe(started.items);
+    expect(imported.items[0].status).toBe("imported");
+    expect(before.items[0].status).toBe("pending");
+    expect(findBulkImportItem(before, "activity-2")).toBe(imported.items[1]);
+  });
+
+  it("keeps counters equal to a recount through every transition", () => {
+    let job = startBulkImportJob(createBulkImportJob(activities, 1000), 1000);
+    job = updateBulkImportItem(job, "activity-1", { status: "imported", reportId: "r1" }, 1100);
+    job = updateBulkImportItem(job, "activity-1", { status: "imported", reportId: "r1" }, 1150);
+    job = failBulkImportItem(job, "activity-2", "Timed out", 1200);
+    job = updateBulkImportItem(job, "activity-2", { status: "imported", reportId: "r2", error: undefined }, 1300);
+    job = updateBulkImportItem(job, "missing", { status: "failed" }, 1400);
+
+    const recount = (status: string) => job.items.filter((item) => item.status === status).length;
+    expect(job.imported).toBe(recount("imported"));
+    expect(job.failed).toBe(recount("failed"));
+    expect(findBulkImportItem(job, "activity-2")?.reportId).toBe("r2");
+    expect(findBulkImportItem(job, "missing")).toBeNull();
+  });
 });
@@ -0,0 +1,159 @@
+/**
+ * Service worker bulk import engine: runs jobs to completion, keeps the
+ * worker alive with an alarm, pauses on request and resumes a job the
+ * worker was stopped in. Portal fetches and session saving are mocked.
+ */
+
+import { beforeEach, describe, expect, it, vi } from "vitest";
+
+const { fetchPortalActivityCandidates, saveBulkImportedSession } = vi.hoisted(() => ({
+  fetchPortalActivityCandidates: vi.fn(),
+  saveBulkImportedSession: vi.fn(),
+}));
+
+vi.mock("../src/shared/portal_import", () => ({
+  describeQueryRoundTrips: () => null,
+  fetchPortalActivityCandidates,
+  fetchPortalGraphQL: vi.fn(),
+  isPortalAuthMessage: (message: string) => message.toLowerCase().includes("session expired"),
+  isPortalBridgeUnavailableMessage: () => false,
+}));
+
+vi.mock("../src/background/imported_session", () => ({
+  saveBulkImportedSession,
+}));
+
+vi.mock("../src/shared/bulk_import_store", () => ({
+  clearBulkImportedSessions: vi.fn(() => Promise.resolve()),
+}));
+
+import {
+  BULK_IMPORT_KEEPALIVE_ALARM,
+  isBulkImportRunning,
+  pauseBulkImport,
+  resumeInterruptedBulkImport,
+  startBulkImport,
+} from "../src/background/bulk_import_engine";
+import { createBulkImportJob, startBulkImportJob, updateBulkImportItem } from "../src/shared/bulk_import";
+import { loadStoredBulkImportJob, saveStoredBulkImportJob } from "../src/shared/bulk_import_journal";
+import type { ActivitySummary } from "../src/shared/import_types";
+
+const store: Record<string, unknown> = {};
+
+const chromeMock = {
+  storage: {
+    local: {
+      get: vi.fn((keys: string[]) => {
+        const result: Record<string, unknown> = {};
+        for (const k of keys) {
+          if (k in store) result[k] = structuredClone(store[k]);
+        }
+        return Promise.resolve(result);
+      }),
+      set: vi.fn((items: Record<string, unknown>) => {
+        Object.assign(store, structuredClone(items));
+        return Promise.resolve();
+      }),
+      remove: vi.fn((keys: string[]) => {
+        for (const k of keys) delete store[k];
+        return Promise.resolve();
+      }),
+    },
+  },
+  alarms: {
+    create: vi.fn(() => Promise.resolve()),
+    clear: vi.fn(() => Promise.resolve(true)),
+  },
+};
+
+vi.stubGlobal("chrome", chromeMock);
+
+const activities: ActivitySummary[] = Array.from({ length: 5 }, (_, i) => ({
+  id: `a${i}`,
+  date: "2026-01-01",
+  strokeCount: null,
+  type: "CoursePlayActivity",
+}));
+
+async function waitForStoredState(state: string) {
+  await vi.waitFor(async () => {
+    expect(isBulkImportRunning()).toBe(false);
+    expect((await loadStoredBulkImportJob())?.state).toBe(state);
+  });
+  return (await loadStoredBulkImportJob())!;
+}
+
+beforeEach(() => {
+  for (const key of Object.keys(store)) delete store[key];
+  vi.clearAllMocks();
+  fetchPortalActivityCandidates.mockResolvedValue([{ data: { node: {} } }]);
+  saveBulkImportedSession.mockImplementation(async (_jobId: string, activityId: string) => ({
+    success: true,
+    reportId: `r-${activityId}`,
+    shotCount: 10,
+  }));
+});
+
+describe("bulk import engine", () => {
+  it("imports every item and holds the keepalive alarm only while running", async () => {
+    await startBulkImport(7, activities);
+    const job = await waitForStoredState("complete");
+
+    expect(job.imported).toBe(5);
+    expect(job.tabId).toBe(7);
+    expect(fetchPortalActivityCandidates).toHaveBeenCalledWith(7, "a0", "CoursePlayActivity", expect.anything(), "bulk");
+    expect(chromeMock.alarms.create).toHaveBeenCalledWith(BULK_IMPORT_KEEPALIVE_ALARM, expect.any(Object));
+    expect(chromeMock.alarms.clear).toHaveBeenCalledWith(BULK_IMPORT_KEEPALIVE_ALARM);
+  });
+
+  it("pauses on request and leaves no item importing", async () => {
+    let release!: () => void;
+    const gate = new Promise<void>((resolve) => { release = resolve; });
+    fetchPortalActivityCandidates.mockImplementation(async () => {
+      await gate;
+      return [{ data: { node: {} } }];
+    });
+
+    await startBulkImport(7, activities);
+    await vi.waitFor(() => expect(fetchPortalActivityCandidates).toHaveBeenCalled());
+    await pauseBulkImport();
+    release();
+    const job = await waitForStoredState("paused");
+
+    expect(job.imported).toBeLessThan(5);
+    expect(job.items.some((item) => item.status === "importing")).toBe(false);
+  });
+
+  it("stops the job on an auth failure", async () => {
+    fetchPortalActivityCandidates.mockRejectedValue(new Error("Session expired — log in"));
+
+    await startBulkImport(7, activities);
+    const job = await waitForStoredState("paused");
+
+    expect(job.lastError).toContain("Session expired");
+    expect(job.items.filter((item) => item.status === "pending").length).toBeGreaterThan(0);
+  });
+
+  it("resumes a job the worker stopped in from its last checkpoint", async () => {
+    let job = startBulkImportJob({ ...createBulkImportJob(activities, 1000), tabId: 3 }, 1000);
+    job = updateBulkImportItem(job, "a0", { status: "imported", reportId: "r-a0" }, 1100);
+    job = updateBulkImportItem(job, "a1", { status: "importing" }, 1100);
+    await saveStoredBulkImportJob(job);
+
+    await resumeInterruptedBulkImport();
+    const resumed = await waitForStoredState("complete");
+
+    expect(resumed.imported).toBe(5);
+    expect(fetchPortalActivityCandidates.mock.calls.map(([, id]) => id).sort()).toEqual(["a1", "a2", "a3", "a4"]);
+  });
+
+  it("leaves a running job without a tab paused for the user", async () => {
+    const job = startBulkImportJob(createBulkImportJob(activities, 1000), 1000);
+    await saveStoredBulkImportJob(job);
+
+    await resumeInterruptedBulkImport();
+
+    expect((await loadStoredBulkImportJob())?.state).toBe("paused");
+    expect(fetchPortalActivityCandidates).not.toHaveBeenCalled();
+  });
+});
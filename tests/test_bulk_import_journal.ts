@@ -0,0 +1,153 @@
+/**
+ * Bulk import job persistence: whole-job saves vs. per-item journal writes.
+ * Uses a mocked chrome.storage.local.
+ */
+
+import { beforeEach, describe, expect, it, vi } from "vitest";
+import { BULK_IMPORT_ITEM_KEY_PREFIX, STORAGE_KEYS } from "../src/shared/constants";
+import {
+  createBulkImportJob,
+  startBulkImportJob,
+  updateBulkImportItem,
+} from "../src/shared/bulk_import";
+import {
+  applyBulkImportJournalChanges,
+  journalBulkImportItems,
+  loadStoredBulkImportJob,
+  saveStoredBulkImportJob,
+} from "../src/shared/bulk_import_journal";
+import type { ActivitySummary } from "../src/shared/import_types";
+
+const store: Record<string, unknown> = {};
+
+const chromeMock = {
+  storage: {
+    local: {
+      get: vi.fn((keys: string[]) => {
+        const result: Record<string, unknown> = {};
+        for (const k of keys) {
+          if (k in store) result[k] = structuredClone(store[k]);
+        }
+        return Promise.resolve(result);
+      }),
+      set: vi.fn((items: Record<string, unknown>) => {
+        Object.assign(store, structuredClone(items));
+        return Promise.resolve();
+      }),
+      remove: vi.fn((keys: string[]) => {
+        for (const k of keys) delete store[k];
+        return Promise.resolve();
+      }),
+    },
+  },
+};
+
+vi.stubGlobal("chrome", chromeMock);
+
+const activities: ActivitySummary[] = Array.from({ length: 4 }, (_, i) => ({
+  id: `a${i}`,
+  date: "2026-01-01",
+  strokeCount: null,
+  type: "CoursePlayActivity",
+}));
+
+beforeEach(() => {
+  for (const key of Object.keys(store)) delete store[key];
+  vi.clearAllMocks();
+});
+
+describe("bulk import journal", () => {
+  it("writes only the header and the changed item for a step", async () => {
+    let job = startBulkImportJob(createBulkImportJob(activities, 1000), 1000);
+    await saveStoredBulkImportJob(job);
+    chromeMock.storage.local.set.mockClear();
+
+    job = updateBulkImportItem(job, "a2", { status: "imported", reportId: "r2" }, 1100);
+    await journalBulkImportItems(job, ["a2"]);
+
+    const written = chromeMock.storage.local.set.mock.calls[0][0];
+    expect(Object.keys(written).sort()).toEqual([BULK_IMPORT_ITEM_KEY_PREFIX + "a2", STORAGE_KEYS.BULK_IMPORT_STATUS]);
+    expect(written[STORAGE_KEYS.BULK_IMPORT_STATUS]).not.toHaveProperty("items");
+
+    const loaded = await loadStoredBulkImportJob();
+    expect(loaded?.imported).toBe(1);
+    expect(loaded?.items.map((item) => item.status)).toEqual(["pending", "pending", "imported", "pending"]);
+  });
+
+  it("folds the journal into the item list on a full save", async () => {
+    let job = createBulkImportJob(activities, 1000);
+    await saveStoredBulkImportJob(job);
+    job = updateBulkImportItem(job, "a0", { status: "failed", error: "x" }, 1100);
+    await journalBulkImportItems(job, ["a0"]);
+
+    await saveStoredBulkImportJob(job);
+
+    expect(Object.keys(store).some((key) => key.startsWith(BULK_IMPORT_ITEM_KEY_PREFIX))).toBe(false);
+    expect((await loadStoredBulkImportJob())?.items[0].status).toBe("failed");
+  });
+
+  it("clears the journal in the same write as the whole job", async () => {
+    let job = createBulkImportJob(activities, 1000);
+    await saveStoredBulkImportJob(job);
+    job = updateBulkImportItem(job, "a0", { status: "failed", error: "x" }, 1100);
+    await journalBulkImportItems(job, ["a0"]);
+    // The worker stops after the whole-job write, before the journal is removed
+    chromeMock.storage.local.remove.mockImplementationOnce(() => new Promise(() => undefined));
+
+    const reset = { ...job, items: job.items.map((item) => ({ ...item, status: "pending" as const })) };
+    void saveStoredBulkImportJob(reset);
+    await vi.waitFor(() => expect(chromeMock.storage.local.remove).toHaveBeenCalled());
+
+    expect((await loadStoredBulkImportJob())?.items[0].status).toBe("pending");
+  });
+
+  it("ignores journal entries left by another job", async () => {
+    const job = createBulkImportJob(activities, 1000);
+    await saveStoredBulkImportJob(job);
+    store[BULK_IMPORT_ITEM_KEY_PREFIX + "a1"] = {
+      jobId: "bulk-old",
+      item: { ...job.items[1], status: "imported" },
+    };
+
+    expect((await loadStoredBulkImportJob())?.items[1].status).toBe("pending");
+  });
+
+  it("loads jobs stored whole before the journal existed", async () => {
+    const job = createBulkImportJob(activities, 1000);
+    store[STORAGE_KEYS.BULK_IMPORT_STATUS] = job;
+
+    expect(await loadStoredBulkImportJob()).toEqual(job);
+  });
+
+  it("applies a journal step to a loaded job without reading storage", async () => {
+    let job = startBulkImportJob(createBulkImportJob(activities, 1000), 1000);
+    await saveStoredBulkImportJob(job);
+    const watched = await loadStoredBulkImportJob();
+    job = updateBulkImportItem(job, "a1", { status: "imported", reportId: "r1" }, 1100);
+    await journalBulkImportItems(job, ["a1"]);
+    const written = chromeMock.storage.local.set.mock.calls.at(-1)![0] as Record<string, unknown>;
+    chromeMock.storage.local.get.mockClear();
+
+    const step = applyBulkImportJournalChanges(watched, Object.fromEntries(
+      Object.entries(written).map(([key, newValue]) => [key, { newValue }])
+    ));
+
+    expect(chromeMock.storage.local.get).not.toHaveBeenCalled();
+    expect(step?.changedActivityIds).toEqual(["a1"]);
+    expect(step?.job.imported).toBe(1);
+    expect(step?.job.items[1]).toMatchObject({ status: "imported", reportId: "r1" });
+  });
+
+  it("leaves whole-job saves and other jobs to a reload", () => {
+    const job = createBulkImportJob(activities, 1000);
+    const { items: _, ...header } = job;
+
+    expect(applyBulkImportJournalChanges(job, {
+      [STORAGE_KEYS.BULK_IMPORT_STATUS]: { newValue: header },
+      [STORAGE_KEYS.BULK_IMPORT_ITEMS]: { newValue: job.items },
+    })).toBeNull();
+    expect(applyBulkImportJournalChanges(job, {
+      [STORAGE_KEYS.BULK_IMPORT_STATUS]: { newValue: { ...header, id: "bulk-other" } },
+    })).toBeNull();
+  });
+});
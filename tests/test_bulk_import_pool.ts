@@ -0,0 +1,135 @@
+import { describe, expect, it } from "vitest";
+import {
+  createAdaptiveConcurrency,
+  decreaseConcurrency,
+  getConcurrencySlots,
+  increaseConcurrency,
+  runAdaptivePool,
+  type PoolTaskOutcome,
+} from "../src/shared/bulk_import_pool";
+
+function tick(ms = 1): Promise<void> {
+  return new Promise((resolve) => setTimeout(resolve, ms));
+}
+
+function queue(count: number): () => number | null {
+  let nextIndex = 0;
+  return () => (nextIndex < count ? nextIndex++ : null);
+}
+
+describe("adaptive concurrency", () => {
+  it("grows additively and halves on backoff within bounds", () => {
+    let state = createAdaptiveConcurrency(2, 1, 4);
+    state = increaseConcurrency(state);
+    state = increaseConcurrency(state);
+    expect(getConcurrencySlots(state)).toBe(2);
+    state = increaseConcurrency(state);
+    expect(getConcurrencySlots(state)).toBe(3);
+
+    for (let i = 0; i < 20; i++) state = increaseConcurrency(state);
+    expect(state.limit).toBe(4);
+
+    state = decreaseConcurrency(state);
+    expect(getConcurrencySlots(state)).toBe(2);
+    state = decreaseConcurrency(decreaseConcurrency(state));
+    expect(getConcurrencySlots(state)).toBe(1);
+  });
+});
+
+describe("runAdaptivePool", () => {
+  it("runs every item without exceeding the concurrency limit", async () => {
+    let active = 0;
+    let peak = 0;
+    const done: number[] = [];
+
+    const final = await runAdaptivePool({
+      next: queue(20),
+      run: async (item) => {
+        active += 1;
+        peak = Math.max(peak, active);
+        await tick();
+        active -= 1;
+        done.push(item);
+        return "success";
+      },
+      concurrency: createAdaptiveConcurrency(2, 1, 4),
+    });
+
+    expect(done.sort((a, b) => a - b)).toEqual(Array.from({ length: 20 }, (_, i) => i));
+    expect(peak).toBeGreaterThan(2);
+    expect(peak).toBeLessThanOrEqual(4);
+    expect(final.limit).toBe(4);
+  });
+
+  it("backs off after an error before dispatching again", async () => {
+    const startedAt: number[] = [];
+    const slots: number[] = [];
+
+    const final = await runAdaptivePool({
+      next: queue(3),
+      run: async (item): Promise<PoolTaskOutcome> => {
+        startedAt.push(Date.now());
+        await tick();
+        return item === 0 ? "backoff" : "success";
+      },
+      concurrency: createAdaptiveConcurrency(1, 1, 4),
+      backoffDelayMs: 40,
+      onConcurrencyChange: (next) => slots.push(next),
+    });
+
+    expect(startedAt[1] - startedAt[0]).toBeGreaterThanOrEqual(35);
+    expect(final.limit).toBeGreaterThan(1);
+    expect(slots).toContain(2);
+  });
+
+  it("treats a rejected task as a backoff", async () => {
+    const final = await runAdaptivePool({
+      next: queue(1),
+      run: async () => {
+        throw new Error("timed out");
+      },
+      concurrency: createAdaptiveConcurrency(4, 1, 4),
+      backoffDelayMs: 0,
+    });
+
+    expect(final.limit).toBe(2);
+  });
+
+  it("stops dispatching on a stop outcome and waits for in-flight tasks", async () => {
+    const started: number[] = [];
+    const finished: number[] = [];
+
+    await runAdaptivePool({
+      next: queue(10),
+      run: async (item): Promise<PoolTaskOutcome> => {
+        started.push(item);
+        await tick(item === 0 ? 1 : 10);
+        finished.push(item);
+        return item === 0 ? "stop" : "neutral";
+      },
+      concurrency: createAdaptiveConcurrency(3, 1, 3),
+    });
+
+    expect(started).toEqual([0, 1, 2]);
+    expect(finished.sort()).toEqual([0, 1, 2]);
+  });
+
+  it("stops dispatching once shouldStop is true", async () => {
+    let pauseRequested = false;
+    const started: number[] = [];
+
+    await runAdaptivePool({
+      next: queue(10),
+      run: async (item) => {
+        started.push(item);
+        if (item === 1) pauseRequested = true;
+        await tick();
+        return "neutral";
+      },
+      shouldStop: () => pauseRequested,
+      concurrency: createAdaptiveConcurrency(1, 1, 1),
+    });
+
+    expect(started).toEqual([0, 1]);
+  });
+});
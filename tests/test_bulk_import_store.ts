@@ -1,10 +1,12 @@
 import { beforeEach, describe, expect, it, vi } from "vitest";
-import { indexedDB } from "fake-indexeddb";
+import { IDBDatabase, indexedDB } from "fake-indexeddb";
 import type { SessionData } from "../src/models/types";
 import {
   clearBulkImportedSessions,
+  flushBulkImportWrites,
   getBulkImportedSessions,
   putBulkImportedSession,
+  resetBulkImportStoreForTests,
 } from "../src/shared/bulk_import_store";
 
 vi.stubGlobal("indexedDB", indexedDB);
@@ -32,6 +34,8 @@ function makeSession(reportId: string, raw = true): SessionData {
 
 describe("bulk import IndexedDB store", () => {
   beforeEach(async () => {
+    vi.restoreAllMocks();
+    await resetBulkImportStoreForTests();
     await deleteDb("trackpull-bulk-import").catch(() => undefined);
   });
 
@@ -68,4 +72,42 @@ describe("bulk import IndexedDB store", () => {
     expect(await getBulkImportedSessions("job-1")).toEqual([]);
     expect((await getBulkImportedSessions("job-2")).map((session) => session.report_id)).toEqual(["report-2"]);
   });
+
+  it("reuses one connection across operations", async () => {
+    const openSpy = vi.spyOn(indexedDB, "open");
+
+    await putBulkImportedSession("job-1", "activity-1", makeSession("report-1"), 1000);
+    await putBulkImportedSession("job-1", "activity-2", makeSession("report-2"), 1100);
+    await getBulkImportedSessions("job-1");
+    await clearBulkImportedSessions("job-1");
+
+    expect(openSpy).toHaveBeenCalledTimes(1);
+  });
+
+  it("commits puts that arrive together in one transaction", async () => {
+    await flushBulkImportWrites();
+    const transactionSpy = vi.spyOn(IDBDatabase.prototype, "transaction");
+
+    await Promise.all(
+      Array.from({ length: 25 }, (_, i) =>
+        putBulkImportedSession("job-1", `activity-${i}`, makeSession(`report-${i}`), 1000 + i)
+      )
+    );
+
+    // Encoding finishes at slightly different times; allow a straggler batch
+    const writes = transactionSpy.mock.calls.filter(([, mode]) => mode === "readwrite");
+    expect(writes.length).toBeGreaterThanOrEqual(1);
+    expect(writes.length).toBeLessThanOrEqual(2);
+    expect(await getBulkImportedSessions("job-1")).toHaveLength(25);
+  });
+
+  it("reopens after another context deletes the database", async () => {
+    await putBulkImportedSession("job-1", "activity-1", makeSession("report-1"), 1000);
+
+    // versionchange closes the cached connection so the delete is not blocked
+    await deleteDb("trackpull-bulk-import");
+
+    await putBulkImportedSession("job-1", "activity-2", makeSession("report-2"), 1100);
+    expect((await getBulkImportedSessions("job-1")).map((s) => s.report_id)).toEqual(["report-2"]);
+  });
 });
@@ -0,0 +1,111 @@
+import { describe, expect, it } from "vitest";
+import type { SessionData } from "../src/models/types";
+import {
+  decodeColumnarSession,
+  encodeColumnarSession,
+  fromColumnarSession,
+  getClubShotViews,
+  isColumnarSession,
+  sessionHasTags,
+  toColumnarSession,
+} from "../src/shared/columnar_session";
+import { writeBulkCsv, writeCsv } from "../src/shared/csv_writer";
+import { writeTsv } from "../src/shared/tsv_writer";
+
+function makeSession(): SessionData {
+  return {
+    date: "2026-03-01",
+    report_id: "r1",
+    url_type: "report",
+    metric_names: ["Carry", "ClubSpeed", "SpinRate"],
+    metadata_params: { nd_001: "789012" },
+    club_groups: [
+      {
+        club_name: "Driver",
+        shots: [
+          { shot_number: 0, metrics: { Carry: "230.5", ClubSpeed: "45.1", SpinRate: "2500" }, tag: "Warmup" },
+          { shot_number: 1, metrics: { Carry: "228", ClubSpeed: "44.8" } },
+          { shot_number: 3, metrics: { Carry: "231.2", SpinRate: "2650" } },
+        ],
+        averages: {},
+        consistency: {},
+      },
+      {
+        club_name: "7Iron",
+        shots: [
+          { shot_number: 0, metrics: { Carry: "150", ClubSpeed: "36" } },
+          { shot_number: 1, metrics: { Carry: "152.4", ClubSpeed: "36.5" } },
+        ],
+        averages: {},
+        consistency: {},
+      },
+    ],
+  };
+}
+
+describe("toColumnarSession", () => {
+  it("stores one Float64Array per metric aligned to metric_names", () => {
+    const columnar = toColumnarSession(makeSession());
+    const driver = columnar.club_groups[0];
+
+    expect(isColumnarSession(columnar)).toBe(true);
+    expect(Array.from(driver.shot_numbers)).toEqual([0, 1, 3]);
+    expect(driver.columns).toHaveLength(3);
+    expect(driver.columns[0]).toBeInstanceOf(Float64Array);
+    expect(Array.from(driver.columns[0])).toEqual([230.5, 228, 231.2]);
+    expect(Number.isNaN(driver.columns[2][1])).toBe(true);
+    expect(driver.tags).toEqual(["Warmup", undefined, undefined]);
+    expect(columnar.club_groups[1].tags).toBeNull();
+  });
+
+  it("round-trips back to the row shape with numeric values", () => {
+    const row = fromColumnarSession(toColumnarSession(makeSession()));
+
+    expect(row).not.toHaveProperty("layout");
+    expect(row.club_groups[0].shots[1]).toEqual({
+      shot_number: 1,
+      metrics: { Carry: 228, ClubSpeed: 44.8 },
+    });
+    expect(row.club_groups[0].shots[0].tag).toBe("Warmup");
+  });
+
+  it("survives JSON through the stored encoding", () => {
+    const columnar = toColumnarSession(makeSession());
+    const stored = JSON.parse(JSON.stringify(encodeColumnarSession(columnar)));
+    const decoded = decodeColumnarSession(stored);
+
+    expect(Number.isNaN(decoded.club_groups[0].columns[2][1])).toBe(true);
+    expect(fromColumnarSession(decoded)).toEqual(fromColumnarSession(columnar));
+  });
+});
+
+describe("club shot views", () => {
+  it("read the same values from either layout", () => {
+    const session = makeSession();
+    const rowViews = getClubShotViews(session);
+    const columnarViews = getClubShotViews(toColumnarSession(session));
+
+    expect(columnarViews.map((v) => v.shotCount)).toEqual(rowViews.map((v) => v.shotCount));
+    expect(columnarViews[0].metric(2, "Carry")).toBe(231.2);
+    expect(columnarViews[0].metric(1, "SpinRate")).toBeUndefined();
+    expect(columnarViews[0].metric(0, "NotAMetric")).toBeUndefined();
+    expect(sessionHasTags(toColumnarSession(session))).toBe(true);
+  });
+});
+
+describe("writers accept columnar sessions", () => {
+  it("writeCsv output matches the row layout", () => {
+    const session = makeSession();
+    expect(writeCsv(toColumnarSession(session))).toBe(writeCsv(session));
+  });
+
+  it("writeBulkCsv output matches the row layout", () => {
+    const session = makeSession();
+    expect(writeBulkCsv([toColumnarSession(session)])).toBe(writeBulkCsv([session]));
+  });
+
+  it("writeTsv output matches the row layout", () => {
+    const session = makeSession();
+    expect(writeTsv(toColumnarSession(session))).toBe(writeTsv(session));
+  });
+});
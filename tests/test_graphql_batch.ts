@@ -0,0 +1,112 @@
+import { describe, expect, it, vi } from "vitest";
+import {
+  buildBatchedNodeQuery,
+  createNodeBatcher,
+  getNodeSelection,
+  splitBatchedNodeResponse,
+  type GraphQLFetchResponse,
+} from "../src/shared/graphql_batch";
+import { IMPORT_SESSION_QUERY_CANDIDATES } from "../src/shared/import_types";
+
+const candidate = {
+  label: "CoursePlayActivity:strokes",
+  query: `
+    query FetchActivityById($id: ID!) {
+      node(id: $id) {
+        __typename
+        ... on CoursePlayActivity { id time strokes { club } }
+      }
+    }
+  `,
+};
+
+describe("batched node queries", () => {
+  it("extracts the node selection from every import candidate", () => {
+    for (const importCandidate of IMPORT_SESSION_QUERY_CANDIDATES) {
+      const selection = getNodeSelection(importCandidate.query);
+      expect(selection, importCandidate.label).not.toBeNull();
+      expect(selection!.startsWith("{")).toBe(true);
+      expect(selection!.endsWith("}")).toBe(true);
+    }
+  });
+
+  it("aliases one node field per activity", () => {
+    const query = buildBatchedNodeQuery(candidate, 2)!;
+    expect(query).toContain("query FetchActivitiesById($id0: ID!, $id1: ID!)");
+    expect(query).toContain("a0: node(id: $id0) {");
+    expect(query).toContain("a1: node(id: $id1) {");
+    expect(query.match(/strokes \{ club \}/g)).toHaveLength(2);
+  });
+
+  it("keeps errors with the alias they belong to", () => {
+    const parts = splitBatchedNodeResponse({
+      success: true,
+      data: {
+        data: { a0: { id: "x" }, a1: null },
+        errors: [{ message: "Not found", path: ["a1", "strokes"] }],
+      },
+    }, 2);
+
+    expect(parts[0]).toEqual({ success: true, data: { data: { node: { id: "x" } } } });
+    expect(parts[1]).toEqual({
+      success: true,
+      data: { data: { node: null }, errors: [{ message: "Not found", path: ["node", "strokes"] }] },
+    });
+  });
+});
+
+describe("createNodeBatcher", () => {
+  it("combines concurrent loads of one candidate into one request", async () => {
+    const send = vi.fn(async (_query: string, variables: Record<string, unknown>): Promise<GraphQLFetchResponse> => ({
+      success: true,
+      data: {
+        data: Object.fromEntries(
+          Object.entries(variables).map(([key, id]) => [`a${key.slice(2)}`, { id }])
+        ),
+      },
+    }));
+    const batcher = createNodeBatcher({ send, maxBatchSize: 3, windowMs: 5 });
+
+    const results = await Promise.all(["r1", "r2", "r3", "r4"].map((id) => batcher.load(candidate, id)));
+
+    expect(results.map((result) => (result.data?.data?.node as { id: string }).id)).toEqual([
+      "r1", "r2", "r3", "r4",
+    ]);
+    // Three filled a batch; the fourth went alone with the original query
+    expect(send).toHaveBeenCalledTimes(2);
+    expect(send.mock.calls[1]).toEqual([candidate.query, { id: "r4" }]);
+    expect(batcher.getStats()).toEqual({ requests: 2, batches: 1, batchedLoads: 3, fallbacks: 0 });
+  });
+
+  it("falls back to single fetches when the server rejects a batch", async () => {
+    const send = vi.fn(async (query: string, variables: Record<string, unknown>): Promise<GraphQLFetchResponse> => {
+      if (query.includes("a0:")) {
+        return { success: true, data: { errors: [{ message: "Query too complex" }] } };
+      }
+      return { success: true, data: { data: { node: { id: variables.id } } } };
+    });
+    const batcher = createNodeBatcher({ send, maxBatchSize: 2, windowMs: 5 });
+
+    const results = await Promise.all([batcher.load(candidate, "r1"), batcher.load(candidate, "r2")]);
+    expect(results.map((result) => (result.data?.data?.node as { id: string }).id)).toEqual(["r1", "r2"]);
+    expect(batcher.getStats().fallbacks).toBe(1);
+
+    // The candidate is no longer batched
+    send.mockClear();
+    await Promise.all([batcher.load(candidate, "r3"), batcher.load(candidate, "r4")]);
+    expect(send.mock.calls.every(([query]) => query === candidate.query)).toBe(true);
+  });
+
+  it("does not retry a batch singly after a fatal error", async () => {
+    const send = vi.fn(async (): Promise<GraphQLFetchResponse> => ({ success: false, error: "Unauthorized" }));
+    const batcher = createNodeBatcher({
+      send,
+      maxBatchSize: 2,
+      isFatalError: (message) => message === "Unauthorized",
+    });
+
+    const results = await Promise.all([batcher.load(candidate, "r1"), batcher.load(candidate, "r2")]);
+    expect(results.every((result) => result.error === "Unauthorized")).toBe(true);
+    expect(send).toHaveBeenCalledTimes(1);
+  });
+});
@@ -0,0 +1,136 @@
+/**
+ * Tests for the MutationObserver-driven group-tag collector.
+ *
+ * @vitest-environment jsdom
+ */
+import { beforeEach, describe, expect, it } from "vitest";
+import type { SessionData } from "../src/models/types";
+import {
+  applyGroupTags,
+  collectGroupTags,
+  getLastGroupTagTiming,
+  readGroupTags,
+} from "../src/content/group_tags";
+
+function addTag(text: string, parent: Element = document.body): HTMLElement {
+  const wrapper = document.createElement("div");
+  wrapper.className = "stroke-group";
+  const tag = document.createElement("span");
+  tag.className = "group-tag";
+  tag.textContent = text;
+  wrapper.appendChild(tag);
+  parent.appendChild(wrapper);
+  return tag;
+}
+
+function addNoise(count: number): void {
+  for (let i = 0; i < count; i += 1) {
+    const row = document.createElement("div");
+    row.textContent = `row ${i}`;
+    document.body.appendChild(row);
+  }
+}
+
+function makeSession(groupCount: number): SessionData {
+  return {
+    date: "2026-01-01",
+    report_id: "r",
+    url_type: "report",
+    metric_names: ["Carry"],
+    metadata_params: {},
+    club_groups: Array.from({ length: groupCount }, (_, i) => ({
+      club_name: `Club ${i}`,
+      shots: [{ shot_number: 0, metrics: { Carry: "100" } }],
+      averages: {},
+      consistency: {},
+    })),
+  };
+}
+
+describe("readGroupTags", () => {
+  beforeEach(() => {
+    document.body.innerHTML = "";
+  });
+
+  it("reads textContent of every tag in document order", () => {
+    addTag("  D1   SW ");
+    addTag("7i");
+    expect(readGroupTags()).toEqual(["D1 SW", "7i"]);
+  });
+});
+
+describe("applyGroupTags", () => {
+  it("tags shots by group position and skips empty tags", () => {
+    const session = makeSession(3);
+    applyGroupTags(session, ["A", "", "C"]);
+
+    expect(session.club_groups[0].shots[0].tag).toBe("A");
+    expect(session.club_groups[1].shots[0].tag).toBeUndefined();
+    expect(session.club_groups[2].shots[0].tag).toBe("C");
+  });
+});
+
+describe("collectGroupTags", () => {
+  beforeEach(() => {
+    document.body.innerHTML = "";
+  });
+
+  it("resolves immediately when the tags are already rendered", async () => {
+    addTag("A");
+    addTag("B");
+
+    const { tags, timing } = await collectGroupTags(2);
+
+    expect(tags).toEqual(["A", "B"]);
+    expect(timing.wakeups).toBe(0);
+    expect(timing.scans).toBe(1);
+    expect(timing.timedOut).toBe(false);
+  });
+
+  it("resolves as soon as the expected count is inserted", async () => {
+    const pending = collectGroupTags(2, { deadlineMs: 5000 });
+
+    addTag("A");
+    await Promise.resolve();
+    addTag("B");
+
+    const { tags, timing } = await pending;
+
+    expect(tags).toEqual(["A", "B"]);
+    expect(timing.timedOut).toBe(false);
+    expect(timing.timeToTagsMs).toBeLessThan(5000);
+    expect(getLastGroupTagTiming()).toEqual(timing);
+  });
+
+  it("does not rescan the DOM for unrelated insertions", async () => {
+    const pending = collectGroupTags(1, { deadlineMs: 5000 });
+
+    addNoise(5);
+    await new Promise((resolve) => setTimeout(resolve, 0));
+    addTag("A");
+
+    const { timing } = await pending;
+
+    expect(timing.wakeups).toBeGreaterThanOrEqual(2);
+    expect(timing.scans).toBe(2);
+  });
+
+  it("picks up tags nested inside an inserted subtree", async () => {
+    const pending = collectGroupTags(1, { deadlineMs: 5000 });
+
+    const container = document.createElement("section");
+    addTag("Nested", container);
+    document.body.appendChild(container);
+
+    expect((await pending).tags).toEqual(["Nested"]);
+  });
+
+  it("settles at the deadline with whatever tags exist", async () => {
+    addTag("Only one");
+
+    const { tags, timing } = await collectGroupTags(3, { deadlineMs: 20 });
+
+    expect(tags).toEqual(["Only one"]);
+    expect(timing.timedOut).toBe(true);
+  });
+});
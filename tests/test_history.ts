@@ -1,24 +1,39 @@
 import { describe, it, expect, vi, beforeEach } from "vitest";
+import { indexedDB } from "fake-indexeddb";
 import type { SessionData } from "../src/models/types";
 
+vi.stubGlobal("indexedDB", indexedDB);
+
 // Mock chrome.storage.local and chrome.runtime
 let mockStore: Record<string, unknown> = {};
 
 vi.stubGlobal("chrome", {
   storage: {
     local: {
-      get: vi.fn((keys: string[], cb: (result: Record<string, unknown>) => void) => {
+      get: vi.fn((keys: string[], cb?: (result: Record<string, unknown>) => void) => {
         const result: Record<string, unknown> = {};
         for (const key of keys) {
           if (key in mockStore) {
             result[key] = mockStore[key];
           }
         }
-        cb(result);
+        if (cb) {
+          cb(result);
+          return undefined;
+        }
+        return Promise.resolve(result);
       }),
-      set: vi.fn((data: Record<string, unknown>, cb: () => void) => {
+      set: vi.fn((data: Record<string, unknown>, cb?: () => void) => {
         Object.assign(mockStore, data);
-        cb();
+        if (cb) {
+          cb();
+          return undefined;
+        }
+        return Promise.resolve();
+      }),
+      remove: vi.fn((key: string) => {
+        delete mockStore[key];
+        return Promise.resolve();
       }),
     },
   },
@@ -27,7 +42,24 @@ vi.stubGlobal("chrome", {
   },
 });
 
-import { saveSessionToHistory, getHistoryErrorMessage } from "../src/shared/history";
+import {
+  saveSessionToHistory,
+  getSessionHistory,
+  getHistoryErrorMessage,
+  migrateSnapshotMetrics,
+  migrateStoredSessionMetrics,
+  migrateStorageHistoryToIndexedDb,
+} from "../src/shared/history";
+import { STORAGE_KEYS } from "../src/shared/constants";
+
+function deleteDb(name: string): Promise<void> {
+  return new Promise((resolve, reject) => {
+    const request = indexedDB.deleteDatabase(name);
+    request.onsuccess = () => resolve();
+    request.onerror = () => reject(request.error);
+    request.onblocked = () => reject(new Error("delete blocked"));
+  });
+}
 
 function makeSession(reportId: string, overrides?: Partial<SessionData>): SessionData {
   return {
@@ -43,130 +75,65 @@ function makeSession(reportId: string, overrides?: Partial<SessionData>): Sessio
 }
 
 describe("saveSessionToHistory", () => {
-  beforeEach(() => {
+  beforeEach(async () => {
     mockStore = {};
-    vi.mocked(chrome.storage.local.get).mockImplementation(
-      (keys: string[], cb: (result: Record<string, unknown>) => void) => {
-        const result: Record<string, unknown> = {};
-        for (const key of keys) {
-          if (key in mockStore) {
-            result[key] = mockStore[key];
-          }
-        }
-        cb(result);
-      }
-    );
-    vi.mocked(chrome.storage.local.set).mockImplementation(
-      (data: Record<string, unknown>, cb: () => void) => {
-        Object.assign(mockStore, data);
-        cb();
-      }
-    );
     chrome.runtime.lastError = null;
+    await deleteDb("trackpull-history").catch(() => undefined);
   });
 
   it("saves new session with raw_api_data stripped", async () => {
-    const session = makeSession("report-1");
-    await saveSessionToHistory(session);
+    await saveSessionToHistory(makeSession("report-1"));
 
-    const stored = mockStore["sessionHistory"] as Array<{ snapshot: Record<string, unknown> }>;
+    const stored = await getSessionHistory();
     expect(stored).toHaveLength(1);
     expect(stored[0].snapshot.report_id).toBe("report-1");
     expect(stored[0].snapshot).not.toHaveProperty("raw_api_data");
   });
 
   it("deduplicates by report_id and updates captured_at", async () => {
-    // Save first time
-    await saveSessionToHistory(makeSession("report-dup"));
-    const firstSave = mockStore["sessionHistory"] as Array<{ captured_at: number }>;
-    const firstTime = firstSave[0].captured_at;
-
-    // Small delay to ensure different timestamp
-    await new Promise((r) => setTimeout(r, 5));
-
-    // Save again with same report_id
-    await saveSessionToHistory(makeSession("report-dup"));
-    const secondSave = mockStore["sessionHistory"] as Array<{ captured_at: number }>;
-    expect(secondSave).toHaveLength(1);
-    expect(secondSave[0].captured_at).toBeGreaterThanOrEqual(firstTime);
+    await saveSessionToHistory(makeSession("report-dup"), undefined, 1000);
+    await saveSessionToHistory(makeSession("report-dup"), undefined, 2000);
+
+    const stored = await getSessionHistory();
+    expect(stored).toHaveLength(1);
+    expect(stored[0].captured_at).toBe(2000);
   });
 
-  it("evicts oldest when at 20-session cap", async () => {
-    // Fill with 20 sessions
-    const entries = [];
+  it("evicts oldest entries past the cap", async () => {
     for (let i = 0; i < 20; i++) {
-      entries.push({
-        captured_at: 1000 + i, // oldest = 1000, newest = 1019
-        snapshot: {
-          date: "2026-01-01",
-          report_id: `report-${i}`,
-          url_type: "report",
-          club_groups: [],
-          metric_names: [],
-          metadata_params: {},
-        },
-      });
+      await saveSessionToHistory(makeSession(`report-${i}`), 20, 1000 + i);
     }
-    mockStore["sessionHistory"] = entries;
 
-    // Save 21st session
-    await saveSessionToHistory(makeSession("report-new"));
+    await saveSessionToHistory(makeSession("report-new"), 20, 5000);
 
-    const stored = mockStore["sessionHistory"] as Array<{
-      captured_at: number;
-      snapshot: { report_id: string };
-    }>;
-    expect(stored).toHaveLength(20);
+    const ids = (await getSessionHistory()).map((e) => e.snapshot.report_id);
+    expect(ids).toHaveLength(20);
     // Oldest (report-0 with captured_at 1000) should be evicted
-    const ids = stored.map((e) => e.snapshot.report_id);
     expect(ids).not.toContain("report-0");
-    expect(ids).toContain("report-new");
+    expect(ids[0]).toBe("report-new");
   });
 
-  it("re-captured report_id gets newest captured_at", async () => {
-    const entries = [];
-    for (let i = 0; i < 5; i++) {
-      entries.push({
-        captured_at: 1000 + i,
-        snapshot: {
-          date: "2026-01-01",
-          report_id: `report-${i}`,
-          url_type: "report",
-          club_groups: [],
-          metric_names: [],
-          metadata_params: {},
-        },
-      });
+  it("keeps thousands of sessions under the default cap", async () => {
+    for (let i = 0; i < 1200; i++) {
+      await saveSessionToHistory(makeSession(`report-${i}`), undefined, i);
     }
-    mockStore["sessionHistory"] = entries;
 
-    // Re-capture report-0 (the oldest)
-    await saveSessionToHistory(makeSession("report-0"));
-
-    const stored = mockStore["sessionHistory"] as Array<{
-      captured_at: number;
-      snapshot: { report_id: string };
-    }>;
-    // report-0 should now have the newest captured_at (first in array since sorted desc)
-    const report0 = stored.find((e) => e.snapshot.report_id === "report-0");
-    expect(report0).toBeDefined();
-    expect(report0!.captured_at).toBeGreaterThan(1004);
+    expect(await getSessionHistory()).toHaveLength(1200);
+    expect((await getSessionHistory(3)).map((e) => e.captured_at)).toEqual([1199, 1198, 1197]);
   });
 
-  it("rejects promise on chrome.runtime.lastError", async () => {
-    vi.mocked(chrome.storage.local.get).mockImplementation(
-      (_keys: string[], cb: (result: Record<string, unknown>) => void) => {
-        chrome.runtime.lastError = { message: "Storage error" };
-        cb({});
-      }
-    );
+  it("re-captured report_id gets newest captured_at", async () => {
+    for (let i = 0; i < 5; i++) {
+      await saveSessionToHistory(makeSession(`report-${i}`), undefined, 1000 + i);
+    }
 
-    await expect(saveSessionToHistory(makeSession("report-err"))).rejects.toThrow(
-      "Storage error"
-    );
+    // Re-capture report-0 (the oldest)
+    await saveSessionToHistory(makeSession("report-0"), undefined, 2000);
 
-    // Reset lastError for other tests
-    chrome.runtime.lastError = null;
+    const stored = await getSessionHistory();
+    expect(stored).toHaveLength(5);
+    expect(stored[0].snapshot.report_id).toBe("report-0");
+    expect(stored[0].captured_at).toBe(2000);
   });
 });
 
@@ -186,3 +153,60 @@ describe("getHistoryErrorMessage", () => {
     );
   });
 });
+
+describe("storage migration", () => {
+  function legacySession(reportId: string): SessionData {
+    return makeSession(reportId, {
+      metric_names: ["Carry", "ClubSpeed"],
+      club_groups: [
+        {
+          club_name: "Driver",
+          shots: [{ shot_number: 0, metrics: { Carry: "230.5", ClubSpeed: "45", Note: "n/a" } }],
+          averages: {},
+          consistency: {},
+        },
+      ],
+    });
+  }
+
+  beforeEach(async () => {
+    mockStore = {};
+    chrome.runtime.lastError = null;
+    await deleteDb("trackpull-history").catch(() => undefined);
+  });
+
+  it("converts numeric strings and leaves other values alone", () => {
+    const migrated = migrateSnapshotMetrics(legacySession("r1"));
+    expect(migrated.club_groups[0].shots[0].metrics).toEqual({
+      Carry: 230.5,
+      ClubSpeed: 45,
+      Note: "n/a",
+    });
+  });
+
+  it("rewrites the stored current session", async () => {
+    mockStore[STORAGE_KEYS.TRACKMAN_DATA] = legacySession("current");
+
+    await migrateStoredSessionMetrics();
+
+    const current = mockStore[STORAGE_KEYS.TRACKMAN_DATA] as SessionData;
+    expect(current.club_groups[0].shots[0].metrics.Carry).toBe(230.5);
+  });
+
+  it("moves chrome.storage history into IndexedDB", async () => {
+    await saveSessionToHistory(makeSession("newer-in-idb"), undefined, 9000);
+    mockStore[STORAGE_KEYS.SESSION_HISTORY] = [
+      { captured_at: 2, snapshot: legacySession("old-2") },
+      { captured_at: 1, snapshot: legacySession("old-1") },
+      { captured_at: 3, snapshot: legacySession("newer-in-idb") },
+    ];
+
+    expect(await migrateStorageHistoryToIndexedDb()).toBe(3);
+
+    const stored = await getSessionHistory();
+    expect(stored.map((e) => e.snapshot.report_id)).toEqual(["newer-in-idb", "old-2", "old-1"]);
+    expect(stored[0].captured_at).toBe(9000);
+    expect(stored[1].snapshot.club_groups[0].shots[0].metrics.Carry).toBe(230.5);
+    expect(mockStore).not.toHaveProperty(STORAGE_KEYS.SESSION_HISTORY);
+  });
+});
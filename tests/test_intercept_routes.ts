@@ -0,0 +1,97 @@
+import { beforeEach, describe, expect, it } from "vitest";
+import {
+  countIntercept,
+  getInterceptCounters,
+  matchInterceptRoute,
+  passesResponseGates,
+  resetInterceptCountersForTests,
+  sniffShotData,
+  MAX_INTERCEPT_BODY_BYTES,
+} from "../src/content/intercept_routes";
+
+const REPORT_PAGE = "https://web-dynamic-reports.trackmangolf.com/reports?r=123";
+
+describe("matchInterceptRoute", () => {
+  it("matches Trackman API hosts", () => {
+    expect(matchInterceptRoute("https://api.trackmangolf.com/reports?r=123")?.label).toBe("trackmangolf");
+    expect(matchInterceptRoute("https://web-dynamic-reports.trackmangolf.com/api/report")?.label).toBe("trackmangolf");
+    expect(matchInterceptRoute("https://app.trackmancloud.com/api/activity")?.label).toBe("trackmancloud");
+  });
+
+  it("resolves relative request URLs against the page", () => {
+    expect(matchInterceptRoute("/api/report?r=123", REPORT_PAGE)?.label).toBe("trackmangolf");
+  });
+
+  it("skips third-party hosts", () => {
+    expect(matchInterceptRoute("https://www.google-analytics.com/g/collect")).toBeNull();
+    expect(matchInterceptRoute("https://fonts.gstatic.com/s/roboto.woff2")).toBeNull();
+    expect(matchInterceptRoute("https://nottrackmangolf.com/api")).toBeNull();
+  });
+
+  it("skips static assets on Trackman hosts", () => {
+    expect(matchInterceptRoute("https://web-dynamic-reports.trackmangolf.com/main.3f2a.js")).toBeNull();
+    expect(matchInterceptRoute("https://web-dynamic-reports.trackmangolf.com/assets/logo.svg")).toBeNull();
+    expect(matchInterceptRoute("https://web-dynamic-reports.trackmangolf.com/fonts/a.woff2")).toBeNull();
+  });
+
+  it("skips non-http schemes and malformed URLs", () => {
+    expect(matchInterceptRoute("data:application/json,{}")).toBeNull();
+    expect(matchInterceptRoute("blob:https://web-dynamic-reports.trackmangolf.com/abc")).toBeNull();
+    expect(matchInterceptRoute("http://[bad")).toBeNull();
+  });
+});
+
+describe("passesResponseGates", () => {
+  it("accepts JSON content types", () => {
+    expect(passesResponseGates("application/json; charset=utf-8", null)).toBe(true);
+    expect(passesResponseGates("application/problem+json", null)).toBe(true);
+  });
+
+  it("rejects non-JSON content types", () => {
+    expect(passesResponseGates("image/png", null)).toBe(false);
+    expect(passesResponseGates("text/html", null)).toBe(false);
+    expect(passesResponseGates("font/woff2", null)).toBe(false);
+  });
+
+  it("lets responses without headers through to the text sniff", () => {
+    expect(passesResponseGates(null, null)).toBe(true);
+  });
+
+  it("applies the size gate", () => {
+    expect(passesResponseGates("application/json", "2")).toBe(false);
+    expect(passesResponseGates("application/json", "4096")).toBe(true);
+    expect(passesResponseGates("application/json", String(MAX_INTERCEPT_BODY_BYTES + 1))).toBe(false);
+  });
+});
+
+describe("sniffShotData", () => {
+  it("finds the StrokeGroups key in raw text", () => {
+    expect(sniffShotData('{"StrokeGroups":[{"Club":"Driver"}]}')).toBe(true);
+  });
+
+  it("rejects bodies without the key", () => {
+    expect(sniffShotData('{"locale":"en-US","resources":{"carry":"Carry"}}')).toBe(false);
+    expect(sniffShotData("{}")).toBe(false);
+  });
+});
+
+describe("intercept counters", () => {
+  beforeEach(() => {
+    resetInterceptCountersForTests();
+  });
+
+  it("counts skipped, sniffed and parsed responses", () => {
+    countIntercept("skipped");
+    countIntercept("skipped");
+    countIntercept("sniffed");
+    countIntercept("parsed");
+
+    expect(getInterceptCounters()).toEqual({ skipped: 2, sniffed: 1, parsed: 1, duplicates: 0, merged: 0 });
+  });
+
+  it("returns a copy of the counters", () => {
+    const snapshot = getInterceptCounters();
+    countIntercept("sniffed");
+    expect(snapshot.sniffed).toBe(0);
+  });
+});
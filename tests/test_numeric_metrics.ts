@@ -0,0 +1,74 @@
+/**
+ * Numeric metric storage: parsers emit numbers, and the writers produce
+ * byte-identical output for numeric sessions and legacy string snapshots.
+ */
+import { describe, expect, it } from "vitest";
+import type { SessionData } from "../src/models/types";
+import { parseSessionData } from "../src/content/session_parser";
+import { writeBulkCsv, writeCsv } from "../src/shared/csv_writer";
+import { writeTsv } from "../src/shared/tsv_writer";
+import { migrateSnapshotMetrics } from "../src/shared/history";
+
+const REPORT_URL = "https://web-dynamic-reports.trackmangolf.com/reports?r=parity&nd_001=789012";
+
+function makeReport(): Record<string, unknown> {
+  return {
+    Time: { Date: "2026-03-01T10:00:00Z" },
+    StrokeGroups: [
+      {
+        Club: "Driver",
+        Strokes: [
+          { Measurement: { ClubSpeed: 45.1234, BallSpeed: 67.02, SmashFactor: 1.486, Carry: 230.55, SpinRate: 2511.6 } },
+          { Measurement: { ClubSpeed: 44.9, BallSpeed: 66.1, SmashFactor: 1.472, Carry: 228.04, SpinRate: 2650.2 } },
+          { Measurement: { ClubSpeed: 46.01, Carry: 233.3, Tempo: 2.987 } },
+        ],
+      },
+      {
+        Club: "7Iron",
+        Strokes: [
+          { Measurement: { ClubSpeed: 36.4, Carry: 150.26, ImpactHeight: 0.0042, AttackAngle: -4.17 } },
+          { Measurement: { ClubSpeed: 36.9, Carry: 152.61, ImpactHeight: -0.0031, AttackAngle: -3.92 } },
+        ],
+      },
+    ],
+  };
+}
+
+/** The snapshot shape older versions stored: every metric as `${number}`. */
+function toLegacyStrings(session: SessionData): SessionData {
+  const legacy = structuredClone(session);
+  for (const club of legacy.club_groups) {
+    for (const shot of club.shots) {
+      for (const [key, value] of Object.entries(shot.metrics)) {
+        shot.metrics[key] = `${value}`;
+      }
+    }
+  }
+  return legacy;
+}
+
+describe("numeric metric storage", () => {
+  const session = parseSessionData(makeReport(), REPORT_URL)!;
+  const legacy = toLegacyStrings(session);
+
+  it("parser stores numbers, not strings", () => {
+    const metrics = session.club_groups[0].shots[0].metrics;
+    expect(metrics.Carry).toBe(230.55);
+    expect(Object.values(metrics).every((value) => typeof value === "number")).toBe(true);
+  });
+
+  it("writeCsv output is unchanged from string-valued snapshots", () => {
+    expect(writeCsv(session)).toBe(writeCsv(legacy));
+    expect(writeCsv(session, true, undefined, { speed: "m/s", distance: "meters" }))
+      .toBe(writeCsv(legacy, true, undefined, { speed: "m/s", distance: "meters" }));
+  });
+
+  it("writeBulkCsv and writeTsv output is unchanged from string-valued snapshots", () => {
+    expect(writeBulkCsv([session, session])).toBe(writeBulkCsv([legacy, legacy]));
+    expect(writeTsv(session)).toBe(writeTsv(legacy));
+  });
+
+  it("migrated legacy snapshots equal freshly parsed sessions", () => {
+    expect(migrateSnapshotMetrics(toLegacyStrings(session))).toEqual(session);
+  });
+});
@@ -0,0 +1,90 @@
+import { beforeEach, describe, expect, it } from "vitest";
+import {
+  fingerprintReport,
+  fingerprintText,
+  forgetFingerprint,
+  isDuplicatePayload,
+  rememberFingerprint,
+  resetFingerprintsForTests,
+} from "../src/content/payload_fingerprint";
+
+const URL_A = "https://web-dynamic-reports.trackmangolf.com/reports?r=a";
+const URL_B = "https://web-dynamic-reports.trackmangolf.com/reports?r=b";
+
+function makeReport(carries: number[]): Record<string, unknown> {
+  return {
+    StrokeGroups: [
+      {
+        Club: "Driver",
+        Strokes: carries.map((Carry) => ({ Measurement: { Carry } })),
+      },
+    ],
+  };
+}
+
+describe("fingerprintText", () => {
+  it("is stable for identical text and URL", () => {
+    const text = JSON.stringify(makeReport([200, 210]));
+    expect(fingerprintText(text, URL_A)).toBe(fingerprintText(text, URL_A));
+  });
+
+  it("differs when the text or the URL changes", () => {
+    const text = JSON.stringify(makeReport([200, 210]));
+    const other = JSON.stringify(makeReport([200, 211]));
+
+    expect(fingerprintText(text, URL_A)).not.toBe(fingerprintText(other, URL_A));
+    expect(fingerprintText(text, URL_A)).not.toBe(fingerprintText(text, URL_B));
+  });
+});
+
+describe("fingerprintReport", () => {
+  it("matches structurally identical payloads", () => {
+    expect(fingerprintReport(makeReport([200, 205, 210]), URL_A))
+      .toBe(fingerprintReport(makeReport([200, 205, 210]), URL_A));
+  });
+
+  it("changes with stroke count or any stroke", () => {
+    const base = fingerprintReport(makeReport([200, 205, 210]), URL_A);
+
+    expect(fingerprintReport(makeReport([200, 205, 210, 215]), URL_A)).not.toBe(base);
+    expect(fingerprintReport(makeReport([201, 205, 210]), URL_A)).not.toBe(base);
+    expect(fingerprintReport(makeReport([200, 206, 210]), URL_A)).not.toBe(base);
+    expect(fingerprintReport(makeReport([200, 205, 211]), URL_A)).not.toBe(base);
+  });
+});
+
+describe("isDuplicatePayload", () => {
+  beforeEach(() => {
+    resetFingerprintsForTests();
+  });
+
+  it("matches only the last posted fingerprint", () => {
+    expect(isDuplicatePayload("x")).toBe(false);
+    rememberFingerprint("x");
+    expect(isDuplicatePayload("x")).toBe(true);
+    expect(isDuplicatePayload("y")).toBe(false);
+  });
+
+  it("lets a report be posted again after navigating away and back", () => {
+    rememberFingerprint("report-a");
+    rememberFingerprint("report-b");
+
+    expect(isDuplicatePayload("report-a")).toBe(false);
+  });
+
+  it("does not block a payload whose parse failed", () => {
+    rememberFingerprint("report-a");
+    rememberFingerprint("failed-parse");
+    forgetFingerprint("failed-parse");
+
+    expect(isDuplicatePayload("failed-parse")).toBe(false);
+  });
+
+  it("keeps a later payload when an earlier one is forgotten", () => {
+    rememberFingerprint("report-a");
+    rememberFingerprint("report-b");
+    forgetFingerprint("report-a");
+
+    expect(isDuplicatePayload("report-b")).toBe(true);
+  });
+});
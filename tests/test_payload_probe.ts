@@ -0,0 +1,114 @@
+import { afterEach, describe, expect, it, vi } from "vitest";
+import {
+  containsStrokegroups,
+  probeShotDataIndicators,
+  PROBE_MAX_DEPTH,
+  PROBE_MAX_NODES,
+  type PayloadProbeStats,
+} from "../src/content/payload_probe";
+
+function nestUnder(value: unknown, levels: number): unknown {
+  let nested = value;
+  for (let i = 0; i < levels; i += 1) {
+    nested = { level: nested };
+  }
+  return nested;
+}
+
+describe("containsStrokegroups", () => {
+  afterEach(() => {
+    vi.restoreAllMocks();
+  });
+
+  it("accepts a non-empty top-level StrokeGroups array", () => {
+    expect(containsStrokegroups({ StrokeGroups: [{ Club: "Driver", Strokes: [] }] })).toBe(true);
+  });
+
+  it("rejects non-objects and empty payloads", () => {
+    expect(containsStrokegroups(null)).toBe(false);
+    expect(containsStrokegroups("StrokeGroups")).toBe(false);
+    expect(containsStrokegroups(42)).toBe(false);
+    expect(containsStrokegroups({})).toBe(false);
+    expect(containsStrokegroups([])).toBe(false);
+  });
+
+  it("falls back to key indicators when StrokeGroups is missing", () => {
+    const payload = {
+      data: {
+        Strokes: [{ Measurement: { BallSpeed: 70.1, Carry: 180.2 } }],
+      },
+    };
+    expect(containsStrokegroups(payload)).toBe(true);
+  });
+
+  it("requires three distinct indicators", () => {
+    expect(containsStrokegroups({ settings: { Carry: 1, CarryUnit: "m" } })).toBe(false);
+    expect(containsStrokegroups({ settings: { Carry: 1, SpinRate: 2, ClubSpeed: 3 } })).toBe(true);
+  });
+
+  it("ignores indicators that only appear in string values", () => {
+    const translations = {
+      labels: {
+        a: "Ball Speed ballspeed",
+        b: "Carry carry",
+        c: "Spin Rate spinrate",
+      },
+    };
+    expect(containsStrokegroups(translations)).toBe(false);
+  });
+
+  it("never serializes the payload", () => {
+    const stringify = vi.spyOn(JSON, "stringify");
+    containsStrokegroups({ config: { theme: "dark", items: [{ a: 1 }, { b: 2 }] } });
+    expect(stringify).not.toHaveBeenCalled();
+  });
+
+  it("stops looking below the depth bound", () => {
+    const indicators = { BallSpeed: 1, ClubSpeed: 2, SpinRate: 3 };
+    expect(containsStrokegroups(nestUnder(indicators, PROBE_MAX_DEPTH - 1))).toBe(true);
+    expect(containsStrokegroups(nestUnder(indicators, PROBE_MAX_DEPTH + 1))).toBe(false);
+  });
+
+  it("tolerates circular references", () => {
+    const payload: Record<string, unknown> = { name: "config" };
+    payload.self = payload;
+    expect(containsStrokegroups(payload)).toBe(false);
+  });
+});
+
+describe("probeShotDataIndicators", () => {
+  it("exits as soon as three indicators are found", () => {
+    const stats: PayloadProbeStats = { nodesVisited: 0, indicatorsFound: 0 };
+    const payload = {
+      BallSpeed: 1,
+      ClubSpeed: 2,
+      SpinRate: 3,
+      big: Array.from({ length: 1000 }, (_, i) => ({ index: i })),
+    };
+
+    expect(probeShotDataIndicators(payload, stats)).toBe(true);
+    expect(stats.nodesVisited).toBe(1);
+    expect(stats.indicatorsFound).toBe(3);
+  });
+
+  it("samples only the head of large arrays", () => {
+    const stats: PayloadProbeStats = { nodesVisited: 0, indicatorsFound: 0 };
+    const payload = {
+      rows: Array.from({ length: 10000 }, (_, i) => ({ key: `row-${i}` })),
+    };
+
+    expect(probeShotDataIndicators(payload, stats)).toBe(false);
+    expect(stats.nodesVisited).toBeLessThan(10);
+  });
+
+  it("gives up after the node budget", () => {
+    const stats: PayloadProbeStats = { nodesVisited: 0, indicatorsFound: 0 };
+    const wide: Record<string, unknown> = {};
+    for (let i = 0; i < PROBE_MAX_NODES * 2; i += 1) {
+      wide[`section${i}`] = { value: i };
+    }
+
+    expect(probeShotDataIndicators(wide, stats)).toBe(false);
+    expect(stats.nodesVisited).toBe(PROBE_MAX_NODES + 1);
+  });
+});
@@ -8,13 +8,13 @@ class TestPermissionsManifest:
     """Verify permissions are correctly configured in manifest."""
 
     def test_source_manifest_has_required_permissions(self):
-        """Source manifest must include storage, downloads, clipboardWrite."""
+        """Source manifest must include storage, downloads, clipboardWrite, tabs, alarms."""
         manifest_path = Path("src/manifest.json")
         with open(manifest_path) as f:
             manifest = json.load(f)
         permissions = set(manifest.get("permissions", []))
-        assert permissions == {"storage", "downloads", "clipboardWrite"}, (
-            f"Expected {{storage, downloads, clipboardWrite}}, got {permissions}"
+        assert permissions == {"storage", "downloads", "clipboardWrite", "tabs", "alarms"}, (
+            f"Expected {{storage, downloads, clipboardWrite, tabs, alarms}}, got {permissions}"
         )
 
     def test_source_manifest_host_permissions_unchanged(self):
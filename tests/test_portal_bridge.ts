@@ -0,0 +1,100 @@
+import { describe, expect, it } from "vitest";
+import { createMainWorldBridge, type BridgeWindow } from "../src/content/portal_fetch";
+import {
+  PORTAL_BRIDGE_PING_TYPE,
+  PORTAL_BRIDGE_READY_TYPE,
+  PORTAL_GRAPHQL_REQUEST_TYPE,
+  PORTAL_GRAPHQL_RESPONSE_SOURCE,
+  PORTAL_GRAPHQL_RESPONSE_TYPE,
+  type PortalGraphQLRequestMessage,
+} from "../src/content/portal_bridge_protocol";
+
+/** A window whose page bridge, when present, answers after `latencyMs`. */
+function createFakeWindow(options: { bridge: boolean; latencyMs?: number }) {
+  const listeners: Array<(event: MessageEvent) => void> = [];
+  const posted: unknown[] = [];
+  const target: BridgeWindow = {
+    addEventListener: (_type, listener) => listeners.push(listener),
+    postMessage: (message) => {
+      posted.push(message);
+      if (!options.bridge) return;
+      const request = message as Partial<PortalGraphQLRequestMessage>;
+      const reply = request.type === PORTAL_BRIDGE_PING_TYPE
+        ? { source: PORTAL_GRAPHQL_RESPONSE_SOURCE, type: PORTAL_BRIDGE_READY_TYPE }
+        : request.type === PORTAL_GRAPHQL_REQUEST_TYPE
+          ? {
+            source: PORTAL_GRAPHQL_RESPONSE_SOURCE,
+            type: PORTAL_GRAPHQL_RESPONSE_TYPE,
+            requestId: request.requestId,
+            success: true,
+            data: { data: { echo: request.variables } },
+          }
+          : null;
+      if (reply) setTimeout(() => dispatch(reply), options.latencyMs ?? 1);
+    },
+  };
+  const dispatch = (data: unknown) => {
+    for (const listener of listeners) listener({ source: target, data } as unknown as MessageEvent);
+  };
+  return { target, listeners, posted, dispatch };
+}
+
+describe("createMainWorldBridge", () => {
+  it("answers through the page bridge without waiting for a timeout", async () => {
+    const page = createFakeWindow({ bridge: true, latencyMs: 5 });
+    const bridge = createMainWorldBridge({ target: page.target, origin: "https://portal.trackmangolf.com" });
+
+    const started = Date.now();
+    const response = await bridge.fetch("query { me }", { id: "a1" });
+
+    expect(response).toEqual({ success: true, data: { data: { echo: { id: "a1" } } }, error: undefined });
+    expect(Date.now() - started).toBeLessThan(500);
+  });
+
+  it("reports an absent bridge after the handshake, not the request timeout", async () => {
+    const page = createFakeWindow({ bridge: false });
+    const bridge = createMainWorldBridge({
+      target: page.target,
+      origin: "https://portal.trackmangolf.com",
+      handshakeTimeoutMs: 30,
+      requestTimeoutMs: 15000,
+    });
+
+    const started = Date.now();
+    expect(await bridge.fetch("query { me }")).toBeNull();
+    expect(Date.now() - started).toBeLessThan(1000);
+    // No request was posted into a page that cannot answer it
+    expect(page.posted).toHaveLength(1);
+  });
+
+  it("multiplexes concurrent requests over one listener", async () => {
+    const page = createFakeWindow({ bridge: true });
+    const bridge = createMainWorldBridge({ target: page.target, origin: "https://portal.trackmangolf.com" });
+
+    const responses = await Promise.all(
+      ["a1", "a2", "a3"].map((id) => bridge.fetch("query { node }", { id }))
+    );
+
+    expect(responses.map((response) => (response?.data as { data: { echo: { id: string } } }).data.echo.id))
+      .toEqual(["a1", "a2", "a3"]);
+    expect(page.listeners).toHaveLength(1);
+    expect(bridge.getPendingCount()).toBe(0);
+  });
+
+  it("switches to the bridge when its ready message comes late", async () => {
+    const page = createFakeWindow({ bridge: false });
+    const bridge = createMainWorldBridge({
+      target: page.target,
+      origin: "https://portal.trackmangolf.com",
+      handshakeTimeoutMs: 10,
+      requestTimeoutMs: 50,
+    });
+    expect(await bridge.whenReady()).toBe(false);
+
+    page.dispatch({ source: PORTAL_GRAPHQL_RESPONSE_SOURCE, type: PORTAL_BRIDGE_READY_TYPE });
+    const response = await bridge.fetch("query { me }");
+
+    // The fake page still cannot answer, so the request times out instead of being skipped
+    expect(response).toEqual({ success: false, error: "Portal page bridge timed out" });
+  });
+});
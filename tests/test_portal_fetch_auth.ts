@@ -1,5 +1,12 @@
-import { describe, expect, it } from "vitest";
+import { beforeEach, describe, expect, it } from "vitest";
 import { findTrackmanAuthTokenFromStorage } from "../src/content/portal_fetch";
+import {
+  getAuthTokenCacheStats,
+  invalidateTrackmanAuthToken,
+  isAuthFailureResponse,
+  resetAuthTokenCacheForTests,
+  resolveTrackmanAuthToken,
+} from "../src/content/portal_auth";
 
 class MockStorage {
   private readonly entries: Array<[string, string]>;
@@ -19,6 +26,12 @@ class MockStorage {
   getItem(key: string): string | null {
     return this.entries.find(([entryKey]) => entryKey === key)?.[1] ?? null;
   }
+
+  setItem(key: string, value: string): void {
+    const entry = this.entries.find(([entryKey]) => entryKey === key);
+    if (entry) entry[1] = value;
+    else this.entries.push([key, value]);
+  }
 }
 
 const ACCESS_TOKEN = "eyJhbGciOiJIUzI1NiJ9.eyJzdWIiOiJ1c2VyIn0.signature";
@@ -81,3 +94,39 @@ describe("portal_fetch auth token discovery", () => {
     expect(token).toBeNull();
   });
 });
+
+describe("resolveTrackmanAuthToken", () => {
+  beforeEach(() => {
+    resetAuthTokenCacheForTests();
+  });
+
+  it("scans storage once until invalidated", () => {
+    const storage = new MockStorage({ access_token: ACCESS_TOKEN });
+
+    expect(resolveTrackmanAuthToken(storage)).toBe(ACCESS_TOKEN);
+    storage.setItem("access_token", OPAQUE_ACCESS_TOKEN);
+    expect(resolveTrackmanAuthToken(storage)).toBe(ACCESS_TOKEN);
+    expect(getAuthTokenCacheStats()).toEqual({ scans: 1, hits: 1 });
+
+    invalidateTrackmanAuthToken();
+    expect(resolveTrackmanAuthToken(storage)).toBe(OPAQUE_ACCESS_TOKEN);
+    expect(getAuthTokenCacheStats().scans).toBe(2);
+  });
+
+  it("rescans when a store gains keys or different stores are passed", () => {
+    const storage = new MockStorage({ theme: "dark" });
+    expect(resolveTrackmanAuthToken(storage)).toBeNull();
+
+    storage.setItem("auth", JSON.stringify({ accessToken: ACCESS_TOKEN }));
+    expect(resolveTrackmanAuthToken(storage)).toBe(ACCESS_TOKEN);
+    expect(resolveTrackmanAuthToken(new MockStorage({ id_token: ID_TOKEN }))).toBe(ID_TOKEN);
+    expect(getAuthTokenCacheStats()).toEqual({ scans: 3, hits: 0 });
+  });
+
+  it("recognizes rejected tokens", () => {
+    expect(isAuthFailureResponse(401, null)).toBe(true);
+    expect(isAuthFailureResponse(200, { errors: [{ message: "User is not authorized" }] })).toBe(true);
+    expect(isAuthFailureResponse(200, { errors: [{ message: "Field 'x' not found" }] })).toBe(false);
+    expect(isAuthFailureResponse(200, { data: {} })).toBe(false);
+  });
+});
@@ -0,0 +1,68 @@
+/**
+ * Candidate fetching in portal_import: which failures stop the loop and
+ * which count against a candidate. The transport, detail cache and stored
+ * candidate stats are mocked; each test uses its own activity kind, so the
+ * candidates are tried in their default order.
+ */
+
+import { beforeEach, describe, expect, it, vi } from "vitest";
+
+const { recordStoredQueryCandidateResults } = vi.hoisted(() => ({
+  recordStoredQueryCandidateResults: vi.fn(),
+}));
+
+vi.mock("../src/shared/activity_detail_cache", () => ({
+  getCachedActivityResponse: vi.fn(() => Promise.resolve(null)),
+  putCachedActivityResponse: vi.fn(() => Promise.resolve()),
+}));
+
+vi.mock("../src/shared/query_candidate_stats", async (importOriginal) => {
+  const actual = await importOriginal<typeof import("../src/shared/query_candidate_stats")>();
+  return {
+    ...actual,
+    loadQueryCandidateStats: (candidates: Parameters<typeof actual.createQueryCandidateStats>[0]) =>
+      Promise.resolve(actual.createQueryCandidateStats(candidates)),
+    recordStoredQueryCandidateResults,
+  };
+});
+
+import {
+  fetchPortalActivityCandidates,
+  setPortalGraphQLTransport,
+  type PortalGraphQLTransport,
+} from "../src/shared/portal_import";
+
+const transport = vi.fn<PortalGraphQLTransport>();
+setPortalGraphQLTransport(transport);
+
+beforeEach(() => {
+  vi.clearAllMocks();
+  transport.mockReset();
+  recordStoredQueryCandidateResults.mockImplementation(() => new Promise(() => undefined));
+});
+
+describe("fetchPortalActivityCandidates", () => {
+  it("stops on an auth failure after an earlier candidate's GraphQL error", async () => {
+    transport
+      .mockResolvedValueOnce({ success: true, data: { errors: [{ message: "Cannot query field" }] } })
+      .mockResolvedValueOnce({ success: false, error: "Unauthorized" });
+
+    await expect(fetchPortalActivityCandidates(1, "act-1", "CoursePlayActivity")).rejects.toThrow();
+
+    expect(transport).toHaveBeenCalledTimes(2);
+    const [, , results] = recordStoredQueryCandidateResults.mock.calls[0];
+    expect(results).toEqual([{ label: "default", hit: false }]);
+  });
+
+  it("does not count a failed request as a candidate miss", async () => {
+    transport
+      .mockResolvedValueOnce({ success: false, error: "Request timed out" })
+      .mockResolvedValue({ success: true, data: { data: { node: {} } } });
+
+    await fetchPortalActivityCandidates(1, "act-2", "MapMyBagActivity");
+
+    const [, , results] = recordStoredQueryCandidateResults.mock.calls[0];
+    expect(results.some((result: { label: string }) => result.label === "default")).toBe(false);
+    expect(results.length).toBe(transport.mock.calls.length - 1);
+  });
+});
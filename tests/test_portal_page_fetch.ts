@@ -1,11 +1,20 @@
-import { beforeEach, describe, expect, it } from "vitest";
+import { beforeEach, describe, expect, it, vi } from "vitest";
 import {
   buildPageContextGraphQLHeaders,
+  fetchGraphQLCoalesced,
   getCapturedPortalGraphQLHeadersForTests,
+  getGraphQLCoalescingStats,
+  getGraphQLRequestKey,
   isTrackmanGraphQLEndpoint,
   rememberPortalGraphQLHeaders,
   resetCapturedPortalGraphQLHeadersForTests,
+  resetGraphQLCoalescingForTests,
 } from "../src/content/portal_page_fetch";
+import {
+  PORTAL_GRAPHQL_RESPONSE_SOURCE,
+  PORTAL_GRAPHQL_RESPONSE_TYPE,
+  type PortalGraphQLResponseMessage,
+} from "../src/content/portal_bridge_protocol";
 
 class MockStorage {
   private readonly entries: Array<[string, string]>;
@@ -79,3 +88,59 @@ describe("portal_page_fetch MAIN-world bridge helpers", () => {
     expect(headers.Authorization).toBe(`Bearer ${STORAGE_ACCESS_TOKEN}`);
   });
 });
+
+describe("portal_page_fetch request coalescing", () => {
+  beforeEach(() => {
+    resetGraphQLCoalescingForTests();
+  });
+
+  function createSend() {
+    const releases: Array<() => void> = [];
+    const send = vi.fn((query: string, variables?: Record<string, unknown>) => (
+      new Promise<PortalGraphQLResponseMessage>((resolve) => {
+        releases.push(() => resolve({
+          source: PORTAL_GRAPHQL_RESPONSE_SOURCE,
+          type: PORTAL_GRAPHQL_RESPONSE_TYPE,
+          requestId: "",
+          success: true,
+          data: { query, variables },
+        }));
+      })
+    ));
+    return { send, releaseAll: () => releases.splice(0).forEach((release) => release()) };
+  }
+
+  it("shares one response between identical requests in flight", async () => {
+    const { send, releaseAll } = createSend();
+
+    const first = fetchGraphQLCoalesced("query A", { id: "a1", take: 1 }, send);
+    const second = fetchGraphQLCoalesced("query A", { take: 1, id: "a1" }, send);
+    const other = fetchGraphQLCoalesced("query A", { id: "a2", take: 1 }, send);
+    releaseAll();
+
+    expect(await first).toBe(await second);
+    expect((await other).data).toEqual({ query: "query A", variables: { id: "a2", take: 1 } });
+    expect(send).toHaveBeenCalledTimes(2);
+    expect(getGraphQLCoalescingStats()).toEqual({ sent: 2, coalesced: 1 });
+  });
+
+  it("sends again once the earlier response has arrived", async () => {
+    const { send, releaseAll } = createSend();
+
+    const first = fetchGraphQLCoalesced("query A", { id: "a1" }, send);
+    releaseAll();
+    await first;
+    const second = fetchGraphQLCoalesced("query A", { id: "a1" }, send);
+    releaseAll();
+    await second;
+
+    expect(send).toHaveBeenCalledTimes(2);
+    expect(getGraphQLCoalescingStats().coalesced).toBe(0);
+  });
+
+  it("keys requests on the query text and variables", () => {
+    expect(getGraphQLRequestKey("query A", { a: 1, b: 2 })).toBe(getGraphQLRequestKey("query A", { b: 2, a: 1 }));
+    expect(getGraphQLRequestKey("query A", { a: 1 })).not.toBe(getGraphQLRequestKey("query B", { a: 1 }));
+    expect(getGraphQLRequestKey("query A")).not.toBe(getGraphQLRequestKey("query A", { a: 1 }));
+  });
+});
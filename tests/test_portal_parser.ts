@@ -365,9 +365,9 @@ describe("parsePortalActivity", () => {
       const session = parsePortalActivity(coursePlayActivity);
       expect(session).not.toBeNull();
       expect(session!.club_groups.map((g) => g.club_name)).toEqual(["Driver", "PW"]);
-      expect(session!.club_groups[0].shots[0].metrics["ClubSpeed"]).toBe("108.1");
-      expect(session!.club_groups[0].shots[0].metrics["Carry"]).toBe("252.2");
-      expect(session!.club_groups[1].shots[0].metrics["BallSpeed"]).toBe("96.2");
+      expect(session!.club_groups[0].shots[0].metrics["ClubSpeed"]).toBe(108.1);
+      expect(session!.club_groups[0].shots[0].metrics["Carry"]).toBe(252.2);
+      expect(session!.club_groups[1].shots[0].metrics["BallSpeed"]).toBe(96.2);
       expect(session!.metadata_params["activity_type"]).toBe("CoursePlayActivity");
     });
 
@@ -408,8 +408,8 @@ describe("parsePortalActivity", () => {
       expect(session).not.toBeNull();
       expect(session!.club_groups.map((g) => g.club_name)).toEqual(["PW", "7-Iron"]);
       expect(session!.club_groups[0].shots).toHaveLength(2);
-      expect(session!.club_groups[0].shots[0].metrics["Carry"]).toBe("123.4");
-      expect(session!.club_groups[1].shots[0].metrics["Total"]).toBe("171.5");
+      expect(session!.club_groups[0].shots[0].metrics["Carry"]).toBe(123.4);
+      expect(session!.club_groups[1].shots[0].metrics["Total"]).toBe(171.5);
       expect(session!.metric_names).toEqual(["Carry", "Total"]);
     });
   });
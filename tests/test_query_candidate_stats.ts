@@ -0,0 +1,140 @@
+import { beforeEach, describe, expect, it, vi } from "vitest";
+import type { ImportSessionQueryCandidate } from "../src/shared/import_types";
+
+let mockStore: Record<string, unknown> = {};
+
+vi.stubGlobal("chrome", {
+  storage: {
+    local: {
+      get: vi.fn(async (keys: string[]) => {
+        const result: Record<string, unknown> = {};
+        for (const key of keys) {
+          if (key in mockStore) result[key] = mockStore[key];
+        }
+        return result;
+      }),
+      set: vi.fn(async (data: Record<string, unknown>) => {
+        Object.assign(mockStore, data);
+      }),
+    },
+  },
+});
+
+import {
+  QUERY_REPROBE_INTERVAL,
+  createQueryCandidateStats,
+  getAverageRoundTrips,
+  loadQueryCandidateStats,
+  orderQueryCandidates,
+  recordQueryCandidateResults,
+  recordStoredQueryCandidateResults,
+  saveQueryCandidateStats,
+} from "../src/shared/query_candidate_stats";
+
+const candidates: ImportSessionQueryCandidate[] = [
+  { label: "default", query: "q0" },
+  { label: "A:strokes", query: "q1" },
+  { label: "B:strokes", query: "q2" },
+  { label: "C:strokes", query: "q3" },
+];
+
+function labels(list: ImportSessionQueryCandidate[]): string[] {
+  return list.map((candidate) => candidate.label);
+}
+
+function missesThenHit(count: number): Array<{ label: string; hit: boolean }> {
+  return candidates.slice(0, count).map((candidate, i) => ({
+    label: candidate.label,
+    hit: i === count - 1,
+  }));
+}
+
+describe("query candidate stats", () => {
+  beforeEach(() => {
+    mockStore = {};
+  });
+
+  it("uses declared order until a type has been seen", () => {
+    const stats = createQueryCandidateStats(candidates);
+    expect(labels(orderQueryCandidates(stats, "CoursePlayActivity", candidates))).toEqual(
+      labels(candidates)
+    );
+  });
+
+  it("tries the learned candidate first, then untried, then failing ones", () => {
+    let stats = createQueryCandidateStats(candidates);
+    stats = recordQueryCandidateResults(stats, "CoursePlayActivity", missesThenHit(3));
+
+    expect(labels(orderQueryCandidates(stats, "CoursePlayActivity", candidates))).toEqual([
+      "B:strokes",
+      "C:strokes",
+      "default",
+      "A:strokes",
+    ]);
+    // Other types keep their own order
+    expect(labels(orderQueryCandidates(stats, "RangeActivity", candidates))).toEqual(labels(candidates));
+    expect(stats.kinds.CoursePlayActivity.candidates["B:strokes"]).toEqual({ hits: 1, misses: 0, score: 1 });
+  });
+
+  it("re-probes in declared order periodically", () => {
+    let stats = createQueryCandidateStats(candidates);
+    stats = recordQueryCandidateResults(stats, "CoursePlayActivity", missesThenHit(3));
+    for (let i = 1; i < QUERY_REPROBE_INTERVAL; i++) {
+      expect(labels(orderQueryCandidates(stats, "CoursePlayActivity", candidates))[0]).toBe("B:strokes");
+      stats = recordQueryCandidateResults(stats, "CoursePlayActivity", [{ label: "B:strokes", hit: true }]);
+    }
+
+    expect(labels(orderQueryCandidates(stats, "CoursePlayActivity", candidates))).toEqual(labels(candidates));
+
+    // The probe finds that the default query now works
+    stats = recordQueryCandidateResults(stats, "CoursePlayActivity", missesThenHit(1));
+    expect(stats.kinds.CoursePlayActivity.importsSinceProbe).toBe(1);
+    stats = recordQueryCandidateResults(stats, "CoursePlayActivity", [{ label: "B:strokes", hit: false }]);
+    stats = recordQueryCandidateResults(stats, "CoursePlayActivity", [{ label: "B:strokes", hit: false }]);
+    stats = recordQueryCandidateResults(stats, "CoursePlayActivity", [{ label: "B:strokes", hit: false }]);
+    expect(labels(orderQueryCandidates(stats, "CoursePlayActivity", candidates))[0]).toBe("default");
+  });
+
+  it("averages round trips per import", () => {
+    let stats = createQueryCandidateStats(candidates);
+    expect(getAverageRoundTrips(stats)).toBe(0);
+    stats = recordQueryCandidateResults(stats, "CoursePlayActivity", missesThenHit(3));
+    stats = recordQueryCandidateResults(stats, null, missesThenHit(1));
+    expect(getAverageRoundTrips(stats)).toBe(2);
+  });
+
+  it("persists stats and discards them when the candidate list changes", async () => {
+    const stats = recordQueryCandidateResults(
+      createQueryCandidateStats(candidates),
+      "CoursePlayActivity",
+      missesThenHit(2)
+    );
+    await saveQueryCandidateStats(stats);
+
+    expect(await loadQueryCandidateStats(candidates)).toEqual(stats);
+
+    const changed = [...candidates, { label: "D:strokes", query: "q4" }];
+    const fresh = await loadQueryCandidateStats(changed);
+    expect(fresh.imports).toBe(0);
+    expect(fresh.kinds).toEqual({});
+  });
+
+  it("records imports on top of what another context saved", async () => {
+    // The other context learned from two imports and saved them
+    let other = createQueryCandidateStats(candidates);
+    other = recordQueryCandidateResults(other, "CoursePlayActivity", missesThenHit(2));
+    other = recordQueryCandidateResults(other, "SessionActivity", missesThenHit(1));
+    await saveQueryCandidateStats(other);
+
+    await Promise.all([
+      recordStoredQueryCandidateResults(candidates, "CoursePlayActivity", missesThenHit(2)),
+      recordStoredQueryCandidateResults(candidates, "RangeActivity", missesThenHit(3)),
+    ]);
+
+    const stored = await loadQueryCandidateStats(candidates);
+    expect(stored.imports).toBe(4);
+    expect(stored.roundTrips).toBe(8);
+    expect(Object.keys(stored.kinds).sort()).toEqual(["CoursePlayActivity", "RangeActivity", "SessionActivity"]);
+    expect(stored.kinds.CoursePlayActivity.candidates["A:strokes"].hits).toBe(2);
+  });
+});
@@ -0,0 +1,80 @@
+import { describe, expect, it } from "vitest";
+import { createRequestScheduler, getAverageWaitMs, type RequestPriority } from "../src/shared/request_scheduler";
+
+/** A request that finishes only when the test releases it. */
+function createGate() {
+  const started: string[] = [];
+  const releases = new Map<string, () => void>();
+  return {
+    started,
+    task: (name: string) => () => new Promise<string>((resolve) => {
+      started.push(name);
+      releases.set(name, () => resolve(name));
+    }),
+    async release(name: string): Promise<void> {
+      releases.get(name)?.();
+      await new Promise((resolve) => setTimeout(resolve, 0));
+    },
+  };
+}
+
+function flush(): Promise<void> {
+  return new Promise((resolve) => setTimeout(resolve, 0));
+}
+
+describe("createRequestScheduler", () => {
+  it("keeps slots for interactive requests while bulk is saturated", async () => {
+    const gate = createGate();
+    const scheduler = createRequestScheduler({ maxConcurrent: 3, quotas: { bulk: 2 } });
+
+    for (const name of ["b1", "b2", "b3"]) void scheduler.schedule("bulk", gate.task(name));
+    await flush();
+    expect(gate.started).toEqual(["b1", "b2"]);
+
+    const interactive = scheduler.schedule("interactive", gate.task("i1"));
+    await flush();
+    expect(gate.started).toEqual(["b1", "b2", "i1"]);
+
+    await gate.release("i1");
+    expect(await interactive).toBe("i1");
+    expect(scheduler.getStats().bulk).toMatchObject({ queued: 1, inFlight: 2 });
+  });
+
+  it("starts the highest class first when a slot frees up", async () => {
+    const gate = createGate();
+    const scheduler = createRequestScheduler({ maxConcurrent: 1 });
+    const order: RequestPriority[] = ["prefetch", "bulk", "interactive"];
+
+    void scheduler.schedule("bulk", gate.task("first"));
+    for (const priority of order) void scheduler.schedule(priority, gate.task(priority));
+    await flush();
+
+    for (const name of ["first", "interactive", "bulk"]) await gate.release(name);
+    expect(gate.started).toEqual(["first", "interactive", "bulk", "prefetch"]);
+  });
+
+  it("releases the slot when a request fails", async () => {
+    const scheduler = createRequestScheduler({ maxConcurrent: 1 });
+
+    await expect(scheduler.schedule("interactive", async () => {
+      throw new Error("timeout");
+    })).rejects.toThrow("timeout");
+    await expect(scheduler.schedule("interactive", async () => "ok")).resolves.toBe("ok");
+    expect(scheduler.getStats().interactive).toMatchObject({ inFlight: 0, completed: 2 });
+  });
+
+  it("records queue wait per class", async () => {
+    let clock = 0;
+    const gate = createGate();
+    const scheduler = createRequestScheduler({ maxConcurrent: 1, now: () => clock });
+
+    void scheduler.schedule("bulk", gate.task("b1"));
+    void scheduler.schedule("bulk", gate.task("b2"));
+    clock = 40;
+    await gate.release("b1");
+
+    const stats = scheduler.getStats().bulk;
+    expect(stats.maxWaitMs).toBe(40);
+    expect(getAverageWaitMs(stats)).toBe(20);
+  });
+});
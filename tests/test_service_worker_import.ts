@@ -13,13 +13,15 @@ import { describe, it, expect, vi, beforeEach } from "vitest";
 
 // vi.hoisted runs BEFORE vi.mock and BEFORE static imports are evaluated.
 // This is the only place we can set globalThis.chrome before serviceWorker.ts loads.
-const { mockStorageSet, mockPutBulkImportedSession, getHandler } = vi.hoisted(() => {
+const { mockStorageSet, mockPutBulkImportedSession, mockTabsSendMessage, getHandler } = vi.hoisted(() => {
   const mockStorageSet = vi.fn();
-  const mockStorageGet = vi.fn();
+  // The bulk import engine reads its stored job as the worker starts
+  const mockStorageGet = vi.fn(() => Promise.resolve({}));
   const mockStorageRemove = vi.fn();
   const mockRuntimeSendMessage = vi.fn();
   const mockDownload = vi.fn();
   const mockPutBulkImportedSession = vi.fn();
+  const mockTabsSendMessage = vi.fn();
 
   type MsgHandler = (message: unknown, sender: unknown, sendResponse: (r: unknown) => void) => boolean | undefined;
   let _handler: MsgHandler | null = null;
@@ -43,12 +45,19 @@ const { mockStorageSet, mockPutBulkImportedSession, getHandler } = vi.hoisted(()
       onChanged: { addListener: vi.fn() },
     },
     downloads: { download: mockDownload },
+    tabs: { sendMessage: mockTabsSendMessage },
+    alarms: {
+      onAlarm: { addListener: vi.fn() },
+      create: vi.fn(() => Promise.resolve()),
+      clear: vi.fn(() => Promise.resolve(true)),
+    },
   };
 
   return {
     mockStorageSet,
     mockStorageGet,
     mockPutBulkImportedSession,
+    mockTabsSendMessage,
     getHandler: () => {
       if (!_handler) throw new Error("onMessage handler not registered");
       return _handler;
@@ -65,16 +74,20 @@ vi.mock("../src/shared/portal_parser", () => ({
 vi.mock("../src/shared/history", () => ({
   saveSessionToHistory: vi.fn(),
   getHistoryErrorMessage: vi.fn((msg: string) => msg),
+  migrateStoredSessionMetrics: vi.fn(() => Promise.resolve()),
+  migrateStorageHistoryToIndexedDb: vi.fn(() => Promise.resolve(0)),
 }));
 
 vi.mock("../src/shared/bulk_import_store", () => ({
   putBulkImportedSession: mockPutBulkImportedSession,
+  clearBulkImportedSessions: vi.fn(() => Promise.resolve()),
 }));
 
 // Static imports — these run after vi.hoisted and vi.mock (vitest hoisting order)
 import { parsePortalActivity } from "../src/shared/portal_parser";
 import { saveSessionToHistory } from "../src/shared/history";
 import { putBulkImportedSession } from "../src/shared/bulk_import_store";
+import { saveBulkImportedSession } from "../src/background/imported_session";
 import { STORAGE_KEYS } from "../src/shared/constants";
 import type { ImportStatus } from "../src/shared/import_types";
 import {
@@ -205,8 +218,25 @@ describe("SAVE_IMPORTED_SESSION handler", () => {
     );
     expect(saveSessionToHistory).toHaveBeenCalledWith(mockSession);
   });
+});
+
+// ─── saveBulkImportedSession (called by the bulk import engine) ──────────────
+
+describe("saveBulkImportedSession", () => {
+  const mockSession = {
+    report_id: "session-abc",
+    date: "2026-01-15",
+    club_groups: [{ club: "Driver", shots: [{ ClubSpeed: "105" }] }],
+  };
+
+  beforeEach(() => {
+    vi.clearAllMocks();
+    mockStorageSet.mockResolvedValue(undefined);
+    vi.mocked(saveSessionToHistory).mockResolvedValue(undefined);
+    vi.mocked(putBulkImportedSession).mockResolvedValue(undefined);
+  });
 
-  it("saves a bulk imported session, archives it, and responds with item metadata", async () => {
+  it("saves a bulk imported session, archives it, and returns item metadata", async () => {
     const bulkSession = {
       ...mockSession,
       report_id: "bulk-report-1",
@@ -216,25 +246,16 @@ describe("SAVE_IMPORTED_SESSION handler", () => {
     };
     vi.mocked(parsePortalActivity).mockReturnValue(bulkSession as any);
 
-    const returnValue = callHandler({
-      type: "SAVE_BULK_IMPORTED_SESSION",
-      jobId: "job-1",
-      activityId: "act-001",
-      graphqlPayloads: [
-        { data: { node: { id: "act-001", date: "2026-01-15", strokeGroups: [] } } },
-      ],
-    }, sendResponse);
-
-    expect(returnValue).toBe(true);
-
-    await vi.waitUntil(() => sendResponse.mock.calls.length > 0);
+    const result = await saveBulkImportedSession("job-1", "act-001", [
+      { data: { node: { id: "act-001", date: "2026-01-15", strokeGroups: [] } } },
+    ]);
 
     expect(mockStorageSet).toHaveBeenCalledWith(
       expect.objectContaining({ [STORAGE_KEYS.TRACKMAN_DATA]: bulkSession })
     );
     expect(saveSessionToHistory).toHaveBeenCalledWith(bulkSession);
     expect(putBulkImportedSession).toHaveBeenCalledWith("job-1", "act-001", bulkSession);
-    expect(sendResponse).toHaveBeenCalledWith({
+    expect(result).toEqual({
       success: true,
       reportId: "bulk-report-1",
       shotCount: 2,
@@ -242,23 +263,56 @@ describe("SAVE_IMPORTED_SESSION handler", () => {
   });
 
   it("returns a bulk import error when all GraphQL payloads have errors", async () => {
+    const result = await saveBulkImportedSession("job-1", "act-001", [
+      { errors: [{ message: "Unauthorized" }] },
+    ]);
+
+    expect(putBulkImportedSession).not.toHaveBeenCalled();
+    expect(result).toEqual({
+      success: false,
+      error: "Unauthorized",
+    });
+  });
+});
+
+// ─── PORTAL_GRAPHQL_REQUEST handler ──────────────────────────────────────────
+
+describe("PORTAL_GRAPHQL_REQUEST handler", () => {
+  beforeEach(() => {
+    mockTabsSendMessage.mockReset();
+  });
+
+  it("runs a popup request through the worker's queue and relays the response", async () => {
+    const portalResponse = { success: true, data: { data: { node: { id: "act-001" } } } };
+    mockTabsSendMessage.mockResolvedValue(portalResponse);
+    const sendResponse = vi.fn();
+
     const returnValue = callHandler({
-      type: "SAVE_BULK_IMPORTED_SESSION",
-      jobId: "job-1",
-      activityId: "act-001",
-      graphqlPayloads: [
-        { errors: [{ message: "Unauthorized" }] },
-      ],
+      type: "PORTAL_GRAPHQL_REQUEST",
+      tabId: 42,
+      query: "query Node($id: ID!) { node(id: $id) { id } }",
+      variables: { id: "act-001" },
+      priority: "prefetch",
     }, sendResponse);
 
     expect(returnValue).toBe(true);
-
     await vi.waitUntil(() => sendResponse.mock.calls.length > 0);
 
-    expect(putBulkImportedSession).not.toHaveBeenCalled();
-    expect(sendResponse).toHaveBeenCalledWith({
-      success: false,
-      error: "Unauthorized",
+    expect(mockTabsSendMessage).toHaveBeenCalledWith(42, {
+      type: "PORTAL_GRAPHQL_FETCH",
+      query: "query Node($id: ID!) { node(id: $id) { id } }",
+      variables: { id: "act-001" },
     });
+    expect(sendResponse).toHaveBeenCalledWith({ response: portalResponse });
+  });
+
+  it("responds with the error when the portal tab is gone", async () => {
+    mockTabsSendMessage.mockRejectedValue(new Error("No tab with id: 42."));
+    const sendResponse = vi.fn();
+
+    callHandler({ type: "PORTAL_GRAPHQL_REQUEST", tabId: 42, query: "q", priority: "interactive" }, sendResponse);
+    await vi.waitUntil(() => sendResponse.mock.calls.length > 0);
+
+    expect(sendResponse).toHaveBeenCalledWith({ error: "No tab with id: 42." });
   });
 });
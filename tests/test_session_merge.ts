@@ -0,0 +1,162 @@
+import { afterEach, beforeEach, describe, expect, it, vi } from "vitest";
+import type { SessionData } from "../src/models/types";
+import {
+  SESSION_MERGE_MAX_WAIT_MS,
+  SESSION_MERGE_WINDOW_MS,
+  bufferSession,
+  flushSessionMerge,
+  mergeSessionData,
+  resetSessionMergeForTests,
+  setSessionMergeHandler,
+} from "../src/content/session_merge";
+
+function makeSession(
+  reportId: string,
+  metric: string,
+  groups: Array<{ club: string; shots: number[] }>,
+  mp = metric
+): SessionData {
+  return {
+    date: "2026-03-01",
+    report_id: reportId,
+    url_type: "activity",
+    metric_names: [metric],
+    metadata_params: { r: reportId, "mp[]": mp },
+    club_groups: groups.map(({ club, shots }) => ({
+      club_name: club,
+      shots: shots.map((shot_number) => ({
+        shot_number,
+        metrics: { [metric]: `${shot_number + 100}` },
+      })),
+      averages: {},
+      consistency: {},
+    })),
+  };
+}
+
+describe("mergeSessionData", () => {
+  it("merges metrics by club group and shot number", () => {
+    const carry = makeSession("r1", "Carry", [{ club: "Driver", shots: [0, 1] }]);
+    const spin = makeSession("r1", "SpinRate", [{ club: "Driver", shots: [0, 1] }]);
+
+    const merged = mergeSessionData(carry, spin);
+
+    expect(merged.metric_names).toEqual(["Carry", "SpinRate"]);
+    expect(merged.club_groups).toHaveLength(1);
+    expect(merged.club_groups[0].shots[1].metrics).toEqual({ Carry: "101", SpinRate: "101" });
+  });
+
+  it("appends shots and groups only present in the incoming payload", () => {
+    const first = makeSession("r1", "Carry", [{ club: "Driver", shots: [0] }]);
+    const second = makeSession("r1", "Total", [
+      { club: "Driver", shots: [0, 2] },
+      { club: "7Iron", shots: [0] },
+    ]);
+
+    const merged = mergeSessionData(first, second);
+
+    expect(merged.club_groups.map((g) => g.club_name)).toEqual(["Driver", "7Iron"]);
+    expect(merged.club_groups[0].shots.map((s) => s.shot_number)).toEqual([0, 2]);
+    expect(merged.club_groups[0].shots[0].metrics).toEqual({ Carry: "100", Total: "100" });
+  });
+
+  it("matches groups by club when a page omits a group", () => {
+    const carry = makeSession("r1", "Carry", [
+      { club: "Driver", shots: [0] },
+      { club: "7Iron", shots: [0] },
+      { club: "7Iron", shots: [0] },
+    ]);
+    // The Driver group had no usable shots on this page and was dropped
+    const spin = makeSession("r1", "SpinRate", [
+      { club: "7Iron", shots: [0] },
+      { club: "7Iron", shots: [0] },
+    ]);
+
+    const merged = mergeSessionData(carry, spin);
+
+    expect(merged.club_groups.map((g) => g.club_name)).toEqual(["Driver", "7Iron", "7Iron"]);
+    expect(merged.club_groups[0].shots[0].metrics).toEqual({ Carry: "100" });
+    expect(merged.club_groups[1].shots[0].metrics).toEqual({ Carry: "100", SpinRate: "100" });
+    expect(merged.club_groups[2].shots[0].metrics).toEqual({ Carry: "100", SpinRate: "100" });
+  });
+
+  it("matches same-club groups by group id when a page omits the first", () => {
+    const withIds = (session: SessionData, ids: string[]) => ({
+      ...session,
+      club_groups: session.club_groups.map((group, i) => ({ ...group, group_id: ids[i] })),
+    });
+    const carry = withIds(makeSession("r1", "Carry", [
+      { club: "7Iron", shots: [0] },
+      { club: "7Iron", shots: [0] },
+    ]), ["g-1", "g-2"]);
+    // The first 7Iron group had no usable shots on this page and was dropped
+    const spin = withIds(makeSession("r1", "SpinRate", [{ club: "7Iron", shots: [0] }]), ["g-2"]);
+
+    const merged = mergeSessionData(carry, spin);
+
+    expect(merged.club_groups).toHaveLength(2);
+    expect(merged.club_groups[0].shots[0].metrics).toEqual({ Carry: "100" });
+    expect(merged.club_groups[1].shots[0].metrics).toEqual({ Carry: "100", SpinRate: "100" });
+  });
+
+  it("does not modify its inputs", () => {
+    const first = makeSession("r1", "Carry", [{ club: "Driver", shots: [0] }]);
+    const second = makeSession("r1", "Total", [{ club: "Driver", shots: [0] }]);
+
+    mergeSessionData(first, second);
+
+    expect(first.metric_names).toEqual(["Carry"]);
+    expect(first.club_groups[0].shots[0].metrics).toEqual({ Carry: "100" });
+  });
+});
+
+describe("bufferSession", () => {
+  const posted: Array<{ session: SessionData; payloads: number }> = [];
+
+  beforeEach(() => {
+    vi.useFakeTimers();
+    posted.length = 0;
+    setSessionMergeHandler((session, payloads) => posted.push({ session, payloads }));
+  });
+
+  afterEach(() => {
+    resetSessionMergeForTests();
+    vi.useRealTimers();
+  });
+
+  it("posts one merged session for payloads inside the window", () => {
+    expect(bufferSession(makeSession("r1", "Carry", [{ club: "Driver", shots: [0] }]))).toBe(false);
+    vi.advanceTimersByTime(SESSION_MERGE_WINDOW_MS - 1);
+    expect(bufferSession(makeSession("r1", "SpinRate", [{ club: "Driver", shots: [0] }]))).toBe(true);
+
+    vi.advanceTimersByTime(SESSION_MERGE_WINDOW_MS - 1);
+    expect(posted).toHaveLength(0);
+
+    vi.advanceTimersByTime(1);
+    expect(posted).toHaveLength(1);
+    expect(posted[0].payloads).toBe(2);
+    expect(posted[0].session.metric_names).toEqual(["Carry", "SpinRate"]);
+  });
+
+  it("flushes the buffer when a different report arrives", () => {
+    bufferSession(makeSession("r1", "Carry", [{ club: "Driver", shots: [0] }]));
+    bufferSession(makeSession("r2", "Carry", [{ club: "Driver", shots: [0] }]));
+
+    expect(posted.map((p) => p.session.report_id)).toEqual(["r1"]);
+
+    flushSessionMerge();
+    expect(posted.map((p) => p.session.report_id)).toEqual(["r1", "r2"]);
+  });
+
+  it("does not hold a session past the max wait", () => {
+    bufferSession(makeSession("r1", "Carry", [{ club: "Driver", shots: [0] }]));
+    const step = SESSION_MERGE_WINDOW_MS - 100;
+    for (let elapsed = 0; elapsed < SESSION_MERGE_MAX_WAIT_MS; elapsed += step) {
+      bufferSession(makeSession("r1", "Total", [{ club: "Driver", shots: [0] }]));
+      vi.advanceTimersByTime(step);
+    }
+
+    expect(posted.length).toBeGreaterThanOrEqual(1);
+    expect(posted[0].payloads).toBeGreaterThan(1);
+  });
+});
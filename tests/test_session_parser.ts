@@ -0,0 +1,219 @@
+import { fileURLToPath } from "node:url";
+import { build } from "esbuild";
+import { afterEach, describe, expect, it, vi } from "vitest";
+import { METRIC_KEYS, parseSessionData, tryParseJson } from "../src/content/session_parser";
+import {
+  buildParserWorkerSource,
+  parseSessionText,
+  parseSessionTextInThread,
+  resetParserWorkerForTests,
+} from "../src/content/parser_worker";
+
+const REPORT_URL = "https://web-dynamic-reports.trackmangolf.com/reports?r=report-1&mp[]=Carry";
+
+function makeReport(shotsPerClub = 2): Record<string, unknown> {
+  return {
+    Time: { Date: "2026-03-01T10:00:00Z" },
+    StrokeGroups: [
+      {
+        Club: "Driver",
+        Strokes: Array.from({ length: shotsPerClub }, (_, i) => ({
+          Measurement: { BallSpeed: 70 + i, Carry: "230.5", Unrelated: 1 },
+          NormalizedMeasurement: { Carry: 228 + i },
+        })),
+      },
+      {
+        Club: "7Iron",
+        Strokes: [{ Measurement: { SpinRate: 6500 } }],
+      },
+    ],
+  };
+}
+
+/** Runs the generated worker script against an in-memory message port. */
+function createWorkerScope(source = buildParserWorkerSource()): {
+  send: (data: unknown) => void;
+  replies: unknown[];
+} {
+  const replies: unknown[] = [];
+  const scope: { onmessage?: (event: { data: unknown }) => void; postMessage: (data: unknown) => void } = {
+    postMessage: (data) => replies.push(data),
+  };
+  new Function("self", source)(scope);
+  return {
+    send: (data) => scope.onmessage?.({ data }),
+    replies,
+  };
+}
+
+describe("parseSessionData", () => {
+  it("builds SessionData from StrokeGroups", () => {
+    const session = parseSessionData(makeReport(), REPORT_URL);
+
+    expect(session?.report_id).toBe("report-1");
+    expect(session?.date).toBe("2026-03-01T10:00:00Z");
+    expect(session?.club_groups.map((group) => group.club_name)).toEqual(["Driver", "7Iron"]);
+    expect(session?.metric_names).toEqual(["BallSpeed", "Carry", "SpinRate"]);
+    expect(session?.club_groups[0].shots[1].metrics.Carry).toBe(229);
+    expect(session?.metadata_params["mp[]"]).toBe("Carry");
+  });
+
+  it("honours an explicit metric key set", () => {
+    const session = parseSessionData(makeReport(), REPORT_URL, new Set(["Carry"]));
+    expect(session?.metric_names).toEqual(["Carry"]);
+    expect(session?.club_groups).toHaveLength(1);
+  });
+
+  it("keeps the group's id, or its first stroke's, as group_id", () => {
+    const report = makeReport();
+    const [driver, iron] = report.StrokeGroups as Array<Record<string, unknown>>;
+    driver.Id = "group-1";
+    (iron.Strokes as Array<Record<string, unknown>>)[0].Time = "2026-03-01T10:05:00Z";
+
+    const session = parseSessionData(report, REPORT_URL);
+
+    expect(session?.club_groups.map((group) => group.group_id)).toEqual(["group-1", "2026-03-01T10:05:00Z"]);
+    expect(parseSessionData(makeReport(), REPORT_URL)?.club_groups[0]).not.toHaveProperty("group_id");
+  });
+
+  it("returns null without StrokeGroups", () => {
+    expect(parseSessionData({ Strokes: [] }, REPORT_URL)).toBeNull();
+  });
+
+  it("tryParseJson returns null for invalid JSON", () => {
+    expect(tryParseJson("{not json")).toBeNull();
+    expect(tryParseJson("[1]")).toEqual([1]);
+  });
+});
+
+describe("parser worker script", () => {
+  it("produces the same SessionData as the in-thread parser", () => {
+    const text = JSON.stringify(makeReport(5));
+    const { send, replies } = createWorkerScope();
+
+    send({ id: 7, text, url: REPORT_URL, metricKeys: Array.from(METRIC_KEYS) });
+
+    expect(replies).toEqual([
+      { id: 7, session: parseSessionTextInThread(text, REPORT_URL) },
+    ]);
+  });
+
+  it.each([false, true])("works from the esbuild bundle (minify: %s)", async (minify) => {
+    // The worker is built from parseSessionData's source text, so it must
+    // survive what the bundler does to that function
+    const bundle = await build({
+      entryPoints: [fileURLToPath(new URL("../src/content/parser_worker.ts", import.meta.url))],
+      bundle: true,
+      write: false,
+      format: "iife",
+      platform: "browser",
+      globalName: "parserWorkerBundle",
+      minify,
+    });
+    const bundled = new Function(`${bundle.outputFiles[0].text}; return parserWorkerBundle;`)() as {
+      buildParserWorkerSource: () => string;
+    };
+    const text = JSON.stringify(makeReport(5));
+    const { send, replies } = createWorkerScope(bundled.buildParserWorkerSource());
+
+    send({ id: 3, text, url: REPORT_URL, metricKeys: Array.from(METRIC_KEYS) });
+
+    expect(replies).toEqual([
+      { id: 3, session: parseSessionTextInThread(text, REPORT_URL) },
+    ]);
+  });
+
+  it("replies null for unparseable or non-object bodies", () => {
+    const { send, replies } = createWorkerScope();
+
+    send({ id: 1, text: "{oops", url: REPORT_URL, metricKeys: [] });
+    send({ id: 2, text: "[1,2]", url: REPORT_URL, metricKeys: [] });
+
+    expect(replies).toEqual([{ id: 1, session: null }, { id: 2, session: null }]);
+  });
+});
+
+describe("parseSessionText", () => {
+  afterEach(() => {
+    vi.unstubAllGlobals();
+    resetParserWorkerForTests();
+  });
+
+  it("falls back to in-thread parsing when Worker is unavailable", async () => {
+    vi.stubGlobal("Worker", undefined);
+    const text = JSON.stringify(makeReport());
+
+    const session = await parseSessionText(text, REPORT_URL);
+
+    expect(session).toEqual(parseSessionTextInThread(text, REPORT_URL));
+  });
+
+  it("parses through the worker when one can be created", async () => {
+    const posted: unknown[] = [];
+
+    class FakeWorker {
+      onmessage: ((event: { data: unknown }) => void) | null = null;
+      onerror: ((event: unknown) => void) | null = null;
+      private readonly scope = createWorkerScope();
+
+      postMessage(data: unknown): void {
+        posted.push(data);
+        this.scope.send(data);
+        const reply = this.scope.replies.shift();
+        queueMicrotask(() => this.onmessage?.({ data: reply }));
+      }
+
+      terminate(): void {}
+    }
+    vi.stubGlobal("Worker", FakeWorker);
+    const revokeObjectURL = vi.spyOn(URL, "revokeObjectURL");
+
+    const text = JSON.stringify(makeReport());
+    const session = await parseSessionText(text, REPORT_URL);
+
+    expect(posted).toHaveLength(1);
+    expect(session?.club_groups).toHaveLength(2);
+    expect(revokeObjectURL).toHaveBeenCalledTimes(1);
+    revokeObjectURL.mockRestore();
+  });
+
+  it("falls back when the worker cannot be constructed", async () => {
+    class BlockedWorker {
+      constructor() {
+        throw new Error("Refused to create a worker from 'blob:' (CSP)");
+      }
+    }
+    vi.stubGlobal("Worker", BlockedWorker);
+    vi.spyOn(console, "log").mockImplementation(() => undefined);
+
+    const session = await parseSessionText(JSON.stringify(makeReport()), REPORT_URL);
+
+    expect(session?.report_id).toBe("report-1");
+  });
+
+  it("drains pending parses in-thread when the worker errors", async () => {
+    let instance: { onerror: ((event: unknown) => void) | null } | null = null;
+
+    class CrashingWorker {
+      onmessage: ((event: unknown) => void) | null = null;
+      onerror: ((event: unknown) => void) | null = null;
+
+      constructor() {
+        instance = this;
+      }
+
+      postMessage(): void {
+        queueMicrotask(() => this.onerror?.({ message: "boom", preventDefault: () => undefined }));
+      }
+
+      terminate(): void {}
+    }
+    vi.stubGlobal("Worker", CrashingWorker);
+    vi.spyOn(console, "log").mockImplementation(() => undefined);
+
+    const session = await parseSessionText(JSON.stringify(makeReport()), REPORT_URL);
+
+    expect(instance).not.toBeNull();
+    expect(session?.club_groups).toHaveLength(2);
+  });
+});
@@ -0,0 +1,89 @@
+import { beforeEach, describe, expect, it, vi } from "vitest";
+import type { SessionSnapshot } from "../src/models/types";
+import {
+  SNAPSHOT_CODEC_VERSION,
+  decodeSnapshot,
+  encodeSnapshot,
+  getSnapshotCodecStats,
+  isEncodedSnapshot,
+  resetSnapshotCodecStatsForTests,
+} from "../src/shared/snapshot_codec";
+
+function makeSnapshot(shotsPerClub = 10): SessionSnapshot {
+  return {
+    date: "2026-03-01",
+    report_id: "r1",
+    url_type: "activity",
+    metric_names: ["Carry", "ClubSpeed", "SpinRate"],
+    metadata_params: { activity_type: "CoursePlayActivity" },
+    club_groups: ["Driver", "7Iron"].map((club_name, g) => ({
+      club_name,
+      shots: Array.from({ length: shotsPerClub }, (_, i) => ({
+        shot_number: i,
+        metrics: i % 3 === 0
+          ? { Carry: 200 - g * 50 + i * 0.1, ClubSpeed: 44.5 - g * 8 }
+          : { Carry: 200 - g * 50 + i * 0.1, ClubSpeed: 44.5 - g * 8, SpinRate: 2500 + i },
+        ...(i === 0 ? { tag: "Warmup" } : {}),
+      })),
+      averages: {},
+      consistency: {},
+    })),
+  };
+}
+
+describe("snapshot codec", () => {
+  beforeEach(() => {
+    resetSnapshotCodecStatsForTests();
+    vi.unstubAllGlobals();
+  });
+
+  it("round-trips a numeric snapshot through the columnar gzip encoding", async () => {
+    const snapshot = makeSnapshot();
+    const encoded = await encodeSnapshot(snapshot);
+
+    expect(isEncodedSnapshot(encoded)).toBe(true);
+    expect(Array.from(encoded.subarray(0, 5))).toEqual([0x54, 0x50, SNAPSHOT_CODEC_VERSION, 1, 1]);
+    expect(await decodeSnapshot(encoded)).toEqual(snapshot);
+  });
+
+  it("keeps the row layout for values columns cannot hold", async () => {
+    const snapshot = makeSnapshot(2);
+    snapshot.club_groups[0].shots[0].metrics.Carry = "n/a";
+
+    const encoded = await encodeSnapshot(snapshot);
+
+    expect(encoded[3]).toBe(0);
+    expect(await decodeSnapshot(encoded)).toEqual(snapshot);
+  });
+
+  it("stores uncompressed when CompressionStream is unavailable", async () => {
+    vi.stubGlobal("CompressionStream", undefined);
+    const snapshot = makeSnapshot(2);
+
+    const encoded = await encodeSnapshot(snapshot);
+
+    expect(encoded[4]).toBe(0);
+    expect(await decodeSnapshot(encoded)).toEqual(snapshot);
+  });
+
+  it("passes plain snapshots written before the codec through", async () => {
+    const snapshot = makeSnapshot(1);
+    expect(await decodeSnapshot(snapshot)).toBe(snapshot);
+  });
+
+  it("rejects unknown codec versions", async () => {
+    const encoded = await encodeSnapshot(makeSnapshot(1));
+    encoded[2] = 99;
+    await expect(decodeSnapshot(encoded)).rejects.toThrow("Unsupported snapshot codec version: 99");
+  });
+
+  it("reports compression ratio and timing", async () => {
+    await decodeSnapshot(await encodeSnapshot(makeSnapshot(50)));
+
+    const stats = getSnapshotCodecStats();
+    expect(stats.encoded).toBe(1);
+    expect(stats.decoded).toBe(1);
+    expect(stats.ratio).toBeGreaterThan(3);
+    expect(stats.encodeMs).toBeGreaterThanOrEqual(0);
+  });
+});
@@ -3,5 +3,8 @@ import { defineConfig } from "vitest/config";
 export default defineConfig({
   test: {
     include: ["tests/test_*.ts"],
+    benchmark: {
+      include: ["tests/bench_*.ts"],
+    },
   },
 });